@@ -0,0 +1 @@
+# Benchmarks per ingest dhe raportet
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+from typing import Any, Dict, Iterator, Tuple
+
+# metrikat ku me e vogel eshte me mire; per te tjerat (events_per_sek) me e madhe
+_ULET = ("_ms", "sekonda", "mib_per_milion", "madhesia_bytes")
+
+
+def _metrikat(rezultatet: Dict[str, Any], prefiks: str = "") -> Iterator[Tuple[str, float]]:
+    for k, v in rezultatet.items():
+        emri = f"{prefiks}.{k}" if prefiks else k
+        if isinstance(v, dict):
+            if k in ("dite", "parametrat", "operacione"):
+                continue
+            yield from _metrikat(v, emri)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            yield emri, float(v)
+
+
+def krahaso(para: Dict[str, Any], pas: Dict[str, Any]) -> Iterator[Tuple[str, float, float, float, bool]]:
+    # (metrika, para, pas, ndryshimi %, a u permiresua)
+    te_vjetrat = dict(_metrikat(para.get("rezultatet", {})))
+    for emri, vlera in _metrikat(pas.get("rezultatet", {})):
+        if emri not in te_vjetrat:
+            continue
+        e_vjetra = te_vjetrat[emri]
+        ndryshimi = (vlera - e_vjetra) / e_vjetra * 100 if e_vjetra else 0.0
+        me_mire = ndryshimi < 0 if emri.endswith(_ULET) else ndryshimi > 0
+        yield emri, e_vjetra, vlera, ndryshimi, me_mire
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Krahaso dy rezultate JSON te benchmarks.run")
+    ap.add_argument("para", help="JSON i versionit te vjeter")
+    ap.add_argument("pas", help="JSON i versionit te ri")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.para, "r", encoding="utf-8") as f:
+        para = json.load(f)
+    with open(args.pas, "r", encoding="utf-8") as f:
+        pas = json.load(f)
+    print(f"para: {para['meta'].get('git')} ({para['meta'].get('koha')})")
+    print(f"pas:  {pas['meta'].get('git')} ({pas['meta'].get('koha')})")
+    print()
+    for emri, v1, v2, ndryshimi, me_mire in krahaso(para, pas):
+        shenja = "" if abs(ndryshimi) < 5 else ("+" if me_mire else "!")
+        print(f"  {emri:42s} {v1:>14.2f} {v2:>14.2f} {ndryshimi:>+8.1f}% {shenja}")
+
+
+if __name__ == "__main__":
+    main()
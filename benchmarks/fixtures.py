@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generators import gjenero_events
+from src.database import SCHEMA_VERSION, EventRecord, SecurityDatabase
+
+FIXTURE_BATCH = 5_000
+
+
+def madhesia_db(db_path: str) -> int:
+    # file-i kryesor + WAL + particionet (nese ka)
+    totali = 0
+    for p in (db_path, db_path + "-wal"):
+        if os.path.exists(p):
+            totali += os.path.getsize(p)
+    parts = db_path + ".parts"
+    if os.path.isdir(parts):
+        totali += sum(e.stat().st_size for e in os.scandir(parts) if e.is_file())
+    return totali
+
+
+def nderto_db(
+    db_path: str,
+    events: int,
+    perdorues: int = 50,
+    paths: int = 10_000,
+    forma: str = "uniform",
+    dite: int = 7,
+    seed: int = 42,
+    fillim: Optional[float] = None,
+    rindertoj: bool = False,
+) -> Dict[str, Any]:
+    # DB e madhe per benchmark-et e raportit. Parametrat ruhen ne <db>.json; nje
+    # fixture me te njejtat parametra (dhe te njejtin schema) riperdoret.
+    parametrat = {
+        "events": events, "perdorues": perdorues, "paths": paths, "forma": forma,
+        "dite": dite, "seed": seed, "fillim": fillim, "schema": SCHEMA_VERSION,
+    }
+    meta_path = db_path + ".json"
+    if not rindertoj and os.path.exists(db_path) and os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("parametrat") == parametrat:
+            logging.info("Fixture ekzistues: %s", db_path)
+            return {**meta, "riperdorur": True}
+
+    for p in (db_path, db_path + "-wal", db_path + "-shm", meta_path):
+        if os.path.exists(p):
+            os.remove(p)
+
+    db = SecurityDatabase(db_path, cache_lru_size=0, cache_bloom_capacity=0)
+    t0 = time.perf_counter()
+    batch: List[EventRecord] = []
+    for ev in gjenero_events(events, perdorues, paths, forma, fillim=fillim, dite=dite, seed=seed):
+        batch.append(ev)
+        if len(batch) >= FIXTURE_BATCH:
+            db.shto_events(batch)
+            batch = []
+    db.shto_events(batch)
+    sekonda = time.perf_counter() - t0
+    db.mbyll()  # mbyllja e fundit ben checkpoint te WAL-it
+
+    meta = {
+        "parametrat": parametrat,
+        "sekonda": round(sekonda, 3),
+        "events_per_sek": round(events / max(sekonda, 1e-9), 1),
+        "madhesia_bytes": madhesia_db(db_path),
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return {**meta, "riperdorur": False}
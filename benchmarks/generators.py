@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import time
+from typing import Dict, Iterator, List, Optional
+
+from src.database import EventRecord
+
+FORMAT = ("uniform", "burst", "hot")
+VEPRIMET = ("CREATED", "MODIFIED", "MODIFIED", "MODIFIED", "DELETED", "MOVED")
+
+
+def _zgjidh_path(rng: random.Random, paths: List[str], forma: str) -> str:
+    if forma == "hot":
+        # u**7: ~80% e events bien ne 20% e pare te path-eve
+        return paths[int(len(paths) * rng.random() ** 7)]
+    return paths[rng.randrange(len(paths))]
+
+
+def gjenero_events(
+    n: int,
+    perdorues: int = 50,
+    paths: int = 10_000,
+    forma: str = "uniform",
+    burst: int = 20,
+    fillim: Optional[float] = None,
+    dite: int = 1,
+    seed: int = 42,
+    root: str = "/home",
+) -> Iterator[EventRecord]:
+    # Rrjedhe deterministe events. Kardinaliteti (perdorues, paths) kontrollon sa
+    # suspicious dalin dhe sa rritet file_history; `forma`:
+    #   uniform - cdo event zgjedh perdorues/path rastesisht
+    #   burst   - seri `burst` events (editor save) mbi te njejtin path/perdorues
+    #   hot     - shumica e events bien mbi pak path-e te nxehte
+    # Kohet shtrihen njetrajtesisht ne `dite` dite qe nga `fillim`.
+    if forma not in FORMAT:
+        raise ValueError(f"Forme e panjohur: {forma!r} (te mundshme: {', '.join(FORMAT)})")
+    rng = random.Random(seed)
+    emrat = [f"user{i:04d}" for i in range(max(1, perdorues))]
+    lista = [f"{root}/{emrat[i % len(emrat)]}/d{i % 97:02d}/file{i:07d}.txt" for i in range(max(1, paths))]
+    fillim = time.time() - dite * 86400 if fillim is None else fillim
+    hapi = dite * 86400 / max(1, n)
+
+    i = 0
+    while i < n:
+        perdoruesi = emrat[rng.randrange(len(emrat))]
+        path = _zgjidh_path(rng, lista, forma)
+        seria = min(n - i, max(1, burst) if forma == "burst" else 1)
+        for j in range(seria):
+            veprimi = "MODIFIED" if j else VEPRIMET[rng.randrange(len(VEPRIMET))]
+            dest = path + ".new" if veprimi == "MOVED" else None
+            yield EventRecord(perdoruesi, veprimi, path, fillim + (i + j) * hapi, 1, dest)
+        i += seria
+
+
+def stuhi_fs(dir: str, files: int = 1_000, modifikime: int = 3, dirs: int = 20) -> Dict[str, int]:
+    # Operacione reale mbi nje direktori (qe monitorohet): krijim, shkrime te
+    # perseritura, rename dhe fshirje. Kthen sa operacione u bene per lloj.
+    ops = {"CREATED": 0, "MODIFIED": 0, "MOVED": 0, "DELETED": 0}
+    nendirs = [os.path.join(dir, f"d{i:03d}") for i in range(max(1, dirs))]
+    for d in nendirs:
+        os.makedirs(d, exist_ok=True)
+    emrat = [os.path.join(nendirs[i % len(nendirs)], f"f{i:06d}.txt") for i in range(files)]
+
+    for path in emrat:
+        with open(path, "w") as f:
+            f.write("x")
+        ops["CREATED"] += 1
+    for r in range(modifikime):
+        for path in emrat:
+            with open(path, "a") as f:
+                f.write(str(r))
+            ops["MODIFIED"] += 1
+    for path in emrat[::2]:
+        os.rename(path, path + ".bak")
+        ops["MOVED"] += 1
+    for i, path in enumerate(emrat):
+        os.remove(path + ".bak" if i % 2 == 0 else path)
+        ops["DELETED"] += 1
+    return ops
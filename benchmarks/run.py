@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileModifiedEvent, FileMovedEvent
+
+from benchmarks.fixtures import madhesia_db, nderto_db
+from benchmarks.generators import FORMAT, gjenero_events, stuhi_fs
+from src.attribution import Attribution
+from src.config import RootConfig
+from src.database import EventRecord, SecurityDatabase
+from src.monitor import FileMonitor, RootWorker, krijo_root
+from src.observer import krijo_observer
+from src.raport import RaportGenerator
+from src.writer import EventWriter
+
+SKENARET = ("db", "ingest", "storm", "report")
+
+_WATCHDOG = {
+    "CREATED": FileCreatedEvent,
+    "MODIFIED": FileModifiedEvent,
+    "DELETED": FileDeletedEvent,
+}
+
+
+def percentil(vlerat: List[float], p: float) -> float:
+    if not vlerat:
+        return 0.0
+    renditur = sorted(vlerat)
+    return renditur[max(0, math.ceil(p / 100 * len(renditur)) - 1)]
+
+
+def _latencat(vlerat: List[float]) -> Dict[str, float]:
+    # sekonda -> milisekonda
+    return {
+        "p50_ms": round(percentil(vlerat, 50) * 1000, 3),
+        "p99_ms": round(percentil(vlerat, 99) * 1000, 3),
+        "max_ms": round(max(vlerat, default=0.0) * 1000, 3),
+    }
+
+
+def _per_milion(madhesia: int, rreshta: int) -> float:
+    return round(madhesia / max(rreshta, 1) * 1_000_000 / 2**20, 2)  # MiB per 1M events
+
+
+class _AttributionSkenar(Attribution):
+    # perdoruesi i eventit sintetik: futet ne radhe para dispatch-it dhe merret
+    # nga thread-i i root-it ne te njejtin rend
+    emri = "skenar"
+
+    def __init__(self):
+        self.radha: deque = deque()
+
+    def perdoruesi(self, file_path: str, veprimi: str) -> str:
+        return self.radha.popleft()
+
+
+class _Matesi:
+    # on_verdict i writer-it: koha nga FileMonitor (ev.koha) deri pas commit-it
+    def __init__(self):
+        self.latencat: List[float] = []
+        self.suspicious = 0
+
+    def __call__(self, ev: EventRecord, event_id: int, suspicious: int) -> None:
+        self.latencat.append(time.time() - ev.koha)
+        self.suspicious += suspicious
+
+
+def _ritmi(rate: float) -> Callable[[int], None]:
+    # rate=0: sa me shpejt; perndryshe pret qe event-i i i-te te mos dale para kohe
+    if rate <= 0:
+        return lambda i: None
+    fillim = time.perf_counter()
+
+    def prit(i: int) -> None:
+        vonesa = fillim + i / rate - time.perf_counter()
+        if vonesa > 0:
+            time.sleep(vonesa)
+
+    return prit
+
+
+def bench_db(args, dir: str) -> Dict[str, Any]:
+    # tavani i shkrimit: shto_events me batch, pa monitor/writer
+    db_path = os.path.join(dir, "db.db")
+    db = SecurityDatabase(db_path)
+    latencat: List[float] = []
+    suspicious = 0
+    batch: List[EventRecord] = []
+    t0 = time.perf_counter()
+
+    def shkruaj():
+        nonlocal suspicious
+        t = time.perf_counter()
+        suspicious += sum(s for _, s in db.shto_events(batch))
+        latencat.append(time.perf_counter() - t)
+
+    for ev in gjenero_events(args.events, args.users, args.paths, args.shape, args.burst, seed=args.seed):
+        batch.append(ev)
+        if len(batch) >= args.batch_size:
+            shkruaj()
+            batch = []
+    if batch:
+        shkruaj()
+    sekonda = time.perf_counter() - t0
+    db.mbyll()
+    return {
+        "events": args.events,
+        "suspicious": suspicious,
+        "sekonda": round(sekonda, 3),
+        "events_per_sek": round(args.events / max(sekonda, 1e-9), 1),
+        "batch_latenca": _latencat(latencat),
+        "mib_per_milion": _per_milion(madhesia_db(db_path), args.events),
+    }
+
+
+def bench_ingest(args, dir: str) -> Dict[str, Any]:
+    # rruga e plote ne proces: RootWorker -> FileMonitor (filter, attribution,
+    # coalescing) -> EventWriter -> SecurityDatabase; pa inotify
+    db_path = os.path.join(dir, "ingest.db")
+    db = SecurityDatabase(db_path)
+    matesi = _Matesi()
+    writer = EventWriter(db, args.batch_size, args.flush_interval, args.queue_size, on_verdict=matesi).start()
+    attribution = _AttributionSkenar()
+    handler = FileMonitor(
+        db, "/home", [], writer=writer, coalesce_window=args.coalesce_window,
+        ignore_rules=[], attribution=attribution,
+    )
+    worker = RootWorker("bench", handler, max_queue=args.queue_size).start()
+    prit = _ritmi(args.rate)
+
+    t0 = time.perf_counter()
+    for i, ev in enumerate(gjenero_events(args.events, args.users, args.paths, args.shape, args.burst, seed=args.seed)):
+        prit(i)
+        attribution.radha.append(ev.perdoruesi)
+        if ev.veprimi == "MOVED":
+            worker.dispatch(FileMovedEvent(ev.file_path, ev.dest_path))
+        else:
+            worker.dispatch(_WATCHDOG[ev.veprimi](ev.file_path))
+    worker.ndalo()
+    writer.ndalo()
+    sekonda = time.perf_counter() - t0
+    db.mbyll()
+    return {
+        "events": args.events,
+        "rreshta": writer.events_shkruar,
+        "suspicious": matesi.suspicious,
+        "sekonda": round(sekonda, 3),
+        "events_per_sek": round(args.events / max(sekonda, 1e-9), 1),
+        "latenca": _latencat(matesi.latencat),
+        "batches": writer.batches_shkruar,
+        "mib_per_milion": _per_milion(madhesia_db(db_path), writer.events_shkruar),
+    }
+
+
+def bench_storm(args, dir: str) -> Dict[str, Any]:
+    # operacione reale ne nje direktori te perkohshme, me observer-in e vertete
+    rrenja = os.path.join(dir, "storm")
+    os.makedirs(rrenja)
+    db_path = os.path.join(dir, "storm.db")
+    db = SecurityDatabase(db_path)
+    matesi = _Matesi()
+    writer = EventWriter(db, args.batch_size, args.flush_interval, args.queue_size, on_verdict=matesi).start()
+    root = RootConfig(
+        emri="storm", path=rrenja, recursive=True, ignore_suffixes=[], ignore_rules=[],
+        use_default_ignores=True, attribution="process", attribution_hook=None,
+        coalesce_window=args.coalesce_window, coalesce_rules=["created+modified", "modified"],
+    )
+    worker = krijo_root(root, db, writer, db_path, args.queue_size).start()
+    observer = krijo_observer(prune=worker.handler.rules.dir_perjashtuar)
+    observer.schedule(worker, rrenja, recursive=True)
+    observer.start()
+
+    t0 = time.perf_counter()
+    ops = stuhi_fs(rrenja, files=args.storm_files, modifikime=args.storm_writes)
+    koha_ops = time.perf_counter() - t0
+
+    # prit qetesine: asnje event i ri per `quiet` sekonda
+    quiet = max(1.0, args.flush_interval * 2 + args.coalesce_window)
+    e_fundit, koha_e_fundit = -1, time.perf_counter()
+    while time.perf_counter() - koha_e_fundit < quiet:
+        time.sleep(0.05)
+        tani = (worker.events_marre, worker.handler.events_pranuar, writer.events_shkruar)
+        if tani != e_fundit:
+            e_fundit, koha_e_fundit = tani, time.perf_counter()
+    sekonda = koha_e_fundit - t0
+
+    observer.stop()
+    observer.join()
+    worker.ndalo()
+    writer.ndalo()
+    db.mbyll()
+    return {
+        "operacione": ops,
+        "operacione_sekonda": round(koha_ops, 3),
+        "events_marre": worker.events_marre,
+        "events_pranuar": worker.handler.events_pranuar,
+        "rreshta": writer.events_shkruar,
+        "sekonda": round(sekonda, 3),
+        "events_per_sek": round(worker.events_marre / max(sekonda, 1e-9), 1),
+        "latenca": _latencat(matesi.latencat),
+    }
+
+
+def bench_report(args, dir: str) -> Dict[str, Any]:
+    fixture_dir = args.fixture_dir or dir
+    os.makedirs(fixture_dir, exist_ok=True)
+    db_path = os.path.join(
+        fixture_dir, f"fixture_{args.report_events}_{args.users}u_{args.paths}p_{args.shape}_{args.days}d.db"
+    )
+    fillim = datetime.strptime(args.start, "%Y-%m-%d")
+    meta = nderto_db(
+        db_path, args.report_events, args.users, args.paths, args.shape, args.days,
+        seed=args.seed, fillim=fillim.timestamp(), rindertoj=args.rebuild,
+    )
+
+    # pa cache: matet llogaritja e raportit, jo leximi i nje JSON-i
+    gen = RaportGenerator(db_path=db_path, reports_dir=os.path.join(dir, "reports"), cache=False)
+    kohet: List[float] = []
+    dite: Dict[str, Dict[str, float]] = {}
+    for d in range(args.days):
+        data = (fillim + timedelta(days=d)).strftime("%Y-%m-%d")
+        kohet_dites = []
+        for _ in range(max(1, args.repeat)):
+            t = time.perf_counter()
+            gen.gjenero_raport_tekst(data)
+            kohet_dites.append(time.perf_counter() - t)
+        kohet += kohet_dites
+        dite[data] = {"i_pari_ms": round(kohet_dites[0] * 1000, 2), "p50_ms": round(percentil(kohet_dites, 50) * 1000, 2)}
+    gen.lidhjet.close()
+    return {
+        "events": args.report_events,
+        "fixture": meta,
+        "mib_per_milion": _per_milion(meta["madhesia_bytes"], args.report_events),
+        "raporti": _latencat(kohet),
+        "dite": dite,
+    }
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        git = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        git = None
+    return {
+        "koha": datetime.now().isoformat(timespec="seconds"),
+        "git": git,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platforma": platform.platform(),
+        "cpu": os.cpu_count(),
+    }
+
+
+BENCHMARKS = {"db": bench_db, "ingest": bench_ingest, "storm": bench_storm, "report": bench_report}
+
+
+def ekzekuto(args) -> Dict[str, Any]:
+    dir = tempfile.mkdtemp(prefix="si-bench-")
+    rezultatet: Dict[str, Any] = {}
+    try:
+        for emri in args.scenario or SKENARET:
+            logging.info("Benchmark '%s'...", emri)
+            rezultatet[emri] = BENCHMARKS[emri](args, dir)
+            logging.info("  %s", json.dumps(rezultatet[emri], ensure_ascii=False))
+    finally:
+        shutil.rmtree(dir, ignore_errors=True)
+    parametrat = {k: v for k, v in vars(args).items() if k not in ("out", "verbose")}
+    return {"meta": _meta(), "parametrat": parametrat, "rezultatet": rezultatet}
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Benchmark per ingest (events/sek, latenca) dhe raportet")
+    ap.add_argument("--scenario", action="append", choices=SKENARET,
+                    help="Skenari (mund te perseritet; default: te gjithe)")
+    ap.add_argument("--events", type=int, default=50_000, help="Events per db/ingest (default: 50000)")
+    ap.add_argument("--users", type=int, default=50, help="Kardinaliteti i perdoruesve (default: 50)")
+    ap.add_argument("--paths", type=int, default=10_000, help="Kardinaliteti i path-eve (default: 10000)")
+    ap.add_argument("--shape", choices=FORMAT, default="uniform", help="Forma e rrjedhes (default: uniform)")
+    ap.add_argument("--burst", type=int, default=20, help="Events per seri ne --shape burst (default: 20)")
+    ap.add_argument("--rate", type=float, default=0.0, help="Events/sek per ingest (0 = sa me shpejt)")
+    ap.add_argument("--seed", type=int, default=42, help="Seed i gjeneratorit (default: 42)")
+    ap.add_argument("--batch-size", type=int, default=500, help="Batch i writer-it (default: 500)")
+    ap.add_argument("--flush-interval", type=float, default=0.5, help="Flush i writer-it (default: 0.5)")
+    ap.add_argument("--queue-size", type=int, default=10_000, help="Radha e writer-it/root-it (default: 10000)")
+    ap.add_argument("--coalesce-window", type=float, default=0.0,
+                    help="Coalescing ne ingest/storm (default: 0, latenca pa dritaren)")
+    ap.add_argument("--storm-files", type=int, default=2_000, help="File ne storm (default: 2000)")
+    ap.add_argument("--storm-writes", type=int, default=3, help="Shkrime per file ne storm (default: 3)")
+    ap.add_argument("--report-events", type=int, default=1_000_000, help="Events ne fixture-in e raportit")
+    ap.add_argument("--days", type=int, default=7, help="Ditet e fixture-it (default: 7)")
+    ap.add_argument("--start", default="2024-01-01", help="Dita e pare e fixture-it (default: 2024-01-01)")
+    ap.add_argument("--repeat", type=int, default=3, help="Perseritje te raportit per dite (default: 3)")
+    ap.add_argument("--fixture-dir", default=None, help="Ruaj/riperdor fixture-in e raportit ketu")
+    ap.add_argument("--rebuild", action="store_true", help="Rindertoj fixture-in edhe nese ekziston")
+    ap.add_argument("--out", default=None, help="Shkruaj rezultatet JSON ne kete file (default: stdout)")
+    ap.add_argument("--verbose", action="store_true", help="Log me detaje")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s - %(message)s")
+    rezultati = ekzekuto(args)
+    teksti = json.dumps(rezultati, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(teksti + "\n")
+        print(f"Rezultatet u ruajten ne: {args.out}", file=sys.stderr)
+    else:
+        print(teksti)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,21 @@
 
 import os
 import subprocess
+from datetime import datetime
 from pathlib import Path
 
+def daemon(komanda, db_path="security.db", **argumentet):
+    # pergjigja nga daemon-i (python3 -m src.daemon) kur eshte aktiv, perndryshe None:
+    # menuja bie te procesi/DB e vet si me pare
+    from src.ctl import DaemonJoAktiv, GabimKomande, socket_default, thirr
+    try:
+        return thirr(socket_default(db_path), komanda, **argumentet)
+    except DaemonJoAktiv:
+        return None
+    except (GabimKomande, OSError) as e:
+        print(f"\nDaemon-i ktheu gabim: {e}")
+        return None
+
 def shfaq_menu():
     os.system("clear")
     print("SI LOG EVENT MANAGER")
@@ -15,6 +28,8 @@ def shfaq_menu():
     print("  4. Fillo Scheduler Automatik")
     print("  5. Shiko Events Suspicious")
     print("  6. Fshi Databazen (Reset)")
+    print("  7. Kerko Events nen nje Dosje")
+    print("  8. Daemon: Statusi / Rifresko / Ndalo")
     print("  0. Dil")
     print("\n")
 
@@ -24,9 +39,12 @@ def shiko_statistika(db_path="security.db"):
         input("\nEnter per te vazhduar...")
         return
 
-    from src.database import SecurityDatabase
-    db = SecurityDatabase(db_path)
-    stats = db.statistika()
+    stats = daemon("stats", db_path)
+    if stats is None:
+        from src.database import SecurityDatabase
+        db = SecurityDatabase(db_path)
+        stats = db.statistika()
+        db.mbyll()
 
     print("\nSTATISTIKA\n")
     print(f"  Total Events:       {stats['total_events']}")
@@ -40,9 +58,12 @@ def shiko_suspicious(db_path="security.db"):
         input("\nEnter per te vazhduar...")
         return
 
-    from src.database import SecurityDatabase
-    db = SecurityDatabase(db_path)
-    suspicious = db.merr_suspicious_events(limit=200)
+    suspicious = daemon("suspicious", db_path, limit=200)
+    if suspicious is None:
+        from src.database import SecurityDatabase
+        db = SecurityDatabase(db_path)
+        suspicious = db.merr_suspicious_events(limit=200)
+        db.mbyll()
 
     print("\n⚠️  EVENTS SUSPICIOUS\n")
     if not suspicious:
@@ -56,12 +77,67 @@ def shiko_suspicious(db_path="security.db"):
 
     input("Enter per te vazhduar...")
 
+def kerko_dosje(db_path="security.db"):
+    if not os.path.exists(db_path):
+        print("\nDatabaza nuk ekziston!")
+        input("\nEnter per te vazhduar...")
+        return
+
+    dosja = input("Dosja (p.sh. /srv/app/config): ").strip()
+    if not dosja:
+        return
+    since = input("Intervali (p.sh. 30m, 6h, 2d; default 6h): ").strip() or "6h"
+    user = input("Perdoruesi (bosh = te gjithe): ").strip()
+    rreshtat = daemon("kerko", db_path, dosja=dosja, since=since, user=user or None, limit=500)
+    if rreshtat is not None:
+        from src.ctl import formato
+        print()
+        print(formato("kerko", rreshtat))
+        input("\nEnter per te vazhduar...")
+        return
+    cmd = ["python3", "-m", "src.query", dosja, "--db", db_path, "--since", since, "--limit", "500"]
+    if user:
+        cmd += ["--user", user]
+    print()
+    subprocess.run(cmd)
+    input("\nEnter per te vazhduar...")
+
+def gjenero_raport(db_path="security.db"):
+    rezultati = daemon("raport", db_path, data=datetime.now().strftime("%Y-%m-%d"), ruaj=True)
+    if rezultati is None:
+        subprocess.run(["python3", "-m", "src.raport"])
+        return
+    print("\n" + rezultati["raport"])
+    print(f"\nRaporti u ruajt ne: {rezultati['file']}\n")
+    input("Enter per te vazhduar...")
+
+def menaxho_daemon(db_path="security.db"):
+    info = daemon("ping", db_path)
+    if info is None:
+        print("\nDaemon-i nuk eshte aktiv. Nise me: python3 -m src.daemon --path <folder> --recursive --scheduler")
+        input("\nEnter per te vazhduar...")
+        return
+    from src.ctl import formato
+    print("\n" + formato("ping", info))
+    zgjedhja = input("\n(r) Rifresko cache-t, (s) Ndalo daemon-in, Enter per te vazhduar: ").strip().lower()
+    if zgjedhja == "r":
+        print(daemon("reload", db_path))
+    elif zgjedhja == "s" and daemon("stop", db_path):
+        print("Daemon-i po ndalet.")
+    else:
+        return
+    input("\nEnter per te vazhduar...")
+
 def reset_databaza(db_path="security.db"):
     print("\n⚠️ KUJDES: Do te fshihen te gjitha te dhenat!")
     konfirmo = input("\nShkruaj 'PO' per te konfirmuar: ")
     if konfirmo.upper() == "PO":
         if os.path.exists(db_path):
             os.remove(db_path)
+            # file-t shoqeruese te WAL mode
+            for ext in ("-wal", "-shm"):
+                if os.path.exists(db_path + ext):
+                    os.remove(db_path + ext)
             print("\nDatabaza u fshi!")
         else:
             print("\nDatabaza nuk ekziston!")
@@ -72,7 +148,7 @@ def reset_databaza(db_path="security.db"):
 def main():
     while True:
         shfaq_menu()
-        zgjedhja = input("Zgjidhni (0-6): ").strip()
+        zgjedhja = input("Zgjidhni (0-8): ").strip()
 
         if zgjedhja == "1":
             path = input("Path per monitorim (default: current folder): ").strip() or str(Path.cwd())
@@ -84,7 +160,7 @@ def main():
             subprocess.run(cmd)
 
         elif zgjedhja == "2":
-            subprocess.run(["python3", "-m", "src.raport"])
+            gjenero_raport()
 
         elif zgjedhja == "3":
             shiko_statistika()
@@ -98,6 +174,12 @@ def main():
         elif zgjedhja == "6":
             reset_databaza()
 
+        elif zgjedhja == "7":
+            kerko_dosje()
+
+        elif zgjedhja == "8":
+            menaxho_daemon()
+
         elif zgjedhja == "0":
             print("Faleminderit!\n")
             break
@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import ipaddress
+import json
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from email.message import EmailMessage
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.database import NDARES_MOVED, EventRow
+from src.metrics import METRIKAT
+
+SINKS = ("console", "smtp", "webhook")
+
+_EVENTS = METRIKAT.counter("si_alert_events_total", "Events suspicious te pranuara nga alert-et", ("rezultati",))
+_DERGUAR = METRIKAT.counter("si_alert_derguar_total", "Alarme te derguara", ("sink",))
+_GABIME = METRIKAT.counter("si_alert_gabime_total", "Dergime te deshtuara (pas riprovimeve)", ("sink",))
+_KOHA = METRIKAT.histogram("si_alert_dergimi_seconds", "Koha e dergimit te nje alarmi", ("sink",))
+
+_NDALO = object()
+PASTRIMI_BUCKET = 60.0  # sekonda mes kalimeve mbi token bucket-et
+
+# (perdoruesi, direktoria)
+CelesGrupi = Tuple[str, str]
+
+
+class Alarm(NamedTuple):
+    subjekti: str
+    mesazhi: str
+    perdoruesi: Optional[str] = None
+    dir: Optional[str] = None
+    events: Tuple[EventRow, ...] = ()
+    te_shtypura: int = 0
+
+
+def celesi_i_grupit(event: EventRow) -> CelesGrupi:
+    # MOVED shfaqet "burim -> destinacion": grupohet sipas burimit
+    path = event[4].split(NDARES_MOVED, 1)[0]
+    return event[2], os.path.dirname(path) or path
+
+
+def formato_alarm(celesi: CelesGrupi, events: Sequence[EventRow], te_shtypura: int = 0) -> Alarm:
+    perdoruesi, dir = celesi
+    subjekti = f"LARM SIGURIE - {len(events)} aktivitete suspicious ({perdoruesi} ne {dir})"
+    rreshtat = [f"U gjeten {len(events)} aktivitete suspicious nga {perdoruesi} ne {dir}.", "", "Detaje (max 5):"]
+    for event_id, data_ora, _, veprimi, file_path, _ in events[:5]:
+        rreshtat += [f"- [{data_ora}] user={perdoruesi} action={veprimi}", f"  file={file_path}", ""]
+    if len(events) > 5:
+        rreshtat += [f"... dhe {len(events) - 5} aktivitete te tjera.", ""]
+    if te_shtypura:
+        rreshtat += [f"({te_shtypura} events te tjera per kete grup u shtypen nga rate limit.)", ""]
+    rreshtat.append("Ju lutem kontrolloni keto aktivitete sa me shpejt.")
+    return Alarm(subjekti, "\n".join(rreshtat) + "\n", perdoruesi, dir, tuple(events), te_shtypura)
+
+
+def formato_permbledhje(celesi: CelesGrupi, te_shtypura: int) -> Alarm:
+    # grupi nuk solli events te reja pas rate limit-it: vetem numri i te shtypurave
+    perdoruesi, dir = celesi
+    subjekti = f"LARM SIGURIE - {te_shtypura} aktivitete suspicious te shtypura ({perdoruesi} ne {dir})"
+    mesazhi = (
+        f"{te_shtypura} events suspicious nga {perdoruesi} ne {dir} u shtypen nga rate limit.\n\n"
+        "Ju lutem kontrolloni keto aktivitete sa me shpejt.\n"
+    )
+    return Alarm(subjekti, mesazhi, perdoruesi, dir, (), te_shtypura)
+
+
+def _eshte_lokal(host: Optional[str]) -> bool:
+    if not host:
+        return False
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ConsoleSink:
+    emri = "console"
+
+    def dergo(self, alarm: Alarm, per: str) -> None:
+        print("\n".join([
+            "",
+            "=" * 70,
+            "EMAIL ALERT (SIMULIM - console)",
+            f"Per:      {per}",
+            f"Subjekti: {alarm.subjekti}",
+            "-" * 70,
+            alarm.mesazhi,
+            "=" * 70,
+            "",
+        ]), flush=True)
+
+
+class SmtpSink:
+    emri = "smtp"
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        nga: str = "si-monitor@localhost",
+        timeout: float = 10.0,
+        starttls: bool = False,
+        perdoruesi: Optional[str] = None,
+        fjalekalimi: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.nga = nga
+        self.timeout = float(timeout)
+        self.starttls = starttls
+        self.perdoruesi = perdoruesi
+        self.fjalekalimi = fjalekalimi
+
+    def dergo(self, alarm: Alarm, per: str) -> None:
+        msg = EmailMessage()
+        msg["From"] = self.nga
+        msg["To"] = per
+        msg["Subject"] = alarm.subjekti
+        msg.set_content(alarm.mesazhi)
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.starttls:
+                smtp.starttls()
+            if self.perdoruesi:
+                smtp.login(self.perdoruesi, self.fjalekalimi or "")
+            smtp.send_message(msg)
+
+
+class WebhookSink:
+    emri = "webhook"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        # vetem localhost: alarmet (path-e, perdorues) nuk dalin nga makina
+        pjeset = urllib.parse.urlsplit(url)
+        if pjeset.scheme not in ("http", "https"):
+            raise ValueError(f"Webhook URL i pavlefshem: {url!r}")
+        if not _eshte_lokal(pjeset.hostname):
+            raise ValueError(f"Webhook-u lejohet vetem ne localhost: {url!r}")
+        self.url = url
+        self.timeout = float(timeout)
+
+    def dergo(self, alarm: Alarm, per: str) -> None:
+        trupi = {
+            "per": per,
+            "subjekti": alarm.subjekti,
+            "mesazhi": alarm.mesazhi,
+            "perdoruesi": alarm.perdoruesi,
+            "dir": alarm.dir,
+            "te_shtypura": alarm.te_shtypura,
+            "events": [
+                {"id": e[0], "data_ora": e[1], "perdoruesi": e[2], "veprimi": e[3], "path": e[4]}
+                for e in alarm.events
+            ],
+        }
+        req = urllib.request.Request(
+            self.url,
+            data=json.dumps(trupi, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class AlertDispatcher:
+    # Alarmet dergohen nga nje thread i vetem; thirresit (scheduler-i) vetem
+    # fusin ne radhe dhe nuk presin kurre per SMTP/webhook.
+    #
+    # Events grupohen sipas (perdoruesi, direktoria) per `dritarja` sekonda dhe
+    # dergohen si nje alarm. Nje event qe perseritet (user, veprim, path) brenda
+    # `dedup_ttl` hidhet. Cdo grup ka nje token bucket me `rate_per_ore` alarme
+    # ne ore; kur mbaron, events numerohen dhe raportohen ne alarmin pasardhes,
+    # ose ne nje permbledhje kur bucket-i mbushet perseri pa events te reja.
+    # Bucket-et plot dhe pa te shtypura hiqen, qe memoria te mos rritet pa fund.
+
+    def __init__(
+        self,
+        sinks: Sequence = (),
+        per: str = "admin@example.com",
+        dritarja: float = 60.0,
+        rate_per_ore: float = 6,
+        dedup_ttl: float = 3600.0,
+        max_radha: int = 10000,
+        riprovo: int = 2,
+        ora: Callable[[], float] = time.monotonic,
+    ):
+        self.sinks = list(sinks) or [ConsoleSink()]
+        self.per = per
+        self.dritarja = max(0.0, float(dritarja))
+        self.rate_per_ore = max(0.0, float(rate_per_ore))
+        self.dedup_ttl = max(0.0, float(dedup_ttl))
+        self.riprovo = max(0, int(riprovo))
+        self._ora = ora
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_radha)))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        # celesi -> (afati, events)
+        self._grupet: Dict[CelesGrupi, Tuple[float, List[EventRow]]] = {}
+        # (user, veprim, path) -> skadimi; ttl konstant => renditje sipas skadimit
+        self._pare: "OrderedDict[Tuple[str, str, str], float]" = OrderedDict()
+        # celesi -> (tokens, koha e fundit, te shtypura)
+        self._bucket: Dict[CelesGrupi, List[float]] = {}
+        self._afati_bucket = self._ora() + PASTRIMI_BUCKET
+
+        self.alarme_derguar = 0
+        self.hedhur = 0
+
+    def start(self) -> "AlertDispatcher":
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="si-alerts", daemon=True)
+                self._thread.start()
+        return self
+
+    def ndalo(self, timeout: Optional[float] = None) -> None:
+        # grupet e hapura dergohen pa pritur fundin e dritares
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_NDALO)
+        thread.join(timeout)
+
+    def madhesia_radhes(self) -> int:
+        return self._queue.qsize()
+
+    def _fut(self, item) -> bool:
+        self.start()
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.hedhur += 1
+            logging.warning("Radha e alarmeve plot: alarmi u hodh")
+            return False
+
+    def dergo_alarm_suspicious(self, events: Sequence[EventRow]) -> bool:
+        # False: radha plot, thirresi nuk e leviz cursor-in dhe provon perseri
+        if not events:
+            return True
+        if not self._fut(list(events)):
+            _EVENTS.inc(len(events), rezultati="hedhur")
+            return False
+        return True
+
+    def dergo_raport(self, subjekti: str, mesazhi: str) -> None:
+        # raporti ditor: pa grupim dhe pa rate limit
+        self._fut(Alarm(subjekti, mesazhi))
+
+    def _run(self) -> None:
+        while True:
+            afati = min((a for a, _ in self._grupet.values()), default=None)
+            if self._bucket:
+                afati = min(afati if afati is not None else self._afati_bucket, self._afati_bucket)
+            timeout = None if afati is None else max(0.0, afati - self._ora())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if item is _NDALO:
+                break
+            self._trajto(item)
+            self._dergo_grupet()
+            self._mirembaj_bucket()
+
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _NDALO:
+                self._trajto(item)
+        self._dergo_grupet(te_gjitha=True)
+        self._mirembaj_bucket(te_gjitha=True)
+
+    def _trajto(self, item) -> None:
+        if isinstance(item, Alarm):
+            self._dergo(item)
+        elif item is not None:
+            self._grupo(item)
+
+    def _grupo(self, events: List[EventRow]) -> None:
+        tani = self._ora()
+        while self._pare and next(iter(self._pare.values())) <= tani:
+            self._pare.popitem(last=False)
+        for event in events:
+            dedup = (event[2], event[3], event[4])
+            if dedup in self._pare:
+                _EVENTS.inc(rezultati="dedup")
+                continue
+            if self.dedup_ttl:
+                self._pare[dedup] = tani + self.dedup_ttl
+            celesi = celesi_i_grupit(event)
+            if celesi not in self._grupet:
+                self._grupet[celesi] = (tani + self.dritarja, [])
+            self._grupet[celesi][1].append(event)
+            _EVENTS.inc(rezultati="grupuar")
+
+    def _lejo(self, celesi: CelesGrupi, n: int) -> Tuple[bool, int]:
+        # -> (lejohet, events te shtypura me pare per kete grup)
+        if not self.rate_per_ore:
+            return True, 0
+        tani = self._ora()
+        bucket = self._bucket.setdefault(celesi, [self.rate_per_ore, tani, 0])
+        self._mbush(bucket, tani)
+        if bucket[0] < 1:
+            bucket[2] += n
+            return False, 0
+        bucket[0] -= 1
+        te_shtypura, bucket[2] = int(bucket[2]), 0
+        return True, te_shtypura
+
+    def _mbush(self, bucket: List[float], tani: float) -> None:
+        bucket[0] = min(self.rate_per_ore, bucket[0] + (tani - bucket[1]) * self.rate_per_ore / 3600.0)
+        bucket[1] = tani
+
+    def _mirembaj_bucket(self, te_gjitha: bool = False) -> None:
+        # te shtypurat e nje grupi qe heshti dergohen kur ka token (ose ne ndalim);
+        # grupet e hapura i raportojne vete ne alarmin e tyre
+        tani = self._ora()
+        if not te_gjitha and tani < self._afati_bucket:
+            return
+        self._afati_bucket = tani + PASTRIMI_BUCKET
+        for celesi, bucket in list(self._bucket.items()):
+            if celesi in self._grupet:
+                continue
+            self._mbush(bucket, tani)
+            if bucket[2] and (bucket[0] >= 1 or te_gjitha):
+                bucket[0] = max(0.0, bucket[0] - 1)
+                te_shtypura, bucket[2] = int(bucket[2]), 0
+                self._dergo(formato_permbledhje(celesi, te_shtypura))
+            elif not bucket[2] and bucket[0] >= self.rate_per_ore:
+                del self._bucket[celesi]
+
+    def _dergo_grupet(self, te_gjitha: bool = False) -> None:
+        tani = self._ora()
+        for celesi, (afati, events) in list(self._grupet.items()):
+            if not te_gjitha and afati > tani:
+                continue
+            del self._grupet[celesi]
+            lejohet, te_shtypura = self._lejo(celesi, len(events))
+            if not lejohet:
+                _EVENTS.inc(len(events), rezultati="shtypur")
+                continue
+            self._dergo(formato_alarm(celesi, events, te_shtypura))
+
+    def _dergo(self, alarm: Alarm) -> None:
+        for sink in self.sinks:
+            for prova in range(self.riprovo + 1):
+                t = time.perf_counter()
+                try:
+                    sink.dergo(alarm, self.per)
+                except Exception as e:
+                    if prova < self.riprovo:
+                        time.sleep(0.5 * 2**prova)
+                        continue
+                    _GABIME.inc(sink=sink.emri)
+                    logging.error("Alarmi '%s' nuk u dergua ne %s: %s", alarm.subjekti, sink.emri, e)
+                else:
+                    _KOHA.observe(time.perf_counter() - t, sink=sink.emri)
+                    _DERGUAR.inc(sink=sink.emri)
+                break
+        self.alarme_derguar += 1
+
+
+def krijo_sinks(
+    emrat: Sequence[str],
+    smtp_host: str = "localhost",
+    smtp_port: int = 25,
+    smtp_nga: str = "si-monitor@localhost",
+    smtp_starttls: bool = False,
+    smtp_perdoruesi: Optional[str] = None,
+    webhook_url: Optional[str] = None,
+) -> List:
+    sinks = []
+    for emri in dict.fromkeys(emrat or ["console"]):
+        if emri == "console":
+            sinks.append(ConsoleSink())
+        elif emri == "smtp":
+            # fjalekalimi vetem nga mjedisi, jo nga argv (ps)
+            sinks.append(SmtpSink(smtp_host, smtp_port, smtp_nga, starttls=smtp_starttls,
+                                  perdoruesi=smtp_perdoruesi, fjalekalimi=os.environ.get("SI_SMTP_PASSWORD")))
+        elif emri == "webhook":
+            if not webhook_url:
+                raise ValueError("Sink-u webhook kerkon --webhook-url")
+            sinks.append(WebhookSink(webhook_url))
+        else:
+            raise ValueError(f"Sink i panjohur: {emri!r} (te mundshem: {', '.join(SINKS)})")
+    return sinks
+
+
+def shto_argumentet(ap) -> None:
+    ap.add_argument("--alert-sink", action="append", choices=SINKS, default=[],
+                    help="Ku dergohen alarmet (mund te perseritet; default: console)")
+    ap.add_argument("--alert-window", type=float, default=60.0,
+                    help="Sekonda grupimi per (perdorues, direktori) para dergimit")
+    ap.add_argument("--alert-rate", type=float, default=6,
+                    help="Max alarme ne ore per grup (0 = pa limit)")
+    ap.add_argument("--alert-dedup", type=float, default=3600.0,
+                    help="Sekonda gjate te cilave (user, veprim, path) i njejte nuk alarmohet perseri")
+    ap.add_argument("--smtp-host", default="localhost", help="Serveri SMTP (default: localhost)")
+    ap.add_argument("--smtp-port", type=int, default=25, help="Porta SMTP")
+    ap.add_argument("--smtp-from", default="si-monitor@localhost", help="Derguesi i email-eve")
+    ap.add_argument("--smtp-starttls", action="store_true", help="STARTTLS para dergimit")
+    ap.add_argument("--smtp-user", default=None, help="Perdoruesi SMTP (fjalekalimi nga SI_SMTP_PASSWORD)")
+    ap.add_argument("--webhook-url", default=None, help="URL per POST JSON, p.sh. http://127.0.0.1:9000/alert")
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+from src.columnar import HAS_NUMPY, RreshtArkive, ShkruesKolonar
+from src.connections import ConnectionManager
+from src.database import SecurityDatabase, event_burimi, intervali_i_dites
+from src.partitions import STATUS_ARKIVUAR, celesi_per_kohe
+
+
+def _gjendja_e_rollups(conn: sqlite3.Connection, nga: str, deri: str) -> Dict[str, Tuple[int, int]]:
+    # dita -> (SUM(numri), MAX(last_id)); cdo event i ri i dites ndryshon te pakten njerin
+    numri = dict(conn.execute(
+        "SELECT dita, SUM(numri) FROM stats_dita_veprimi WHERE dita >= ? AND dita <= ? GROUP BY dita",
+        (nga, deri),
+    ).fetchall())
+    last_id = dict(conn.execute(
+        "SELECT dita, MAX(last_id) FROM stats_dita_perdoruesi WHERE dita >= ? AND dita <= ? GROUP BY dita",
+        (nga, deri),
+    ).fetchall())
+    return {d: (int(n), int(last_id.get(d) or 0)) for d, n in numri.items()}
+
+
+def arkivat_kolonare(lidhjet: ConnectionManager, nga: str, deri: str) -> Dict[str, Tuple[str, int, int]]:
+    # dita -> (path, numri, last_id) te regjistruara, pa kontroll vlefshmerie
+    if lidhjet.ne_memorie:
+        return {}
+    with lidhjet.reader() as conn:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'arkiva_kolonare'").fetchone():
+            return {}
+        return {
+            dita: (path, numri, last_id)
+            for dita, path, numri, last_id in conn.execute(
+                "SELECT dita, path, numri, last_id FROM arkiva_kolonare WHERE dita >= ? AND dita <= ?",
+                (nga, deri),
+            )
+        }
+
+
+def arkivat_e_vlefshme(lidhjet: ConnectionManager, nga: str, deri: str) -> Dict[str, str]:
+    # Ditet qe mund te lexohen nga arkiva kolonare -> path. Arkiva vlen derisa
+    # rollups e dites jane ato qe pa arkivuesi; nje event i vonuar e zhvlereson.
+    arkivat = arkivat_kolonare(lidhjet, nga, deri)
+    if not arkivat:
+        return {}
+    with lidhjet.reader() as conn:
+        gjendja = _gjendja_e_rollups(conn, nga, deri)
+    return {
+        dita: path
+        for dita, (path, numri, last_id) in arkivat.items()
+        if gjendja.get(dita) == (numri, last_id) and os.path.exists(path)
+    }
+
+
+class Arkivuesi:
+    # Ditet e mbyllura shkruhen ne <db>.columnar/events_<dita>.col (src.columnar),
+    # nga te gjitha burimet qe i mbulojne: DB kryesore, particionet aktive dhe
+    # ato .gz te retention-it (dekompresohen perkohesisht, nje here per thirrje).
+    # Tabela arkiva_kolonare mban regjistrimin + gjendjen e rollups ne ate cast.
+
+    def __init__(self, db: SecurityDatabase, dir: Optional[str] = None):
+        self.db = db
+        self.lidhjet = db.lidhjet
+        self.particionet = db.particionet
+        self.dir = dir or os.path.abspath(db.db_name) + ".columnar"
+
+    def _path_per(self, dita: str) -> str:
+        return os.path.join(self.dir, f"events_{dita}.col")
+
+    def ditet_per_arkivim(self, nga: Optional[str] = None, deri: Optional[str] = None,
+                          tani: Optional[float] = None) -> List[str]:
+        # ditet e mbyllura me events, pa arkive ose me arkive te vjeteruar
+        sot = celesi_per_kohe(time.time() if tani is None else tani, "day")
+        with self.lidhjet.reader() as conn:
+            ditet = [
+                d for (d,) in conn.execute(
+                    "SELECT DISTINCT dita FROM stats_dita_veprimi WHERE dita < ? AND dita >= ? AND dita <= ? ORDER BY dita",
+                    (sot, nga or "", deri or "9999"),
+                )
+            ]
+        if not ditet:
+            return []
+        te_vlefshme = arkivat_e_vlefshme(self.lidhjet, ditet[0], ditet[-1])
+        return [d for d in ditet if d not in te_vlefshme]
+
+    def arkivo(self, nga: Optional[str] = None, deri: Optional[str] = None,
+               tani: Optional[float] = None) -> List[str]:
+        ditet = self.ditet_per_arkivim(nga, deri, tani)
+        if not ditet:
+            return []
+        os.makedirs(self.dir, exist_ok=True)
+        with ExitStack() as stack:
+            gz_hapur: Dict[str, str] = {}
+            for dita in ditet:
+                rreshta = self._arkivo_diten(dita, stack, gz_hapur)
+                logging.info("Dita %s u arkivua ne format kolonar (%d events)", dita, rreshta)
+        return ditet
+
+    def _burimet(self, fillim: int, fund: int, stack: ExitStack, gz_hapur: Dict[str, str]) -> List[Optional[str]]:
+        # rend kohor: particionet (aktive ose .gz) nga me i vjetri, pastaj DB kryesore
+        burimet: List[Optional[str]] = []
+        for p in reversed(self.particionet.lista(vetem_aktive=False)):
+            if not (p.fillim < fund and fillim < p.fund):
+                continue
+            if p.statusi != STATUS_ARKIVUAR:
+                burimet.append(p.path)
+                continue
+            if p.path not in gz_hapur:
+                fd, tmp = tempfile.mkstemp(suffix=".db", dir=self.dir)
+                stack.callback(os.remove, tmp)
+                with gzip.open(p.path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                gz_hapur[p.path] = tmp
+            burimet.append(gz_hapur[p.path])
+        return burimet + [None]
+
+    def _arkivo_diten(self, dita: str, stack: ExitStack, gz_hapur: Dict[str, str]) -> int:
+        fillim, fund = intervali_i_dites(dita)
+        burimet = self._burimet(fillim, fund, stack, gz_hapur)
+        # gjendja lexohet para rreshtave: nje event qe vjen ndermjet e ben arkiven te vjeteruar
+        with self.lidhjet.reader() as conn:
+            numri, last_id = _gjendja_e_rollups(conn, dita, dita).get(dita, (0, 0))
+
+        with ShkruesKolonar(self._path_per(dita), dita) as shkruesi:
+            for burimi in burimet:
+                with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                    for r in conn.execute(
+                        f"""
+                        SELECT e.id, e.ts, e.perdoruesi_id, u.emri, e.veprimi, e.path_id, p.path,
+                               e.dest_path_id, d.path, COALESCE(e.suspicious, 0), COALESCE(e.numri, 1), e.arsye
+                        FROM {event_burimi(tabela)}
+                        WHERE e.ts >= ? AND e.ts < ?
+                        ORDER BY e.ts, e.id
+                        """,
+                        (fillim, fund),
+                    ):
+                        shkruesi.shto(RreshtArkive(*r))
+            rreshta, min_id, max_id = shkruesi.rreshta, shkruesi.min_id, shkruesi.max_id
+
+        if rreshta != numri:
+            logging.warning("Dita %s: %d events ne burime, %d ne rollups (burim i humbur?)", dita, rreshta, numri)
+        with self.lidhjet.writer() as conn:
+            conn.execute(
+                """
+                INSERT INTO arkiva_kolonare (dita, path, rreshta, min_id, max_id, numri, last_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(dita) DO UPDATE SET
+                    path = excluded.path, rreshta = excluded.rreshta, min_id = excluded.min_id,
+                    max_id = excluded.max_id, numri = excluded.numri, last_id = excluded.last_id
+                """,
+                (dita, self._path_per(dita), rreshta, min_id, max_id, numri, last_id),
+            )
+        return rreshta
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Arkive kolonare e kompresuar per ditet e mbyllura (raporte afatgjata)")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--from", dest="nga", default=None, help="Nga dita YYYY-MM-DD (default: e para me events)")
+    ap.add_argument("--to", dest="deri", default=None, help="Deri ne diten YYYY-MM-DD (default: dje)")
+    ap.add_argument("--dir", default=None, help="Folder per file-t kolonare (default: <db>.columnar)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        raise SystemExit(f"ERROR: Databaza '{args.db}' nuk ekziston!")
+
+    db = SecurityDatabase(args.db, cache_lru_size=0, cache_bloom_capacity=0)
+    t = time.perf_counter()
+    try:
+        ditet = Arkivuesi(db, dir=args.dir).arkivo(args.nga, args.deri)
+    finally:
+        db.mbyll()
+    print(f"Dite te arkivuara: {', '.join(ditet) or '-'} ({time.perf_counter() - t:.2f}s)")
+    if not HAS_NUMPY:
+        print("(numpy mungon: raportet do lexojne arkivat pa agregim vektorial)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import getpass
+import importlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import pwd
+    HAS_PWD = True
+except ImportError:  # jo-POSIX
+    HAS_PWD = False
+
+# hook(file_path, veprimi) -> emri i perdoruesit, ose None (=> fallback)
+HookFn = Callable[[str, str], Optional[str]]
+
+STRATEGJITE = ("process", "owner", "hook")
+
+
+class UidCache:
+    # uid -> emer, me TTL qe nje rename/shtim ne /etc/passwd te kapet pa restart.
+    # getpwuid (NSS) mund te jete i shtrenjte (LDAP/sssd); ketu thirret rralle.
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = max(0.0, float(ttl))
+        self._emrat: Dict[int, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def emri(self, uid: int) -> str:
+        tani = time.monotonic()
+        with self._lock:
+            rresht = self._emrat.get(uid)
+            if rresht is not None and rresht[1] > tani:
+                self.hits += 1
+                return rresht[0]
+            self.misses += 1
+        emri = _emri_per_uid(uid)
+        with self._lock:
+            self._emrat[uid] = (emri, tani + self.ttl)
+        return emri
+
+    def invalido(self) -> None:
+        with self._lock:
+            self._emrat.clear()
+
+
+def _emri_per_uid(uid: int) -> str:
+    if HAS_PWD:
+        try:
+            return pwd.getpwuid(uid).pw_name
+        except KeyError:
+            pass
+    return str(uid)  # uid pa emer (p.sh. file nga nje container)
+
+
+class Attribution:
+    # Kush e beri kete event? Thirret nga thread-i i observer-it per cdo event,
+    # ndaj strategjite duhet te jene te lira pas thirrjes se pare.
+    emri = "base"
+
+    def perdoruesi(self, file_path: str, veprimi: str) -> str:
+        raise NotImplementedError
+
+    def invalido(self) -> None:
+        pass
+
+    def statistika(self) -> Dict[str, int]:
+        return {}
+
+
+class ProcessAttribution(Attribution):
+    # useri i procesit te monitorit; llogaritet nje here (ishte getlogin() per event)
+    emri = "process"
+
+    def __init__(self):
+        self._emri: Optional[str] = None
+
+    def perdoruesi(self, file_path: str, veprimi: str) -> str:
+        if self._emri is None:
+            self._emri = _useri_i_procesit()
+        return self._emri
+
+    def invalido(self) -> None:
+        self._emri = None
+
+
+def _useri_i_procesit() -> str:
+    try:
+        return os.getlogin()
+    except OSError:
+        pass
+    if HAS_PWD:
+        return _emri_per_uid(os.getuid())
+    return getpass.getuser()
+
+
+class OwnerAttribution(Attribution):
+    # pronari i file-it (stat().st_uid). Per DELETED (file s'ekziston me) perdoret
+    # pronari i fundit i njohur per ate path, pastaj useri i procesit.
+    emri = "owner"
+
+    def __init__(self, uid_ttl: float = 300.0, path_cache: int = 50_000):
+        self.uids = UidCache(uid_ttl)
+        self._procesi = ProcessAttribution()
+        self._path_uid: "OrderedDict[str, int]" = OrderedDict()
+        self._path_cache = max(0, int(path_cache))
+        self._lock = threading.Lock()
+        self.stat_gabime = 0
+
+    def perdoruesi(self, file_path: str, veprimi: str) -> str:
+        try:
+            uid = os.lstat(file_path).st_uid
+        except OSError:
+            self.stat_gabime += 1
+            with self._lock:
+                uid = self._path_uid.pop(file_path, None)
+            if uid is None:
+                return self._procesi.perdoruesi(file_path, veprimi)
+            return self.uids.emri(uid)
+
+        if self._path_cache:
+            with self._lock:
+                self._path_uid[file_path] = uid
+                self._path_uid.move_to_end(file_path)
+                while len(self._path_uid) > self._path_cache:
+                    self._path_uid.popitem(last=False)
+        return self.uids.emri(uid)
+
+    def invalido(self) -> None:
+        self.uids.invalido()
+        self._procesi.invalido()
+        with self._lock:
+            self._path_uid.clear()
+
+    def statistika(self) -> Dict[str, int]:
+        return {"uid_hits": self.uids.hits, "uid_misses": self.uids.misses, "stat_gabime": self.stat_gabime}
+
+
+class HookAttribution(Attribution):
+    # Hook per burime audit (auditd, fanotify, eBPF...). Rezultati ruhet per
+    # (path, veprim) per `ttl` sekonda; None => strategjia fallback.
+    emri = "hook"
+
+    def __init__(self, hook: HookFn, fallback: Optional[Attribution] = None, ttl: float = 1.0, cache: int = 10_000):
+        self.hook = hook
+        self.fallback = fallback or ProcessAttribution()
+        self.ttl = max(0.0, float(ttl))
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[str, float]]" = OrderedDict()
+        self._cache_max = max(0, int(cache))
+        self._lock = threading.Lock()
+        self.hook_gabime = 0
+        self.fallbacks = 0
+
+    def perdoruesi(self, file_path: str, veprimi: str) -> str:
+        celesi = (file_path, veprimi)
+        tani = time.monotonic()
+        with self._lock:
+            rresht = self._cache.get(celesi)
+            if rresht is not None and rresht[1] > tani:
+                return rresht[0]
+
+        try:
+            emri = self.hook(file_path, veprimi)
+        except Exception:
+            self.hook_gabime += 1
+            logging.exception("Attribution hook deshtoi per %s", file_path)
+            emri = None
+        if not emri:
+            self.fallbacks += 1
+            return self.fallback.perdoruesi(file_path, veprimi)
+
+        if self._cache_max and self.ttl > 0:
+            with self._lock:
+                self._cache[celesi] = (emri, tani + self.ttl)
+                while len(self._cache) > self._cache_max:
+                    self._cache.popitem(last=False)
+        return emri
+
+    def invalido(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        self.fallback.invalido()
+
+    def statistika(self) -> Dict[str, int]:
+        return {"hook_gabime": self.hook_gabime, "fallbacks": self.fallbacks, **self.fallback.statistika()}
+
+
+def ngarko_hook(spec: str) -> HookFn:
+    # "paketa.moduli:funksioni"
+    moduli, _, funksioni = spec.partition(":")
+    if not moduli or not funksioni:
+        raise ValueError(f"Hook i pavlefshem: {spec!r} (prisja modul:funksion)")
+    return getattr(importlib.import_module(moduli), funksioni)
+
+
+def krijo_attribution(strategjia: str = "process", hook: Optional[str] = None, uid_ttl: float = 300.0) -> Attribution:
+    if strategjia == "process":
+        return ProcessAttribution()
+    if strategjia == "owner":
+        return OwnerAttribution(uid_ttl=uid_ttl)
+    if strategjia == "hook":
+        if not hook:
+            raise ValueError("Strategjia 'hook' kerkon --attribution-hook modul:funksion")
+        return HookAttribution(ngarko_hook(hook), fallback=OwnerAttribution(uid_ttl=uid_ttl))
+    raise ValueError(f"Strategji attribution e panjohur: {strategjia!r} (te mundshme: {', '.join(STRATEGJITE)})")
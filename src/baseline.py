@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from src.attribution import STRATEGJITE, Attribution, UidCache, krijo_attribution
+from src.database import EventRecord, SecurityDatabase
+from src.detector import BurstDetector
+from src.ignore_rules import DEFAULT_RULES, IgnoreRules
+
+STATUS_AKTIV = "aktiv"
+STATUS_PERFUNDUAR = "perfunduar"
+DELETE_CHUNK = 1_000
+_IN_CHUNK = 500  # max parametra ne nje "IN (...)"
+
+# (path, inode, madhesia, mtime_ns, uid)
+FileRow = Tuple[str, int, int, int, int]
+
+
+class DirRezultat(NamedTuple):
+    dir: str
+    files: List[FileRow]
+    subdirs: List[str]
+    gabim: Optional[str]
+
+
+class Progresi(NamedTuple):
+    dirs_kryer: int
+    dirs_ne_pritje: int
+    files: int
+    ndryshime: int
+    files_per_sek: float
+    sekonda: float
+
+
+ProgressFn = Callable[[Progresi], None]
+
+
+def log_progres(p: Progresi) -> None:
+    logging.info(
+        "Baseline: %d dirs (%d ne pritje), %d files, %d ndryshime, %.0f files/sek",
+        p.dirs_kryer, p.dirs_ne_pritje, p.files, p.ndryshime, p.files_per_sek,
+    )
+
+
+class BaselineScanner:
+    # Skanim i root-it me os.scandir ne nje thread pool. Thread-et vetem lexojne
+    # filesystem-in; thread-i thirres shkruan ne DB me batch-e, ku ne te njejtin
+    # transaksion ruhen snapshot-i, events sintetike, seed-i dhe radha e
+    # direktorive. Nje nderprerje rifillon nga radha e ruajtur ne skanim_dirs.
+    #
+    # Diff ndaj skanimit te meparshem (vetem nese ka nje skanim te perfunduar):
+    #   - path i ri -> CREATED, (inode, madhesia, mtime) ndryshe -> MODIFIED
+    #   - path qe s'u pa ne kete skanim -> DELETED
+    # Events i atribuohen pronarit te file-it (uid nga stat / snapshot). Seed-i
+    # perdor perdoruesin qe `attribution` e root-it do t'i jepte prekjes se pare
+    # (first-seen eshte sipas (path, perdorues)); pa te, pronarin.
+    # Events sintetike kalojne nga i njejti `detektori` si ato live (fshirje masive
+    # gjate downtime-it = burst), dhe `on_suspicious` merr id-ne me te madhe
+    # suspicious pas cdo commit-i, qe scheduler-i me kanal aktiv t'i shohe.
+
+    def __init__(
+        self,
+        db: SecurityDatabase,
+        root: str,
+        rules: Optional[IgnoreRules] = None,
+        threads: int = 8,
+        seed: bool = False,
+        diff: bool = True,
+        batch_files: int = 2_000,
+        progress: Optional[ProgressFn] = log_progres,
+        progress_interval: float = 5.0,
+        attribution: Optional[Attribution] = None,
+        on_suspicious: Optional[Callable[[int], None]] = None,
+        detektori: Optional[BurstDetector] = None,
+    ):
+        self.db = db
+        self.root = os.path.abspath(root)
+        self.rules = rules or IgnoreRules(DEFAULT_RULES, root=self.root)
+        self.threads = max(1, int(threads))
+        self.seed = seed
+        self.diff = diff
+        self.batch_files = max(1, int(batch_files))
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.uids = UidCache()
+        self.attribution = None if attribution is not None and attribution.emri == "owner" else attribution
+        self.on_suspicious = on_suspicious
+        self.detektori = detektori
+        self._stop = threading.Event()
+
+        self.dirs_kryer = 0
+        self.files = 0
+        self.gabime = 0
+        self.seeded = 0
+        self.ndryshime: Dict[str, int] = {"CREATED": 0, "MODIFIED": 0, "DELETED": 0}
+        self.rifilluar = False
+
+    def ndalo(self) -> None:
+        # ndalon pas batch-it aktual; skanimi mbetet "aktiv" dhe rifillon here tjeter
+        self._stop.set()
+
+    def _skano_dir(self, dir: str) -> DirRezultat:
+        files: List[FileRow] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(dir) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self.rules.dir_perjashtuar(entry.path):
+                                subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False) and self.rules.perputhet(entry.path) is None:
+                            st = entry.stat(follow_symlinks=False)
+                            files.append((entry.path, st.st_ino, st.st_size, st.st_mtime_ns, st.st_uid))
+                    except OSError:
+                        continue
+        except OSError as e:
+            return DirRezultat(dir, [], [], str(e))
+        return DirRezultat(dir, files, subdirs, None)
+
+    def _fillo(self) -> Tuple[int, int, bool, List[str]]:
+        with self.db.transaksion() as conn:
+            cursor = conn.cursor()
+            rrenja_id = self.db.paths.id_per(cursor, self.root)
+            rresht = cursor.execute(
+                "SELECT id, diff FROM skanimet WHERE rrenja_id = ? AND statusi = ? ORDER BY id DESC LIMIT 1",
+                (rrenja_id, STATUS_AKTIV),
+            ).fetchone()
+            if rresht is not None:
+                self.rifilluar = True
+                skanimi, diff = int(rresht[0]), bool(rresht[1])
+            else:
+                ka_te_meparshem = cursor.execute(
+                    "SELECT 1 FROM skanimet WHERE rrenja_id = ? AND statusi = ? LIMIT 1",
+                    (rrenja_id, STATUS_PERFUNDUAR),
+                ).fetchone()
+                diff = self.diff and ka_te_meparshem is not None
+                cursor.execute(
+                    "INSERT INTO skanimet (rrenja_id, fillim, statusi, diff) VALUES (?, ?, ?, ?)",
+                    (rrenja_id, int(time.time()), STATUS_AKTIV, int(diff)),
+                )
+                skanimi = int(cursor.lastrowid)
+                cursor.execute("INSERT INTO skanim_dirs (skanimi, dir) VALUES (?, ?)", (skanimi, self.root))
+            ne_pritje = [r[0] for r in cursor.execute("SELECT dir FROM skanim_dirs WHERE skanimi = ?", (skanimi,))]
+        return skanimi, rrenja_id, diff, ne_pritje
+
+    def skano(self) -> Dict[str, int]:
+        fillimi = time.monotonic()
+        skanimi, rrenja_id, diff, ne_pritje = self._fillo()
+        if self.rifilluar:
+            logging.info("Baseline %s: rifillim i skanimit %d (%d dirs ne pritje)", self.root, skanimi, len(ne_pritje))
+
+        gati: List[DirRezultat] = []
+        files_ne_batch = 0
+        flush_i_fundit = progres_i_fundit = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="si-baseline") as pool:
+            ne_proces = {pool.submit(self._skano_dir, d) for d in ne_pritje}
+            while ne_proces and not self._stop.is_set():
+                kryer, ne_proces = wait(ne_proces, timeout=0.5, return_when=FIRST_COMPLETED)
+                for f in kryer:
+                    r = f.result()
+                    gati.append(r)
+                    files_ne_batch += len(r.files)
+                    # nen-direktorite nisen menjehere; ruhen ne radhe me batch-in e prindit
+                    ne_proces |= {pool.submit(self._skano_dir, d) for d in r.subdirs}
+
+                tani = time.monotonic()
+                if gati and (files_ne_batch >= self.batch_files or tani - flush_i_fundit >= 1.0 or not ne_proces):
+                    self._ruaj(skanimi, rrenja_id, diff, gati)
+                    gati, files_ne_batch, flush_i_fundit = [], 0, tani
+                if self.progress and tani - progres_i_fundit >= self.progress_interval:
+                    progres_i_fundit = tani
+                    self.progress(self._progresi(len(ne_proces), fillimi))
+
+            if self._stop.is_set():
+                for f in ne_proces:
+                    f.cancel()
+        if gati:
+            # vetem rezultatet e plota; nen-direktorite e tyre jane ne radhe
+            self._ruaj(skanimi, rrenja_id, diff, gati)
+
+        if self._stop.is_set():
+            logging.info("Baseline %s: u ndal; do te rifillohet", self.root)
+        else:
+            self._perfundo(skanimi, rrenja_id, diff)
+            if self.progress:
+                self.progress(self._progresi(0, fillimi))
+        return self.statistika()
+
+    def _progresi(self, ne_pritje: int, fillimi: float) -> Progresi:
+        sekonda = time.monotonic() - fillimi
+        return Progresi(
+            self.dirs_kryer, ne_pritje, self.files, sum(self.ndryshime.values()),
+            self.files / max(sekonda, 1e-9), sekonda,
+        )
+
+    def _ruaj(self, skanimi: int, rrenja_id: int, diff: bool, rezultatet: List[DirRezultat]) -> None:
+        tani = time.time()
+        with self.db.transaksion() as conn:
+            cursor = conn.cursor()
+            rreshtat = []
+            for r in rezultatet:
+                if r.gabim:
+                    self.gabime += 1
+                    logging.debug("Baseline: %s nuk u lexua: %s", r.dir, r.gabim)
+                for path, inode, madhesia, mtime_ns, uid in r.files:
+                    rreshtat.append((self.db.paths.id_per(cursor, path), path, inode, madhesia, mtime_ns, uid))
+
+            te_vjetra: Dict[int, tuple] = {}
+            for i in range(0, len(rreshtat), _IN_CHUNK):
+                ids = [r[0] for r in rreshtat[i:i + _IN_CHUNK]]
+                for path_id, *vlerat in cursor.execute(
+                    f"""
+                    SELECT path_id, inode, madhesia, mtime_ns, skanimi FROM snapshot
+                    WHERE path_id IN ({','.join('?' * len(ids))})
+                    """,
+                    ids,
+                ):
+                    te_vjetra[path_id] = tuple(vlerat)
+
+            events: List[EventRecord] = []
+            seed = []
+            for path_id, path, inode, madhesia, mtime_ns, uid in rreshtat:
+                e_vjeter = te_vjetra.get(path_id)
+                if diff and (e_vjeter is None or e_vjeter[3] != skanimi):
+                    veprimi = None
+                    if e_vjeter is None:
+                        veprimi = "CREATED"
+                    elif e_vjeter[:3] != (inode, madhesia, mtime_ns):
+                        veprimi = "MODIFIED"
+                    if veprimi:
+                        self.ndryshime[veprimi] += 1
+                        events.append(EventRecord(self.uids.emri(uid), veprimi, path, tani))
+                if self.seed:
+                    if self.attribution is None:
+                        useri = self.uids.emri(uid)
+                    else:
+                        useri = self.attribution.perdoruesi(path, "MODIFIED")
+                    seed.append((path_id, self.db.perdoruesit.id_per(cursor, useri)))
+
+            te_shkruara = self.db.shkruaj_events(cursor, self._detekto(events))
+            self.seeded += self.db.seed_file_history(cursor, seed)
+            cursor.executemany(
+                """
+                INSERT INTO snapshot (path_id, rrenja_id, inode, madhesia, mtime_ns, uid, skanimi)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path_id) DO UPDATE SET
+                    rrenja_id = excluded.rrenja_id, inode = excluded.inode, madhesia = excluded.madhesia,
+                    mtime_ns = excluded.mtime_ns, uid = excluded.uid, skanimi = excluded.skanimi
+                """,
+                [(pid, rrenja_id, ino, sz, mt, uid, skanimi) for pid, _, ino, sz, mt, uid in rreshtat],
+            )
+            cursor.executemany(
+                "INSERT OR IGNORE INTO skanim_dirs (skanimi, dir) VALUES (?, ?)",
+                [(skanimi, d) for r in rezultatet for d in r.subdirs],
+            )
+            cursor.executemany(
+                "DELETE FROM skanim_dirs WHERE skanimi = ? AND dir = ?",
+                [(skanimi, r.dir) for r in rezultatet],
+            )
+            cursor.execute(
+                "UPDATE skanimet SET files = files + ?, ndryshime = ndryshime + ? WHERE id = ?",
+                (len(rreshtat), len(events), skanimi),
+            )
+        self.dirs_kryer += len(rezultatet)
+        self.files += len(rreshtat)
+        self._njofto(te_shkruara)
+
+    def _detekto(self, events: List[EventRecord]) -> List[EventRecord]:
+        if self.detektori is None:
+            return events
+        return [self.detektori.shiko(ev) for ev in events]
+
+    def _njofto(self, te_shkruara: List[Tuple[int, int]]) -> None:
+        # thirret pas commit-it: scheduler-i lexon nga DB deri te kjo id
+        if self.on_suspicious is None:
+            return
+        ids = [event_id for event_id, suspicious in te_shkruara if suspicious]
+        if ids:
+            self.on_suspicious(max(ids))
+
+    def _perfundo(self, skanimi: int, rrenja_id: int, diff: bool) -> None:
+        # cdo gje nen root qe s'u pa ne kete skanim eshte fshire gjate downtime-it
+        while True:
+            te_shkruara: List[Tuple[int, int]] = []
+            with self.db.transaksion() as conn:
+                cursor = conn.cursor()
+                te_fshira = cursor.execute(
+                    """
+                    SELECT s.path_id, p.path, s.uid FROM snapshot AS s
+                    JOIN paths AS p ON p.id = s.path_id
+                    WHERE s.rrenja_id = ? AND s.skanimi < ?
+                    LIMIT ?
+                    """,
+                    (rrenja_id, skanimi, DELETE_CHUNK),
+                ).fetchall()
+                if diff and te_fshira:
+                    tani = time.time()
+                    te_shkruara = self.db.shkruaj_events(cursor, self._detekto(
+                        [EventRecord(self.uids.emri(uid), "DELETED", path, tani) for _, path, uid in te_fshira]
+                    ))
+                    self.ndryshime["DELETED"] += len(te_fshira)
+                    cursor.execute(
+                        "UPDATE skanimet SET ndryshime = ndryshime + ? WHERE id = ?", (len(te_fshira), skanimi)
+                    )
+                cursor.executemany("DELETE FROM snapshot WHERE path_id = ?", [(r[0],) for r in te_fshira])
+            self._njofto(te_shkruara)
+            if len(te_fshira) < DELETE_CHUNK:
+                break
+
+        with self.db.transaksion() as conn:
+            conn.execute(
+                "UPDATE skanimet SET statusi = ?, fund = ? WHERE id = ?",
+                (STATUS_PERFUNDUAR, int(time.time()), skanimi),
+            )
+            conn.execute("DELETE FROM skanim_dirs WHERE skanimi = ?", (skanimi,))
+
+    def statistika(self) -> Dict[str, int]:
+        return {
+            "dirs": self.dirs_kryer,
+            "files": self.files,
+            "gabime": self.gabime,
+            "seeded": self.seeded,
+            **{k.lower(): v for k, v in self.ndryshime.items()},
+        }
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Skanim baseline + diff offline per nje folder")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--path", required=True, help="Folder-i qe skanohet")
+    ap.add_argument("--threads", type=int, default=8, help="Thread-e per os.scandir")
+    ap.add_argument("--seed", action="store_true",
+                    help="Shto cdo (file, perdorues sipas --attribution) ne file_history, qe prekja e pare "
+                         "te mos jete suspicious")
+    ap.add_argument("--attribution", choices=STRATEGJITE, default="process",
+                    help="Si te monitori: perdoruesi per te cilin behet seed-i (owner = pronari i file-it)")
+    ap.add_argument("--attribution-hook", default=None, help="Per --attribution hook: modul:funksion")
+    ap.add_argument("--no-diff", action="store_true", help="Vetem snapshot, pa events sintetike")
+    ap.add_argument("--ignore-rule", action="append", default=[], help="Rregull injorimi (si te monitori)")
+    ap.add_argument("--no-default-ignores", action="store_true", help="Mos perdor rregullat default")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    root = os.path.abspath(args.path)
+    if not os.path.isdir(root):
+        raise SystemExit(f"Path nuk ekziston ose s'eshte folder: {root}")
+
+    try:
+        attribution = krijo_attribution(args.attribution, args.attribution_hook)
+    except (ValueError, ImportError, AttributeError) as e:
+        raise SystemExit(f"ERROR: {e}")
+
+    rregullat = [] if args.no_default_ignores else list(DEFAULT_RULES)
+    rregullat += [os.path.basename(args.db) + "*"] + args.ignore_rule
+    db = SecurityDatabase(args.db)
+    scanner = BaselineScanner(
+        db, root, IgnoreRules(rregullat, root=root), threads=args.threads, seed=args.seed, diff=not args.no_diff,
+        attribution=attribution,
+    )
+    try:
+        print(scanner.skano())
+    except KeyboardInterrupt:
+        print("U nderpre; skanimi rifillon me te njejten komande.")
+    finally:
+        db.mbyll()
+
+
+if __name__ == "__main__":
+    main()
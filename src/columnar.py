@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.database import ARSYE_E_RE
+
+try:
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+# Formati (nje file per dite):
+#   MAGIC | blloqe zlib, nje per kolone per cdo BLLOKU rreshta | footer JSON (zlib)
+#   | gjatesia e footer-it ("<Q") | MAGIC
+# Footer-i mban offset-et e blloqeve dhe fjaloret (perdorues, veprime, path-e,
+# arsye); kolonat mbajne vetem kodet e fjalorit. id dhe ts ruhen si diferenca.
+MAGIC = b"SICOL\x00\x01\n"
+VERSIONI = 1
+BLLOKU = 65_536
+NIVELI = 6
+
+# (emri, typecode i array-t, delta)
+KOLONAT: Tuple[Tuple[str, str, bool], ...] = (
+    ("id", "q", True),
+    ("ts", "q", True),
+    ("perdoruesi", "i", False),
+    ("veprimi", "h", False),
+    ("path", "i", False),
+    ("dest", "i", False),  # -1 = pa destinacion
+    ("suspicious", "b", False),
+    ("numri", "i", False),
+    ("arsye", "h", False),  # -1 = NULL
+)
+_TIPET = {emri: (tipi, delta) for emri, tipi, delta in KOLONAT}
+
+
+class RreshtArkive(NamedTuple):
+    id: int
+    ts: int
+    perdoruesi_id: int
+    perdoruesi: str
+    veprimi: str
+    path_id: int
+    path: str
+    dest_path_id: Optional[int]
+    dest_path: Optional[str]
+    suspicious: int
+    numri: int
+    arsye: Optional[str]
+
+
+class _Fjalori:
+    # vlere -> kod i vazhdueshem; per dimensionet ruhet edhe id-ja globale e DB-se
+    def __init__(self):
+        self.kodet: Dict[Any, int] = {}
+        self.vlerat: List[str] = []
+        self.ids: List[int] = []
+
+    def kodi(self, vlera: str, id_: Optional[int] = None) -> int:
+        celesi = vlera if id_ is None else id_
+        k = self.kodet.get(celesi)
+        if k is None:
+            k = self.kodet[celesi] = len(self.vlerat)
+            self.vlerat.append(vlera)
+            if id_ is not None:
+                self.ids.append(id_)
+        return k
+
+    def json(self) -> Dict[str, list]:
+        return {"vlerat": self.vlerat, "ids": self.ids}
+
+
+class ShkruesKolonar:
+    # Shkruan ne <path>.tmp dhe e zevendeson atomikisht ne mbyll(); memoria
+    # eshte nje bllok + fjaloret.
+
+    def __init__(self, path: str, dita: str, blloku: Optional[int] = None):
+        self.path = path
+        self.dita = dita
+        self.blloku = blloku or BLLOKU
+        self._tmp = path + ".tmp"
+        self._f = open(self._tmp, "wb")
+        self._f.write(MAGIC)
+        self._kolonat: Dict[str, list] = {emri: [] for emri, _, _ in KOLONAT}
+        self._blloqet: List[Dict[str, Any]] = []
+        self._perdoruesit = _Fjalori()
+        self._veprimet = _Fjalori()
+        self._paths = _Fjalori()
+        self._arsyet = _Fjalori()
+        self.rreshta = 0
+        self.min_id: Optional[int] = None
+        self.max_id: Optional[int] = None
+
+    def __enter__(self) -> "ShkruesKolonar":
+        return self
+
+    def __exit__(self, tipi, *_) -> None:
+        if tipi is None:
+            self.mbyll()
+        else:
+            self.anulo()
+
+    def shto(self, r: RreshtArkive) -> None:
+        k = self._kolonat
+        k["id"].append(r.id)
+        k["ts"].append(r.ts)
+        k["perdoruesi"].append(self._perdoruesit.kodi(r.perdoruesi, r.perdoruesi_id))
+        k["veprimi"].append(self._veprimet.kodi(r.veprimi))
+        k["path"].append(self._paths.kodi(r.path, r.path_id))
+        k["dest"].append(-1 if r.dest_path_id is None else self._paths.kodi(r.dest_path, r.dest_path_id))
+        k["suspicious"].append(1 if r.suspicious else 0)
+        k["numri"].append(r.numri)
+        k["arsye"].append(-1 if r.arsye is None else self._arsyet.kodi(r.arsye))
+        self.rreshta += 1
+        self.min_id = r.id if self.min_id is None else min(self.min_id, r.id)
+        self.max_id = r.id if self.max_id is None else max(self.max_id, r.id)
+        if len(k["id"]) >= self.blloku:
+            self._shkruaj_bllokun()
+
+    def _shkruaj_bllokun(self) -> None:
+        n = len(self._kolonat["id"])
+        if not n:
+            return
+        blloku: Dict[str, Any] = {"n": n, "kolonat": {}}
+        for emri, tipi, delta in KOLONAT:
+            vlerat = self._kolonat[emri]
+            if delta:
+                vlerat = [vlerat[0]] + [b - a for a, b in zip(vlerat, vlerat[1:])]
+            te_dhenat = zlib.compress(array(tipi, vlerat).tobytes(), NIVELI)
+            blloku["kolonat"][emri] = [self._f.tell(), len(te_dhenat)]
+            self._f.write(te_dhenat)
+            self._kolonat[emri] = []
+        self._blloqet.append(blloku)
+
+    def mbyll(self) -> Dict[str, Any]:
+        self._shkruaj_bllokun()
+        footer = {
+            "versioni": VERSIONI,
+            "dita": self.dita,
+            "rreshta": self.rreshta,
+            "min_id": self.min_id,
+            "max_id": self.max_id,
+            "rendi": sys.byteorder,
+            "madhesite": {emri: array(tipi).itemsize for emri, tipi, _ in KOLONAT},
+            "blloqet": self._blloqet,
+            "fjaloret": {
+                "perdoruesit": self._perdoruesit.json(),
+                "veprimet": self._veprimet.json(),
+                "paths": self._paths.json(),
+                "arsyet": self._arsyet.json(),
+            },
+        }
+        te_dhenat = zlib.compress(json.dumps(footer, separators=(",", ":")).encode(), NIVELI)
+        self._f.write(te_dhenat)
+        self._f.write(struct.pack("<Q", len(te_dhenat)))
+        self._f.write(MAGIC)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return {"rreshta": self.rreshta, "min_id": self.min_id, "max_id": self.max_id}
+
+    def anulo(self) -> None:
+        self._f.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+
+def _grupo(kodet, ts, ids) -> Tuple[Sequence[int], Sequence[int], Sequence[int], Sequence[int]]:
+    # -> (celesat, numri, max ts, id-ja me e vogel ne sekonden max ts) per cdo kod;
+    # (ts DESC, id ASC) eshte renditja e raportit origjinal (src.raport.top_me_barazime)
+    if HAS_NUMPY:
+        unik, inv = np.unique(kodet, return_inverse=True)
+        inv = inv.reshape(-1)
+        n = np.bincount(inv, minlength=len(unik))
+        mts = np.full(len(unik), np.iinfo(np.int64).min, dtype=np.int64)
+        np.maximum.at(mts, inv, ts)
+        ne_fund = ts == mts[inv]
+        fid = np.full(len(unik), np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(fid, inv[ne_fund], ids[ne_fund])
+        return unik, n, mts, fid
+    grupet: Dict[int, List[int]] = {}
+    for k, t, i in zip(kodet, ts, ids):
+        g = grupet.get(k)
+        if g is None:
+            grupet[k] = [1, t, i]
+        else:
+            g[0] += 1
+            if t > g[1]:
+                g[1], g[2] = t, i
+            elif t == g[1] and i < g[2]:
+                g[2] = i
+    vlerat = list(grupet.values())
+    return list(grupet), [v[0] for v in vlerat], [v[1] for v in vlerat], [v[2] for v in vlerat]
+
+
+def _top(n, mts, fid, k: int) -> List[int]:
+    # indekset e k grupeve te para: numri DESC, ts DESC, id ASC (si raporti nga SQLite)
+    if HAS_NUMPY:
+        return np.lexsort((fid, -mts, -n))[:k].tolist()
+    return heapq.nsmallest(k, range(len(n)), key=lambda i: (-n[i], -mts[i], fid[i]))
+
+
+class ArkivKolonare:
+    # Lexuesi: file-i hapet me mmap (faqet lexohen nga OS sipas nevojes) dhe
+    # dekompresohen vetem kolonat qe perdor agregimi. Me numpy agregimet jane
+    # vektoriale; pa te, array + loop ne Python japin te njejtin rezultat.
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            mm = self._mm
+            if len(mm) < 2 * len(MAGIC) + 8 or mm[:len(MAGIC)] != MAGIC or mm[-len(MAGIC):] != MAGIC:
+                raise ValueError(f"File kolonar i pavlefshem: {path}")
+            fundi = len(mm) - len(MAGIC) - 8
+            (gjatesia,) = struct.unpack("<Q", mm[fundi:fundi + 8])
+            self.meta: Dict[str, Any] = json.loads(zlib.decompress(mm[fundi - gjatesia:fundi]))
+            if self.meta.get("versioni") != VERSIONI:
+                raise ValueError(f"Versioni {self.meta.get('versioni')!r} i file-it kolonar nuk njihet: {path}")
+        except BaseException:
+            self._mm.close()
+            raise
+        fjaloret = self.meta["fjaloret"]
+        self.perdoruesit: List[str] = fjaloret["perdoruesit"]["vlerat"]
+        self.veprimet: List[str] = fjaloret["veprimet"]["vlerat"]
+        self.paths: List[str] = fjaloret["paths"]["vlerat"]
+        self.path_ids: List[int] = fjaloret["paths"]["ids"]
+        self.arsyet: List[str] = fjaloret["arsyet"]["vlerat"]
+        self._kolonat: Dict[str, Any] = {}
+
+    @property
+    def dita(self) -> str:
+        return self.meta["dita"]
+
+    @property
+    def rreshta(self) -> int:
+        return self.meta["rreshta"]
+
+    def __enter__(self) -> "ArkivKolonare":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.mbyll()
+
+    def mbyll(self) -> None:
+        self._kolonat.clear()
+        self._mm.close()
+
+    def kolona(self, emri: str):
+        # numpy.ndarray (me numpy) ose array.array; e dekoduar nje here per lexues
+        if emri in self._kolonat:
+            return self._kolonat[emri]
+        tipi, delta = _TIPET[emri]
+        if self.meta["madhesite"][emri] != array(tipi).itemsize:
+            raise ValueError(f"Kolona {emri} u shkrua ne nje platforme tjeter: {self.path}")
+        swap = self.meta["rendi"] != sys.byteorder
+        pjeset = []
+        with memoryview(self._mm) as mv:
+            for blloku in self.meta["blloqet"]:
+                offset, gjatesia = blloku["kolonat"][emri]
+                te_dhenat = zlib.decompress(mv[offset:offset + gjatesia])
+                if HAS_NUMPY:
+                    dtype = np.dtype(tipi).newbyteorder("<" if self.meta["rendi"] == "little" else ">")
+                    a = np.frombuffer(te_dhenat, dtype=dtype)
+                    pjeset.append(np.cumsum(a, dtype=np.int64) if delta else a.astype(np.dtype(tipi)))
+                else:
+                    a = array(tipi)
+                    a.frombytes(te_dhenat)
+                    if swap:
+                        a.byteswap()
+                    pjeset.append(array(tipi, accumulate(a)) if delta else a)
+        if HAS_NUMPY:
+            kolona = np.concatenate(pjeset) if pjeset else np.empty(0, dtype=np.dtype(tipi))
+        else:
+            kolona = array(tipi)
+            for a in pjeset:
+                kolona.extend(a)
+        self._kolonat[emri] = kolona
+        return kolona
+
+    def _path_shfaqur(self, path: int, dest: int) -> str:
+        return self.paths[path] if dest < 0 else f"{self.paths[path]} -> {self.paths[dest]}"
+
+    def _celesat_e_files(self):
+        # (path, dest) -> nje kod i vetem int64
+        m = len(self.paths) + 1
+        path, dest = self.kolona("path"), self.kolona("dest")
+        if HAS_NUMPY:
+            return path.astype(np.int64) * m + dest + 1, m
+        return [p * m + d + 1 for p, d in zip(path, dest)], m
+
+    def grupet_e_files(self) -> Dict[Tuple[int, Optional[int]], List[int]]:
+        # (path_id, dest_path_id) globale -> [numri, max ts, id-ja e pare ne ate sekonde], per bashkim me SQLite
+        if not self.rreshta:
+            return {}
+        celesat, m = self._celesat_e_files()
+        unik, n, mts, fid = _grupo(celesat, self.kolona("ts"), self.kolona("id"))
+        rezultati = {}
+        for k, numri, t, i in zip(unik, n, mts, fid):
+            p, d = divmod(int(k), m)
+            rezultati[(self.path_ids[p], self.path_ids[d - 1] if d else None)] = [int(numri), int(t), int(i)]
+        return rezultati
+
+    def top_files(self, k: int = 5) -> List[Tuple[str, int]]:
+        if not self.rreshta:
+            return []
+        celesat, m = self._celesat_e_files()
+        unik, n, mts, fid = _grupo(celesat, self.kolona("ts"), self.kolona("id"))
+        rezultati = []
+        for i in _top(n, mts, fid, k):
+            p, d = divmod(int(unik[i]), m)
+            rezultati.append((self._path_shfaqur(p, d - 1), int(n[i])))
+        return rezultati
+
+    def suspicious_te_fundit(self, k: int = 10) -> List[tuple]:
+        # rreshtat si EVENT_KOLONAT_ARSYE, ts DESC, id ASC
+        sus, ts, ids = self.kolona("suspicious"), self.kolona("ts"), self.kolona("id")
+        if HAS_NUMPY:
+            idx = np.flatnonzero(sus)
+            zgjedhur = idx[np.lexsort((ids[idx], -ts[idx]))[:k]].tolist()
+        else:
+            zgjedhur = heapq.nsmallest(k, (i for i, s in enumerate(sus) if s), key=lambda i: (-ts[i], ids[i]))
+        perdoruesi, veprimi = self.kolona("perdoruesi"), self.kolona("veprimi")
+        path, dest, arsye = self.kolona("path"), self.kolona("dest"), self.kolona("arsye")
+        return [
+            (
+                int(ids[i]),
+                datetime.fromtimestamp(int(ts[i])).strftime("%Y-%m-%d %H:%M:%S"),
+                self.perdoruesit[perdoruesi[i]],
+                self.veprimet[veprimi[i]],
+                self._path_shfaqur(int(path[i]), int(dest[i])),
+                1,
+                ARSYE_E_RE if arsye[i] < 0 else self.arsyet[arsye[i]],
+            )
+            for i in zgjedhur
+        ]
+
+    def permbledhja(self) -> Dict[str, Any]:
+        # e njejta strukture si RaportGenerator.merr_permbledhjen (pa "arkiva")
+        if not self.rreshta:
+            return {
+                "total_events": 0, "total_suspicious": 0, "perdorues_aktive": 0, "veprimet": {},
+                "top_perdorues": [], "top_files": [], "suspicious_detaje": [],
+            }
+        veprimi, sus = self.kolona("veprimi"), self.kolona("suspicious")
+        if HAS_NUMPY:
+            veprimet = np.bincount(veprimi, minlength=len(self.veprimet)).tolist()
+            total_suspicious = int(np.count_nonzero(sus))
+        else:
+            numrat = Counter(veprimi)
+            veprimet = [numrat.get(k, 0) for k in range(len(self.veprimet))]
+            total_suspicious = sum(sus)
+        unik, n, mts, fid = _grupo(self.kolona("perdoruesi"), self.kolona("ts"), self.kolona("id"))
+        return {
+            "total_events": self.rreshta,
+            "total_suspicious": total_suspicious,
+            "perdorues_aktive": len(unik),
+            "veprimet": {v: c for v, c in zip(self.veprimet, veprimet) if c},
+            "top_perdorues": [(self.perdoruesit[int(unik[i])], int(n[i])) for i in _top(n, mts, fid, 5)],
+            "top_files": self.top_files(5),
+            "suspicious_detaje": self.suspicious_te_fundit(10),
+        }
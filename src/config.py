@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import copy
+import json
+import os
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import yaml
+
+from src.connections import DEFAULT_PRAGMAS
+
+# Vlerat default; config.yaml mbishkruan vetem celesat qe jep.
+DEFAULTS: Dict[str, Any] = {
+    "monitor": {
+        "path": None,
+        "recursive": True,
+        "ignore_suffixes": [".swp", ".tmp", "~", ".log"],
+        "ignore_rules": [],
+        "use_default_ignores": True,
+        "db": "security.db",
+        "log_file": None,
+        "attribution": "process",
+        "attribution_hook": None,
+        "coalesce": {"window": 0.5, "rules": ["created+modified", "modified"]},
+        "batch_size": 500,
+        "flush_interval": 0.5,
+        "queue_size": 10000,
+        "backpressure": "block",
+        "journal": {"dir": None, "fsync_batch": 256, "fsync_interval": 0.2},
+        "stats_interval": 60,
+        "notify": {"enabled": True, "socket": None},
+        # detektori i burst-eve: pragje per dritare (sekonda); known_extensions None = lista default
+        "detector": {
+            "enabled": True,
+            "window": 60,
+            "user": 1000,
+            "dir": 500,
+            "rename": 20,
+            "delete": 200,
+            "max_keys": 10000,
+            "known_extensions": None,
+        },
+        "log_sample": 1,
+        "log_rate": 0,
+        "baseline": {"enabled": False, "seed": False, "threads": 8},
+        "roots": [],
+    },
+    "scheduler": {
+        "admin_email": "admin@example.com",
+        "report_time": "23:59",
+        "check_minutes": 10,
+        "reports_dir": "reports",
+        "partition": None,
+        "retention": -1,
+    },
+    "metrics": {
+        "textfile": None,
+        "http": None,
+        "interval": 15,
+        "profile": False,
+        "profile_sample": 100,
+    },
+    "database": {
+        "read_pool_size": 4,
+        "cache_lru_size": 100_000,
+        "cache_bloom_capacity": 1_000_000,
+        "cache_dim_size": 200_000,
+        "pragmas": dict(DEFAULT_PRAGMAS),
+    },
+}
+
+# celesat e monitor-it qe nje root mund t'i mbishkruaje
+ROOT_KEYS = (
+    "path",
+    "recursive",
+    "ignore_suffixes",
+    "ignore_rules",
+    "use_default_ignores",
+    "attribution",
+    "attribution_hook",
+    "coalesce",
+    "baseline",
+)
+
+
+class ConfigError(ValueError):
+    pass
+
+
+class RootConfig(NamedTuple):
+    emri: str
+    path: str
+    recursive: bool
+    ignore_suffixes: List[str]
+    ignore_rules: List[str]
+    use_default_ignores: bool
+    attribution: str
+    attribution_hook: Optional[str]
+    coalesce_window: float
+    coalesce_rules: List[str]
+    baseline: bool = False  # skanim + diff offline ne start
+    baseline_seed: bool = False
+
+
+def _bashko(baza: Dict[str, Any], shtesa: Dict[str, Any]) -> Dict[str, Any]:
+    rezultati = copy.deepcopy(baza)
+    for k, v in (shtesa or {}).items():
+        if isinstance(v, dict) and isinstance(rezultati.get(k), dict):
+            rezultati[k] = _bashko(rezultati[k], v)
+        else:
+            rezultati[k] = copy.deepcopy(v)
+    return rezultati
+
+
+def ngarko_config(path: Optional[str] = None) -> Dict[str, Any]:
+    # path=None => vetem DEFAULTS
+    if path is None:
+        return copy.deepcopy(DEFAULTS)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            te_dhenat = yaml.safe_load(f) or {}
+    except OSError as e:
+        raise ConfigError(f"Config nuk u lexua: {e}") from e
+    except yaml.YAMLError as e:
+        raise ConfigError(f"Config YAML i pavlefshem ({path}): {e}") from e
+    if not isinstance(te_dhenat, dict):
+        raise ConfigError(f"Config duhet te jete nje mapping YAML: {path}")
+    for seksioni, vlera in te_dhenat.items():
+        if seksioni in DEFAULTS and vlera is not None and not isinstance(vlera, dict):
+            raise ConfigError(f"Seksioni '{seksioni}' duhet te jete mapping")
+    return _bashko(DEFAULTS, {k: v for k, v in te_dhenat.items() if v is not None})
+
+
+def rrenjet(cfg: Dict[str, Any]) -> List[RootConfig]:
+    # monitor.roots: liste root-esh; secili trashegon vlerat e monitor-it.
+    # Pa roots, monitor.path eshte root-i i vetem (sjellja e vjeter).
+    monitor = cfg["monitor"]
+    lista = monitor.get("roots") or []
+    if not lista:
+        if not monitor.get("path"):
+            raise ConfigError("Mungon monitor.path ose monitor.roots")
+        lista = [{"path": monitor["path"]}]
+
+    rezultati: List[RootConfig] = []
+    emrat = set()
+    for i, r in enumerate(lista):
+        if isinstance(r, str):
+            r = {"path": r}
+        if not isinstance(r, dict) or not r.get("path"):
+            raise ConfigError(f"monitor.roots[{i}]: mungon 'path'")
+        te_panjohur = set(r) - set(ROOT_KEYS) - {"name"}
+        if te_panjohur:
+            raise ConfigError(f"monitor.roots[{i}]: celesa te panjohur: {', '.join(sorted(te_panjohur))}")
+        v = _bashko({k: monitor.get(k) for k in ROOT_KEYS}, r)
+        path = os.path.abspath(os.path.expanduser(v["path"]))
+        emri = str(r.get("name") or path)
+        if emri in emrat:
+            raise ConfigError(f"Root i dyfishte: {emri}")
+        emrat.add(emri)
+        coalesce = v.get("coalesce") or {}
+        baseline = v.get("baseline") or {}
+        rezultati.append(
+            RootConfig(
+                emri=emri,
+                path=path,
+                recursive=bool(v["recursive"]),
+                ignore_suffixes=list(v.get("ignore_suffixes") or []),
+                ignore_rules=list(v.get("ignore_rules") or []),
+                use_default_ignores=bool(v.get("use_default_ignores", True)),
+                attribution=v.get("attribution") or "process",
+                attribution_hook=v.get("attribution_hook"),
+                coalesce_window=float(coalesce.get("window") or 0.0),
+                coalesce_rules=list(coalesce.get("rules") or []),
+                baseline=bool(baseline.get("enabled")),
+                baseline_seed=bool(baseline.get("seed")),
+            )
+        )
+    return rezultati
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Valido dhe shfaq config-un efektiv")
+    ap.add_argument("config", help="Rruga e config.yaml")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        cfg = ngarko_config(args.config)
+        roots = rrenjet(cfg)
+    except ConfigError as e:
+        raise SystemExit(f"ERROR: {e}")
+    cfg["monitor"]["roots"] = [r._asdict() for r in roots]
+    print(json.dumps(cfg, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
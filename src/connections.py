@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+# keto vlejne per file-in ose kane kuptim vetem per lidhjen qe shkruan
+WRITER_ONLY_PRAGMAS = {"journal_mode", "synchronous", "wal_autocheckpoint", "auto_vacuum"}
+
+
+def parse_pragma_args(values: Optional[List[str]]) -> Dict[str, Any]:
+    pragmas: Dict[str, Any] = {}
+    for v in values or []:
+        if "=" not in v:
+            raise ValueError(f"Pragma duhet ne formen EMRI=VLERA: {v!r}")
+        k, val = v.split("=", 1)
+        k = k.strip().lower()
+        if not k.replace("_", "").isalnum():
+            raise ValueError(f"Emer pragma i pavlefshem: {k!r}")
+        pragmas[k] = val.strip()
+    return pragmas
+
+
+class ConnectionManager:
+    # Nje lidhje e vetme e gjate per shkrim (e mbrojtur me lock) + pool i vogel
+    # lidhjesh read-only. Te gjitha lidhjet jane check_same_thread=False qe te
+    # perdoren nga thread-et e watchdog/writer/scheduler.
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, Any]] = None, read_pool_size: int = 4):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update({k.lower(): v for k, v in pragmas.items()})
+        self.read_pool_size = max(1, int(read_pool_size))
+
+        self._memory = db_path == ":memory:" or db_path.startswith("file::memory:")
+        self._write_lock = threading.RLock()
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.read_pool_size)
+        self._closed = False
+
+    @property
+    def ne_memorie(self) -> bool:
+        return self._memory
+
+    def _apply_pragmas(self, conn: sqlite3.Connection, writer: bool) -> None:
+        for emri, vlera in self.pragmas.items():
+            if vlera is None or (not writer and emri in WRITER_ONLY_PRAGMAS):
+                continue
+            conn.execute(f"PRAGMA {emri} = {vlera}")
+
+    def _open_writer(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._apply_pragmas(conn, writer=True)
+        return conn
+
+    def _open_reader(self) -> sqlite3.Connection:
+        uri = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._apply_pragmas(conn, writer=False)
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("ConnectionManager eshte mbyllur")
+            if self._writer_conn is None:
+                self._writer_conn = self._open_writer()
+            conn = self._writer_conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        if self._memory:
+            # ":memory:" nuk mund te ndahet mes lidhjeve: lexo nga writer-i
+            with self._write_lock:
+                if self._writer_conn is None:
+                    self._writer_conn = self._open_writer()
+                yield self._writer_conn
+            return
+
+        self._slots.acquire()
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open_reader()
+            yield conn
+        finally:
+            if conn is not None:
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put(conn)
+            self._slots.release()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        # writer-i mbyllet i fundit: vetem lidhja e fundit ben checkpoint dhe fshin
+        # WAL-in, e nje lidhje read-only nuk mundet
+        with self._write_lock:
+            if self._writer_conn is not None:
+                self._writer_conn.close()
+                self._writer_conn = None
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Any, List, Optional
+
+# Klienti i protokollit te kontrollit te src.daemon: nje rresht JSON per kerkese
+# ({"cmd": ..., argumentet}) dhe nje rresht JSON per pergjigje ({"ok": true,
+# "rezultati": ...} ose {"ok": false, "gabim": ...}). Vetem stdlib, qe menuja dhe
+# CLI-ja te mos importojne sqlite, watchdog apo raportet.
+KOMANDAT = ("ping", "stats", "suspicious", "raport", "kerko", "reload", "stop")
+MAX_KERKESA = 64 * 1024
+
+
+class DaemonJoAktiv(ConnectionError):
+    pass
+
+
+class GabimKomande(RuntimeError):
+    pass
+
+
+def socket_default(db_path: str) -> str:
+    return os.path.abspath(db_path) + ".ctl"
+
+
+def thirr(path: str, komanda: str, timeout: float = 60.0, **argumentet) -> Any:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonJoAktiv(f"Daemon-i nuk degjon ne {path}: {e}") from e
+        sock.sendall(json.dumps({"cmd": komanda, **argumentet}).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            rreshti = f.readline()
+    finally:
+        sock.close()
+    if not rreshti:
+        raise DaemonJoAktiv(f"Daemon-i mbylli lidhjen pa pergjigje ({path})")
+    pergjigja = json.loads(rreshti)
+    if not pergjigja.get("ok"):
+        raise GabimKomande(pergjigja.get("gabim") or "gabim i panjohur")
+    return pergjigja.get("rezultati")
+
+
+def formato(komanda: str, rezultati: Any) -> str:
+    if komanda == "ping":
+        return (f"Daemon pid {rezultati['pid']}, aktiv prej {rezultati['uptime']:.0f}s "
+                f"(komponentet: {', '.join(rezultati['komponentet']) or '-'})")
+    if komanda == "stats":
+        return "\n".join(f"  {k:20s} {v}" for k, v in rezultati.items() if not isinstance(v, dict))
+    if komanda == "suspicious":
+        return "\n".join(f"[{r[1]}] {r[2]} - {r[3]}\n   File: {r[4]}" for r in rezultati) or "Nuk ka events suspicious!"
+    if komanda == "raport":
+        return rezultati["raport"] + (f"\n\nRaporti u ruajt ne: {rezultati['file']}" if rezultati.get("file") else "")
+    if komanda == "kerko":
+        rreshtat = []
+        for r in rezultati:
+            path = r["path"] if r["dest_path"] is None else f"{r['path']} -> {r['dest_path']}"
+            shenja = " [SUSPICIOUS]" if r["suspicious"] else ""
+            rreshtat.append(f"[{r['data_ora']}] {r['perdoruesi']:<12} {r['veprimi']:<9} {path}{shenja}")
+        return "\n".join(rreshtat) or "Asnje event."
+    return json.dumps(rezultati, ensure_ascii=False, indent=2)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Kontrolli i daemon-it SI (src.daemon) nga terminali")
+    ap.add_argument("komanda", choices=KOMANDAT, help="Komanda")
+    ap.add_argument("vlera", nargs="?", default=None, help="Data (YYYY-MM-DD) per raport, dosja per kerko")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes (per socket-in default)")
+    ap.add_argument("--socket", default=None, help="Socket-i i kontrollit (default: <db>.ctl)")
+    ap.add_argument("--limit", type=int, default=None, help="Max rreshta per suspicious / kerko")
+    ap.add_argument("--since", default=None, help="Per kerko: 30m, 6h, 2d ...")
+    ap.add_argument("--user", default=None, help="Per kerko: vetem ky perdorues")
+    ap.add_argument("--save", action="store_true", help="Per raport: ruaje edhe ne folderin e raporteve")
+    ap.add_argument("--json", action="store_true", help="Pergjigja JSON pa formatim")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    argumentet = {}
+    if args.komanda == "raport":
+        argumentet = {"data": args.vlera, "ruaj": args.save}
+    elif args.komanda == "kerko":
+        if not args.vlera:
+            raise SystemExit("ERROR: kerko do nje dosje")
+        argumentet = {"dosja": args.vlera, "since": args.since, "user": args.user}
+    if args.limit is not None and args.komanda in ("suspicious", "kerko"):
+        argumentet["limit"] = args.limit
+    try:
+        rezultati = thirr(args.socket or socket_default(args.db), args.komanda, **argumentet)
+    except (DaemonJoAktiv, GabimKomande, OSError) as e:
+        raise SystemExit(f"ERROR: {e}")
+    if args.json:
+        json.dump(rezultati, sys.stdout, ensure_ascii=False)
+        print()
+    else:
+        print(formato(args.komanda, rezultati))
+
+
+if __name__ == "__main__":
+    main()
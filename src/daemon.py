@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from src.ctl import MAX_KERKESA, socket_default
+
+# Nje proces i vetem per monitorin, scheduler-in dhe sherbimin e kontrollit.
+# Modulet e renda (watchdog, schedule, raportet, eksporti) importohen vetem kur
+# komponenti nisur ose komanda e pare i kerkon; src.ctl nuk importon asgje
+# pertej stdlib.
+MAX_RRESHTA = 5000
+
+
+class Sherbimi:
+    # Komandat e protokollit (src.ctl). Perdorin DB-ne e monitorit kur ai eshte
+    # ne proces: lidhjet, cache-t e dimensioneve dhe faqet e SQLite jane te ngrohta.
+
+    def __init__(self, db, reports_dir: str = "reports", monitori=None, scheduler=None):
+        self.db = db
+        self.reports_dir = reports_dir
+        self.monitori = monitori
+        self.scheduler = scheduler
+        self.fillimi = time.time()
+        self.ndal = threading.Event()
+        self._generator = None
+        self._lock = threading.Lock()
+        self._komandat: Dict[str, Callable[..., Any]] = {
+            "ping": self.ping,
+            "stats": self.stats,
+            "suspicious": self.suspicious,
+            "raport": self.raport,
+            "kerko": self.kerko,
+            "reload": self.reload,
+            "stop": self.stop,
+        }
+
+    def generator(self):
+        # src.raport importohet ne kerkesen e pare (ose vjen gati nga scheduler-i)
+        with self._lock:
+            if self._generator is None:
+                if self.scheduler is not None:
+                    self._generator = self.scheduler.generator
+                else:
+                    from src.raport import RaportGenerator
+
+                    self._generator = RaportGenerator(
+                        db_path=self.db.db_name,
+                        reports_dir=self.reports_dir,
+                        lidhjet=self.db.lidhjet,
+                        particionet=self.db.particionet,
+                    )
+            return self._generator
+
+    def trajto(self, kerkesa: Dict[str, Any]) -> Dict[str, Any]:
+        komanda = kerkesa.get("cmd")
+        fn = self._komandat.get(komanda)
+        if fn is None:
+            return {"ok": False, "gabim": f"Komande e panjohur: {komanda!r}"}
+        argumentet = {k: v for k, v in kerkesa.items() if k != "cmd"}
+        t = time.perf_counter()
+        try:
+            rezultati = fn(**argumentet)
+        except (TypeError, ValueError) as e:
+            return {"ok": False, "gabim": str(e)}
+        except Exception as e:
+            logging.exception("Komanda '%s' deshtoi", komanda)
+            return {"ok": False, "gabim": f"{type(e).__name__}: {e}"}
+        logging.debug("Komanda '%s' ne %.1f ms", komanda, (time.perf_counter() - t) * 1000)
+        return {"ok": True, "rezultati": rezultati}
+
+    def komponentet(self) -> List[str]:
+        return ["kontroll"] + (["monitor"] if self.monitori else []) + (["scheduler"] if self.scheduler else [])
+
+    def ping(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "uptime": time.time() - self.fillimi, "komponentet": self.komponentet()}
+
+    def stats(self) -> Dict[str, Any]:
+        rezultati: Dict[str, Any] = dict(self.db.statistika())
+        if self.monitori is not None:
+            rezultati["monitor"] = self.monitori.statistika()
+        return rezultati
+
+    def suspicious(self, limit: int = 50) -> List[list]:
+        limit = max(1, min(int(limit), MAX_RRESHTA))
+        return [list(r) for r in self.db.merr_suspicious_events(limit=limit)]
+
+    def raport(self, data: Optional[str] = None, ruaj: bool = False) -> Dict[str, Any]:
+        data = data or datetime.now().strftime("%Y-%m-%d")
+        datetime.strptime(data, "%Y-%m-%d")
+        gen = self.generator()
+        raport = gen.gjenero_raport_tekst(data)
+        return {"data": data, "raport": raport, "file": gen.ruaj_raport(raport, data) if ruaj else None}
+
+    def kerko(
+        self,
+        dosja: str,
+        since: Optional[str] = None,
+        nga: Optional[str] = None,
+        deri: Optional[str] = None,
+        user: Optional[str] = None,
+        veprimet: Optional[List[str]] = None,
+        limit: int = 500,
+    ) -> List[Dict[str, Any]]:
+        from src.export import kufiri_kohor
+        from src.query import kohezgjatja
+
+        fillim = kufiri_kohor(nga) if nga else None
+        if since:
+            fillim = max(fillim or 0, time.time() - kohezgjatja(since))
+        rreshtat = self.db.itero_nen_dosje(
+            dosja,
+            nga=fillim,
+            deri=kufiri_kohor(deri, fundi=True) if deri else None,
+            perdoruesi=user or None,
+            veprimet=[v.upper() for v in veprimet] if veprimet else None,
+        )
+        limit = max(1, min(int(limit), MAX_RRESHTA))
+        return [r._asdict() for r in itertools.islice(rreshtat, limit)]
+
+    def reload(self) -> Dict[str, Any]:
+        rifreskuar = []
+        if self.monitori is not None:
+            self.monitori.rifresko()
+            rifreskuar.append("attribution")
+        return {"rifreskuar": rifreskuar}
+
+    def stop(self) -> Dict[str, Any]:
+        logging.info("Ndalim i kerkuar nga socket-i i kontrollit")
+        self.ndal.set()
+        return {"ndalet": True}
+
+
+class _Trajtuesi(socketserver.StreamRequestHandler):
+    # nje lidhje mund te dergoje disa kerkesa, nje per rresht
+    timeout = 300
+
+    def handle(self) -> None:
+        sherbimi: Sherbimi = self.server.sherbimi
+        try:
+            while True:
+                rreshti = self.rfile.readline(MAX_KERKESA + 1)
+                if not rreshti:
+                    return
+                if len(rreshti) > MAX_KERKESA:
+                    self._shkruaj({"ok": False, "gabim": "Kerkese shume e madhe"})
+                    return
+                try:
+                    kerkesa = json.loads(rreshti)
+                except ValueError:
+                    kerkesa = None
+                if not isinstance(kerkesa, dict):
+                    self._shkruaj({"ok": False, "gabim": "Kerkesa duhet te jete nje objekt JSON ne nje rresht"})
+                    continue
+                self._shkruaj(sherbimi.trajto(kerkesa))
+        except OSError:
+            # klienti u mbyll ose heshti pertej timeout-it
+            return
+
+    def _shkruaj(self, pergjigja: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(pergjigja, ensure_ascii=False, default=str).encode() + b"\n")
+
+
+class ServeriKontrollit(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, sherbimi: Sherbimi):
+        self.path = path
+        self.sherbimi = sherbimi
+        self._thread: Optional[threading.Thread] = None
+        # socket-i i mbetur nga nje daemon i meparshem fshihet vetem nese askush s'degjon
+        if os.path.exists(path):
+            prove = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                prove.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise OSError(f"Nje daemon tjeter degjon ne {path}")
+            finally:
+                prove.close()
+        super().__init__(path, _Trajtuesi)
+
+    def server_bind(self) -> None:
+        # vetem pronari: komandat lexojne events dhe mund ta ndalin daemon-in
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def nis(self) -> "ServeriKontrollit":
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.5}, name="si-kontroll", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def ndalo(self) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    from src.alerts import shto_argumentet as shto_argumentet_alert
+
+    ap = argparse.ArgumentParser(
+        description="Daemon SI: monitor + scheduler + socket kontrolli ne nje proces",
+        epilog="Opsionet e tjera (--path, --recursive, --burst-*, --metrics-* ...) i kalohen monitorit; "
+               "shih python3 -m src.monitor --help.",
+    )
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--config", default=None, help="config.yaml (seksionet monitor, scheduler, metrics, database)")
+    ap.add_argument("--socket", default=None, help="Socket-i Unix i kontrollit (default: <db>.ctl)")
+    ap.add_argument("--no-monitor", action="store_true", help="Pa monitor (vetem scheduler dhe/ose kontroll)")
+    ap.add_argument("--scheduler", action="store_true", help="Nis edhe scheduler-in (raport ditor, alarme, particione)")
+    ap.add_argument("--out", default=None, help="Folder per raportet (default: scheduler.reports_dir ose reports)")
+    ap.add_argument("--admin-email", default=None, help="Marresi i alarmeve dhe raporteve")
+    ap.add_argument("--report-time", default=None, help="Ora e raportit ditor (HH:MM)")
+    ap.add_argument("--check-minutes", type=int, default=None, help="Minuta midis kontrollimeve suspicious")
+    ap.add_argument("--partition", choices=["month", "day"], default=None, help="Particionim cdo nate 00:15")
+    ap.add_argument("--retention", type=int, default=None, help="Particione aktive qe mbahen (-1 = pa limit)")
+    ap.add_argument("--columnar-archive", action="store_true", help="Arkivo ditet e mbyllura ne format kolonar")
+    # alarmet e scheduler-it (--alert-sink, --smtp-*, --webhook-url), si ne src.scheduler
+    shto_argumentet_alert(ap)
+    return ap.parse_known_args(argv)
+
+
+def _cilesimet_e_scheduler(args) -> Dict[str, Any]:
+    from src.config import DEFAULTS, ngarko_config
+
+    sc = dict(ngarko_config(args.config)["scheduler"] if args.config else DEFAULTS["scheduler"])
+    for celesi, vlera in (
+        ("reports_dir", args.out),
+        ("admin_email", args.admin_email),
+        ("report_time", args.report_time),
+        ("check_minutes", args.check_minutes),
+        ("partition", args.partition),
+        ("retention", args.retention),
+    ):
+        if vlera is not None:
+            sc[celesi] = vlera
+    return sc
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args, te_tjerat = parse_args(argv)
+    if args.no_monitor and te_tjerat:
+        raise SystemExit(f"ERROR: opsione te panjohura pa monitor: {' '.join(te_tjerat)}")
+
+    kanali = None
+    if args.scheduler:
+        # monitori dhe scheduler-i ne te njejtin proces: verdiktet pa socket
+        from src.notify import KanalLokal
+
+        kanali = KanalLokal()
+
+    monitori = None
+    eksportuesi = None
+    if args.no_monitor:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        from src.database import SecurityDatabase
+
+        db = SecurityDatabase(args.db)
+    else:
+        from src import monitor
+
+        margs = monitor.parse_args(te_tjerat + ["--db", args.db] + (["--config", args.config] if args.config else []))
+        try:
+            cilesimet, rrenjet_cfg = monitor.ngarko_cilesimet(margs)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        monitor.setup_logging(cilesimet["log_file"], margs.verbose)
+        try:
+            monitori = monitor.Monitori(cilesimet, rrenjet_cfg, publikuesi=kanali)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        db = monitori.db
+        from src.metrics import nis as nis_metrikat
+
+        try:
+            eksportuesi = nis_metrikat(**cilesimet["metrics"])
+        except (OSError, ValueError) as e:
+            db.mbyll()
+            raise SystemExit(f"Metrikat: {e}")
+
+    # me config, monitor.db mund te ndryshoje nga --db
+    db_path = db.db_name
+    scheduler = None
+    sc: Dict[str, Any] = {}
+    if args.scheduler:
+        from src.alerts import AlertDispatcher, krijo_sinks
+        from src.metrics import METRIKAT
+        from src.scheduler import Scheduler
+
+        try:
+            sc = _cilesimet_e_scheduler(args)
+            sinks = krijo_sinks(args.alert_sink, args.smtp_host, args.smtp_port, args.smtp_from,
+                                args.smtp_starttls, args.smtp_user, args.webhook_url)
+        except ValueError as e:
+            db.mbyll()
+            raise SystemExit(f"ERROR: {e}")
+        alerts = AlertDispatcher(sinks, sc["admin_email"], dritarja=args.alert_window,
+                                 rate_per_ore=args.alert_rate, dedup_ttl=args.alert_dedup)
+        METRIKAT.gauge("si_alert_radha", "Alarme ne radhe per dergim").funksion(alerts.madhesia_radhes)
+        scheduler = Scheduler(
+            db_path=db_path,
+            reports_dir=sc["reports_dir"],
+            admin_email=sc["admin_email"],
+            partition=sc["partition"],
+            retention=sc["retention"],
+            alert_system=alerts,
+            njoftimet=kanali,
+            columnar=args.columnar_archive,
+            db=db,
+        )
+
+    sherbimi = Sherbimi(db, sc.get("reports_dir") or args.out or "reports", monitori, scheduler)
+    try:
+        serveri = ServeriKontrollit(args.socket or socket_default(db_path), sherbimi).nis()
+    except OSError as e:
+        db.mbyll()
+        raise SystemExit(f"ERROR: socket-i i kontrollit: {e}")
+    logging.info("Socket-i i kontrollit: %s (%s)", serveri.path, ", ".join(sherbimi.komponentet()))
+
+    if monitori is not None:
+        monitori.start()
+    thread_scheduler = None
+    if scheduler is not None:
+        scheduler.setup_schedule(report_time=sc["report_time"], check_minutes=int(sc["check_minutes"]))
+        thread_scheduler = threading.Thread(target=scheduler.run, name="si-scheduler", daemon=True)
+        thread_scheduler.start()
+
+    def _ndalo(signum, frame):
+        # SIGTERM (systemd stop) si Ctrl+C: monitori ben flush te radhes
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _ndalo)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: sherbimi.reload())
+
+    try:
+        while not sherbimi.ndal.wait(1):
+            if monitori is not None:
+                monitori.tik()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        logging.info("Daemon-i po ndalet")
+        serveri.ndalo()
+        if scheduler is not None:
+            scheduler.ndalo()
+            thread_scheduler.join()
+        if monitori is not None:
+            monitori.ndalo()
+        else:
+            db.mbyll()
+        if eksportuesi is not None:
+            eksportuesi.ndalo()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,135 +1,1145 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import heapq
+import logging
+import os
 import sqlite3
-from datetime import datetime
-from typing import List, Tuple, Dict, Any, Optional
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple, Dict, Any, Optional, NamedTuple, Sequence
+
+from src.connections import ConnectionManager
+from src.dimensions import DimensionCache, DirCache, dosja_e
+from src.metrics import METRIKAT, profil
+from src.partitions import STATUS_ARKIVUAR, PartitionManager
+from src.seen_cache import SeenCache
 
 EventRow = Tuple[int, str, str, str, str, int]
 
+_TX_KOHA = METRIKAT.histogram("si_db_transaksion_seconds", "Kohezgjatja e transaksioneve te shkrimit (me commit)")
+_TX_ROLLBACK = METRIKAT.counter("si_db_rollback_total", "Transaksione shkrimi te anuluara")
+_DB_EVENTS = METRIKAT.counter("si_db_events_total", "Events te shkruara ne DB")
+_DB_SUSPICIOUS = METRIKAT.counter("si_db_suspicious_total", "Events suspicious te shkruara ne DB")
+
+# PRAGMA user_version; rritet me cdo migrim ne krijo_tabela
+SCHEMA_VERSION = 7
+BACKFILL_CHUNK = 10_000
+
+# para v5, MOVED ruhej si nje string i vetem "src -> dest"
+NDARES_MOVED = " -> "
+
+EVENTS_DDL = """
+    CREATE TABLE IF NOT EXISTS {emri} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        data_ora TEXT,
+        perdoruesi_id INTEGER,
+        veprimi TEXT,
+        path_id INTEGER,
+        dest_path_id INTEGER,
+        suspicious INTEGER,
+        numri INTEGER DEFAULT 1,
+        ts INTEGER,
+        dir_id INTEGER,
+        dest_dir_id INTEGER,
+        arsye TEXT
+    )
+"""
+
+# Kolonat e EventRow. Emrat bashkohen nga dimensionet vetem per rreshtat qe
+# kthehen: CROSS JOIN e mban events si loop-in e jashtem (indeksi ts/id + LIMIT).
+EVENT_KOLONAT = (
+    "e.id, e.data_ora, u.emri, e.veprimi, "
+    "CASE WHEN e.dest_path_id IS NULL THEN p.path ELSE p.path || ' -> ' || d.path END, "
+    "e.suspicious"
+)
+
+
+def event_burimi(tabela: str) -> str:
+    return (
+        f"{tabela} AS e"
+        " CROSS JOIN main.perdoruesit AS u ON u.id = e.perdoruesi_id"
+        " CROSS JOIN main.paths AS p ON p.id = e.path_id"
+        " LEFT JOIN main.paths AS d ON d.id = e.dest_path_id"
+    )
+
+
+# kolonat e itero_events: path-i dhe destinacioni te ndara, per eksport
+EKSPORT_KOLONAT = "e.id, e.ts, e.data_ora, u.emri, e.veprimi, p.path, d.path, e.numri, e.suspicious"
+
+
+# events.arsye per rreshtat suspicious: rregulli "hera e pare" i DB-se, ose
+# gjetja e detektorit (src.detector) qe erdhi me EventRecord.arsye. NULL te
+# rreshtat suspicious para v7 do te thote ARSYE_E_RE.
+ARSYE_E_RE = "e_re"
+# EVENT_KOLONAT + arsyeja (NULL per rreshtat normale), per raportet
+EVENT_KOLONAT_ARSYE = EVENT_KOLONAT + f", CASE WHEN e.suspicious = 1 THEN COALESCE(e.arsye, '{ARSYE_E_RE}') END"
+
+# Indekset e pemes se dosjeve (v6): events sipas dosjes prind te path-it, ne
+# rend kohor. dest_dir_id ka vlere vetem per MOVED, ndaj indeksi i tij eshte i pjesshem.
+DIR_INDEKSET = (
+    "CREATE INDEX IF NOT EXISTS {schema}idx_events_dir_ts ON events(dir_id, ts)",
+    "CREATE INDEX IF NOT EXISTS {schema}idx_events_dest_dir_ts ON events(dest_dir_id, ts) WHERE dest_dir_id IS NOT NULL",
+)
+# me shume dosje se kaq ne nenpeme: skanim sipas ts ne vend te bashkimit te kursoreve
+DOSJE_MERGE_MAX = 64
+
+
+def _kufiri_i_prefiksit(prefiksi: str) -> str:
+    # stringu i pare pas gjithe path-eve qe fillojne me prefiksin
+    return prefiksi[:-1] + chr(ord(prefiksi[-1]) + 1)
+
+
+def intervali_i_dites(data: str) -> Tuple[int, int]:
+    # "YYYY-MM-DD" (ore lokale) -> [fillim, fund) ne epoch seconds
+    dita = datetime.strptime(data, "%Y-%m-%d")
+    return int(dita.timestamp()), int((dita + timedelta(days=1)).timestamp())
+
+
+class EventRecord(NamedTuple):
+    perdoruesi: str
+    veprimi: str
+    file_path: str
+    koha: float  # epoch seconds kur ndodhi eventi
+    numri: int = 1  # sa events raw u bashkuan ne kete (coalescing ne monitor)
+    dest_path: Optional[str] = None  # vetem per MOVED; file_path eshte burimi
+    arsye: Optional[str] = None  # gjetja e detektorit; eventi ruhet suspicious
+
+    @property
+    def path_shfaqur(self) -> str:
+        return self.file_path if self.dest_path is None else self.file_path + NDARES_MOVED + self.dest_path
+
+
+class EventEksport(NamedTuple):
+    id: int
+    ts: int
+    data_ora: str
+    perdoruesi: str
+    veprimi: str
+    path: str
+    dest_path: Optional[str]
+    numri: int
+    suspicious: int
+
+
 class SecurityDatabase:
-    def __init__(self, db_name: str = "security.db"):
+    def __init__(
+        self,
+        db_name: str = "security.db",
+        pragmas: Optional[Dict[str, Any]] = None,
+        read_pool_size: int = 4,
+        cache_lru_size: int = 100_000,
+        cache_bloom_capacity: int = 1_000_000,
+        partitions_dir: Optional[str] = None,
+        cache_dim_size: int = 200_000,
+    ):
         self.db_name = db_name
+        self.lidhjet = ConnectionManager(db_name, pragmas=pragmas, read_pool_size=read_pool_size)
+        self.particionet = PartitionManager(self.lidhjet, db_name, dir=partitions_dir)
+        self.paths = DimensionCache("paths", "path", cache_dim_size)
+        self.perdoruesit = DimensionCache("perdoruesit", "emri", cache_dim_size)
+        self.dirs = DirCache(cache_dim_size)
+        self._seen_ne_pritje: List[Tuple[int, int]] = []
+        self._tx_lock = threading.RLock()
         self.krijo_tabela()
+        self.seen = SeenCache(lru_size=cache_lru_size, bloom_capacity=cache_bloom_capacity)
+        self.ngroh_cache()
+
+    def ngroh_cache(self) -> int:
+        self.seen.pastro()
+        if not self.seen.aktiv:
+            return 0
+        with self.lidhjet.reader() as conn:
+            cursor = conn.execute("SELECT path_id, perdoruesi_id FROM file_history ORDER BY id DESC")
+            return self.seen.ngarko(cursor)
 
-    def _conn(self):
-        return sqlite3.connect(self.db_name)
+    def mbyll(self) -> None:
+        self.lidhjet.close()
 
     def krijo_tabela(self) -> None:
-        conn = self._conn()
-        cursor = conn.cursor()
+        with self.lidhjet.writer() as conn:
+            cursor = conn.cursor()
+
+            # dimensionet: cdo path / perdorues ruhet nje here, events mbajne id-te
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS paths (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE
+                )
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS perdoruesit (
+                    id INTEGER PRIMARY KEY,
+                    emri TEXT NOT NULL UNIQUE
+                )
+                """
+            )
+            # pema e dosjeve; "nen /a/b" = path = '/a/b' ose range-i ['/a/b/', '/a/b0')
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dirs (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    prind_id INTEGER
+                )
+                """
+            )
+
+            cursor.execute(EVENTS_DDL.format(emri="events"))
+            cursor.execute(self._file_history_ddl("file_history"))
+            self._krijo_rollups(cursor)
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS particionet (
+                    celesi TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    fillim INTEGER NOT NULL,
+                    fund INTEGER NOT NULL,
+                    min_id INTEGER,
+                    max_id INTEGER,
+                    rreshta INTEGER,
+                    statusi TEXT NOT NULL
+                )
+                """
+            )
+            # ditet e arkivuara ne format kolonar (src.archive); numri/last_id jane
+            # gjendja e rollups kur u shkrua file-i
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS arkiva_kolonare (
+                    dita TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    rreshta INTEGER NOT NULL,
+                    min_id INTEGER,
+                    max_id INTEGER,
+                    numri INTEGER NOT NULL,
+                    last_id INTEGER NOT NULL
+                )
+                """
+            )
+
+            # baseline: gjendja e fundit e njohur e cdo file-i nen nje root te skanuar
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshot (
+                    path_id INTEGER PRIMARY KEY,
+                    rrenja_id INTEGER NOT NULL,
+                    inode INTEGER,
+                    madhesia INTEGER,
+                    mtime_ns INTEGER,
+                    uid INTEGER,
+                    skanimi INTEGER NOT NULL
+                )
+                """
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshot_rrenja ON snapshot(rrenja_id, skanimi)")
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS skanimet (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rrenja_id INTEGER NOT NULL,
+                    fillim INTEGER,
+                    fund INTEGER,
+                    statusi TEXT NOT NULL,
+                    diff INTEGER NOT NULL DEFAULT 1,
+                    files INTEGER NOT NULL DEFAULT 0,
+                    ndryshime INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            # radha e direktorive ende pa skanuar (rifillim pas nderprerjes)
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS skanim_dirs (
+                    skanimi INTEGER NOT NULL,
+                    dir TEXT NOT NULL,
+                    PRIMARY KEY (skanimi, dir)
+                )
+                """
+            )
+
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS scheduler_state (
+                    emri TEXT PRIMARY KEY,
+                    vlera INTEGER NOT NULL
+                )
+                """
+            )
+            versioni = int(cursor.execute("PRAGMA user_version").fetchone()[0])
+
+        if versioni < SCHEMA_VERSION:
+            self._migro(versioni)
+
+    def _migro(self, nga_versioni: int) -> None:
+        # Cdo hap eshte idempotent; user_version vendoset vetem pasi hapi mbaron,
+        # keshtu nje migrim i nderprere vazhdon aty ku mbeti.
+        if nga_versioni < 1:
+            with self.lidhjet.writer() as conn:
+                self._shto_kolone_nese_mungon(conn.cursor(), "events", "numri", "INTEGER DEFAULT 1")
+                conn.execute("PRAGMA user_version = 1")
+
+        if nga_versioni < 2:
+            with self.lidhjet.writer() as conn:
+                cursor = conn.cursor()
+                self._shto_kolone_nese_mungon(cursor, "events", "ts", "INTEGER")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_ts ON events(ts)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_events_suspicious_ts ON events(suspicious, ts)")
+            mbushur = self._backfill_ts()
+            if mbushur:
+                logging.info("Migrimi: u plotesua ts per %d events", mbushur)
+            with self.lidhjet.writer() as conn:
+                conn.execute("PRAGMA user_version = 2")
+
+        if nga_versioni < 3:
+            # rollups u shtuan ne v3; ndertohen nga events ne fund te v5,
+            # pasi events te jene ne skemen me id
+            with self.lidhjet.writer() as conn:
+                conn.execute("PRAGMA user_version = 3")
+
+        if nga_versioni < 4:
+            # keyset per kontrollet inkrementale suspicious (id > cursor)
+            with self.lidhjet.writer() as conn:
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_events_suspicious_id ON events(id) WHERE suspicious = 1")
+                conn.execute("PRAGMA user_version = 4")
+
+        if nga_versioni < 5:
+            # paths/perdoruesit si dimensione; MOVED ndahet ne path_id + dest_path_id.
+            # Particionet aktive migrohen ne vend; arkivat .gz mbeten ashtu si jane.
+            for burimi in self.particionet.burimet()[1:]:
+                self._normalizo_events(burimi)
+            n = self._normalizo_events(None)
+            if n:
+                logging.info("Migrimi: %d events u kaluan ne skemen me dimensione", n)
+            self._normalizo_file_history()
+            with self.lidhjet.writer() as conn:
+                # rollups per perdorues ishin me emer; rindertohen me id
+                conn.execute("DROP TABLE IF EXISTS stats_perdoruesit")
+                conn.execute("DROP TABLE IF EXISTS stats_dita_perdoruesi")
+            self.rindertoj_rollups()
+            with self.lidhjet.writer() as conn:
+                conn.execute("PRAGMA user_version = 5")
+
+        if nga_versioni < 6:
+            # dir_id/dest_dir_id per kerkimet "nen kete dosje"; edhe particionet aktive
+            for burimi in [None] + self.particionet.burimet()[1:]:
+                n = self._backfill_dirs(burimi)
+                if n:
+                    logging.info("Migrimi: dir_id u plotesua per %d events (%s)", n, burimi or "main")
+            with self.lidhjet.writer() as conn:
+                conn.execute("PRAGMA user_version = 6")
+
+        if nga_versioni < 7:
+            # ADD COLUMN pa vlere default: vetem skema ndryshon, rreshtat nuk preken
+            for burimi in [None] + self.particionet.burimet()[1:]:
+                schema = "main" if burimi is None else "part"
+                with self.transaksion(burimi) as conn:
+                    self._shto_kolone_nese_mungon(conn.cursor(), f"{schema}.events", "arsye", "TEXT")
+            with self.lidhjet.writer() as conn:
+                conn.execute("PRAGMA user_version = 7")
+
+    @staticmethod
+    def _file_history_ddl(emri: str) -> str:
+        return f"""
+            CREATE TABLE IF NOT EXISTS {emri} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                path_id INTEGER NOT NULL,
+                perdoruesi_id INTEGER NOT NULL,
+                sa_here INTEGER DEFAULT 1,
+                UNIQUE(path_id, perdoruesi_id)
+            )
+        """
+
+    @contextmanager
+    def transaksion(self, burimi: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+        # Transaksion writer-i (opsionalisht me particionin e bashkangjitur si "part").
+        # Id-te e reja te dimensioneve dhe ciftet e reja ne file_history hyjne ne
+        # cache vetem pas commit-it; nje rollback i hedh. _tx_lock mbulon edhe
+        # konfirmimin, qe nje transaksion tjeter te mos nderhyje ndermjet.
+        with self._tx_lock:
+            t = time.perf_counter()
+            try:
+                with self.lidhjet.writer() as conn:
+                    if burimi is None:
+                        yield conn
+                    else:
+                        with PartitionManager._bashkangjit_rw(conn, burimi):
+                            yield conn
+            except BaseException:
+                _TX_ROLLBACK.inc()
+                self.paths.anulo()
+                self.perdoruesit.anulo()
+                self.dirs.anulo()
+                self._seen_ne_pritje.clear()
+                raise
+            _TX_KOHA.observe(time.perf_counter() - t)
+            self.paths.konfirmo()
+            self.perdoruesit.konfirmo()
+            self.dirs.konfirmo()
+            for celesi in self._seen_ne_pritje:
+                self.seen.shto(celesi)
+            self._seen_ne_pritje.clear()
+
+    def _ndaj_path(self, cursor: sqlite3.Cursor, veprimi: str, file_path: str) -> Tuple[int, Optional[int]]:
+        if veprimi == "MOVED" and NDARES_MOVED in file_path:
+            src, dest = file_path.split(NDARES_MOVED, 1)
+            return self.paths.id_per(cursor, src), self.paths.id_per(cursor, dest)
+        return self.paths.id_per(cursor, file_path), None
+
+    def _normalizo_events(self, burimi: Optional[str], chunk: Optional[int] = None) -> int:
+        # Kopjon events ne events_v5 me chunk-e (transaksion me vete secili, rifillon
+        # nga MAX(id) pas nderprerjes), pastaj nderron tabelat ne nje transaksion.
+        chunk = chunk or BACKFILL_CHUNK
+        schema = "main" if burimi is None else "part"
+        with self.transaksion(burimi) as conn:
+            kolonat = {r[1] for r in conn.execute(f"PRAGMA {schema}.table_info(events)")}
+            if "perdoruesi_id" in kolonat:
+                return 0
+            conn.execute(EVENTS_DDL.format(emri=f"{schema}.events_v5"))
+
+        totali = 0
+        while True:
+            with self.transaksion(burimi) as conn:
+                cursor = conn.cursor()
+                i_fundit = cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {schema}.events_v5").fetchone()[0]
+                rreshtat = cursor.execute(
+                    f"""
+                    SELECT id, data_ora, perdoruesi, veprimi, file_path, suspicious, numri, ts
+                    FROM {schema}.events WHERE id > ? ORDER BY id LIMIT ?
+                    """,
+                    (i_fundit, chunk),
+                ).fetchall()
+                te_reja = []
+                for id_, data_ora, perdoruesi, veprimi, file_path, suspicious, numri, ts in rreshtat:
+                    path_id, dest_id = self._ndaj_path(cursor, veprimi, file_path or "")
+                    perdoruesi_id = self.perdoruesit.id_per(cursor, perdoruesi or "")
+                    te_reja.append((id_, data_ora, perdoruesi_id, veprimi, path_id, dest_id, suspicious, numri, ts))
+                cursor.executemany(
+                    f"""
+                    INSERT INTO {schema}.events_v5
+                        (id, data_ora, perdoruesi_id, veprimi, path_id, dest_path_id, suspicious, numri, ts)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    te_reja,
+                )
+            totali += len(rreshtat)
+            if len(rreshtat) < chunk:
+                break
+
+        with self.transaksion(burimi) as conn:
+            # AUTOINCREMENT: sekuenca e vjeter ruhet, qe id-te e reja te mos perplasen
+            # me ato te particioneve (ose me cursor-in e scheduler-it)
+            seq = conn.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = 'events'").fetchone()
+            conn.execute(f"DROP TABLE {schema}.events")
+            conn.execute(f"ALTER TABLE {schema}.events_v5 RENAME TO events")
+            if seq is not None:
+                conn.execute(
+                    f"UPDATE {schema}.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'events'", (seq[0],)
+                )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_events_ts ON events(ts)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_events_suspicious_ts ON events(suspicious, ts)")
+            if burimi is None:
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_events_suspicious_id ON events(id) WHERE suspicious = 1"
+                )
+        return totali
+
+    def _backfill_dirs(self, burimi: Optional[str], chunk: Optional[int] = None) -> int:
+        # chunk-e sipas id-se; rreshtat me dir_id tashme te vendosur kapercehen,
+        # keshtu nje migrim i nderprere vazhdon. Indekset krijohen ne fund.
+        chunk = chunk or BACKFILL_CHUNK
+        schema = "main" if burimi is None else "part"
+        with self.transaksion(burimi) as conn:
+            cursor = conn.cursor()
+            self._shto_kolone_nese_mungon(cursor, f"{schema}.events", "dir_id", "INTEGER")
+            self._shto_kolone_nese_mungon(cursor, f"{schema}.events", "dest_dir_id", "INTEGER")
+
+        totali, pas_id = 0, 0
+        while True:
+            with self.transaksion(burimi) as conn:
+                cursor = conn.cursor()
+                rreshtat = cursor.execute(
+                    f"""
+                    SELECT e.id, p.path, d.path
+                    FROM {schema}.events AS e
+                    JOIN main.paths AS p ON p.id = e.path_id
+                    LEFT JOIN main.paths AS d ON d.id = e.dest_path_id
+                    WHERE e.id > ? AND e.dir_id IS NULL
+                    ORDER BY e.id
+                    LIMIT ?
+                    """,
+                    (pas_id, chunk),
+                ).fetchall()
+                cursor.executemany(
+                    f"UPDATE {schema}.events SET dir_id = ?, dest_dir_id = ? WHERE id = ?",
+                    [
+                        (
+                            self.dirs.id_per(cursor, dosja_e(path)),
+                            None if dest is None else self.dirs.id_per(cursor, dosja_e(dest)),
+                            id_,
+                        )
+                        for id_, path, dest in rreshtat
+                    ],
+                )
+            totali += len(rreshtat)
+            if len(rreshtat) < chunk:
+                break
+            pas_id = rreshtat[-1][0]
 
+        with self.transaksion(burimi) as conn:
+            for ddl in DIR_INDEKSET:
+                conn.execute(ddl.format(schema=f"{schema}."))
+        return totali
+
+    def _normalizo_file_history(self) -> None:
+        with self.transaksion() as conn:
+            cursor = conn.cursor()
+            kolonat = {r[1] for r in cursor.execute("PRAGMA table_info(file_history)")}
+            if "path_id" in kolonat:
+                return
+            cursor.execute(self._file_history_ddl("file_history_v5"))
+            # rendi i id-ve ruhet (ngroh_cache lexon me te rejat te parat); ciftet
+            # "src -> dest" te vjetra bashkohen te burimi
+            for file_path, perdoruesi, sa_here in conn.execute(
+                "SELECT file_path, perdoruesi, sa_here FROM file_history ORDER BY id"
+            ).fetchall():
+                path_id, _ = self._ndaj_path(cursor, "MOVED", file_path or "")
+                cursor.execute(
+                    """
+                    INSERT INTO file_history_v5 (path_id, perdoruesi_id, sa_here) VALUES (?, ?, ?)
+                    ON CONFLICT(path_id, perdoruesi_id) DO UPDATE SET sa_here = sa_here + excluded.sa_here
+                    """,
+                    (path_id, self.perdoruesit.id_per(cursor, perdoruesi or ""), sa_here or 1),
+                )
+            cursor.execute("DROP TABLE file_history")
+            cursor.execute("ALTER TABLE file_history_v5 RENAME TO file_history")
+
+    @staticmethod
+    def _krijo_rollups(cursor: sqlite3.Cursor) -> None:
+        # Tabela permbledhese qe perditesohen ne te njejtin transaksion me events.
         cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                data_ora TEXT,
-                perdoruesi TEXT,
+            CREATE TABLE IF NOT EXISTS stats_global (
+                celesi TEXT PRIMARY KEY,
+                vlera INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats_perdoruesit (
+                perdoruesi_id INTEGER PRIMARY KEY,
+                numri INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stats_dita_veprimi (
+                dita TEXT,
                 veprimi TEXT,
-                file_path TEXT,
-                suspicious INTEGER
+                numri INTEGER NOT NULL DEFAULT 0,
+                suspicious INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (dita, veprimi)
             )
             """
         )
-
+        # last_ts/last_id ruajne renditjen e barazimeve te top-5 ne raport
         cursor.execute(
             """
-            CREATE TABLE IF NOT EXISTS file_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                file_path TEXT,
-                perdoruesi TEXT,
-                sa_here INTEGER DEFAULT 1,
-                UNIQUE(file_path, perdoruesi)
+            CREATE TABLE IF NOT EXISTS stats_dita_perdoruesi (
+                dita TEXT,
+                perdoruesi_id INTEGER,
+                numri INTEGER NOT NULL DEFAULT 0,
+                last_ts INTEGER,
+                last_id INTEGER,
+                PRIMARY KEY (dita, perdoruesi_id)
             )
             """
         )
 
-        conn.commit()
-        conn.close()
+    def rindertoj_rollups(self) -> Dict[str, int]:
+        # Rindertim i plote nga events raw (DB kryesore + particionet aktive).
+        # Particionet lexohen me reader; shkrimi behet ne nje transaksion te vetem.
+        # Ditet e particioneve te arkivuara (.gz) nuk kane me events raw: rreshtat
+        # e tyre stats_dita_* ruhen dhe prej tyre rillogariten totalet.
+        nga_particionet = []
+        for burimi in self.particionet.burimet()[1:]:
+            with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                nga_particionet.append(self._agrego_rollups(conn, tabela))
+        arkivuar = [p.celesi for p in self.particionet.lista(vetem_aktive=False) if p.statusi == STATUS_ARKIVUAR]
+        jo_arkivuar = " AND ".join(["substr(dita, 1, ?) != ?"] * len(arkivuar)) or "1"
+        parametrat = [v for celesi in arkivuar for v in (len(celesi), celesi)]
 
-    def shto_event(self, perdoruesi: str, veprimi: str, file_path: str) -> int:
-        conn = self._conn()
-        cursor = conn.cursor()
+        with self.lidhjet.writer() as conn:
+            cursor = conn.cursor()
+            self._krijo_rollups(cursor)
+            for tabela in ("stats_dita_veprimi", "stats_dita_perdoruesi"):
+                cursor.execute(f"DELETE FROM {tabela} WHERE {jo_arkivuar}", parametrat)
+            for tabela in ("stats_global", "stats_perdoruesit"):
+                cursor.execute(f"DELETE FROM {tabela}")
+            cursor.execute(
+                """
+                INSERT INTO stats_perdoruesit (perdoruesi_id, numri)
+                SELECT perdoruesi_id, SUM(numri) FROM stats_dita_perdoruesi GROUP BY perdoruesi_id
+                """
+            )
+            cursor.execute(
+                """
+                INSERT INTO stats_global (celesi, vlera)
+                SELECT 'total_events', COALESCE(SUM(numri), 0) FROM stats_dita_veprimi
+                UNION ALL
+                SELECT 'suspicious_events', COALESCE(SUM(suspicious), 0) FROM stats_dita_veprimi
+                """
+            )
 
-        tani = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            te_gjitha = [self._agrego_rollups(conn, "main.events")] + nga_particionet
+            for perdoruesit, dita_veprimi, dita_perdoruesi, total, suspicious in te_gjitha:
+                cursor.executemany(
+                    """
+                    INSERT INTO stats_perdoruesit (perdoruesi_id, numri) VALUES (?, ?)
+                    ON CONFLICT(perdoruesi_id) DO UPDATE SET numri = numri + excluded.numri
+                    """,
+                    perdoruesit,
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO stats_dita_veprimi (dita, veprimi, numri, suspicious) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(dita, veprimi) DO UPDATE SET
+                        numri = numri + excluded.numri, suspicious = suspicious + excluded.suspicious
+                    """,
+                    dita_veprimi,
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO stats_dita_perdoruesi (dita, perdoruesi_id, numri, last_ts, last_id) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(dita, perdoruesi_id) DO UPDATE SET
+                        numri = numri + excluded.numri,
+                        last_ts = MAX(last_ts, excluded.last_ts),
+                        last_id = MAX(last_id, excluded.last_id)
+                    """,
+                    dita_perdoruesi,
+                )
+                cursor.executemany(
+                    """
+                    INSERT INTO stats_global (celesi, vlera) VALUES (?, ?)
+                    ON CONFLICT(celesi) DO UPDATE SET vlera = vlera + excluded.vlera
+                    """,
+                    [("total_events", total), ("suspicious_events", suspicious)],
+                )
+            cursor.execute(
+                """
+                INSERT INTO stats_global (celesi, vlera)
+                SELECT 'perdorues_aktive', COUNT(*) FROM stats_perdoruesit
+                """
+            )
+            return dict(cursor.execute("SELECT celesi, vlera FROM stats_global").fetchall())
 
-        cursor.execute(
+    @staticmethod
+    def _agrego_rollups(conn: sqlite3.Connection, tabela: str):
+        perdoruesit = conn.execute(f"SELECT perdoruesi_id, COUNT(*) FROM {tabela} GROUP BY perdoruesi_id").fetchall()
+        dita_veprimi = conn.execute(
+            f"""
+            SELECT substr(data_ora, 1, 10), veprimi, COUNT(*), SUM(suspicious = 1)
+            FROM {tabela} GROUP BY substr(data_ora, 1, 10), veprimi
             """
-            SELECT id FROM file_history
-            WHERE file_path = ? AND perdoruesi = ?
-            """,
-            (file_path, perdoruesi),
-        )
+        ).fetchall()
+        dita_perdoruesi = conn.execute(
+            f"""
+            SELECT substr(data_ora, 1, 10), perdoruesi_id, COUNT(*), MAX(ts), MAX(id)
+            FROM {tabela} GROUP BY substr(data_ora, 1, 10), perdoruesi_id
+            """
+        ).fetchall()
+        total, suspicious = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(suspicious = 1), 0) FROM {tabela}"
+        ).fetchone()
+        return perdoruesit, dita_veprimi, dita_perdoruesi, total, suspicious
 
-        ka_me_pare = cursor.fetchone() is not None
-        eshte_suspicious = 0 if ka_me_pare else 1
+    @staticmethod
+    def _perditeso_rollups(cursor: sqlite3.Cursor, rreshtat: List[Tuple[str, int, str, int, int, int]]) -> None:
+        # rreshtat: (dita, perdoruesi_id, veprimi, suspicious, ts, event_id) per batch-in.
+        # Agregohen ne Python qe cdo celes te preket vetem nje here per batch.
+        dita_veprimi: Dict[Tuple[str, str], List[int]] = {}
+        dita_perdoruesi: Dict[Tuple[str, int], List[int]] = {}
+        perdoruesit: Dict[int, int] = {}
+        suspicious_total = 0
+        for dita, perdoruesi, veprimi, suspicious, ts, event_id in rreshtat:
+            dv = dita_veprimi.setdefault((dita, veprimi), [0, 0])
+            dv[0] += 1
+            dv[1] += suspicious
+            dp = dita_perdoruesi.setdefault((dita, perdoruesi), [0, ts, event_id])
+            dp[0] += 1
+            dp[1] = max(dp[1], ts)
+            dp[2] = max(dp[2], event_id)
+            perdoruesit[perdoruesi] = perdoruesit.get(perdoruesi, 0) + 1
+            suspicious_total += suspicious
 
-        cursor.execute(
+        perdorues_te_rinj = 0
+        for perdoruesi, n in perdoruesit.items():
+            cursor.execute(
+                "INSERT OR IGNORE INTO stats_perdoruesit (perdoruesi_id, numri) VALUES (?, 0)", (perdoruesi,)
+            )
+            perdorues_te_rinj += cursor.rowcount
+            cursor.execute(
+                "UPDATE stats_perdoruesit SET numri = numri + ? WHERE perdoruesi_id = ?", (n, perdoruesi)
+            )
+        cursor.executemany(
             """
-            INSERT INTO events (data_ora, perdoruesi, veprimi, file_path, suspicious)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO stats_dita_veprimi (dita, veprimi, numri, suspicious) VALUES (?, ?, ?, ?)
+            ON CONFLICT(dita, veprimi) DO UPDATE SET
+                numri = numri + excluded.numri, suspicious = suspicious + excluded.suspicious
             """,
-            (tani, perdoruesi, veprimi, file_path, eshte_suspicious),
+            [(d, v, n, s) for (d, v), (n, s) in dita_veprimi.items()],
         )
+        cursor.executemany(
+            """
+            INSERT INTO stats_dita_perdoruesi (dita, perdoruesi_id, numri, last_ts, last_id) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(dita, perdoruesi_id) DO UPDATE SET
+                numri = numri + excluded.numri,
+                last_ts = MAX(last_ts, excluded.last_ts),
+                last_id = MAX(last_id, excluded.last_id)
+            """,
+            [(d, p, n, t, i) for (d, p), (n, t, i) in dita_perdoruesi.items()],
+        )
+        cursor.executemany(
+            """
+            INSERT INTO stats_global (celesi, vlera) VALUES (?, ?)
+            ON CONFLICT(celesi) DO UPDATE SET vlera = vlera + excluded.vlera
+            """,
+            [
+                ("total_events", len(rreshtat)),
+                ("suspicious_events", suspicious_total),
+                ("perdorues_aktive", perdorues_te_rinj),
+            ],
+        )
+
+    def _backfill_ts(self, chunk: Optional[int] = None) -> int:
+        # data_ora eshte ore lokale; 'utc' e kthen ne UTC para '%s'. Nje transaksion
+        # per chunk, qe writer-i (ose nje proces tjeter) te futet ndermjet tyre.
+        chunk = chunk or BACKFILL_CHUNK
+        totali = 0
+        while True:
+            with self.lidhjet.writer() as conn:
+                cursor = conn.execute(
+                    """
+                    UPDATE events
+                    SET ts = COALESCE(CAST(strftime('%s', data_ora, 'utc') AS INTEGER), 0)
+                    WHERE id IN (SELECT id FROM events WHERE ts IS NULL ORDER BY id LIMIT ?)
+                    """,
+                    (chunk,),
+                )
+                n = cursor.rowcount
+            totali += max(n, 0)
+            if n < chunk:
+                return totali
+
+    @staticmethod
+    def _shto_kolone_nese_mungon(cursor: sqlite3.Cursor, tabela: str, kolona: str, tipi: str) -> None:
+        # DB te vjetra (para kesaj kolone) marrin ALTER ne vend
+        schema, _, emri = tabela.rpartition(".")
+        pragma = f"PRAGMA {schema}.table_info({emri})" if schema else f"PRAGMA table_info({emri})"
+        kolonat = {r[1] for r in cursor.execute(pragma)}
+        if kolona not in kolonat:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {kolona} {tipi}")
+
+    def shto_event(self, perdoruesi: str, veprimi: str, file_path: str) -> int:
+        rezultati = self.shto_events([EventRecord(perdoruesi, veprimi, file_path, time.time())])
+        return rezultati[0][1]
+
+    def shto_events(
+        self, events: Sequence[EventRecord], cursor: Optional[Tuple[str, int]] = None
+    ) -> List[Tuple[int, int]]:
+        # Nje transaksion per gjithe batch-in. Kthen (event_id, suspicious) ne te
+        # njejtin rend; verdikti eshte i njejte sikur eventet te shtoheshin nje nga nje.
+        # `cursor` (emri, vlera) ruhet ne te njejtin commit (p.sh. seq i journal-it).
+        if not events:
+            return []
+        with self.transaksion() as conn:
+            rezultati = self.shkruaj_events(conn.cursor(), events)
+            if cursor is not None:
+                self._vendos_cursor(conn, *cursor)
+            return rezultati
+
+    def shkruaj_events(self, cursor: sqlite3.Cursor, events: Sequence[EventRecord]) -> List[Tuple[int, int]]:
+        # si shto_events, por brenda nje transaksion()-i te hapur nga thirresi
+        # (p.sh. baseline shkruan events + snapshot ne te njejtin commit)
+        rezultati: List[Tuple[int, int]] = []
+        pare_ne_batch = set()
+        rollup_rreshta = []
+
+        if not events:
+            return rezultati
+        for ev in events:
+            # id-te vijne nga cache-i ne memorie; query vetem per path/user te ri
+            perdoruesi_id = self.perdoruesit.id_per(cursor, ev.perdoruesi)
+            path_id = self.paths.id_per(cursor, ev.file_path)
+            dest_id = None if ev.dest_path is None else self.paths.id_per(cursor, ev.dest_path)
+            dir_id = self.dirs.id_per(cursor, dosja_e(ev.file_path))
+            dest_dir_id = None if ev.dest_path is None else self.dirs.id_per(cursor, dosja_e(ev.dest_path))
+            celesi = (path_id, perdoruesi_id)
+            if celesi in pare_ne_batch:
+                ka_me_pare = True
+            else:
+                with profil("db.first_seen"):
+                    ka_me_pare = self.seen.kontrollo(celesi)
+                    if ka_me_pare is None:
+                        cursor.execute(
+                            """
+                            SELECT id FROM file_history
+                            WHERE path_id = ? AND perdoruesi_id = ?
+                            """,
+                            celesi,
+                        )
+                        ka_me_pare = cursor.fetchone() is not None
+                        self.seen.rezultat_db(celesi, ka_me_pare)
+            eshte_suspicious = 0 if ka_me_pare and ev.arsye is None else 1
+            arsye = ev.arsye or (None if ka_me_pare else ARSYE_E_RE)
+            data_ora = datetime.fromtimestamp(ev.koha).strftime("%Y-%m-%d %H:%M:%S")
 
-        if not ka_me_pare:
             cursor.execute(
                 """
-                INSERT OR IGNORE INTO file_history (file_path, perdoruesi)
-                VALUES (?, ?)
+                INSERT INTO events
+                    (data_ora, perdoruesi_id, veprimi, path_id, dest_path_id, suspicious, numri, ts,
+                     dir_id, dest_dir_id, arsye)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
-                (file_path, perdoruesi),
+                (data_ora, perdoruesi_id, ev.veprimi, path_id, dest_id, eshte_suspicious, ev.numri, int(ev.koha),
+                 dir_id, dest_dir_id, arsye),
+            )
+            event_id = int(cursor.lastrowid)
+            rezultati.append((event_id, eshte_suspicious))
+            rollup_rreshta.append(
+                (data_ora[:10], perdoruesi_id, ev.veprimi, eshte_suspicious, int(ev.koha), event_id)
             )
-        else:
+
             cursor.execute(
                 """
-                UPDATE file_history
-                SET sa_here = sa_here + 1
-                WHERE file_path = ? AND perdoruesi = ?
+                INSERT INTO file_history (path_id, perdoruesi_id)
+                VALUES (?, ?)
+                ON CONFLICT(path_id, perdoruesi_id) DO UPDATE SET sa_here = sa_here + 1
                 """,
-                (file_path, perdoruesi),
+                celesi,
             )
+            if not ka_me_pare:
+                self._seen_ne_pritje.append(celesi)
+            pare_ne_batch.add(celesi)
 
-        conn.commit()
-        conn.close()
-        return eshte_suspicious
-
-    def statistika(self) -> Dict[str, int]:
-        conn = self._conn()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM events")
-        total = int(cursor.fetchone()[0])
+        with profil("db.rollups"):
+            self._perditeso_rollups(cursor, rollup_rreshta)
+        _DB_EVENTS.inc(len(rezultati))
+        _DB_SUSPICIOUS.inc(sum(s for _, s in rezultati))
+        return rezultati
 
-        cursor.execute("SELECT COUNT(*) FROM events WHERE suspicious = 1")
-        suspicious = int(cursor.fetchone()[0])
+    def seed_file_history(self, cursor: sqlite3.Cursor, ciftet: Sequence[Tuple[int, int]]) -> int:
+        # baseline: (path_id, perdoruesi_id) qe konsiderohen "te njohura" pa event;
+        # brenda nje transaksion()-i. Ciftet ekzistuese nuk preken.
+        n = 0
+        for celesi in ciftet:
+            cursor.execute("INSERT OR IGNORE INTO file_history (path_id, perdoruesi_id) VALUES (?, ?)", celesi)
+            if cursor.rowcount > 0:
+                self._seen_ne_pritje.append(tuple(celesi))
+                n += 1
+        return n
 
-        cursor.execute("SELECT COUNT(DISTINCT perdoruesi) FROM events")
-        perdorues = int(cursor.fetchone()[0])
-
-        conn.close()
+    def statistika(self) -> Dict[str, int]:
+        # O(1): lexim nga stats_global (mbahet nga shto_events / rindertoj_rollups)
+        with self.lidhjet.reader() as conn:
+            vlerat = dict(conn.execute("SELECT celesi, vlera FROM stats_global").fetchall())
 
         return {
-            "total_events": total,
-            "suspicious_events": suspicious,
-            "perdorues_aktive": perdorues,
+            "total_events": int(vlerat.get("total_events", 0)),
+            "suspicious_events": int(vlerat.get("suspicious_events", 0)),
+            "perdorues_aktive": int(vlerat.get("perdorues_aktive", 0)),
         }
 
     def merr_suspicious_events(self, limit: int = 50) -> List[EventRow]:
-        conn = self._conn()
-        cursor = conn.cursor()
+        # me te rejat ne fillim: DB kryesore, pastaj particionet nga me i riu
+        events: List[EventRow] = []
+        for burimi in self.particionet.burimet(rend="desc"):
+            if len(events) >= limit:
+                break
+            with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                events += conn.execute(
+                    f"""
+                    SELECT {EVENT_KOLONAT}
+                    FROM {event_burimi(tabela)}
+                    WHERE e.suspicious = 1
+                    ORDER BY e.ts DESC, e.id
+                    LIMIT ?
+                    """,
+                    (limit - len(events),),
+                ).fetchall()
+        return events
 
-        cursor.execute(
+    def merr_cursor(self, emri: str) -> Optional[int]:
+        with self.lidhjet.reader() as conn:
+            rresht = conn.execute("SELECT vlera FROM scheduler_state WHERE emri = ?", (emri,)).fetchone()
+        return None if rresht is None else int(rresht[0])
+
+    def vendos_cursor(self, emri: str, vlera: int) -> None:
+        # cursor-i vetem ecen perpara; nje thirrje e vonuar nuk e kthen mbrapa
+        with self.lidhjet.writer() as conn:
+            self._vendos_cursor(conn, emri, vlera)
+
+    @staticmethod
+    def _vendos_cursor(conn: sqlite3.Connection, emri: str, vlera: int) -> None:
+        conn.execute(
             """
-            SELECT id, data_ora, perdoruesi, veprimi, file_path, suspicious
-            FROM events
-            WHERE suspicious = 1
-            ORDER BY data_ora DESC
-            LIMIT ?
+            INSERT INTO scheduler_state (emri, vlera) VALUES (?, ?)
+            ON CONFLICT(emri) DO UPDATE SET vlera = MAX(vlera, excluded.vlera)
             """,
-            (limit,),
+            (emri, int(vlera)),
         )
 
-        events = cursor.fetchall()
-        conn.close()
+    def merr_suspicious_pas(self, pas_id: int, limit: int = 200) -> List[EventRow]:
+        # keyset: vetem events suspicious me id > pas_id, ne rend rrites. Particionet
+        # lexohen vetem nese max_id i tyre eshte pas cursor-it.
+        events: List[EventRow] = []
+        for burimi in self.particionet.burimet(pas_id=pas_id, rend="asc"):
+            if len(events) >= limit:
+                break
+            with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                events += conn.execute(
+                    f"""
+                    SELECT {EVENT_KOLONAT}
+                    FROM {event_burimi(tabela)}
+                    WHERE e.suspicious = 1 AND e.id > ?
+                    ORDER BY e.id
+                    LIMIT ?
+                    """,
+                    (int(pas_id), limit - len(events)),
+                ).fetchall()
         return events
+
+    def itero_events(
+        self,
+        nga: Optional[float] = None,
+        deri: Optional[float] = None,
+        perdoruesi: Optional[str] = None,
+        veprimet: Optional[Sequence[str]] = None,
+        prefiksi: Optional[str] = None,
+        suspicious: Optional[bool] = None,
+        pas_id: int = 0,
+        faqja: int = 1000,
+    ) -> Iterator[EventEksport]:
+        # Keyset mbi id (rend rrites): faqe me `faqja` rreshta, secila me lexuesin
+        # e vet, keshtu memoria dhe transaksionet e leximit mbeten te vogla. Id-te
+        # rriten me cdo shkrim, ndaj `pas_id` i rreshtit te fundit vazhdon nje
+        # eksport pa humbur events te reja (edhe me ts te vonuar). [nga, deri) ne epoch.
+        faqja = max(1, int(faqja))
+        with self.lidhjet.reader() as conn:
+            perdoruesi_id = None
+            if perdoruesi is not None:
+                rresht = conn.execute("SELECT id FROM perdoruesit WHERE emri = ?", (perdoruesi,)).fetchone()
+                if rresht is None:
+                    return
+                perdoruesi_id = rresht[0]
+
+        kushtet, parametrat = [], []
+        if nga is not None:
+            # +e.ts / +e.suspicious: filtrat nuk duhet te zevendesojne skanimin sipas
+            # id-se me nje indeks qe kerkon renditje te plote per cdo faqe
+            kushtet.append("+e.ts >= ?")
+            parametrat.append(int(nga))
+        if deri is not None:
+            kushtet.append("+e.ts < ?")
+            parametrat.append(int(deri))
+        if perdoruesi_id is not None:
+            kushtet.append("e.perdoruesi_id = ?")
+            parametrat.append(perdoruesi_id)
+        if veprimet:
+            kushtet.append(f"e.veprimi IN ({','.join('?' * len(veprimet))})")
+            parametrat += list(veprimet)
+        if prefiksi:
+            kufiri = _kufiri_i_prefiksit(prefiksi)
+            kushtet.append("((p.path >= ? AND p.path < ?) OR (d.path >= ? AND d.path < ?))")
+            parametrat += [prefiksi, kufiri, prefiksi, kufiri]
+        if suspicious is not None:
+            kushtet.append("+e.suspicious = ?")
+            parametrat.append(1 if suspicious else 0)
+        ku = "".join(f" AND {k}" for k in kushtet)
+
+        pas_id = int(pas_id)
+        for burimi in self.particionet.burimet(nga, deri, pas_id=pas_id, rend="asc"):
+            fund_id = None
+            if nga is not None or deri is not None:
+                # kufijte e id-se per intervalin, nje here per burim (indeksi ts)
+                with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                    min_id, fund_id = conn.execute(
+                        f"SELECT MIN(id), MAX(id) FROM {tabela} WHERE ts >= ? AND ts < ?",
+                        (int(nga) if nga is not None else -2**63, int(deri) if deri is not None else 2**63 - 1),
+                    ).fetchone()
+                if min_id is None:
+                    continue
+                pas_id = max(pas_id, min_id - 1)
+            while True:
+                with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                    rreshtat = conn.execute(
+                        f"""
+                        SELECT {EKSPORT_KOLONAT}
+                        FROM {event_burimi(tabela)}
+                        WHERE e.id > ?{" AND e.id <= ?" if fund_id is not None else ""}{ku}
+                        ORDER BY e.id
+                        LIMIT ?
+                        """,
+                        [pas_id] + ([fund_id] if fund_id is not None else []) + parametrat + [faqja],
+                    ).fetchall()
+                for r in rreshtat:
+                    yield EventEksport(*r)
+                if len(rreshtat) < faqja:
+                    break
+                pas_id = rreshtat[-1][0]
+
+    def itero_nen_dosje(
+        self,
+        dosja: str,
+        nga: Optional[float] = None,
+        deri: Optional[float] = None,
+        perdoruesi: Optional[str] = None,
+        veprimet: Optional[Sequence[str]] = None,
+        rend: str = "desc",
+        faqja: int = 1000,
+    ) -> Iterator[EventEksport]:
+        # Events me burim ose destinacion nen `dosja`, ne rend (ts, id). Nenpema
+        # vjen nga range-i mbi dirs.path; per pak dosje, nje kursor keyset per
+        # dosje mbi idx_events_dir_ts (+ dest) bashkohen me heapq.merge, ndryshe
+        # skanohet idx_events_ts me filtrin e nenpemes. Asgje nuk mbahet ne memorie
+        # pertej nje faqeje per kursor.
+        dosja = dosja.rstrip("/") or "/"
+        prefiksi = "/" if dosja == "/" else dosja + "/"
+        nenpema = "(path = ? OR (path >= ? AND path < ?))"
+        nenpema_param = [dosja, prefiksi, _kufiri_i_prefiksit(prefiksi)]
+
+        with self.lidhjet.reader() as conn:
+            perdoruesi_id = None
+            if perdoruesi is not None:
+                rresht = conn.execute("SELECT id FROM perdoruesit WHERE emri = ?", (perdoruesi,)).fetchone()
+                if rresht is None:
+                    return
+                perdoruesi_id = rresht[0]
+            dir_ids = [
+                r[0]
+                for r in conn.execute(
+                    f"SELECT id FROM dirs WHERE {nenpema} LIMIT ?", nenpema_param + [DOSJE_MERGE_MAX + 1]
+                )
+            ]
+        if not dir_ids:
+            return
+
+        kushtet, parametrat = [], []
+        if nga is not None:
+            kushtet.append("e.ts >= ?")
+            parametrat.append(int(nga))
+        if deri is not None:
+            kushtet.append("e.ts < ?")
+            parametrat.append(int(deri))
+        if perdoruesi_id is not None:
+            kushtet.append("e.perdoruesi_id = ?")
+            parametrat.append(perdoruesi_id)
+        if veprimet:
+            kushtet.append(f"e.veprimi IN ({','.join('?' * len(veprimet))})")
+            parametrat += list(veprimet)
+
+        kursoret = []
+        for burimi in self.particionet.burimet(nga, deri, rend=rend):
+            if len(dir_ids) > DOSJE_MERGE_MAX:
+                # "+": indeksi ts mban rendin; nenpema kontrollohet per rresht
+                filtri = (
+                    f"(+e.dir_id IN (SELECT id FROM main.dirs WHERE {nenpema})"
+                    f" OR +e.dest_dir_id IN (SELECT id FROM main.dirs WHERE {nenpema}))"
+                )
+                kursoret.append(
+                    self._faqet_sipas_ts(burimi, [filtri] + kushtet, nenpema_param * 2 + parametrat, rend, faqja)
+                )
+                continue
+            for dir_id in dir_ids:
+                for kolona in ("e.dir_id", "e.dest_dir_id"):
+                    kursoret.append(
+                        self._faqet_sipas_ts(burimi, [f"{kolona} = ?"] + kushtet, [dir_id] + parametrat, rend, faqja)
+                    )
+
+        # nje event me burim dhe destinacion ne nenpeme vjen nga dy kursore, me
+        # celes identik, pra njeri pas tjetrit
+        i_fundit = None
+        for r in heapq.merge(*kursoret, key=lambda r: (r.ts, r.id), reverse=rend == "desc"):
+            if r.id != i_fundit:
+                i_fundit = r.id
+                yield r
+
+    def _faqet_sipas_ts(
+        self, burimi: Optional[str], kushtet: List[str], parametrat: List[Any], rend: str, faqja: int
+    ) -> Iterator[EventEksport]:
+        # keyset mbi (ts, id); faqja e pare e vogel, pastaj dyfishohet: nje kerkim
+        # "50 te fundit" nen shume dosje nuk lexon faqe te plota nga secila
+        desc = rend == "desc"
+        drejtimi = "DESC" if desc else "ASC"
+        madhesia = min(32, max(1, int(faqja)))
+        kursori: Optional[Tuple[int, int]] = None
+        while True:
+            shtese, param_shtese = "", []
+            if kursori is not None:
+                shtese = " AND e.ts <= ? AND (e.ts < ? OR e.id < ?)" if desc else " AND e.ts >= ? AND (e.ts > ? OR e.id > ?)"
+                param_shtese = [kursori[0], kursori[0], kursori[1]]
+            with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as tabela:
+                rreshtat = conn.execute(
+                    f"""
+                    SELECT {EKSPORT_KOLONAT}
+                    FROM {event_burimi(tabela)}
+                    WHERE {" AND ".join(kushtet)}{shtese}
+                    ORDER BY e.ts {drejtimi}, e.id {drejtimi}
+                    LIMIT ?
+                    """,
+                    parametrat + param_shtese + [madhesia],
+                ).fetchall()
+            for r in rreshtat:
+                yield EventEksport(*r)
+            if len(rreshtat) < madhesia:
+                return
+            kursori = (rreshtat[-1][1], rreshtat[-1][0])
+            madhesia = min(madhesia * 2, max(1, int(faqja)))
+
+    def id_para_suspicious_te_fundit(self, n: int) -> int:
+        # pika e nisjes kur s'ka ende cursor: para n suspicious me te fundit
+        with self.lidhjet.reader() as conn:
+            rresht = conn.execute(
+                """
+                SELECT MIN(id) FROM (
+                    SELECT id FROM events WHERE suspicious = 1 ORDER BY id DESC LIMIT ?
+                )
+                """,
+                (n,),
+            ).fetchone()
+        return 0 if rresht[0] is None else int(rresht[0]) - 1
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Mirembajtje e security.db")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--rebuild-rollups", action="store_true", help="Rindertoj tabelat stats_* nga events raw")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.db):
+        print(f"ERROR: Databaza '{args.db}' nuk ekziston! Fillimisht nis monitorin.")
+        return
+
+    db = SecurityDatabase(args.db, cache_lru_size=0, cache_bloom_capacity=0)
+    if args.rebuild_rollups:
+        stats = db.rindertoj_rollups()
+        print(f"Rollups u rindertuan: {stats}")
+    else:
+        print(db.statistika())
+    db.mbyll()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.database import ARSYE_E_RE, EventRecord
+from src.dimensions import dosja_e
+from src.metrics import METRIKAT
+
+# arsyet qe ruhen ne events.arsye (bashke me ARSYE_E_RE te DB-se)
+ARSYE_BURST_PERDORUESI = "burst_perdoruesi"
+ARSYE_BURST_DOSJA = "burst_dosja"
+ARSYE_RENAME = "rename_ext"
+ARSYE_FSHIRJE = "fshirje_masive"
+
+ARSYET: Dict[str, str] = {
+    ARSYE_E_RE: "Perdoruesi nuk e ka modifikuar kete file me pare",
+    ARSYE_BURST_PERDORUESI: "Shume ndryshime nga i njejti perdorues ne pak kohe",
+    ARSYE_BURST_DOSJA: "Shume ndryshime ne te njejten dosje ne pak kohe",
+    ARSYE_RENAME: "Riemertime masive ne prapashtesa te panjohura (ransomware?)",
+    ARSYE_FSHIRJE: "Fshirje masive nga i njejti perdorues",
+}
+
+# prapashtesat "normale"; rename drejt nje prapashtese tjeter numerohet si i panjohur
+PRAPASHTESAT_E_NJOHURA = (
+    ".txt", ".md", ".csv", ".json", ".yaml", ".yml", ".xml", ".ini", ".conf", ".cfg", ".log",
+    ".py", ".js", ".ts", ".c", ".h", ".cpp", ".java", ".go", ".rs", ".sh", ".sql", ".html", ".css",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".odt", ".ods", ".pdf", ".rtf",
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".mp3", ".mp4", ".zip", ".tar", ".gz", ".db",
+    ".bak", ".old", ".orig", ".tmp", ".swp", ".part",
+)
+KOSHAT = 10
+
+_GJETJE = METRIKAT.counter("si_detektor_gjetje_total", "Gjetje te detektorit te burst-eve", ("arsye",))
+
+
+class Pragjet(NamedTuple):
+    dritarja: float = 60.0  # sekonda
+    perdoruesi: int = 1000  # events per perdorues ne dritare
+    dosja: int = 500  # events ne te njejten dosje
+    rename: int = 20  # rename ne prapashtesa te panjohura, per perdorues
+    fshirje: int = 200  # DELETED per perdorues
+    max_celesa: int = 10_000  # per secilin numerues
+    prapashtesat: Tuple[str, ...] = PRAPASHTESAT_E_NJOHURA
+
+
+class _Dritare:
+    # Dritare rreshqitese me KOSHAT kosha fikse: shto() eshte O(1) (max KOSHAT
+    # kosha pastrohen kur koha kercen), memoria O(KOSHAT) per celes. Numri eshte
+    # i perafert brenda nje koshi (dritarja / KOSHAT).
+    __slots__ = ("koshat", "i_fundit", "totali", "heshtur_deri")
+
+    def __init__(self, kosha: int):
+        self.koshat = [0] * KOSHAT
+        self.i_fundit = kosha
+        self.totali = 0
+        self.heshtur_deri = 0.0
+
+    def shto(self, kosha: int) -> int:
+        if kosha > self.i_fundit:
+            for k in range(self.i_fundit + 1, min(kosha, self.i_fundit + KOSHAT) + 1):
+                self.totali -= self.koshat[k % KOSHAT]
+                self.koshat[k % KOSHAT] = 0
+            self.i_fundit = kosha
+        elif self.i_fundit - kosha >= KOSHAT:
+            # event me i vjeter se dritarja (vonese nga coalescing / root-e te tjere)
+            return self.totali
+        self.koshat[kosha % KOSHAT] += 1
+        self.totali += 1
+        return self.totali
+
+
+class _Numeruesi:
+    # celes -> _Dritare, LRU: celesat pa aktivitet per nje dritare te plote
+    # (ose pertej max_celesa) hiqen nga fillimi, amortizuar O(1) per event
+
+    def __init__(self, prag: int, pragjet: Pragjet):
+        self.prag = prag
+        self.gjeresia = pragjet.dritarja / KOSHAT
+        self.dritarja = pragjet.dritarja
+        self.max_celesa = max(1, pragjet.max_celesa)
+        self._celesat: "OrderedDict[str, _Dritare]" = OrderedDict()
+
+    def shto(self, celesi: str, koha: float) -> bool:
+        # True nje here per dritare kur celesi kalon pragun
+        kosha = int(koha // self.gjeresia)
+        d = self._celesat.get(celesi)
+        if d is None:
+            d = self._celesat[celesi] = _Dritare(kosha)
+        else:
+            self._celesat.move_to_end(celesi)
+        n = d.shto(kosha)
+        if n >= self.prag and koha >= d.heshtur_deri:
+            d.heshtur_deri = koha + self.dritarja
+            return True
+        return False
+
+    def pastro(self, koha: float) -> None:
+        kosha = int(koha // self.gjeresia)
+        while self._celesat:
+            celesi, d = next(iter(self._celesat.items()))
+            if len(self._celesat) <= self.max_celesa and kosha - d.i_fundit < KOSHAT:
+                return
+            del self._celesat[celesi]
+
+    def __len__(self) -> int:
+        return len(self._celesat)
+
+
+class BurstDetector:
+    # Faze ne pipeline-in e monitorit (para writer-it): numerues per perdorues,
+    # dosje, rename ne prapashtesa te panjohura dhe fshirje. Eventi qe kalon nje
+    # prag merr `arsye` dhe ruhet si suspicious; pas kesaj celesi hesht per nje
+    # dritare, qe nje burst te jape nje gjetje ne minute, jo nje per cdo file.
+
+    def __init__(self, pragjet: Optional[Pragjet] = None):
+        self.pragjet = pragjet or Pragjet()
+        p = self.pragjet
+        self._perdoruesi = _Numeruesi(p.perdoruesi, p)
+        self._dosja = _Numeruesi(p.dosja, p)
+        self._rename = _Numeruesi(p.rename, p)
+        self._fshirje = _Numeruesi(p.fshirje, p)
+        self._numeruesit = (self._perdoruesi, self._dosja, self._rename, self._fshirje)
+        self._njohura = {e.lower() for e in p.prapashtesat}
+        self._lock = threading.Lock()
+        self.gjetje: Dict[str, int] = {}
+
+    def _rename_i_panjohur(self, ev: EventRecord) -> bool:
+        if ev.veprimi != "MOVED" or ev.dest_path is None:
+            return False
+        e_re = os.path.splitext(ev.dest_path)[1].lower()
+        return bool(e_re) and e_re != os.path.splitext(ev.file_path)[1].lower() and e_re not in self._njohura
+
+    def shiko(self, ev: EventRecord) -> EventRecord:
+        gjetjet: List[str] = []
+        with self._lock:
+            # te gjithe numeruesit perditesohen; arsyeja e pare sipas rendesise
+            if self._rename_i_panjohur(ev) and self._rename.shto(ev.perdoruesi, ev.koha):
+                gjetjet.append(ARSYE_RENAME)
+            if ev.veprimi == "DELETED" and self._fshirje.shto(ev.perdoruesi, ev.koha):
+                gjetjet.append(ARSYE_FSHIRJE)
+            if self._perdoruesi.shto(ev.perdoruesi, ev.koha):
+                gjetjet.append(ARSYE_BURST_PERDORUESI)
+            if self._dosja.shto(dosja_e(ev.file_path), ev.koha):
+                gjetjet.append(ARSYE_BURST_DOSJA)
+            for n in self._numeruesit:
+                n.pastro(ev.koha)
+            for arsye in gjetjet:
+                self.gjetje[arsye] = self.gjetje.get(arsye, 0) + 1
+        if not gjetjet:
+            return ev
+        for arsye in gjetjet:
+            _GJETJE.inc(arsye=arsye)
+        return ev._replace(arsye=gjetjet[0])
+
+    def celesa(self) -> int:
+        return sum(len(n) for n in self._numeruesit)
+
+
+def pragjet_nga(cfg: Dict) -> Pragjet:
+    # monitor.detector (config ose flamujt --burst-*) -> Pragjet; celesat qe
+    # mungojne (ose None) marrin default-in
+    baza = Pragjet()
+
+    def vlera(celesi, default, tipi):
+        v = cfg.get(celesi)
+        return default if v is None else tipi(v)
+
+    return Pragjet(
+        dritarja=vlera("window", baza.dritarja, float),
+        perdoruesi=vlera("user", baza.perdoruesi, int),
+        dosja=vlera("dir", baza.dosja, int),
+        rename=vlera("rename", baza.rename, int),
+        fshirje=vlera("delete", baza.fshirje, int),
+        max_celesa=vlera("max_keys", baza.max_celesa, int),
+        prapashtesat=vlera("known_extensions", baza.prapashtesat, tuple),
+    )
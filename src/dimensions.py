@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class DimensionCache:
+    # vlere (path ose emer perdoruesi) -> id ne nje tabele dimensioni.
+    #   - LRU ne memorie: hit => asnje query shtese per event
+    #   - miss => SELECT, e nese mungon INSERT (brenda transaksionit te writer-it)
+    # Id-te e reja mbahen "ne pritje" deri ne commit: pas nje rollback SQLite mund
+    # t'i riperdore, ndaj anulo() i hedh. Perdoret vetem nen lock-un e writer-it.
+
+    def __init__(self, tabela: str, kolona: str, madhesia: int = 200_000):
+        self.tabela = tabela
+        self.kolona = kolona
+        self.madhesia = max(0, int(madhesia))
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self._ne_pritje: Dict[str, int] = {}
+
+        self.hits = 0
+        self.lookups = 0
+        self.te_reja = 0
+
+    def id_per(self, cursor: sqlite3.Cursor, vlera: str) -> int:
+        id_ = self._ids.get(vlera)
+        if id_ is not None:
+            self._ids.move_to_end(vlera)
+            self.hits += 1
+            return id_
+        id_ = self._ne_pritje.get(vlera)
+        if id_ is not None:
+            return id_
+
+        self.lookups += 1
+        rresht = cursor.execute(f"SELECT id FROM {self.tabela} WHERE {self.kolona} = ?", (vlera,)).fetchone()
+        if rresht is not None:
+            self._vendos(vlera, int(rresht[0]))
+            return int(rresht[0])
+        id_ = self._shto(cursor, vlera)
+        self._ne_pritje[vlera] = id_
+        self.te_reja += 1
+        return id_
+
+    def _shto(self, cursor: sqlite3.Cursor, vlera: str) -> int:
+        cursor.execute(f"INSERT INTO {self.tabela} ({self.kolona}) VALUES (?)", (vlera,))
+        return int(cursor.lastrowid)
+
+    def konfirmo(self) -> None:
+        # thirret pas commit-it te transaksionit qe i shtoi
+        for vlera, id_ in self._ne_pritje.items():
+            self._vendos(vlera, id_)
+        self._ne_pritje.clear()
+
+    def anulo(self) -> None:
+        self._ne_pritje.clear()
+
+    def _vendos(self, vlera: str, id_: int) -> None:
+        if self.madhesia <= 0:
+            return
+        self._ids[vlera] = id_
+        self._ids.move_to_end(vlera)
+        while len(self._ids) > self.madhesia:
+            self._ids.popitem(last=False)
+
+    def pastro(self) -> None:
+        self._ids.clear()
+        self._ne_pritje.clear()
+
+    def statistika(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "lookups": self.lookups,
+            "te_reja": self.te_reja,
+            "madhesia": len(self._ids),
+        }
+
+
+def dosja_e(path: str) -> str:
+    # dosja prind: "/a/b/f" -> "/a/b", "/f" -> "/", "/" -> "/"
+    return os.path.dirname(path.rstrip("/")) or ("/" if path.startswith("/") else ".")
+
+
+class DirCache(DimensionCache):
+    # Tabela `dirs`: cdo dosje me prind_id. Nje dosje e re shton edhe paraardhesit
+    # qe mungojne, keshtu pema eshte gjithmone e plote deri te rrenja.
+
+    def __init__(self, madhesia: int = 200_000):
+        super().__init__("dirs", "path", madhesia)
+
+    def _shto(self, cursor: sqlite3.Cursor, vlera: str) -> int:
+        prindi = dosja_e(vlera)
+        prind_id: Optional[int] = None if prindi == vlera else self.id_per(cursor, prindi)
+        cursor.execute("INSERT INTO dirs (path, prind_id) VALUES (?, ?)", (vlera, prind_id))
+        return int(cursor.lastrowid)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, TextIO, Tuple
+
+from src.connections import parse_pragma_args
+from src.database import EventEksport, SecurityDatabase, intervali_i_dites
+
+FORMATET = ("ndjson", "csv")
+_TOKEN_VERSIONI = "v1"
+
+
+def _gjurma(filtrat: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(filtrat, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def krijo_token(pas_id: int, filtrat: Dict[str, Any]) -> str:
+    # "v1.<id i fundit>.<gjurma e filtrave>": vazhdimi me filtra te tjere refuzohet
+    return f"{_TOKEN_VERSIONI}.{int(pas_id)}.{_gjurma(filtrat)}"
+
+
+def lexo_token(token: str, filtrat: Dict[str, Any]) -> int:
+    pjeset = token.strip().split(".")
+    if len(pjeset) != 3 or pjeset[0] != _TOKEN_VERSIONI or not pjeset[1].isdigit():
+        raise ValueError(f"Token i pavlefshem: {token!r}")
+    if pjeset[2] != _gjurma(filtrat):
+        raise ValueError("Token-i u krijua me filtra te tjere; perdor te njejtat --from/--to/--user/...")
+    return int(pjeset[1])
+
+
+def kufiri_kohor(vlera: str, fundi: bool = False) -> float:
+    # "YYYY-MM-DD" (fundi=True -> fillimi i dites pasardhese) ose "YYYY-MM-DD HH:MM:SS"
+    try:
+        fillim, fund = intervali_i_dites(vlera)
+        return fund if fundi else fillim
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(vlera, "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        raise ValueError(f"Date e pavlefshme: {vlera!r} (YYYY-MM-DD ose 'YYYY-MM-DD HH:MM:SS')")
+
+
+def shkruaj_ndjson(rreshtat: Iterable[EventEksport], f: TextIO) -> Iterable[EventEksport]:
+    for r in rreshtat:
+        f.write(json.dumps(r._asdict(), ensure_ascii=False) + "\n")
+        yield r
+
+
+def shkruaj_csv(rreshtat: Iterable[EventEksport], f: TextIO) -> Iterable[EventEksport]:
+    w = csv.writer(f)
+    w.writerow(EventEksport._fields)
+    for r in rreshtat:
+        w.writerow(["" if v is None else v for v in r])
+        yield r
+
+
+def eksporto(
+    db: SecurityDatabase,
+    f: TextIO,
+    formati: str = "ndjson",
+    filtrat: Optional[Dict[str, Any]] = None,
+    token: Optional[str] = None,
+    limit: Optional[int] = None,
+    faqja: int = 1000,
+) -> Tuple[int, str]:
+    # -> (sa rreshta u shkruan, token per vazhdimin). Memorie konstante: rreshtat
+    # rrjedhin nga keyset-i direkt ne file.
+    filtrat = dict(filtrat or {})
+    pas_id = lexo_token(token, filtrat) if token else 0
+    rreshtat = db.itero_events(pas_id=pas_id, faqja=faqja, **filtrat)
+    shkruesi = shkruaj_ndjson if formati == "ndjson" else shkruaj_csv
+    n = 0
+    for r in shkruesi(rreshtat, f):
+        pas_id = r.id
+        n += 1
+        if limit is not None and n >= limit:
+            break
+    return n, krijo_token(pas_id, filtrat)
+
+
+def _ruaj_token(path: str, token: str) -> None:
+    dir = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    os.replace(tmp, path)
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Eksporto events (NDJSON/CSV) me memorie konstante")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--format", choices=FORMATET, default="ndjson", help="Formati i daljes (default: ndjson)")
+    ap.add_argument("--out", default="-", help="File i daljes ('-' = stdout)")
+    ap.add_argument("--from", dest="nga", default=None, help="Nga data YYYY-MM-DD ose 'YYYY-MM-DD HH:MM:SS'")
+    ap.add_argument("--to", dest="deri", default=None, help="Deri ne daten (perfshire diten) ose ore te sakte")
+    ap.add_argument("--user", default=None, help="Vetem events e ketij perdoruesi")
+    ap.add_argument("--action", action="append", default=[], help="Vetem ky veprim (mund te perseritet)")
+    ap.add_argument("--path-prefix", default=None, help="Vetem path-et (burim ose destinacion) me kete prefiks")
+    sus = ap.add_mutually_exclusive_group()
+    sus.add_argument("--suspicious", dest="suspicious", action="store_const", const=True, default=None,
+                     help="Vetem events suspicious")
+    sus.add_argument("--normal", dest="suspicious", action="store_const", const=False, help="Vetem events normale")
+    ap.add_argument("--resume", default=None, help="Vazhdo pas nje token-i te meparshem")
+    ap.add_argument("--state-file", default=None,
+                    help="Lexo/ruaj token-in ketu (eksport inkremental: cdo ekzekutim vazhdon aty ku mbeti)")
+    ap.add_argument("--limit", type=int, default=None, help="Max rreshta ne kete ekzekutim")
+    ap.add_argument("--page-size", type=int, default=1000, help="Rreshta per faqe keyset")
+    ap.add_argument("--pragma", action="append", default=[], help="SQLite PRAGMA EMRI=VLERA (mund te perseritet)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        raise SystemExit(f"ERROR: Databaza '{args.db}' nuk ekziston!")
+    try:
+        filtrat = {
+            "nga": kufiri_kohor(args.nga) if args.nga else None,
+            "deri": kufiri_kohor(args.deri, fundi=True) if args.deri else None,
+            "perdoruesi": args.user,
+            "veprimet": [v.upper() for v in args.action] or None,
+            "prefiksi": args.path_prefix,
+            "suspicious": args.suspicious,
+        }
+    except ValueError as e:
+        raise SystemExit(f"ERROR: {e}")
+    token = args.resume
+    if token is None and args.state_file and os.path.exists(args.state_file):
+        with open(args.state_file, encoding="utf-8") as f:
+            token = f.read().strip() or None
+
+    db = SecurityDatabase(args.db, pragmas=parse_pragma_args(args.pragma), cache_lru_size=0, cache_bloom_capacity=0)
+    f = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+    try:
+        n, token = eksporto(db, f, args.format, filtrat, token=token, limit=args.limit, faqja=args.page_size)
+        f.flush()
+    except ValueError as e:
+        raise SystemExit(f"ERROR: {e}")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+        db.mbyll()
+    # token-i ruhet vetem pasi rreshtat jane ne file
+    if args.state_file:
+        _ruaj_token(args.state_file, token)
+    print(f"{n} events u eksportuan; token: {token}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
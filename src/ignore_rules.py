@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Rregullat default (zevendesojne kontrollet e hard-coded te duhet_injoruar).
+DEFAULT_RULES: List[str] = [
+    "dir:.git",
+    "dir:venv",
+    "dir:.venv",
+    "dir:__pycache__",
+    "dir:node_modules",
+    "dir:reports",
+    "security.db*",  # databaza + -wal/-shm/-journal (shmang self-recursion)
+]
+
+
+def glob_ne_regex(pattern: str) -> str:
+    # gitignore-style: "*" dhe "?" nuk kalojne "/", "**" kalon direktori.
+    # Pattern pa "/" perputhet me cdo komponent te path-it; me "/" ankorohet ne root.
+    p = pattern
+    dir_only = p.endswith("/")
+    p = p.rstrip("/")
+    anchored = "/" in p
+    p = p.lstrip("/")
+
+    out = []
+    i = 0
+    while i < len(p):
+        c = p[i]
+        if p.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif p.startswith("/**", i) and i + 3 == len(p):
+            out.append("(?:/.*)?")
+            i += 3
+        elif p.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = p.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+                i += 1
+            else:
+                klasa = p[i + 1:j]
+                if klasa.startswith("!"):
+                    klasa = "^" + klasa[1:]
+                out.append("[" + klasa.replace("\\", "\\\\") + "]")
+                i = j + 1
+        else:
+            out.append(re.escape(c))
+            i += 1
+
+    body = "".join(out)
+    prefix = "^" if anchored else "(?:^|/)"
+    # per direktori (ose pattern pa "/"), perputhen edhe file-t brenda saj
+    suffix = "/" if dir_only else "(?:/|$)"
+    return prefix + body + suffix
+
+
+class IgnoreRules:
+    # Sintaksa e rregullave:
+    #   dir:NAME      - direktori me kete emer, ne cdo nivel (prune ne observer)
+    #   suffix:.swp   - path qe mbaron me kete suffix
+    #   re:REGEX      - regex (search) mbi path-in absolut
+    #   cdo gje tjeter - glob gitignore-style, relativ ndaj root-it
+    # Kompilohen nje here: dir -> set, suffix -> tuple, glob+regex -> nje regex
+    # i vetem me grupe te emeruara qe te dime cili rregull e hodhi eventin.
+
+    def __init__(self, rules: Iterable[str], root: Optional[str] = None):
+        self.rules: List[str] = []
+        self.root = os.path.abspath(root).replace("\\", "/").rstrip("/") if root else None
+        dirs: Dict[str, str] = {}
+        suffixes: List[Tuple[str, str]] = []
+        grupet: List[str] = []
+        self._grup_rregull: Dict[str, str] = {}
+        self._abs_grupet: List[str] = []
+
+        for rregull in rules:
+            rregull = rregull.strip()
+            if not rregull or rregull.startswith("#") or rregull in self.rules:
+                continue
+            self.rules.append(rregull)
+            if rregull.startswith("dir:"):
+                dirs[rregull[4:].strip("/")] = rregull
+            elif rregull.startswith("suffix:"):
+                suffixes.append((rregull[7:], rregull))
+            elif rregull.startswith("re:"):
+                emri = f"r{len(self._grup_rregull)}"
+                re.compile(rregull[3:])  # gabim i qarte per regex te pavlefshem
+                self._abs_grupet.append(f"(?P<{emri}>{rregull[3:]})")
+                self._grup_rregull[emri] = rregull
+            else:
+                emri = f"r{len(self._grup_rregull)}"
+                grupet.append(f"(?P<{emri}>{glob_ne_regex(rregull)})")
+                self._grup_rregull[emri] = rregull
+
+        self._dirs = dirs
+        self._dir_names = frozenset(dirs)
+        self._suffixes = suffixes
+        self._suffix_tuple = tuple(s for s, _ in suffixes if s)
+        self._glob_re: Optional[Pattern[str]] = re.compile("|".join(grupet)) if grupet else None
+        self._abs_re: Optional[Pattern[str]] = re.compile("|".join(self._abs_grupet)) if self._abs_grupet else None
+
+        self.drops: Dict[str, int] = {r: 0 for r in self.rules}
+        self._lock = threading.Lock()
+
+    def _relativ(self, p: str) -> str:
+        if self.root and (p == self.root or p.startswith(self.root + "/")):
+            return p[len(self.root) + 1:]
+        return p.lstrip("/")
+
+    def perputhet(self, filepath: str) -> Optional[str]:
+        p = filepath.replace("\\", "/")
+        if self._dir_names:
+            komponentet = p.split("/")[:-1]
+            if not self._dir_names.isdisjoint(komponentet):
+                for k in komponentet:
+                    if k in self._dir_names:
+                        return self._dirs[k]
+        if self._suffix_tuple and p.endswith(self._suffix_tuple):
+            for suf, rregull in self._suffixes:
+                if suf and p.endswith(suf):
+                    return rregull
+        if self._glob_re is not None:
+            m = self._glob_re.search(self._relativ(p))
+            if m:
+                return self._grup_rregull[m.lastgroup]
+        if self._abs_re is not None:
+            m = self._abs_re.search(p)
+            if m:
+                return self._grup_rregull[m.lastgroup]
+        return None
+
+    def duhet_injoruar(self, filepath: str) -> bool:
+        rregull = self.perputhet(filepath)
+        if rregull is None:
+            return False
+        with self._lock:
+            self.drops[rregull] += 1
+        return True
+
+    def dir_perjashtuar(self, dirpath: str) -> bool:
+        # per prune: a duhet te mos vendoset fare watch ne kete direktori?
+        p = dirpath.replace("\\", "/").rstrip("/")
+        if os.path.basename(p) in self._dir_names:
+            return True
+        if self._glob_re is not None:
+            m = self._glob_re.search(self._relativ(p) + "/")
+            if m:
+                return True
+        return False
+
+    def statistika(self) -> Dict[str, int]:
+        with self._lock:
+            return {r: n for r, n in self.drops.items() if n}
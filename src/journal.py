@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+from src.database import EventRecord
+from src.metrics import METRIKAT
+
+# cursor-i ne scheduler_state: seq-i i fundit i aplikuar ne DB, i shkruar ne te
+# njejtin transaksion me events e riluajtura => riluajtje exactly-once
+JOURNAL_CURSOR = "journal_seq"
+
+# rekord: <madhesia e payload-it, crc32(seq + payload), seq> + payload (JSON)
+_KOKA = struct.Struct("<IIQ")
+_SEQ = struct.Struct("<Q")
+SEGMENT_BYTES = 64 * 2**20
+
+_FSYNC_KOHA = METRIKAT.histogram("si_journal_fsync_seconds", "Koha e fsync-ut te journal-it")
+_SHKRUAR = METRIKAT.counter("si_journal_events_total", "Events te shkruara ne journal")
+
+# (seq, event)
+JournalRecord = Tuple[int, EventRecord]
+
+
+def _kodo(seq: int, ev: EventRecord) -> bytes:
+    payload = json.dumps(list(ev), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    crc = zlib.crc32(payload, zlib.crc32(_SEQ.pack(seq)))
+    return _KOKA.pack(len(payload), crc, seq) + payload
+
+
+def _lexo_segment(path: str, nga: int = 0, max_n: Optional[int] = None) -> Tuple[List[Tuple[int, EventRecord, int]], int]:
+    # -> ([(seq, event, offset pas rekordit)], offset pas rekordit te fundit te vlefshem)
+    rekordet = []
+    poz = nga
+    with open(path, "rb") as f:
+        f.seek(nga)
+        while max_n is None or len(rekordet) < max_n:
+            koka = f.read(_KOKA.size)
+            if len(koka) < _KOKA.size:
+                break
+            madhesia, crc, seq = _KOKA.unpack(koka)
+            payload = f.read(madhesia)
+            if len(payload) < madhesia or zlib.crc32(payload, zlib.crc32(_SEQ.pack(seq))) != crc:
+                break
+            try:
+                ev = EventRecord(*json.loads(payload.decode("utf-8")))
+            except (ValueError, TypeError):
+                break
+            poz += _KOKA.size + madhesia
+            rekordet.append((seq, ev, poz))
+    return rekordet, poz
+
+
+class Journal:
+    # Journal append-only per events qe DB nuk i pranon dot ne kohe (radhe plot,
+    # DB e bllokuar). Segmente `seg_<seq>.log` ne nje direktori; fsync behet me
+    # grupe (`fsync_batch` events ose `fsync_interval` sekonda). Segmentet e
+    # aplikuara plotesisht fshihen. Thread-safe.
+
+    def __init__(self, dir: str, fsync_batch: int = 256, fsync_interval: float = 0.2,
+                 segment_bytes: int = SEGMENT_BYTES):
+        self.dir = dir
+        self.fsync_batch = max(1, int(fsync_batch))
+        self.fsync_interval = max(0.0, float(fsync_interval))
+        self.segment_bytes = max(1, int(segment_bytes))
+        self._lock = threading.RLock()
+        self._segmentet: List[Tuple[int, str]] = []  # (seq i pare, path), te renditura
+        self._f = None
+        self._seq = 0  # seq i fundit i shkruar
+        self._konfirmuar = 0  # seq i fundit i aplikuar ne DB
+        self._lexim: Tuple[int, int] = (0, 0)  # (indeksi i segmentit, offset) pas _konfirmuar
+        self._pas_leximit: Optional[Tuple[int, int, int]] = None
+        self._pa_fsync = 0
+        self._fsync_i_fundit = time.monotonic()
+        self._hapur = False
+
+    @property
+    def ne_pritje(self) -> int:
+        return self._seq - self._konfirmuar
+
+    def hap(self, aplikuar_deri: int = 0) -> int:
+        # Rikuperim pas restart-it: lexon segmentet, pret nje bisht te prere
+        # (shkrim i nderprere) dhe kapercen rekordet qe DB i ka aplikuar tashme.
+        # Kthen sa events presin riluajtjen.
+        with self._lock:
+            os.makedirs(self.dir, exist_ok=True)
+            emrat = sorted(
+                (int(e[4:-4]), os.path.join(self.dir, e))
+                for e in os.listdir(self.dir)
+                if e.startswith("seg_") and e.endswith(".log") and e[4:-4].isdigit()
+            )
+            self._segmentet = []
+            self._seq = self._konfirmuar = int(aplikuar_deri)
+            self._lexim = (0, 0)
+            for i, (seq_pare, path) in enumerate(emrat):
+                rekordet, fund = _lexo_segment(path)
+                if fund < os.path.getsize(path):
+                    logging.warning("Journal: %s i demtuar pas byte %d, u pre", path, fund)
+                    with open(path, "r+b") as f:
+                        f.truncate(fund)
+                self._segmentet.append((seq_pare, path))
+                for seq, _, offset in rekordet:
+                    self._seq = max(self._seq, seq)
+                    if seq <= aplikuar_deri:
+                        self._lexim = (i, offset)
+                if rekordet and rekordet[-1][0] <= aplikuar_deri:
+                    self._lexim = (i + 1, 0)
+            self._hapur = True
+            self._pastro_segmentet()
+            return self.ne_pritje
+
+    def _hap_per_shkrim(self) -> None:
+        if self._f is not None:
+            if self._f.tell() < self.segment_bytes:
+                return
+            self._sinkronizo()
+            self._f.close()
+            self._f = None
+        if not self._segmentet or os.path.getsize(self._segmentet[-1][1]) >= self.segment_bytes:
+            path = os.path.join(self.dir, f"seg_{self._seq + 1:020d}.log")
+            self._segmentet.append((self._seq + 1, path))
+        self._f = open(self._segmentet[-1][1], "ab")
+
+    def shto(self, events: Sequence[EventRecord]) -> int:
+        # kthen seq-in e fundit
+        if not events:
+            return self._seq
+        with self._lock:
+            if not self._hapur:
+                self.hap()
+            self._hap_per_shkrim()
+            pjeset = []
+            for ev in events:
+                self._seq += 1
+                pjeset.append(_kodo(self._seq, ev))
+            self._f.write(b"".join(pjeset))
+            self._pa_fsync += len(events)
+            _SHKRUAR.inc(len(events))
+            if self._pa_fsync >= self.fsync_batch:
+                self._sinkronizo()
+            return self._seq
+
+    def sinkronizo(self, vetem_nese_duhet: bool = False) -> None:
+        with self._lock:
+            if vetem_nese_duhet and time.monotonic() - self._fsync_i_fundit < self.fsync_interval:
+                return
+            self._sinkronizo()
+
+    def _sinkronizo(self) -> None:
+        if self._f is None or not self._pa_fsync:
+            return
+        with _FSYNC_KOHA.koha():
+            self._f.flush()
+            os.fsync(self._f.fileno())
+        self._pa_fsync = 0
+        self._fsync_i_fundit = time.monotonic()
+
+    def lexo(self, max_n: int) -> List[JournalRecord]:
+        # rekordet e para te paaplikuara (nuk avancon; shih konfirmo)
+        with self._lock:
+            if not self.ne_pritje:
+                return []
+            if self._f is not None:
+                self._f.flush()
+            i, offset = self._lexim
+            rezultati: List[JournalRecord] = []
+            while i < len(self._segmentet) and len(rezultati) < max_n:
+                rekordet, _ = _lexo_segment(self._segmentet[i][1], offset, max_n - len(rezultati))
+                for seq, ev, pas in rekordet:
+                    rezultati.append((seq, ev))
+                    offset = pas
+                # segmenti i fundit mbetet i hapur per shkrim: pointer-i qendron ne te
+                if len(rezultati) >= max_n or i == len(self._segmentet) - 1:
+                    break
+                i, offset = i + 1, 0
+            if rezultati:
+                self._pas_leximit = (rezultati[-1][0], i, offset)
+            return rezultati
+
+    def konfirmo(self, seq: int) -> None:
+        # events deri ne `seq` (te kthyera nga lexo) jane ne DB
+        with self._lock:
+            if self._pas_leximit is None or self._pas_leximit[0] != seq:
+                raise ValueError(f"Journal: konfirmim per seq {seq} pa lexim perkates")
+            _, i, offset = self._pas_leximit
+            self._konfirmuar, self._lexim, self._pas_leximit = seq, (i, offset), None
+            self._pastro_segmentet()
+
+    def _pastro_segmentet(self) -> None:
+        # fshin segmentet e aplikuara plotesisht; kur s'mbetet asgje, edhe te fundit
+        i, offset = self._lexim
+        if not self.ne_pritje and self._segmentet:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+            i, offset = len(self._segmentet), 0
+        te_fshira = self._segmentet[:i]
+        for _, path in te_fshira:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._segmentet = self._segmentet[i:]
+        self._lexim = (0, offset if self._segmentet else 0)
+
+    def mbyll(self) -> None:
+        with self._lock:
+            if self._f is not None:
+                self._sinkronizo()
+                self._f.close()
+                self._f = None
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import bisect
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# sekonda: nga 0.1ms (nje INSERT) deri 10s (nje batch i bllokuar)
+BUCKETS_KOHA = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_MADHESIA = (1, 5, 10, 50, 100, 250, 500, 1000, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(vlera: str) -> str:
+    return vlera.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiketat_tekst(emrat: Sequence[str], vlerat: Sequence[str], shtese: str = "") -> str:
+    pjeset = [f'{k}="{_escape(v)}"' for k, v in zip(emrat, vlerat)]
+    if shtese:
+        pjeset.append(shtese)
+    return "{" + ",".join(pjeset) + "}" if pjeset else ""
+
+
+def _numri(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class _Metrika:
+    tipi = "untyped"
+
+    def __init__(self, emri: str, pershkrim: str, etiketat: Sequence[str] = ()):
+        self.emri = emri
+        self.pershkrim = pershkrim
+        self.etiketat = tuple(etiketat)
+        self._lock = threading.Lock()
+        self._funksionet: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def _celesi(self, etiketat: Dict[str, object]) -> Tuple[str, ...]:
+        if len(etiketat) != len(self.etiketat):
+            raise ValueError(f"{self.emri}: prisja etiketat {self.etiketat}, u dhane {tuple(etiketat)}")
+        return tuple(str(etiketat[k]) for k in self.etiketat)
+
+    def funksion(self, fn: Callable[[], float], **etiketat) -> None:
+        # vlera lexohet ne eksport (p.sh. madhesia e radhes); zevendeson te meparshmin
+        with self._lock:
+            self._funksionet[self._celesi(etiketat)] = fn
+
+    def _vlerat_funksion(self) -> Iterator[Tuple[Tuple[str, ...], float]]:
+        with self._lock:
+            funksionet = list(self._funksionet.items())
+        for celesi, fn in funksionet:
+            try:
+                yield celesi, float(fn())
+            except Exception:
+                logging.debug("Metrika %s%s: funksioni deshtoi", self.emri, celesi, exc_info=True)
+
+    def rreshtat(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metrika):
+    tipi = "counter"
+
+    def __init__(self, emri: str, pershkrim: str, etiketat: Sequence[str] = ()):
+        super().__init__(emri, pershkrim, etiketat)
+        self._vlerat: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, n: float = 1, **etiketat) -> None:
+        celesi = self._celesi(etiketat)
+        with self._lock:
+            self._vlerat[celesi] = self._vlerat.get(celesi, 0) + n
+
+    def vlera(self, **etiketat) -> float:
+        celesi = self._celesi(etiketat)
+        with self._lock:
+            fn = self._funksionet.get(celesi)
+            if fn is None:
+                return self._vlerat.get(celesi, 0)
+        return float(fn())
+
+    def rreshtat(self) -> List[str]:
+        with self._lock:
+            vlerat = dict(self._vlerat)
+        vlerat.update(self._vlerat_funksion())
+        return [f"{self.emri}{_etiketat_tekst(self.etiketat, k)} {_numri(v)}" for k, v in sorted(vlerat.items())]
+
+
+class Gauge(Counter):
+    tipi = "gauge"
+
+    def set(self, v: float, **etiketat) -> None:
+        celesi = self._celesi(etiketat)
+        with self._lock:
+            self._vlerat[celesi] = v
+
+
+class Histogram(_Metrika):
+    tipi = "histogram"
+
+    def __init__(self, emri: str, pershkrim: str, etiketat: Sequence[str] = (), buckets: Sequence[float] = BUCKETS_KOHA):
+        super().__init__(emri, pershkrim, etiketat)
+        self.buckets = tuple(sorted(buckets))
+        # celesi -> [numrat per bucket (+Inf ne fund), shuma]
+        self._vlerat: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, v: float, **etiketat) -> None:
+        celesi = self._celesi(etiketat)
+        i = bisect.bisect_left(self.buckets, v)
+        with self._lock:
+            rresht = self._vlerat.get(celesi)
+            if rresht is None:
+                rresht = self._vlerat[celesi] = [[0] * (len(self.buckets) + 1), 0.0]
+            rresht[0][i] += 1
+            rresht[1] += v
+
+    @contextmanager
+    def koha(self, **etiketat) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t, **etiketat)
+
+    def vlera(self, **etiketat) -> Tuple[int, float]:
+        # (numri, shuma)
+        celesi = self._celesi(etiketat)
+        with self._lock:
+            rresht = self._vlerat.get(celesi)
+            return (0, 0.0) if rresht is None else (sum(rresht[0]), rresht[1])
+
+    def seri(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        with self._lock:
+            return {k: (sum(r[0]), r[1]) for k, r in self._vlerat.items()}
+
+    def rreshtat(self) -> List[str]:
+        with self._lock:
+            vlerat = {k: (list(r[0]), r[1]) for k, r in self._vlerat.items()}
+        rreshtat = []
+        for celesi, (numrat, shuma) in sorted(vlerat.items()):
+            kumulativ = 0
+            for kufiri, n in zip(self.buckets + (float("inf"),), numrat):
+                kumulativ += n
+                le = _etiketat_tekst(self.etiketat, celesi, f'le="{_numri(kufiri)}"')
+                rreshtat.append(f"{self.emri}_bucket{le} {kumulativ}")
+            etiketat = _etiketat_tekst(self.etiketat, celesi)
+            rreshtat.append(f"{self.emri}_sum{etiketat} {_numri(shuma)}")
+            rreshtat.append(f"{self.emri}_count{etiketat} {kumulativ}")
+        return rreshtat
+
+
+class Regjistri:
+    def __init__(self):
+        self._metrikat: Dict[str, _Metrika] = {}
+        self._lock = threading.Lock()
+
+    def _merr(self, klasa, emri: str, pershkrim: str, etiketat: Sequence[str], **kw):
+        with self._lock:
+            m = self._metrikat.get(emri)
+            if m is None:
+                m = self._metrikat[emri] = klasa(emri, pershkrim, etiketat, **kw)
+            elif type(m) is not klasa or m.etiketat != tuple(etiketat):
+                raise ValueError(f"Metrika {emri} ekziston me tip/etiketa te tjera")
+            return m
+
+    def counter(self, emri: str, pershkrim: str, etiketat: Sequence[str] = ()) -> Counter:
+        return self._merr(Counter, emri, pershkrim, etiketat)
+
+    def gauge(self, emri: str, pershkrim: str, etiketat: Sequence[str] = ()) -> Gauge:
+        return self._merr(Gauge, emri, pershkrim, etiketat)
+
+    def histogram(self, emri: str, pershkrim: str, etiketat: Sequence[str] = (),
+                  buckets: Sequence[float] = BUCKETS_KOHA) -> Histogram:
+        return self._merr(Histogram, emri, pershkrim, etiketat, buckets=buckets)
+
+    def eksporto(self) -> str:
+        # formati tekst i Prometheus (exposition format 0.0.4)
+        with self._lock:
+            metrikat = sorted(self._metrikat.values(), key=lambda m: m.emri)
+        rreshtat = []
+        for m in metrikat:
+            rreshtat.append(f"# HELP {m.emri} {m.pershkrim}")
+            rreshtat.append(f"# TYPE {m.emri} {m.tipi}")
+            rreshtat.extend(m.rreshtat())
+        return "\n".join(rreshtat) + "\n"
+
+
+# regjistri i procesit; modulet krijojne metrikat e tyre ne import
+METRIKAT = Regjistri()
+
+
+class Profiler:
+    # --profile: mat seksionet e hot path-it per 1 nga `cdo` thirrje. Kur eshte
+    # joaktiv, profil() kthen nje context manager bosh pa matje kohe.
+
+    def __init__(self, regjistri: Regjistri = METRIKAT):
+        self.aktiv = False
+        self.cdo = 100
+        self._numeruesi = itertools.count()
+        self.histogrami = regjistri.histogram(
+            "si_profile_seconds", "Kohet e mostruara te seksioneve te hot path-it (--profile)", ("seksioni",)
+        )
+
+    def konfiguro(self, aktiv: bool, cdo: int = 100) -> None:
+        self.cdo = max(1, int(cdo))
+        self.aktiv = bool(aktiv)
+
+    def profil(self, seksioni: str):
+        if not self.aktiv or next(self._numeruesi) % self.cdo:
+            return nullcontext()
+        return self.histogrami.koha(seksioni=seksioni)
+
+    def permbledhje(self) -> Dict[str, Dict[str, float]]:
+        return {
+            k[0]: {"mostra": n, "mesatarja_us": round(shuma / n * 1e6, 1)}
+            for k, (n, shuma) in sorted(self.histogrami.seri().items())
+            if n
+        }
+
+
+PROFILER = Profiler()
+profil = PROFILER.profil
+
+
+class LogKufizues:
+    # Log per event eshte i shtrenjte ne volum: `sample` N => logohet 1 nga N
+    # events normale (suspicious logohen gjithmone), `rate` R => max R log-e ne
+    # sekonde gjithsej. Te shtypurat numerohen dhe raportohen periodikisht.
+
+    def __init__(self, sample: int = 1, rate: float = 0.0, regjistri: Regjistri = METRIKAT):
+        self._lock = threading.Lock()
+        self._numeruesi = itertools.count()
+        self._shtypur = regjistri.counter("si_log_shtypur_total", "Log-e per event te shtypura nga sampling/rate limit")
+        self.shtypur = 0
+        self.konfiguro(sample, rate)
+
+    def konfiguro(self, sample: int = 1, rate: float = 0.0) -> None:
+        with self._lock:
+            self.sample = max(1, int(sample))
+            self.rate = max(0.0, float(rate))
+            self._dritarja = int(time.monotonic())
+            self._ne_dritare = 0
+
+    def lejo(self, suspicious: bool = False) -> bool:
+        if not suspicious and self.sample > 1 and next(self._numeruesi) % self.sample:
+            return self._shtyp()
+        if self.rate > 0:
+            with self._lock:
+                sekonda = int(time.monotonic())
+                if sekonda != self._dritarja:
+                    self._dritarja, self._ne_dritare = sekonda, 0
+                if self._ne_dritare >= self.rate:
+                    return self._shtyp()
+                self._ne_dritare += 1
+        return True
+
+    def _shtyp(self) -> bool:
+        self.shtypur += 1
+        self._shtypur.inc()
+        return False
+
+    def raporto(self) -> None:
+        if self.shtypur:
+            n, self.shtypur = self.shtypur, 0
+            logging.info("%d log-e per event u shtypen (sampling/rate limit)", n)
+
+
+def shkruaj_textfile(path: str, regjistri: Regjistri = METRIKAT) -> None:
+    # per textfile collector-in e node_exporter: shkrim atomik (tmp + rename)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(regjistri.eksporto())
+    os.replace(tmp, path)
+
+
+def _parse_adresa(adresa: str) -> Tuple[str, int]:
+    # "9464", ":9464" ose "127.0.0.1:9464"; default vetem localhost
+    host, _, port = str(adresa).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class Eksportuesi:
+    # Ekspozon regjistrin si textfile (rishkruhet cdo `interval` sekonda) dhe/ose
+    # si endpoint HTTP /metrics.
+
+    def __init__(self, regjistri: Regjistri = METRIKAT, textfile: Optional[str] = None,
+                 http: Optional[str] = None, interval: float = 15.0):
+        self.regjistri = regjistri
+        self.textfile = textfile
+        self.interval = max(0.5, float(interval))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        if http:
+            self._server = ThreadingHTTPServer(_parse_adresa(http), self._handler())
+            self._server.daemon_threads = True
+
+    @property
+    def adresa(self) -> Optional[Tuple[str, int]]:
+        return None if self._server is None else self._server.server_address[:2]
+
+    def _handler(self):
+        regjistri = self.regjistri
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                trupi = regjistri.eksporto().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(trupi)))
+                self.end_headers()
+                self.wfile.write(trupi)
+
+            def log_message(self, format, *args):
+                logging.debug("metrics http: " + format, *args)
+
+        return Handler
+
+    def start(self) -> "Eksportuesi":
+        if self._server is not None:
+            threading.Thread(target=self._server.serve_forever, name="si-metrics-http", daemon=True).start()
+            logging.info("Metrikat ne http://%s:%d/metrics", *self.adresa)
+        if self.textfile:
+            self._thread = threading.Thread(target=self._run, name="si-metrics-textfile", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._shkruaj()
+
+    def _shkruaj(self) -> None:
+        try:
+            shkruaj_textfile(self.textfile, self.regjistri)
+        except OSError:
+            logging.exception("Metrikat nuk u shkruan ne %s", self.textfile)
+
+    def ndalo(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.textfile:
+            self._shkruaj()  # gjendja e fundit
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def shto_argumentet(ap) -> None:
+    # opsionet e perbashketa per monitorin dhe scheduler-in
+    ap.add_argument("--metrics-textfile", default=None,
+                    help="Shkruaj metrikat Prometheus ne kete file (node_exporter textfile collector)")
+    ap.add_argument("--metrics-http", default=None,
+                    help="Sherbe /metrics ne [HOST:]PORT (default host 127.0.0.1)")
+    ap.add_argument("--metrics-interval", type=float, default=15.0, help="Sekonda ndermjet shkrimeve te textfile")
+    ap.add_argument("--profile", action="store_true", help="Mat kohet e seksioneve te hot path-it (me mostra)")
+    ap.add_argument("--profile-sample", type=int, default=100, help="Per --profile: mat 1 nga N thirrje")
+
+
+def nis(textfile: Optional[str] = None, http: Optional[str] = None, interval: float = 15.0,
+        profile: bool = False, profile_sample: int = 100) -> Optional[Eksportuesi]:
+    PROFILER.konfiguro(profile, profile_sample)
+    if not textfile and not http:
+        return None
+    return Eksportuesi(textfile=textfile, http=http, interval=interval).start()
@@ -4,15 +4,29 @@
 import argparse
 import logging
 import os
+import queue
+import signal
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-from src.database import SecurityDatabase
+from src.baseline import BaselineScanner
+from src.attribution import STRATEGJITE, Attribution, ProcessAttribution, krijo_attribution
+from src.config import RootConfig, ngarko_config, rrenjet
+from src.connections import parse_pragma_args
+from src.database import EventRecord, SecurityDatabase
+from src.detector import BurstDetector, pragjet_nga
+from src.ignore_rules import DEFAULT_RULES, IgnoreRules
+from src.journal import Journal
+from src.notify import PublikuesUnix, socket_default
+from src.metrics import METRIKAT, PROFILER, LogKufizues, profil, shto_argumentet
+from src.metrics import nis as nis_metrikat
+from src.observer import krijo_observer
+from src.writer import POLITIKAT, EventWriter
 
 
 def setup_logging(log_file: str | None = None, verbose: bool = False) -> None:
@@ -28,46 +42,196 @@ def setup_logging(log_file: str | None = None, verbose: bool = False) -> None:
     )
 
 
+# Rregullat e bashkimit: (veprimi ne pritje, veprimi i ri) -> lejohet bashkimi
+COALESCE_RULES: Dict[str, Tuple[str, str]] = {
+    "created+modified": ("CREATED", "MODIFIED"),  # CREATED + MODIFIED*N -> CREATED
+    "modified": ("MODIFIED", "MODIFIED"),          # MODIFIED*N -> MODIFIED (numri=N)
+}
+
+# emit(perdoruesi, veprimi, file_path, koha, numri[, dest_path])
+EmitFn = Callable[..., None]
+
+_EVENTS = METRIKAT.counter("si_events_total", "Events te pranuara nga filtri", ("root", "veprimi"))
+_VONESA_ROOT = METRIKAT.histogram(
+    "si_root_vonesa_seconds", "Sa pret nje event raw ne radhen e root-it pas observer-it", ("root",)
+)
+
+# log-u per event (raporto_verdikt); main() e konfiguron me --log-sample/--log-rate
+LOG_EVENTS = LogKufizues()
+
+
+def parse_coalesce_rules(value: str | Iterable[str]) -> List[str]:
+    emrat = value.split(",") if isinstance(value, str) else list(value)
+    rregullat = [r.strip().lower() for r in emrat if r and r.strip()]
+    for r in rregullat:
+        if r not in COALESCE_RULES:
+            raise ValueError(f"Rregull coalescing i panjohur: {r!r} (te mundshme: {', '.join(COALESCE_RULES)})")
+    return rregullat
+
+
+class EventCoalescer:
+    # Bashkon events per te njejtin (user, file) brenda nje dritareje kohe.
+    # Rendi per cdo (user, file) ruhet: nje veprim qe s'bashkohet (p.sh. DELETED)
+    # e nxjerr me pare eventin ne pritje, pastaj del vete. Kjo mjafton per
+    # verdiktin suspicious, qe varet vetem nga historiku i ciftit.
+
+    def __init__(self, emit: EmitFn, window: float = 0.5, rules: Optional[Iterable[str]] = None):
+        self.emit = emit
+        self.window = max(0.0, float(window))
+        emrat = COALESCE_RULES.keys() if rules is None else rules
+        self._lejohet = {COALESCE_RULES[r] for r in emrat}
+        self._fillestare = {a for a, _ in self._lejohet}
+        # (perdoruesi, file_path) -> [veprimi, koha_e_pare, numri]
+        self._pritje: Dict[Tuple[str, str], list] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.events_hyrje = 0
+        self.events_dalje = 0
+
+    def start(self) -> "EventCoalescer":
+        if self._thread is None and self.window > 0:
+            self._thread = threading.Thread(target=self._run, name="si-coalescer", daemon=True)
+            self._thread.start()
+        return self
+
+    def shto(
+        self,
+        perdoruesi: str,
+        veprimi: str,
+        file_path: str,
+        koha: Optional[float] = None,
+        dest_path: Optional[str] = None,
+    ) -> None:
+        koha = time.time() if koha is None else koha
+        dalje = []
+        with self._lock:
+            self.events_hyrje += 1
+            celesi = (perdoruesi, file_path)
+            ne_pritje = self._pritje.get(celesi)
+            if ne_pritje is not None and (ne_pritje[0], veprimi) in self._lejohet:
+                ne_pritje[2] += 1
+                return
+            if ne_pritje is not None:
+                del self._pritje[celesi]
+                dalje.append((perdoruesi, ne_pritje[0], file_path, ne_pritje[1], ne_pritje[2]))
+            if self.window > 0 and veprimi in self._fillestare and dest_path is None:
+                self._pritje[celesi] = [veprimi, koha, 1]
+            else:
+                dalje.append((perdoruesi, veprimi, file_path, koha, 1, dest_path))
+            self.events_dalje += len(dalje)
+        for d in dalje:
+            self.emit(*d)
+
+    def flush(self, deri: Optional[float] = None) -> int:
+        # deri=None: nxirr gjithcka; perndryshe vetem ato me koha_e_pare <= deri
+        with self._lock:
+            if deri is None:
+                skaduar = list(self._pritje.items())
+                self._pritje.clear()
+            else:
+                skaduar = [(k, v) for k, v in self._pritje.items() if v[1] <= deri]
+                for k, _ in skaduar:
+                    del self._pritje[k]
+            self.events_dalje += len(skaduar)
+        skaduar.sort(key=lambda kv: kv[1][1])
+        for (perdoruesi, file_path), (veprimi, koha, numri) in skaduar:
+            self.emit(perdoruesi, veprimi, file_path, koha, numri)
+        return len(skaduar)
+
+    def ndalo(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.window / 2):
+            self.flush(deri=time.time() - self.window)
+
+
+def raporto_verdikt(ev: EventRecord, event_id: int, suspicious: int) -> None:
+    if not LOG_EVENTS.lejo(bool(suspicious)):
+        return
+    if ev.arsye:
+        logging.warning("SUSPICIOUS (%s): user=%s action=%s file=%s", ev.arsye, ev.perdoruesi, ev.veprimi,
+                        ev.path_shfaqur)
+    elif suspicious:
+        logging.warning("SUSPICIOUS: user=%s action=%s file=%s", ev.perdoruesi, ev.veprimi, ev.path_shfaqur)
+    else:
+        logging.info("user=%s action=%s file=%s", ev.perdoruesi, ev.veprimi, ev.path_shfaqur)
+
+
 class FileMonitor(FileSystemEventHandler):
-    def __init__(self, database: SecurityDatabase, monitored_path: str, ignored: List[str]):
+    def __init__(
+        self,
+        database: SecurityDatabase,
+        monitored_path: str,
+        ignored: List[str],
+        writer: Optional[EventWriter] = None,
+        coalesce_window: float = 0.0,
+        coalesce_rules: Optional[Iterable[str]] = None,
+        ignore_rules: Optional[Iterable[str]] = None,
+        attribution: Optional[Attribution] = None,
+        emri: Optional[str] = None,
+    ):
         self.db = database
+        self.emri = emri or monitored_path
+        self.attribution = attribution or ProcessAttribution()
+        self.writer = writer
+        self.coalescer: Optional[EventCoalescer] = None
+        if coalesce_window > 0:
+            self.coalescer = EventCoalescer(self._dergo, coalesce_window, coalesce_rules)
         self.monitored_path = monitored_path
         self.ignored_suffixes = ignored
+        rregullat = list(DEFAULT_RULES if ignore_rules is None else ignore_rules)
+        rregullat += [f"suffix:{suf}" for suf in ignored if suf]
+        self.rules = IgnoreRules(rregullat, root=monitored_path)
+        self.events_pranuar = 0
 
         logging.info("Monitorimi u inicializua per: %s", monitored_path)
 
     def duhet_injoruar(self, filepath: str) -> bool:
-        p = filepath.replace("\\", "/")
+        with profil("filter"):
+            return self.rules.duhet_injoruar(filepath)
 
-        # avoid noise / self recursion
-        if "/.git/" in p or "/venv/" in p or "/__pycache__/" in p:
-            return True
-        if p.endswith("/security.db") or p.endswith("security.db"):
-            return True
-        if "/reports/" in p:
-            return True
+    def merr_perdorues(self, filepath: str = "", event_type: str = "") -> str:
+        return self.attribution.perdoruesi(filepath, event_type)
 
-        for suf in self.ignored_suffixes:
-            if suf and p.endswith(suf):
-                return True
+    def _log_event(self, event_type: str, filepath: str, dest_path: Optional[str] = None) -> None:
+        # per MOVED, file-i tani ndodhet te destinacioni
+        with profil("attribution"):
+            perdoruesi = self.merr_perdorues(dest_path or filepath, event_type)
+        self.events_pranuar += 1
+        _EVENTS.inc(root=self.emri, veprimi=event_type)
+        koha = time.time()
+        if self.coalescer is not None:
+            self.coalescer.shto(perdoruesi, event_type, filepath, koha, dest_path)
+        else:
+            self._dergo(perdoruesi, event_type, filepath, koha, 1, dest_path)
 
-        return False
+    def _dergo(
+        self,
+        perdoruesi: str,
+        event_type: str,
+        filepath: str,
+        koha: float,
+        numri: int,
+        dest_path: Optional[str] = None,
+    ) -> None:
+        if self.writer is not None:
+            # verdikti vjen asinkron nga writer-i, ne raporto_verdikt
+            self.writer.shto(perdoruesi, event_type, filepath, koha, numri, dest_path)
+            return
 
-    def merr_perdorues(self) -> str:
-        try:
-            return os.getlogin()
-        except Exception:
-            import pwd
-            return pwd.getpwuid(os.getuid()).pw_name
+        ev = EventRecord(perdoruesi, event_type, filepath, koha, numri, dest_path)
+        _, suspicious = self.db.shto_events([ev])[0]
+        raporto_verdikt(ev, 0, suspicious)
 
-    def _log_event(self, event_type: str, filepath: str) -> None:
-        perdoruesi = self.merr_perdorues()
-        suspicious = self.db.shto_event(perdoruesi, event_type, filepath)
-
-        if suspicious:
-            logging.warning("SUSPICIOUS: user=%s action=%s file=%s", perdoruesi, event_type, filepath)
-        else:
-            logging.info("user=%s action=%s file=%s", perdoruesi, event_type, filepath)
+    def raporto_verdikt(self, ev: EventRecord, event_id: int, suspicious: int) -> None:
+        raporto_verdikt(ev, event_id, suspicious)
 
     def on_created(self, event):
         if not event.is_directory and not self.duhet_injoruar(event.src_path):
@@ -86,46 +250,495 @@ class FileMonitor(FileSystemEventHandler):
             dest = getattr(event, "dest_path", "")
             src = getattr(event, "src_path", "")
             if dest and not self.duhet_injoruar(dest):
-                self._log_event("MOVED", f"{src} -> {dest}")
+                self._log_event("MOVED", src, dest)
+
+
+_NDALO_ROOT = object()
+
+
+class RootWorker(FileSystemEventHandler):
+    # Observer-i i root-it vetem fut events raw ne radhe; filtri, attribution dhe
+    # coalescing behen ne thread-in e root-it, qe nje root i zhurmshem (/home)
+    # te mos vonoje te tjeret. Te gjithe i dergojne nje EventWriter-i te perbashket.
+
+    def __init__(self, emri: str, handler: FileMonitor, max_queue: int = 10000):
+        self.emri = emri
+        self.handler = handler
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self.events_marre = 0
+        self.gabime = 0
+        self._fillimi = time.monotonic()
+        self._e_fundit = (self._fillimi, 0)
 
+    def dispatch(self, event) -> None:
+        # thirret nga thread-i i observer-it; bllokon kur radha eshte plot
+        self.events_marre += 1
+        self._queue.put((time.monotonic(), event))
 
-def parse_args():
+    def start(self) -> "RootWorker":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"si-root-{self.emri}", daemon=True)
+            self._thread.start()
+            if self.handler.coalescer is not None:
+                self.handler.coalescer.start()
+        return self
+
+    def ndalo(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._queue.put(_NDALO_ROOT)
+            self._thread.join(timeout)
+            self._thread = None
+        if self.handler.coalescer is not None:
+            self.handler.coalescer.ndalo()
+
+    def madhesia_radhes(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _NDALO_ROOT:
+                return
+            koha, event = item
+            _VONESA_ROOT.observe(time.monotonic() - koha, root=self.emri)
+            try:
+                self.handler.dispatch(event)
+            except Exception:
+                self.gabime += 1
+                logging.exception("Root '%s': gabim ne perpunimin e eventit", self.emri)
+
+    def statistika(self) -> Dict[str, Any]:
+        tani = time.monotonic()
+        pranuar = self.handler.events_pranuar
+        koha_e_fundit, pranuar_e_fundit = self._e_fundit
+        self._e_fundit = (tani, pranuar)
+        return {
+            "marre": self.events_marre,
+            "pranuar": pranuar,
+            "injoruar": sum(self.handler.rules.drops.values()),
+            "radha": self.madhesia_radhes(),
+            "gabime": self.gabime,
+            "events_per_sek": round((pranuar - pranuar_e_fundit) / max(tani - koha_e_fundit, 1e-9), 2),
+            "mesatarja_per_sek": round(pranuar / max(tani - self._fillimi, 1e-9), 2),
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None):
     ap = argparse.ArgumentParser(description="SI Log Event Manager - File monitor")
+    ap.add_argument("--config", default=None,
+                    help="config.yaml; me monitor.roots monitorohen disa root ne nje proces (zevendeson opsionet e tjera)")
     ap.add_argument("--path", default=str(Path.cwd()), help="Folder qe do monitorohet (default: cwd)")
     ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
     ap.add_argument("--recursive", action="store_true", help="Monitorim rekursiv (nensubfoldera)")
     ap.add_argument("--ignore", default=".swp,.tmp,~,.log", help="Suffixes per me i injoru, te ndara me presje")
+    ap.add_argument("--ignore-rule", action="append", default=[],
+                    help="Rregull injorimi (glob gitignore-style, dir:EMER, suffix:SUF, re:REGEX); mund te perseritet")
+    ap.add_argument("--no-default-ignores", action="store_true",
+                    help="Mos perdor rregullat default (.git, venv, node_modules, __pycache__, reports, security.db*)")
+    ap.add_argument("--coalesce-window", type=float, default=0.5,
+                    help="Sekonda per bashkimin e events te njejte per nje file (0 = pa coalescing)")
+    ap.add_argument("--coalesce-rules", default=",".join(COALESCE_RULES),
+                    help="Rregullat e bashkimit, te ndara me presje: " + ", ".join(COALESCE_RULES))
+    ap.add_argument("--batch-size", type=int, default=500, help="Max events per transaksion DB")
+    ap.add_argument("--flush-interval", type=float, default=0.5, help="Sekonda max para flush te batch-it")
+    ap.add_argument("--queue-size", type=int, default=10000, help="Madhesia max e radhes se events ne memorie")
+    ap.add_argument("--backpressure", choices=POLITIKAT, default=None,
+                    help="Kur radha e writer-it mbushet: block, drop-oldest ose spill ne journal (default: block)")
+    ap.add_argument("--journal-dir", default=None,
+                    help="Direktoria e journal-it per events qe s'hyne ne DB (default: <db>.journal)")
+    ap.add_argument("--journal-fsync-batch", type=int, default=256, help="fsync i journal-it cdo N events")
+    ap.add_argument("--journal-fsync-interval", type=float, default=0.2,
+                    help="fsync i journal-it te pakten cdo N sekonda")
+    ap.add_argument("--cache-lru", type=int, default=100_000, help="Sa cifte (user, file) mbahen ne LRU (0 = pa LRU)")
+    ap.add_argument("--cache-bloom", type=int, default=1_000_000, help="Kapaciteti i Bloom filter-it (0 = pa Bloom)")
+    ap.add_argument("--pragma", action="append", default=[], help="SQLite PRAGMA EMRI=VLERA (mund te perseritet)")
+    ap.add_argument("--attribution", choices=STRATEGJITE, default="process",
+                    help="Kush i atribuohet eventit: process (useri i monitorit), owner (pronari i file-it), hook")
+    ap.add_argument("--attribution-hook", default=None,
+                    help="Per --attribution hook: modul:funksion(file_path, veprimi) -> user ose None")
+    ap.add_argument("--baseline", action="store_true",
+                    help="Ne start: skano root-in, ruaj snapshot dhe gjenero events per ndryshimet offline")
+    ap.add_argument("--baseline-seed", action="store_true",
+                    help="Si --baseline, plus file-t ekzistuese shenohen te njohura per perdoruesin "
+                         "qe jep --attribution")
+    ap.add_argument("--scan-threads", type=int, default=8, help="Thread-e per skanimin baseline")
+    ap.add_argument("--notify-socket", default=None,
+                    help="Socket Unix i scheduler-it per njoftimet suspicious (default: <db>.notify)")
+    ap.add_argument("--no-notify", action="store_true", help="Mos njofto scheduler-in (vetem polling ne DB)")
+    ap.add_argument("--no-detector", action="store_true", help="Pa detektorin e burst-eve (vetem rregulli 'hera e pare')")
+    ap.add_argument("--burst-window", type=float, default=None, help="Dritarja e detektorit ne sekonda (default: 60)")
+    ap.add_argument("--burst-user", type=int, default=None, help="Events per perdorues ne dritare (default: 1000)")
+    ap.add_argument("--burst-dir", type=int, default=None, help="Events ne nje dosje ne dritare (default: 500)")
+    ap.add_argument("--burst-rename", type=int, default=None,
+                    help="Rename ne prapashtesa te panjohura per perdorues ne dritare (default: 20)")
+    ap.add_argument("--burst-delete", type=int, default=None, help="Fshirje per perdorues ne dritare (default: 200)")
+    ap.add_argument("--stats-interval", type=float, default=60,
+                    help="Sekonda ndermjet log-eve te statistikave per root (0 = vetem ne fund)")
+    ap.add_argument("--log-sample", type=int, default=None,
+                    help="Logo 1 nga N events normale (suspicious logohen gjithmone; default: 1)")
+    ap.add_argument("--log-rate", type=float, default=None, help="Max log-e per event ne sekonde (0 = pa limit)")
+    shto_argumentet(ap)
     ap.add_argument("--log-file", default=None, help="Ruaj log edhe ne file (p.sh. /var/log/si-monitor.log)")
     ap.add_argument("--verbose", action="store_true", help="Debug logs")
-    return ap.parse_args()
-
+    return ap.parse_args(argv)
 
-def main():
-    args = parse_args()
-    setup_logging(args.log_file, args.verbose)
 
+def _rrenjet_nga_args(args) -> List[RootConfig]:
+    # modi i vjeter me nje --path, i perkthyer ne nje RootConfig
     monitored = os.path.abspath(args.path)
-    if not os.path.isdir(monitored):
-        raise SystemExit(f"Path nuk ekziston ose s'eshte folder: {monitored}")
+    return [
+        RootConfig(
+            emri=monitored,
+            path=monitored,
+            recursive=bool(args.recursive),
+            ignore_suffixes=[x.strip() for x in args.ignore.split(",") if x.strip()],
+            ignore_rules=list(args.ignore_rule),
+            use_default_ignores=not args.no_default_ignores,
+            attribution=args.attribution,
+            attribution_hook=args.attribution_hook,
+            coalesce_window=args.coalesce_window,
+            coalesce_rules=parse_coalesce_rules(args.coalesce_rules),
+            baseline=args.baseline or args.baseline_seed,
+            baseline_seed=args.baseline_seed,
+        )
+    ]
 
-    ignored = [x.strip() for x in args.ignore.split(",") if x.strip()]
 
-    db = SecurityDatabase(args.db)
-    handler = FileMonitor(db, monitored, ignored)
+def _pragjet_nga_args(args) -> Dict[str, Any]:
+    return {
+        "window": args.burst_window,
+        "user": args.burst_user,
+        "dir": args.burst_dir,
+        "rename": args.burst_rename,
+        "delete": args.burst_delete,
+    }
 
-    observer = Observer()
-    observer.schedule(handler, monitored, recursive=bool(args.recursive))
-    observer.start()
 
-    logging.info("Monitorimi ka fillu (Ctrl+C per ndalim). recursive=%s", bool(args.recursive))
+def _cilesimet(args, cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if cfg is None:
+        return {
+            "db": args.db,
+            "pragmas": parse_pragma_args(args.pragma),
+            "read_pool_size": 4,
+            "cache_lru_size": args.cache_lru,
+            "cache_bloom_capacity": args.cache_bloom,
+            "cache_dim_size": 200_000,
+            "batch_size": args.batch_size,
+            "flush_interval": args.flush_interval,
+            "queue_size": args.queue_size,
+            "backpressure": args.backpressure or "block",
+            "journal": {
+                "dir": args.journal_dir,
+                "fsync_batch": args.journal_fsync_batch,
+                "fsync_interval": args.journal_fsync_interval,
+            },
+            "stats_interval": args.stats_interval,
+            "notify": None if args.no_notify else args.notify_socket or socket_default(args.db),
+            "detector": None if args.no_detector else pragjet_nga(_pragjet_nga_args(args)),
+            "scan_threads": args.scan_threads,
+            "log_file": args.log_file,
+            "log_sample": args.log_sample or 1,
+            "log_rate": args.log_rate or 0,
+            "metrics": {
+                "textfile": args.metrics_textfile,
+                "http": args.metrics_http,
+                "interval": args.metrics_interval,
+                "profile": args.profile,
+                "profile_sample": args.profile_sample,
+            },
+        }
+    m, d = cfg["monitor"], cfg["database"]
+    mt = dict(cfg["metrics"])
+    # flamujt e CLI-se per metrikat mbishkruajne config-un
+    mt["textfile"] = args.metrics_textfile or mt.get("textfile")
+    mt["http"] = args.metrics_http or mt.get("http")
+    mt["profile"] = args.profile or bool(mt.get("profile"))
+    jr = dict(m["journal"])
+    jr["dir"] = args.journal_dir or jr.get("dir")
+    if m["backpressure"] not in POLITIKAT:
+        raise ValueError(f"monitor.backpressure i panjohur: {m['backpressure']} (lejohen: {', '.join(POLITIKAT)})")
+    return {
+        "db": m["db"],
+        "pragmas": dict(d.get("pragmas") or {}),
+        "read_pool_size": d["read_pool_size"],
+        "cache_lru_size": d["cache_lru_size"],
+        "cache_bloom_capacity": d["cache_bloom_capacity"],
+        "cache_dim_size": d["cache_dim_size"],
+        "batch_size": m["batch_size"],
+        "flush_interval": m["flush_interval"],
+        "queue_size": m["queue_size"],
+        "backpressure": args.backpressure or m["backpressure"],
+        "journal": jr,
+        "stats_interval": m["stats_interval"],
+        "notify": None if args.no_notify or not m["notify"]["enabled"]
+        else args.notify_socket or m["notify"]["socket"] or socket_default(m["db"]),
+        "detector": None if args.no_detector or not m["detector"]["enabled"]
+        else pragjet_nga({**m["detector"], **{k: v for k, v in _pragjet_nga_args(args).items() if v is not None}}),
+        "scan_threads": (m.get("baseline") or {}).get("threads", 8),
+        "log_file": args.log_file or m["log_file"],
+        "log_sample": args.log_sample or m["log_sample"],
+        "log_rate": m["log_rate"] if args.log_rate is None else args.log_rate,
+        "metrics": mt,
+    }
+
+
+def ngarko_cilesimet(args) -> Tuple[Dict[str, Any], List[RootConfig]]:
+    # args (+ config.yaml nese jepet) -> (cilesimet, rrenjet); ValueError per vlera te pavlefshme
+    cfg = ngarko_config(args.config) if args.config else None
+    rrenjet_cfg = rrenjet(cfg) if cfg is not None else _rrenjet_nga_args(args)
+    return _cilesimet(args, cfg), rrenjet_cfg
+
+
+def krijo_root(root: RootConfig, db: SecurityDatabase, writer: EventWriter, db_path: str, max_queue: int) -> RootWorker:
+    if not os.path.isdir(root.path):
+        raise ValueError(f"Path nuk ekziston ose s'eshte folder: {root.path}")
+    rregullat = list(DEFAULT_RULES) if root.use_default_ignores else []
+    # databaza jone (edhe me emer jo-default) nuk duhet te gjeneroje events
+    rregullat.append(os.path.basename(db_path) + "*")
+    rregullat += root.ignore_rules
+    handler = FileMonitor(
+        db,
+        root.path,
+        root.ignore_suffixes,
+        writer=writer,
+        coalesce_window=root.coalesce_window,
+        coalesce_rules=parse_coalesce_rules(root.coalesce_rules),
+        ignore_rules=rregullat,
+        attribution=krijo_attribution(root.attribution, root.attribution_hook),
+        emri=root.emri,
+    )
+    return RootWorker(root.emri, handler, max_queue=max_queue)
+
+
+def nis_baseline(workers: List["RootWorker"], rrenjet_cfg: List[RootConfig], db: SecurityDatabase,
+                 threads: int, on_suspicious: Optional[Callable[[int], None]] = None,
+                 detektori: Optional[BurstDetector] = None,
+                 ) -> Tuple[Optional[threading.Thread], List[BaselineScanner]]:
+    # Observer-at jane nisur tashme, qe asnje ndryshim gjate skanimit te mos humbase.
+    # Skanimi behet ne sfond, root pas root-i.
+    scanners = [
+        BaselineScanner(db, r.path, w.handler.rules, threads=threads, seed=r.baseline_seed,
+                        attribution=w.handler.attribution, on_suspicious=on_suspicious, detektori=detektori)
+        for w, r in zip(workers, rrenjet_cfg)
+        if r.baseline
+    ]
+    if not scanners:
+        return None, []
+
+    def run():
+        for sc in scanners:
+            try:
+                stats = sc.skano()
+                logging.info("Baseline %s: %s", sc.root, stats)
+            except Exception:
+                logging.exception("Baseline %s deshtoi", sc.root)
+
+    thread = threading.Thread(target=run, name="si-baseline", daemon=True)
+    thread.start()
+    return thread, scanners
+
+
+def regjistro_metrikat(db: SecurityDatabase, writer: EventWriter, workers: List["RootWorker"]) -> None:
+    # metrikat qe lexohen nga gjendja ne momentin e eksportit
+    radha = METRIKAT.gauge("si_root_radha", "Events raw ne radhen e root-it", ("root",))
+    marre = METRIKAT.counter("si_root_marre_total", "Events raw nga observer-i", ("root",))
+    injoruar = METRIKAT.counter("si_root_injoruar_total", "Events te hedhura nga rregullat e injorimit", ("root",))
+    for w in workers:
+        radha.funksion(w.madhesia_radhes, root=w.emri)
+        marre.funksion(lambda w=w: w.events_marre, root=w.emri)
+        injoruar.funksion(lambda w=w: sum(w.handler.rules.drops.values()), root=w.emri)
+    METRIKAT.gauge("si_writer_radha", "Events ne radhen e writer-it").funksion(writer.madhesia_radhes)
+    METRIKAT.counter("si_writer_events_total", "Events te shkruara nga writer-i").funksion(lambda: writer.events_shkruar)
+    METRIKAT.gauge("si_journal_ne_pritje", "Events ne journal qe presin riluajtjen").funksion(writer.ne_journal)
+    if writer.detektori is not None:
+        METRIKAT.gauge("si_detektor_celesa", "Celesa aktive ne numeruesit e detektorit").funksion(
+            writer.detektori.celesa
+        )
+
+    cache = METRIKAT.gauge("si_cache", "Statistikat e cache-ve ne memorie", ("cache", "stat"))
+    for stat in db.seen.statistika():
+        cache.funksion(lambda stat=stat: db.seen.statistika()[stat], cache="seen", stat=stat)
+    for dim in (db.paths, db.perdoruesit, db.dirs):
+        for stat in dim.statistika():
+            cache.funksion(lambda dim=dim, stat=stat: dim.statistika()[stat], cache=dim.tabela, stat=stat)
+
+
+def _ndalo_me_sinjal(signum, frame):
+    # SIGTERM (systemd stop) trajtohet si Ctrl+C qe te behet flush i radhes
+    raise KeyboardInterrupt
+
+
+class Monitori:
+    # Gjithe pjeset e monitorit (DB, writer, root-et, observer-at, baseline) si
+    # nje komponent: main() e nis vete, src.daemon e mban bashke me scheduler-in
+    # dhe sherbimin e kontrollit ne te njejtin proces.
+
+    def __init__(self, cilesimet: Dict[str, Any], rrenjet_cfg: List[RootConfig], publikuesi=None):
+        self.cilesimet = cilesimet
+        self.rrenjet_cfg = rrenjet_cfg
+        self.db = SecurityDatabase(
+            cilesimet["db"],
+            pragmas=cilesimet["pragmas"],
+            read_pool_size=cilesimet["read_pool_size"],
+            cache_lru_size=cilesimet["cache_lru_size"],
+            cache_bloom_capacity=cilesimet["cache_bloom_capacity"],
+            cache_dim_size=cilesimet["cache_dim_size"],
+        )
+        # journal-i krijohet gjithmone (file-t vetem kur duhen): mbron batch-et
+        # kur DB eshte e bllokuar dhe riluan ato te mbetura nga nje ekzekutim i meparshem
+        jr = cilesimet["journal"]
+        journal = Journal(
+            jr["dir"] or cilesimet["db"] + ".journal",
+            fsync_batch=jr["fsync_batch"],
+            fsync_interval=jr["fsync_interval"],
+        )
+        # verdiktet suspicious i cojne scheduler-it nje "zile" (datagram pa bllokim,
+        # ose KanalLokal kur scheduler-i eshte ne te njejtin proces)
+        if publikuesi is None and cilesimet["notify"]:
+            publikuesi = PublikuesUnix(cilesimet["notify"])
+        self.publikuesi = publikuesi
+
+        # nje writer i vetem per gjithe root-et: nje proces, nje lidhje shkrimi
+        self.writer = EventWriter(
+            self.db,
+            batch_size=cilesimet["batch_size"],
+            flush_interval=cilesimet["flush_interval"],
+            max_queue=cilesimet["queue_size"],
+            on_verdict=self._on_verdict,
+            politika=cilesimet["backpressure"],
+            journal=journal,
+            detektori=BurstDetector(cilesimet["detector"]) if cilesimet["detector"] else None,
+        )
+        try:
+            self.workers = [
+                krijo_root(r, self.db, self.writer, cilesimet["db"], cilesimet["queue_size"]) for r in rrenjet_cfg
+            ]
+        except (ValueError, ImportError, AttributeError) as e:
+            self.db.mbyll()
+            raise ValueError(str(e)) from e
+
+        LOG_EVENTS.konfiguro(cilesimet["log_sample"], cilesimet["log_rate"])
+        regjistro_metrikat(self.db, self.writer, self.workers)
+        self.observers: List[Any] = []
+        self.baseline_thread: Optional[threading.Thread] = None
+        self.scanners: List[BaselineScanner] = []
+        self._intervali = float(cilesimet["stats_interval"] or 0)
+        self._afati = time.monotonic() + self._intervali
+
+    def _on_verdict(self, ev: EventRecord, event_id: int, suspicious: int) -> None:
+        raporto_verdikt(ev, event_id, suspicious)
+        if suspicious and self.publikuesi is not None:
+            self.publikuesi.publiko(event_id)
+
+    def start(self) -> "Monitori":
+        self.writer.start()
+        # nje observer per root: secili me prune-in e rregullave te veta
+        for w, r in zip(self.workers, self.rrenjet_cfg):
+            w.start()
+            observer = krijo_observer(prune=w.handler.rules.dir_perjashtuar if r.recursive else None)
+            observer.schedule(w, r.path, recursive=r.recursive)
+            observer.start()
+            self.observers.append(observer)
+            logging.info("Root '%s' (%s) recursive=%s", w.emri, r.path, r.recursive)
+
+        logging.info("Monitorimi ka fillu me %d root", len(self.workers))
+        # events e baseline-it nuk kalojne nga writer-i: detektori dhe njoftimi behen ketu
+        self.baseline_thread, self.scanners = nis_baseline(
+            self.workers, self.rrenjet_cfg, self.db, self.cilesimet["scan_threads"],
+            on_suspicious=self.publikuesi.publiko if self.publikuesi is not None else None,
+            detektori=self.writer.detektori,
+        )
+        return self
+
+    def tik(self) -> None:
+        # thirret rreth nje here ne sekonde nga loop-i kryesor
+        if self.publikuesi is not None:
+            self.publikuesi.heartbeat()
+        if self._intervali > 0 and time.monotonic() >= self._afati:
+            self._afati = time.monotonic() + self._intervali
+            for w in self.workers:
+                logging.info("Root '%s': %s", w.emri, w.statistika())
+            LOG_EVENTS.raporto()
+
+    def rifresko(self) -> None:
+        # SIGHUP / "reload": harro emrat e cache-uar (p.sh. pas ndryshimeve ne /etc/passwd)
+        for w in self.workers:
+            w.handler.attribution.invalido()
+        logging.info("Cache-i i attribution u invalidua")
+
+    def statistika(self) -> Dict[str, Any]:
+        return {
+            "roots": {w.emri: w.statistika() for w in self.workers},
+            "writer": {
+                "radha": self.writer.madhesia_radhes(),
+                "shkruar": self.writer.events_shkruar,
+                "journal": self.writer.ne_journal(),
+            },
+            "seen": self.db.seen.statistika(),
+        }
+
+    def ndalo(self) -> None:
+        for sc in self.scanners:
+            sc.ndalo()
+        if self.baseline_thread is not None:
+            self.baseline_thread.join()
+        for observer in self.observers:
+            observer.stop()
+        for observer in self.observers:
+            observer.join()
+        for w in self.workers:
+            w.ndalo()
+        self.writer.ndalo()
+        if self.publikuesi is not None:
+            self.publikuesi.mbyll()
+        self.db.mbyll()
+        LOG_EVENTS.raporto()
+        logging.info("Radha e events u shkarkua (%d events te shkruara)", self.writer.events_shkruar)
+        logging.info("Cache first-seen: %s", self.db.seen.statistika())
+        for w in self.workers:
+            logging.info("Root '%s': %s", w.emri, w.statistika())
+            logging.info("  events te injoruara sipas rregullit: %s", w.handler.rules.statistika())
+            logging.info("  attribution (%s): %s", w.handler.attribution.emri, w.handler.attribution.statistika())
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    try:
+        cilesimet, rrenjet_cfg = ngarko_cilesimet(args)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    setup_logging(cilesimet["log_file"], args.verbose)
+
+    try:
+        monitori = Monitori(cilesimet, rrenjet_cfg)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    try:
+        eksportuesi = nis_metrikat(**cilesimet["metrics"])
+    except (OSError, ValueError) as e:
+        monitori.db.mbyll()
+        raise SystemExit(f"Metrikat: {e}")
+
+    monitori.start()
+    signal.signal(signal.SIGTERM, _ndalo_me_sinjal)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda signum, frame: monitori.rifresko())
+    logging.info("Ctrl+C per ndalim")
 
     try:
         while True:
             time.sleep(1)
+            monitori.tik()
     except KeyboardInterrupt:
         logging.info("Monitorimi u ndal")
-        observer.stop()
-    observer.join()
+    finally:
+        monitori.ndalo()
+        if eksportuesi is not None:
+            eksportuesi.ndalo()
+        if PROFILER.aktiv:
+            for seksioni, vlerat in PROFILER.permbledhje().items():
+                logging.info("Profili %-20s %s", seksioni, vlerat)
 
 
 if __name__ == "__main__":
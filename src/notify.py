@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+from src.metrics import METRIKAT
+
+# monitori dergon heartbeat me id-ne suspicious me te madhe qe ka pare; pa
+# heartbeat per AFATI_AKTIV sekonda kanali konsiderohet jashte pune dhe scheduler-i
+# kthehet te polling-u i DB-se
+HEARTBEAT = 5.0
+AFATI_AKTIV = 3 * HEARTBEAT
+
+_DERGUAR = METRIKAT.counter("si_notify_derguar_total", "Njoftime te derguara nga monitori", ("rezultati",))
+_MARRE = METRIKAT.counter("si_notify_marre_total", "Njoftime te marra nga scheduler-i")
+
+
+def socket_default(db_path: str) -> str:
+    return os.path.abspath(db_path) + ".notify"
+
+
+class _Marresi:
+    # Ana e scheduler-it: njoftimet jane vetem "zile". Events lexohen gjithmone
+    # nga DB me cursor-in, keshtu nje njoftim i humbur vonon, por nuk humb alarm.
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.max_id = 0
+        self._pare_id = 0
+        self._i_fundit: Optional[float] = None
+
+    def _mori(self, max_id: int) -> None:
+        _MARRE.inc()
+        with self._cond:
+            self._i_fundit = time.monotonic()
+            if max_id > self.max_id:
+                self.max_id = max_id
+                self._cond.notify_all()
+
+    def prit(self, timeout: Optional[float] = None) -> bool:
+        # True kur ka ardhur nje id suspicious me e re se ne thirrjen e meparshme
+        with self._cond:
+            self._cond.wait_for(lambda: self.max_id > self._pare_id, timeout)
+            if self.max_id > self._pare_id:
+                self._pare_id = self.max_id
+                return True
+            return False
+
+    def aktiv(self) -> bool:
+        i_fundit = self._i_fundit
+        return i_fundit is not None and time.monotonic() - i_fundit < AFATI_AKTIV
+
+    def start(self) -> "_Marresi":
+        return self
+
+    def ndalo(self) -> None:
+        pass
+
+
+class _Publikuesi:
+    # Ana e monitorit: thirret nga thread-i i writer-it (dhe i baseline-it), nuk bllokon kurre
+
+    def __init__(self):
+        self.max_id = 0
+        self._hb_i_fundit = 0.0
+
+    def publiko(self, event_id: int) -> None:
+        self.max_id = max(self.max_id, int(event_id))
+        self._dergo(self.max_id)
+
+    def heartbeat(self, detyrueshem: bool = False) -> None:
+        tani = time.monotonic()
+        if detyrueshem or tani - self._hb_i_fundit >= HEARTBEAT:
+            self._hb_i_fundit = tani
+            self._dergo(self.max_id)
+
+    def _dergo(self, max_id: int) -> None:
+        raise NotImplementedError
+
+    def mbyll(self) -> None:
+        pass
+
+
+class KanalLokal(_Marresi):
+    # monitor dhe scheduler ne te njejtin proces: i njejti objekt eshte
+    # publikuesi dhe marresi
+
+    def publiko(self, event_id: int) -> None:
+        _DERGUAR.inc(rezultati="ok")
+        self._mori(int(event_id))
+
+    def heartbeat(self, detyrueshem: bool = False) -> None:
+        self._mori(0)
+
+    def mbyll(self) -> None:
+        pass
+
+
+class PublikuesUnix(_Publikuesi):
+    # datagrame ne socket-in e scheduler-it; pa scheduler (ose radhe plot) hidhen
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self._lock = threading.Lock()
+
+    def _dergo(self, max_id: int) -> None:
+        mesazhi = json.dumps({"max_id": max_id}).encode()
+        try:
+            with self._lock:
+                self._sock.sendto(mesazhi, self.path)
+            _DERGUAR.inc(rezultati="ok")
+        except (FileNotFoundError, ConnectionRefusedError, BlockingIOError):
+            _DERGUAR.inc(rezultati="hedhur")
+        except OSError as e:
+            _DERGUAR.inc(rezultati="hedhur")
+            logging.debug("Njoftimi ne %s deshtoi: %s", self.path, e)
+
+    def mbyll(self) -> None:
+        self._sock.close()
+
+
+class DegjuesUnix(_Marresi):
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ndal = threading.Event()
+
+    def start(self) -> "DegjuesUnix":
+        # socket-i i mbetur nga nje scheduler i meparshem fshihet
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        os.chmod(self.path, 0o660)
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._run, name="si-notify", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._ndal.is_set():
+            try:
+                data = self._sock.recv(512)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            try:
+                self._mori(int(json.loads(data)["max_id"]))
+            except (ValueError, KeyError, TypeError):
+                logging.debug("Njoftim i pavlefshem: %r", data[:64])
+
+    def ndalo(self) -> None:
+        self._ndal.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
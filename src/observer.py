@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import functools
+import itertools
+import logging
+import os
+import sys
+from typing import Callable, Optional
+
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+
+PruneFn = Callable[[str], bool]
+
+try:
+    if not sys.platform.startswith("linux"):
+        raise ImportError("inotify vetem ne Linux")
+    from watchdog.version import VERSION_MAJOR
+    if VERSION_MAJOR < 6:
+        # klasat me poshte mbishkruajne metoda private me nenshkrimet e watchdog 6
+        raise ImportError(f"prune i inotify kerkon watchdog>=6 (gjendet {VERSION_MAJOR})")
+    from watchdog.observers.inotify import InotifyEmitter
+    from watchdog.observers.inotify_buffer import InotifyBuffer
+    from watchdog.observers.inotify_c import Inotify
+    from watchdog.utils import BaseThread
+    from watchdog.utils.delayed_queue import DelayedQueue
+    HAS_INOTIFY = True
+except ImportError:
+    HAS_INOTIFY = False
+
+
+if HAS_INOTIFY:
+
+    class _PrunedInotify(Inotify):
+        # Inotify qe nuk vendos watch ne direktorite e perjashtuara. Per nje
+        # direktori te perjashtuar regjistrojme nje wd fals (negativ) qe
+        # bookkeeping-u i watchdog (_recursive_simulate) te mos deshtoje; kerneli
+        # nuk gjeneron kurre events per to.
+
+        def __init__(self, path: bytes, *, recursive: bool = False, event_mask=None, prune: PruneFn):
+            self._prune = prune
+            self._fake_wds = itertools.count(-2, -1)
+            self.watches_prune = 0
+            super().__init__(path, recursive=recursive, event_mask=event_mask)
+
+        def _add_dir_watch(self, path: bytes, mask: int, *, recursive: bool) -> None:
+            if not os.path.isdir(path):
+                super()._add_dir_watch(path, mask, recursive=recursive)
+                return
+            self._add_watch(path, mask)
+            if not recursive:
+                return
+            for root, dirnames, _ in os.walk(path):
+                te_mbetura = []
+                for dirname in dirnames:
+                    full_path = os.path.join(root, dirname)
+                    if os.path.islink(full_path):
+                        continue
+                    if self._prune(os.fsdecode(full_path)):
+                        self.watches_prune += 1
+                        continue
+                    self._add_watch(full_path, mask)
+                    te_mbetura.append(dirname)
+                dirnames[:] = te_mbetura
+
+        def _add_watch(self, path: bytes, mask: int) -> int:
+            prind_fals = self._wd_for_path.get(os.path.dirname(path), 0) < 0
+            if path != self._path and (prind_fals or self._prune(os.fsdecode(path))):
+                wd = next(self._fake_wds)
+                self._wd_for_path[path] = wd
+                self._path_for_wd[wd] = path
+                self.watches_prune += 1
+                return wd
+            return super()._add_watch(path, mask)
+
+    class _PrunedInotifyBuffer(InotifyBuffer):
+        def __init__(self, path: bytes, *, recursive: bool = False, event_mask=None, prune: PruneFn):
+            # pasqyron InotifyBuffer.__init__, por me _PrunedInotify
+            BaseThread.__init__(self)
+            self._queue = DelayedQueue(self.delay)
+            self._inotify = _PrunedInotify(path, recursive=recursive, event_mask=event_mask, prune=prune)
+            self.start()
+
+    class PrunedInotifyEmitter(InotifyEmitter):
+        def __init__(self, event_queue, watch, *, timeout=1.0, event_filter=None, prune: PruneFn):
+            super().__init__(event_queue, watch, timeout=timeout, event_filter=event_filter)
+            self._prune = prune
+
+        def on_thread_start(self) -> None:
+            path = os.fsencode(self.watch.path)
+            event_mask = self.get_event_mask_from_filter()
+            self._inotify = _PrunedInotifyBuffer(
+                path, recursive=self.watch.is_recursive, event_mask=event_mask, prune=self._prune
+            )
+
+
+def krijo_observer(prune: Optional[PruneFn] = None) -> BaseObserver:
+    # Me prune: direktorite e perjashtuara (p.sh. .git, node_modules) nuk marrin
+    # fare inotify watch ne modin rekursiv. Jashte Linux-it perdoret Observer-i default.
+    if prune is None:
+        return Observer()
+    if not HAS_INOTIFY:
+        logging.debug("inotify mungon: prune i direktorive behet vetem ne filter")
+        return Observer()
+    emitter = functools.partial(PrunedInotifyEmitter, prune=prune)
+    return BaseObserver(emitter)
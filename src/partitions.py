@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+
+from src.connections import ConnectionManager
+
+GRANULARITETET = {"month": "%Y-%m", "day": "%Y-%m-%d"}
+MOVE_CHUNK = 5_000
+
+STATUS_AKTIV = "aktiv"
+STATUS_ARKIVUAR = "arkivuar"
+
+
+class Particion(NamedTuple):
+    celesi: str
+    path: str
+    fillim: int
+    fund: int
+    min_id: int
+    max_id: int
+    rreshta: int
+    statusi: str
+
+
+def intervali_i_celesit(celesi: str) -> tuple:
+    # "YYYY-MM" ose "YYYY-MM-DD" (ore lokale) -> [fillim, fund) ne epoch seconds
+    if len(celesi) == 7:
+        fillim = datetime.strptime(celesi, "%Y-%m")
+        fund = fillim.replace(year=fillim.year + 1, month=1) if fillim.month == 12 else fillim.replace(month=fillim.month + 1)
+    else:
+        fillim = datetime.strptime(celesi, "%Y-%m-%d")
+        fund = datetime.fromordinal(fillim.toordinal() + 1)
+    return int(fillim.timestamp()), int(fund.timestamp())
+
+
+def celesi_per_kohe(ts: float, granulariteti: str) -> str:
+    return datetime.fromtimestamp(ts).strftime(GRANULARITETET[granulariteti])
+
+
+class PartitionManager:
+    # Events e periudhave te mbyllura (muaj ose dite) zhvendosen nga security.db
+    # ne file SQLite me vete (<db>.parts/events_<celesi>.db). Tabela `particionet`
+    # ne DB kryesore mban metadata; queries i bashkangjitin (ATTACH) vetem
+    # particionet qe u duhen. file_history, rollups dhe cursor-at mbeten globale.
+
+    def __init__(
+        self,
+        lidhjet: ConnectionManager,
+        db_path: str,
+        dir: Optional[str] = None,
+        arkiva_dir: Optional[str] = None,
+    ):
+        self.lidhjet = lidhjet
+        baza = os.path.abspath(db_path)
+        self.dir = dir or baza + ".parts"
+        self.arkiva_dir = arkiva_dir or baza + ".archive"
+
+    def lista(self, vetem_aktive: bool = True) -> List[Particion]:
+        if self.lidhjet.ne_memorie:
+            return []
+        with self.lidhjet.reader() as conn:
+            rreshtat = conn.execute(
+                """
+                SELECT celesi, path, fillim, fund, min_id, max_id, rreshta, statusi
+                FROM particionet ORDER BY fillim DESC
+                """
+            ).fetchall()
+        te_gjitha = [Particion(*r) for r in rreshtat]
+        return [p for p in te_gjitha if p.statusi == STATUS_AKTIV] if vetem_aktive else te_gjitha
+
+    def burimet(
+        self,
+        fillim: Optional[int] = None,
+        fund: Optional[int] = None,
+        pas_id: Optional[int] = None,
+        rend: str = "desc",
+    ) -> List[Optional[str]]:
+        # None = tabela events ne DB kryesore; perndryshe path i particionit.
+        # rend="desc": me i riu i pari (main, pastaj particionet); "asc" e kunderta.
+        te_duhura = [
+            p.path
+            for p in self.lista()
+            if (fillim is None or p.fund > fillim)
+            and (fund is None or p.fillim < fund)
+            and (pas_id is None or p.max_id > pas_id)
+        ]
+        burimet: List[Optional[str]] = [None] + te_duhura
+        return burimet if rend == "desc" else list(reversed(burimet))
+
+    def burimi_per_interval(self, fillim: int, fund: int) -> Optional[str]:
+        # per nje dite: particioni qe e mbulon plotesisht, ose None (DB kryesore)
+        for p in self.lista():
+            if p.fillim <= fillim and fund <= p.fund:
+                return p.path
+        return None
+
+    def eshte_arkivuar(self, fillim: int, fund: int) -> Optional[str]:
+        for p in self.lista(vetem_aktive=False):
+            if p.statusi == STATUS_ARKIVUAR and p.fillim <= fillim and fund <= p.fund:
+                return p.path
+        return None
+
+    @contextmanager
+    def tabela(self, conn: sqlite3.Connection, burimi: Optional[str]) -> Iterator[str]:
+        # ATTACH read-only mbi nje lidhje reader; DETACH ne dalje
+        if burimi is None:
+            yield "main.events"
+            return
+        alias = f"part_{abs(hash(burimi)) % 10**8}"
+        uri = Path(burimi).absolute().as_uri() + "?mode=ro"
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (uri,))
+        try:
+            yield f"{alias}.events"
+        finally:
+            conn.execute(f"DETACH DATABASE {alias}")
+
+    @staticmethod
+    @contextmanager
+    def _bashkangjit_rw(conn: sqlite3.Connection, path: str) -> Iterator[None]:
+        conn.execute("ATTACH DATABASE ? AS part", (path,))
+        try:
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE part")
+
+    def _path_per(self, celesi: str) -> str:
+        return os.path.join(self.dir, f"events_{celesi}.db")
+
+    def ndaj(self, granulariteti: str = "month", tani: Optional[float] = None) -> List[str]:
+        # Zhvendos cdo periudhe te mbyllur (para periudhes aktuale) ne particion.
+        if granulariteti not in GRANULARITETET:
+            raise ValueError(f"Granularitet i panjohur: {granulariteti!r}")
+        tani = time.time() if tani is None else tani
+        kufiri, _ = intervali_i_celesit(celesi_per_kohe(tani, granulariteti))
+
+        with self.lidhjet.reader() as conn:
+            min_ts = conn.execute("SELECT MIN(ts) FROM events WHERE ts < ?", (kufiri,)).fetchone()[0]
+        if min_ts is None:
+            return []
+
+        os.makedirs(self.dir, exist_ok=True)
+        te_ndara = []
+        celesi = celesi_per_kohe(min_ts, granulariteti)
+        while True:
+            fillim, fund = intervali_i_celesit(celesi)
+            if fillim >= kufiri:
+                break
+            n = self._zhvendos(celesi, fillim, fund)
+            if n:
+                te_ndara.append(celesi)
+                logging.info("Particioni %s: %d events u zhvendosen", celesi, n)
+            celesi = celesi_per_kohe(fund, granulariteti)
+        return te_ndara
+
+    def _zhvendos(self, celesi: str, fillim: int, fund: int) -> int:
+        path = self._path_per(celesi)
+        with self.lidhjet.reader() as conn:
+            ka = conn.execute("SELECT 1 FROM events WHERE ts >= ? AND ts < ? LIMIT 1", (fillim, fund)).fetchone()
+        if not ka:
+            return 0
+
+        with self.lidhjet.writer() as conn:
+            ddl = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'events'").fetchone()[0]
+            with self._bashkangjit_rw(conn, path):
+                conn.execute("PRAGMA part.journal_mode = DELETE")
+                # pas ALTER TABLE ... RENAME, sqlite_master e ruan emrin me thonjeza
+                conn.execute(re.sub(r'^CREATE TABLE\s+"?events"?', "CREATE TABLE IF NOT EXISTS part.events", ddl, count=1))
+                conn.execute("CREATE INDEX IF NOT EXISTS part.idx_events_ts ON events(ts)")
+                conn.execute("CREATE INDEX IF NOT EXISTS part.idx_events_suspicious_ts ON events(suspicious, ts)")
+                conn.execute("CREATE INDEX IF NOT EXISTS part.idx_events_dir_ts ON events(dir_id, ts)")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS part.idx_events_dest_dir_ts ON events(dest_dir_id, ts)"
+                    " WHERE dest_dir_id IS NOT NULL"
+                )
+
+        # Chunk-e te vogla, secili ne transaksionin e vet: writer-i i monitorit
+        # futet ndermjet tyre. INSERT OR IGNORE + DELETE jane idempotente, ndaj
+        # nje nderprerje ne mes vazhdon pa dublikime ne thirrjen e radhes.
+        zhvendosur = 0
+        while True:
+            with self.lidhjet.writer() as conn:
+                ids = conn.execute(
+                    "SELECT id FROM main.events WHERE ts >= ? AND ts < ? ORDER BY id LIMIT ?",
+                    (fillim, fund, MOVE_CHUNK),
+                ).fetchall()
+                if not ids:
+                    break
+                lo, hi = ids[0][0], ids[-1][0]
+                with self._bashkangjit_rw(conn, path):
+                    conn.execute(
+                        """
+                        INSERT OR IGNORE INTO part.events
+                        SELECT * FROM main.events WHERE ts >= ? AND ts < ? AND id BETWEEN ? AND ?
+                        """,
+                        (fillim, fund, lo, hi),
+                    )
+                    conn.execute(
+                        "DELETE FROM main.events WHERE ts >= ? AND ts < ? AND id BETWEEN ? AND ?",
+                        (fillim, fund, lo, hi),
+                    )
+            zhvendosur += len(ids)
+
+        with self.lidhjet.writer() as conn, self._bashkangjit_rw(conn, path):
+            rreshta, min_id, max_id = conn.execute("SELECT COUNT(*), MIN(id), MAX(id) FROM part.events").fetchone()
+            conn.execute(
+                """
+                INSERT INTO particionet (celesi, path, fillim, fund, min_id, max_id, rreshta, statusi)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(celesi) DO UPDATE SET
+                    path = excluded.path, min_id = excluded.min_id, max_id = excluded.max_id,
+                    rreshta = excluded.rreshta, statusi = excluded.statusi
+                """,
+                (celesi, path, fillim, fund, min_id or 0, max_id or 0, rreshta, STATUS_AKTIV),
+            )
+        return zhvendosur
+
+    def zbato_retention(self, mbaj: int, tani: Optional[float] = None) -> List[str]:
+        # Particionet me te vjetra se `mbaj` periudha kompresohen (gzip) ne
+        # arkiva_dir dhe hiqen nga particionet aktive.
+        tani = time.time() if tani is None else tani
+        aktive = self.lista()
+        if mbaj < 0 or len(aktive) <= mbaj:
+            return []
+
+        os.makedirs(self.arkiva_dir, exist_ok=True)
+        arkivuar = []
+        for p in aktive[mbaj:]:
+            if p.fund > tani:
+                continue
+            destinacioni = os.path.join(self.arkiva_dir, os.path.basename(p.path) + ".gz")
+            tmp = destinacioni + ".tmp"
+            with open(p.path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp, destinacioni)
+            with self.lidhjet.writer() as conn:
+                conn.execute(
+                    "UPDATE particionet SET statusi = ?, path = ? WHERE celesi = ?",
+                    (STATUS_ARKIVUAR, destinacioni, p.celesi),
+                )
+            os.remove(p.path)
+            arkivuar.append(p.celesi)
+            logging.info("Particioni %s u arkivua ne %s", p.celesi, destinacioni)
+        return arkivuar
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Particionim ne kohe + retention per security.db")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--granularity", choices=sorted(GRANULARITETET), default="month", help="Madhesia e particionit")
+    ap.add_argument("--retention", type=int, default=-1,
+                    help="Sa particione aktive mbahen; me te vjetrat arkivohen (default: -1 = pa retention)")
+    ap.add_argument("--parts-dir", default=None, help="Folder per particionet (default: <db>.parts)")
+    ap.add_argument("--archive-dir", default=None, help="Folder per arkivat .gz (default: <db>.archive)")
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.db):
+        print(f"ERROR: Databaza '{args.db}' nuk ekziston! Fillimisht nis monitorin.")
+        return
+
+    from src.database import SecurityDatabase
+
+    db = SecurityDatabase(args.db, cache_lru_size=0, cache_bloom_capacity=0)
+    pm = PartitionManager(db.lidhjet, args.db, dir=args.parts_dir, arkiva_dir=args.archive_dir)
+    te_ndara = pm.ndaj(args.granularity)
+    print(f"Particione te reja: {', '.join(te_ndara) or '-'}")
+    if args.retention >= 0:
+        arkivuar = pm.zbato_retention(args.retention)
+        print(f"Particione te arkivuara: {', '.join(arkivuar) or '-'}")
+    db.mbyll()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import argparse
+import itertools
+import os
+import re
+import sys
+import time
+from typing import Iterable, List, Optional, TextIO
+
+from src.connections import parse_pragma_args
+from src.database import EventEksport, SecurityDatabase
+from src.export import kufiri_kohor, shkruaj_csv, shkruaj_ndjson
+
+FORMATET = ("tabele", "ndjson", "csv")
+_NJESITE = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def kohezgjatja(vlera: str) -> int:
+    # "90s", "30m", "6h", "2d" -> sekonda
+    m = re.fullmatch(r"\s*(\d+)\s*([smhd])\s*", vlera.lower())
+    if not m:
+        raise ValueError(f"Kohezgjatje e pavlefshme: {vlera!r} (p.sh. 30m, 6h, 2d)")
+    return int(m.group(1)) * _NJESITE[m.group(2)]
+
+
+def shkruaj_tabele(rreshtat: Iterable[EventEksport], f: TextIO) -> Iterable[EventEksport]:
+    for r in rreshtat:
+        path = r.path if r.dest_path is None else f"{r.path} -> {r.dest_path}"
+        shenja = " [SUSPICIOUS]" if r.suspicious else ""
+        f.write(f"[{r.data_ora}] {r.perdoruesi:<12} {r.veprimi:<9} {path}{shenja}\n")
+        yield r
+
+
+def kerko(
+    db: SecurityDatabase,
+    f: TextIO,
+    dosja: str,
+    formati: str = "tabele",
+    limit: Optional[int] = None,
+    **filtrat,
+) -> int:
+    # rreshtat shkruhen sapo lexohen; flush pas cdo rreshti vetem ne terminal
+    rreshtat = db.itero_nen_dosje(dosja, **filtrat)
+    if limit is not None:
+        rreshtat = itertools.islice(rreshtat, max(0, limit))
+    shkruesi = {"tabele": shkruaj_tabele, "ndjson": shkruaj_ndjson, "csv": shkruaj_csv}[formati]
+    interaktiv = f.isatty()
+    n = 0
+    for _ in shkruesi(rreshtat, f):
+        n += 1
+        if interaktiv:
+            f.flush()
+    return n
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Cfare ndodhi nen kete dosje? (prefiks + interval + perdorues)")
+    ap.add_argument("dosja", help="Dosja (perfshihen te gjitha nendosjet, burim ose destinacion i MOVED)")
+    ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
+    ap.add_argument("--since", default=None, help="Vetem events e fundit: 30m, 6h, 2d ...")
+    ap.add_argument("--from", dest="nga", default=None, help="Nga data YYYY-MM-DD ose 'YYYY-MM-DD HH:MM:SS'")
+    ap.add_argument("--to", dest="deri", default=None, help="Deri ne daten (perfshire diten) ose ore te sakte")
+    ap.add_argument("--user", default=None, help="Vetem events e ketij perdoruesi")
+    ap.add_argument("--action", action="append", default=[], help="Vetem ky veprim (mund te perseritet)")
+    ap.add_argument("--asc", action="store_true", help="Me te vjetrat te parat (default: me te rejat)")
+    ap.add_argument("--limit", type=int, default=None, help="Max rreshta")
+    ap.add_argument("--format", choices=FORMATET, default="tabele", help="Formati i daljes (default: tabele)")
+    ap.add_argument("--page-size", type=int, default=1000, help="Rreshta per faqe keyset")
+    ap.add_argument("--pragma", action="append", default=[], help="SQLite PRAGMA EMRI=VLERA (mund te perseritet)")
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if not os.path.exists(args.db):
+        raise SystemExit(f"ERROR: Databaza '{args.db}' nuk ekziston!")
+    try:
+        nga = kufiri_kohor(args.nga) if args.nga else None
+        if args.since:
+            nga = max(nga or 0, time.time() - kohezgjatja(args.since))
+        deri = kufiri_kohor(args.deri, fundi=True) if args.deri else None
+    except ValueError as e:
+        raise SystemExit(f"ERROR: {e}")
+
+    db = SecurityDatabase(args.db, pragmas=parse_pragma_args(args.pragma), cache_lru_size=0, cache_bloom_capacity=0)
+    t = time.perf_counter()
+    try:
+        n = kerko(
+            db, sys.stdout, args.dosja, args.format, limit=args.limit,
+            nga=nga, deri=deri, perdoruesi=args.user, veprimet=[v.upper() for v in args.action] or None,
+            rend="asc" if args.asc else "desc", faqja=args.page_size,
+        )
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # p.sh. "| head": dalja u mbyll, s'ka me cfare te shkruajme
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return
+    finally:
+        db.mbyll()
+    print(f"{n} events ne {(time.perf_counter() - t) * 1000:.0f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
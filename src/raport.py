@@ -2,71 +2,471 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import sqlite3
-from datetime import datetime
-from collections import Counter
+import calendar
+import hashlib
+import json
+import logging
 import os
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.archive import arkivat_e_vlefshme, arkivat_kolonare
+from src.columnar import ArkivKolonare
+from src.connections import ConnectionManager, parse_pragma_args
+from src.database import EVENT_KOLONAT_ARSYE, event_burimi, intervali_i_dites
+from src.detector import ARSYET
+from src.partitions import STATUS_ARKIVUAR, PartitionManager
+from src.report_cache import RaportCache
+
+# rritet kur ndryshon formati i raportit, qe cache-i i vjeter te mos perdoret
+CACHE_VERSIONI = 3
+
+
+def ditet_e_intervalit(nga: str, deri: str) -> List[str]:
+    fillim = datetime.strptime(nga, "%Y-%m-%d").date()
+    fund = datetime.strptime(deri, "%Y-%m-%d").date()
+    if fund < fillim:
+        raise ValueError(f"Interval i pavlefshem: {nga} > {deri}")
+    return [(fillim + timedelta(days=i)).isoformat() for i in range((fund - fillim).days + 1)]
+
+
+def intervali_i_javes(java: str) -> Tuple[str, str]:
+    # "YYYY-Www" (ISO) -> (e hene, e diel)
+    try:
+        e_hena = datetime.strptime(java + "-1", "%G-W%V-%u").date()
+    except ValueError:
+        raise ValueError(f"Jave e pavlefshme: {java!r} (p.sh. 2024-W19)")
+    return e_hena.isoformat(), (e_hena + timedelta(days=6)).isoformat()
+
+
+def intervali_i_muajit(muaji: str) -> Tuple[str, str]:
+    # "YYYY-MM" -> (dita e pare, dita e fundit)
+    try:
+        fillim = datetime.strptime(muaji, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"Muaj i pavlefshem: {muaji!r} (p.sh. 2024-05)")
+    return fillim.isoformat(), fillim.replace(day=calendar.monthrange(fillim.year, fillim.month)[1]).isoformat()
+
+
+def top_me_barazime(rreshtat: Iterable[tuple], k: int, id_e_pare: Callable[[Any, int], Optional[int]]) -> List[tuple]:
+    # rreshtat: (celesi, numri, ts e fundit) te renditur numri DESC, ts DESC.
+    # Renditja e raportit origjinal: Counter.most_common mbi events "data_ora DESC"
+    # (id ASC brenda sekondes), pra barazimin e fiton grupi qe shfaqet i pari ne ate
+    # liste, id-ja me e vogel ne sekonden e tij te fundit. Kerkohet vetem per barazimet.
+    kandidatet: List[tuple] = []
+    for r in rreshtat:
+        if len(kandidatet) >= k and r[1:] != kandidatet[k - 1][1:]:
+            break
+        kandidatet.append(r)
+    barazime = Counter(r[1:] for r in kandidatet)
+
+    def renditja(r):
+        i = id_e_pare(r[0], r[2]) if barazime[r[1:]] > 1 else None
+        return -r[1], -r[2], i or 0
+
+    return sorted(kandidatet, key=renditja)[:k]
+
+
+def emrat_e_perdoruesve(conn, ids: List[int]) -> List[str]:
+    emrat = dict(conn.execute(
+        f"SELECT id, emri FROM main.perdoruesit WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()) if ids else {}
+    return [emrat[i] for i in ids]
+
+
+def emrat_e_files(conn, celesat: List[Tuple[int, Optional[int]]]) -> Dict[Tuple[int, Optional[int]], str]:
+    # (path_id, dest_path_id) -> "path" ose "path -> dest", si ne EVENT_KOLONAT
+    ids = sorted({i for c in celesat for i in c if i is not None})
+    emrat = dict(conn.execute(
+        f"SELECT id, path FROM main.paths WHERE id IN ({','.join('?' * len(ids))})", ids
+    ).fetchall()) if ids else {}
+    return {(p, d): emrat[p] if d is None else f"{emrat[p]} -> {emrat[d]}" for p, d in celesat}
 
 
 class RaportGenerator:
-    def __init__(self, db_path: str = "security.db", reports_dir: str = "reports"):
+    def __init__(
+        self,
+        db_path: str = "security.db",
+        reports_dir: str = "reports",
+        lidhjet: Optional[ConnectionManager] = None,
+        particionet: Optional[PartitionManager] = None,
+        cache: bool = True,
+    ):
         self.db_path = db_path
         self.reports_dir = reports_dir
+        # Scheduler-i ndan pool-in e lidhjeve me SecurityDatabase
+        self.lidhjet = lidhjet or ConnectionManager(db_path)
+        self.particionet = particionet or PartitionManager(self.lidhjet, db_path)
+        self.cache = RaportCache(os.path.join(reports_dir, ".cache")) if cache else None
         os.makedirs(self.reports_dir, exist_ok=True)
 
+    def watermarks(self, nga: str, deri: str) -> Dict[str, Optional[str]]:
+        # Gjendja e te dhenave per cdo dite te mbyllur, nga rollups (dy queries per
+        # gjithe intervalin). Cdo event i ri rrit MAX(last_id) te dites se vet;
+        # arkivimi (gz ose kolonar) ndryshon gjendjen. Sot (dhe e ardhmja) -> None.
+        sot = date.today().isoformat()
+        ditet = ditet_e_intervalit(nga, deri)
+        rezultati: Dict[str, Optional[str]] = {d: None for d in ditet}
+        mbyllura = [d for d in ditet if d < sot]
+        if not mbyllura:
+            return rezultati
+        with self.lidhjet.reader() as conn:
+            veprimet: Dict[str, list] = {}
+            for dita, veprimi, numri, suspicious in conn.execute(
+                """
+                SELECT dita, veprimi, numri, suspicious FROM stats_dita_veprimi
+                WHERE dita >= ? AND dita <= ? ORDER BY dita, veprimi
+                """,
+                (mbyllura[0], mbyllura[-1]),
+            ):
+                veprimet.setdefault(dita, []).append([veprimi, numri, suspicious])
+            perdoruesit = {
+                dita: [n, max_id]
+                for dita, n, max_id in conn.execute(
+                    """
+                    SELECT dita, COUNT(*), MAX(last_id) FROM stats_dita_perdoruesi
+                    WHERE dita >= ? AND dita <= ? GROUP BY dita
+                    """,
+                    (mbyllura[0], mbyllura[-1]),
+                )
+            }
+        arkivat = [p for p in self.particionet.lista(vetem_aktive=False) if p.statusi == STATUS_ARKIVUAR]
+        kolonare = arkivat_kolonare(self.lidhjet, mbyllura[0], mbyllura[-1])
+        for dita in mbyllura:
+            fillim, fund = intervali_i_dites(dita)
+            gjendja = [
+                CACHE_VERSIONI,
+                veprimet.get(dita, []),
+                perdoruesit.get(dita),
+                [p.path for p in arkivat if p.fillim < fund and fillim < p.fund],
+                kolonare.get(dita),
+            ]
+            rezultati[dita] = hashlib.sha1(json.dumps(gjendja).encode()).hexdigest()
+        return rezultati
+
+    def watermark(self, nga: str, deri: str) -> Optional[str]:
+        # watermark i intervalit: None nese ndonje dite eshte ende e hapur
+        dite = self.watermarks(nga, deri)
+        if any(wm is None for wm in dite.values()):
+            return None
+        return hashlib.sha1(json.dumps(sorted(dite.items())).encode()).hexdigest()
+
+    def _me_cache(self, celesi: str, watermark: Callable[[], Optional[str]], gjenero: Callable[[], str]) -> str:
+        wm = watermark() if self.cache is not None else None
+        if wm is not None:
+            vlera = self.cache.merr(celesi, wm)
+            if vlera is not None:
+                return vlera["raport"]
+        raport = gjenero()
+        # te dhenat ndryshuan gjate llogaritjes: raporti nuk ruhet
+        if wm is not None and watermark() == wm:
+            self.cache.ruaj(celesi, wm, {"raport": raport})
+        return raport
+
     def merr_te_dhenat(self, data: str):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            """
-            SELECT * FROM events
-            WHERE data_ora LIKE ?
-            ORDER BY data_ora DESC
-            """,
-            (f"{data}%",),
-        )
-        events = cursor.fetchall()
-
-        cursor.execute(
-            """
-            SELECT * FROM events
-            WHERE data_ora LIKE ? AND suspicious = 1
-            ORDER BY data_ora DESC
-            """,
-            (f"{data}%",),
-        )
-        suspicious_events = cursor.fetchall()
+        fillim, fund = intervali_i_dites(data)
+        burimi = self.particionet.burimi_per_interval(fillim, fund)
+        with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as events_tabela:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                f"""
+                SELECT {EVENT_KOLONAT_ARSYE} FROM {event_burimi(events_tabela)}
+                WHERE e.ts >= ? AND e.ts < ?
+                ORDER BY e.ts DESC, e.id
+                """,
+                (fillim, fund),
+            )
+            events = cursor.fetchall()
+
+            cursor.execute(
+                f"""
+                SELECT {EVENT_KOLONAT_ARSYE} FROM {event_burimi(events_tabela)}
+                WHERE e.suspicious = 1 AND e.ts >= ? AND e.ts < ?
+                ORDER BY e.ts DESC, e.id
+                """,
+                (fillim, fund),
+            )
+            suspicious_events = cursor.fetchall()
 
-        conn.close()
         return events, suspicious_events
 
-    def gjenero_raport_tekst(self, data: str):
-        events, suspicious_events = self.merr_te_dhenat(data)
+    def merr_permbledhjen(self, data: str) -> Dict[str, Any]:
+        # Gjithe agregimet llogariten ne SQLite (rollups ditore + GROUP BY/LIMIT mbi
+        # indeksin ts), keshtu memoria nuk varet nga sa events ka dita. Renditja e
+        # barazimeve ne top-5 eshte ajo e raportit origjinal (shih top_me_barazime).
+        # Dita me arkive kolonare te vlefshme lexohet e plote nga arkiva.
+        kolonare = self._lexo_arkivat(arkivat_e_vlefshme(self.lidhjet, data, data), ArkivKolonare.permbledhja)
+        if data in kolonare:
+            return dict(kolonare[data], arkiva=None)
 
-        if not events:
-            return f"Nuk ka te dhena per daten {data}"
+        fillim, fund = intervali_i_dites(data)
+        burimi = self.particionet.burimi_per_interval(fillim, fund)
+        with self.lidhjet.reader() as conn, self.particionet.tabela(conn, burimi) as events_tabela:
+            cursor = conn.cursor()
+
+            # koka e raportit + top perdoruesit: lexim konstant nga rollups
+            cursor.execute(
+                "SELECT veprimi, numri, suspicious FROM stats_dita_veprimi WHERE dita = ?",
+                (data,),
+            )
+            rreshtat = cursor.fetchall()
+            veprimet = {v: n for v, n, _ in rreshtat}
+            total = sum(n for _, n, _ in rreshtat)
+            total_suspicious = sum(sus for _, _, sus in rreshtat)
+
+            cursor.execute("SELECT COUNT(*) FROM stats_dita_perdoruesi WHERE dita = ?", (data,))
+            perdorues_aktive = cursor.fetchone()[0]
+
+            # emrat bashkohen vetem per rreshtat e shfaqur (top-5, top files, detajet)
+            def id_e_pare(kushti: str):
+                return lambda celesi, ts: conn.execute(
+                    f"SELECT MIN(id) FROM {events_tabela} WHERE ts = ? AND {kushti}", (ts, *celesi)
+                ).fetchone()[0]
+
+            top = top_me_barazime(
+                (((u,), n, t) for u, n, t in conn.execute(
+                    """
+                    SELECT perdoruesi_id, numri, last_ts FROM stats_dita_perdoruesi
+                    WHERE dita = ?
+                    ORDER BY numri DESC, last_ts DESC
+                    """,
+                    (data,),
+                )),
+                5,
+                id_e_pare("perdoruesi_id = ?"),
+            )
+            top_perdorues = [(e, n) for e, (_, n, _) in zip(emrat_e_perdoruesve(conn, [u for (u,), _, _ in top]), top)]
+
+            top = top_me_barazime(
+                (((p, d), n, t) for p, d, n, t in conn.execute(
+                    f"""
+                    SELECT path_id, dest_path_id, COUNT(*) AS n, MAX(ts) AS mts
+                    FROM {events_tabela}
+                    WHERE ts >= ? AND ts < ?
+                    GROUP BY path_id, dest_path_id
+                    ORDER BY n DESC, mts DESC
+                    """,
+                    (fillim, fund),
+                )),
+                5,
+                id_e_pare("path_id = ? AND dest_path_id IS ?"),
+            )
+            emrat = emrat_e_files(conn, [c for c, _, _ in top])
+            top_files = [(emrat[c], n) for c, n, _ in top]
+
+            cursor.execute(
+                f"""
+                SELECT {EVENT_KOLONAT_ARSYE} FROM {event_burimi(events_tabela)}
+                WHERE e.suspicious = 1 AND e.ts >= ? AND e.ts < ?
+                ORDER BY e.ts DESC, e.id
+                LIMIT 10
+                """,
+                (fillim, fund),
+            )
+            suspicious_detaje = cursor.fetchall()
+
+        return {
+            "total_events": int(total),
+            "total_suspicious": int(total_suspicious),
+            "perdorues_aktive": int(perdorues_aktive),
+            "veprimet": veprimet,
+            "top_perdorues": top_perdorues,
+            "top_files": top_files,
+            "suspicious_detaje": suspicious_detaje,
+            "arkiva": self.particionet.eshte_arkivuar(fillim, fund),
+        }
 
-        total_events = len(events)
-        total_suspicious = len(suspicious_events)
+    @staticmethod
+    def _lexo_arkivat(arkivat: Dict[str, str], fn: Callable[[ArkivKolonare], Any]) -> Dict[str, Any]:
+        # dita -> fn(arkiva); nje arkive e demtuar lexohet nga SQLite si me pare
+        rezultati = {}
+        for dita, path in sorted(arkivat.items()):
+            try:
+                with ArkivKolonare(path) as arkiva:
+                    rezultati[dita] = fn(arkiva)
+            except (OSError, ValueError, zlib.error) as e:
+                logging.warning("Arkiva kolonare %s nuk u lexua (%s); perdoret SQLite", path, e)
+        return rezultati
 
-        perdoruesit = [e[2] for e in events]
-        perdorues_unike = list(set(perdoruesit))
+    def _id_e_pare(self, conn, ts: int, kushti: str, celesi: tuple) -> Optional[int]:
+        # id-ja me e vogel e grupit ne sekonden ts, ne burimin (DB/particion) qe e mban
+        for burimi in self.particionet.burimet(ts, ts + 1):
+            with self.particionet.tabela(conn, burimi) as events_tabela:
+                i = conn.execute(
+                    f"SELECT MIN(id) FROM {events_tabela} WHERE ts = ? AND {kushti}", (ts, *celesi)
+                ).fetchone()[0]
+            if i is not None:
+                return i
+        return None
 
-        veprimet = [e[3] for e in events]
-        veprime_count = Counter(veprimet)
+    def merr_permbledhjen_interval(self, nga: str, deri: str) -> Dict[str, Any]:
+        # Totalet dhe perdoruesit nga rollups ditore. Top files dhe suspicious
+        # lexohen nga arkivat kolonare per ditet e arkivuara, dhe per pjesen tjeter
+        # kerkohen ne cdo burim (DB kryesore + particionet); gjithcka bashkohet ketu.
+        # Memoria varet nga numri i path-eve te ndryshme, jo i events.
+        ditet = ditet_e_intervalit(nga, deri)
+        kolonare = self._lexo_arkivat(
+            arkivat_e_vlefshme(self.lidhjet, nga, deri),
+            lambda a: (a.grupet_e_files(), a.suspicious_te_fundit(10)),
+        )
+        # intervalet [fillim, fund) te diteve pa arkive kolonare, dite te njepasnjeshme bashke
+        intervalet: List[List[int]] = []
+        for i, dita in enumerate(ditet):
+            if dita in kolonare:
+                continue
+            fillim, fund = intervali_i_dites(dita)
+            if i and ditet[i - 1] not in kolonare:
+                intervalet[-1][1] = fund
+            else:
+                intervalet.append([fillim, fund])
+
+        # celesi -> [numri, ts e fundit, id-ja e pare ne ate sekonde (None: kerkohet ne SQLite)]
+        files: Dict[Tuple[int, Optional[int]], List[Optional[int]]] = {}
+        suspicious: List[tuple] = []
+
+        def shto_grupin(celesi, n, mts, fid=None):
+            f = files.get(celesi)
+            if f is None:
+                files[celesi] = [n, mts, fid]
+                return
+            f[0] += n
+            if mts > f[1]:
+                f[1], f[2] = mts, fid
+            elif mts == f[1] and fid is not None:
+                f[2] = fid if f[2] is None else min(f[2], fid)
+
+        for grupet, te_fundit in kolonare.values():
+            for celesi, (n, mts, fid) in grupet.items():
+                shto_grupin(celesi, n, mts, fid)
+            suspicious += te_fundit
+
+        with self.lidhjet.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT veprimi, SUM(numri), SUM(suspicious) FROM stats_dita_veprimi
+                WHERE dita >= ? AND dita <= ? GROUP BY veprimi
+                """,
+                (nga, deri),
+            )
+            rreshtat = cursor.fetchall()
+            cursor.execute(
+                """
+                SELECT dita, SUM(numri), SUM(suspicious) FROM stats_dita_veprimi
+                WHERE dita >= ? AND dita <= ? GROUP BY dita ORDER BY dita
+                """,
+                (nga, deri),
+            )
+            ditet = [(d, int(n), int(s)) for d, n, s in cursor.fetchall()]
+            cursor.execute(
+                "SELECT COUNT(DISTINCT perdoruesi_id) FROM stats_dita_perdoruesi WHERE dita >= ? AND dita <= ?",
+                (nga, deri),
+            )
+            perdorues_aktive = cursor.fetchone()[0]
+            cursor.execute(
+                """
+                SELECT perdoruesi_id, SUM(numri) AS n, MAX(last_ts) AS lts FROM stats_dita_perdoruesi
+                WHERE dita >= ? AND dita <= ?
+                GROUP BY perdoruesi_id
+                ORDER BY n DESC, lts DESC
+                """,
+                (nga, deri),
+            )
+            top = top_me_barazime(
+                [((u,), int(n), int(t)) for u, n, t in cursor.fetchall()],
+                5,
+                lambda celesi, ts: self._id_e_pare(conn, ts, "perdoruesi_id = ?", celesi),
+            )
+            top_perdorues = [(e, n) for e, (_, n, _) in zip(emrat_e_perdoruesve(conn, [u for (u,), _, _ in top]), top)]
 
-        files = [e[4] for e in events]
-        files_count = Counter(files)
-        top_files = files_count.most_common(5)
+            for fillim, fund in intervalet:
+                for burimi in self.particionet.burimet(fillim, fund):
+                    with self.particionet.tabela(conn, burimi) as events_tabela:
+                        for path_id, dest_id, n, mts in conn.execute(
+                            f"""
+                            SELECT path_id, dest_path_id, COUNT(*), MAX(ts) FROM {events_tabela}
+                            WHERE ts >= ? AND ts < ? GROUP BY path_id, dest_path_id
+                            """,
+                            (fillim, fund),
+                        ):
+                            shto_grupin((path_id, dest_id), n, mts)
+                        suspicious += conn.execute(
+                            f"""
+                            SELECT {EVENT_KOLONAT_ARSYE} FROM {event_burimi(events_tabela)}
+                            WHERE e.suspicious = 1 AND e.ts >= ? AND e.ts < ?
+                            ORDER BY e.ts DESC, e.id
+                            LIMIT 10
+                            """,
+                            (fillim, fund),
+                        ).fetchall()
 
-        perdorues_count = Counter(perdoruesit)
-        top_perdorues = perdorues_count.most_common(5)
+            top = top_me_barazime(
+                sorted(((c, n, mts) for c, (n, mts, _) in files.items()), key=lambda r: (-r[1], -r[2])),
+                5,
+                lambda celesi, ts: files[celesi][2] or self._id_e_pare(
+                    conn, ts, "path_id = ? AND dest_path_id IS ?", celesi
+                ),
+            )
+            emrat = emrat_e_files(conn, [c for c, _, _ in top])
+            top_files = [(emrat[c], n) for c, n, _ in top]
+
+        # arkivat .gz mungojne vetem per ditet pa arkive kolonare
+        arkivat = [
+            p.path for p in self.particionet.lista(vetem_aktive=False)
+            if p.statusi == STATUS_ARKIVUAR and any(p.fillim < fund and fillim < p.fund for fillim, fund in intervalet)
+        ]
+        return {
+            "total_events": sum(int(n) for _, n, _ in rreshtat),
+            "total_suspicious": sum(int(s) for _, _, s in rreshtat),
+            "perdorues_aktive": int(perdorues_aktive),
+            "veprimet": {v: int(n) for v, n, _ in rreshtat},
+            "top_perdorues": top_perdorues,
+            "top_files": top_files,
+            "suspicious_detaje": sorted(suspicious, key=lambda e: (e[1], -e[0]), reverse=True)[:10],
+            "arkiva": ", ".join(arkivat) or None,
+            "ditet": ditet,
+        }
+
+    def gjenero_raport_tekst(self, data: str):
+        return self._me_cache(
+            f"dita_{data}",
+            lambda: self.watermarks(data, data)[data],
+            lambda: self._gjenero_raport_tekst(data),
+        )
+
+    def _gjenero_raport_tekst(self, data: str) -> str:
+        permbledhja = self.merr_permbledhjen(data)
+        if not permbledhja["total_events"]:
+            return f"Nuk ka te dhena per daten {data}"
+        return self.formato_raport(data, permbledhja)
+
+    def gjenero_raport_agregat(self, nga: str, deri: str) -> str:
+        def gjenero():
+            permbledhja = self.merr_permbledhjen_interval(nga, deri)
+            if not permbledhja["total_events"]:
+                return f"Nuk ka te dhena per intervalin {nga} .. {deri}"
+            return self.formato_raport(f"{nga} .. {deri}", permbledhja, titulli="RAPORTI I SIGURISE PER INTERVALIN")
+
+        return self._me_cache(f"agregat_{nga}_{deri}", lambda: self.watermark(nga, deri), gjenero)
+
+    def formato_raport(self, data: str, permbledhja: Dict[str, Any], titulli: str = "RAPORTI DITOR I SIGURISE") -> str:
+        total_events = permbledhja["total_events"]
+        total_suspicious = permbledhja["total_suspicious"]
+        veprime_count = permbledhja["veprimet"]
+        top_perdorues = permbledhja["top_perdorues"]
+        top_files = permbledhja["top_files"]
+        suspicious_events = permbledhja["suspicious_detaje"]
+        ditet = permbledhja.get("ditet")
 
         raport = []
         raport.append("╔" + "═" * 68 + "╗")
-        raport.append("║" + " " * 15 + "RAPORTI DITOR I SIGURISE" + " " * 31 + "║")
+        raport.append("║" + " " * 15 + titulli + " " * (55 - len(titulli)) + "║")
         raport.append("║" + f" Data: {data}" + " " * (68 - len(f" Data: {data}")) + "║")
         raport.append("╚" + "═" * 68 + "╝")
         raport.append("")
@@ -74,13 +474,22 @@ class RaportGenerator:
         raport.append("PERMBLEDHJE E PERGJITHSHME")
         raport.append(f"  • Totali i Events:              {total_events}")
         raport.append(f"  • Events Suspicious:            {total_suspicious} ({total_suspicious/total_events*100:.1f}%)")
-        raport.append(f"  • Perdorues Aktive:             {len(perdorues_unike)}")
+        raport.append(f"  • Perdorues Aktive:             {permbledhja['perdorues_aktive']}")
+        if ditet is not None:
+            raport.append(f"  • Dite me Aktivitet:            {len(ditet)}")
         raport.append(f"  • CREATED:                      {veprime_count.get('CREATED', 0)}")
         raport.append(f"  • MODIFIED:                     {veprime_count.get('MODIFIED', 0)}")
         raport.append(f"  • DELETED:                      {veprime_count.get('DELETED', 0)}")
         raport.append(f"  • MOVED:                        {veprime_count.get('MOVED', 0)}")
         raport.append("")
 
+        if ditet:
+            raport.append("AKTIVITETI SIPAS DITEVE")
+            raport.append("")
+            for dita, n, sus in ditet:
+                raport.append(f"  {dita}   {n:8d} events   {sus:6d} suspicious")
+            raport.append("")
+
         raport.append("TOP 5 PERDORUESIT ME AKTIVE")
         raport.append("")
         for i, (user, count) in enumerate(top_perdorues, 1):
@@ -89,6 +498,12 @@ class RaportGenerator:
 
         raport.append("TOP 5 FILE-T ME TE MODIFIKUARA")
         raport.append("")
+        if permbledhja.get("arkiva"):
+            # totalet vijne nga rollups; events raw jane vetem ne arkiven e kompresuar
+            if ditet is None:
+                raport.append(f"  (events e kesaj dite jane arkivuar: {permbledhja['arkiva']})")
+            else:
+                raport.append(f"  (ditet e arkivuara nuk perfshihen: {permbledhja['arkiva']})")
         for i, (file, count) in enumerate(top_files, 1):
             file_short = file if len(file) <= 50 else "..." + file[-47:]
             raport.append(f"  {i}. {file_short:50s} {count:3d} here")
@@ -98,17 +513,25 @@ class RaportGenerator:
             raport.append("⚠️  AKTIVITETE SUSPICIOUS (DETAJE)")
             raport.append("")
             for event in suspicious_events[:10]:
-                event_id, data_ora, perdoruesi, veprimi, file_path, suspicious = event
-                ora = data_ora.split()[1] if " " in data_ora else data_ora
+                event_id, data_ora, perdoruesi, veprimi, file_path, suspicious, arsye = event
+                ora = data_ora.split()[1] if " " in data_ora and ditet is None else data_ora
                 file_short = file_path if len(file_path) <= 50 else "..." + file_path[-47:]
                 raport.append(f"  [{ora}] ALARM!")
                 raport.append(f"    Perdoruesi:  {perdoruesi}")
                 raport.append(f"    Veprimi:     {veprimi}")
                 raport.append(f"    File:        {file_short}")
-                raport.append("    Arsye:       Perdoruesi nuk e ka modifikuar kete file me pare")
+                raport.append(f"    Arsye:       {ARSYET.get(arsye, arsye)}")
                 raport.append("")
-            if len(suspicious_events) > 10:
-                raport.append(f"  ... dhe {len(suspicious_events) - 10} aktivitete te tjera suspicious")
+            if total_suspicious > 10:
+                raport.append(f"  ... dhe {total_suspicious - 10} aktivitete te tjera suspicious")
+            raport.append("")
+        elif total_suspicious and permbledhja.get("arkiva"):
+            # rollups numerojne suspicious, por rreshtat e tyre jane ne arkiven .gz
+            raport.append("⚠️  AKTIVITETE SUSPICIOUS (DETAJE)")
+            raport.append("")
+            raport.append(
+                f"  {total_suspicious} aktivitete suspicious; events jane arkivuar, detajet nuk jane te disponueshme"
+            )
             raport.append("")
         else:
             raport.append("✅ NUK KA AKTIVITETE SUSPICIOUS")
@@ -128,25 +551,109 @@ class RaportGenerator:
         filename = self.ruaj_raport(raport, data)
         return raport, filename
 
+    def gjenero_ditet(self, nga: str, deri: str, jobs: int = 1) -> List[Tuple[str, str, bool]]:
+        # Raport per cdo dite te intervalit -> [(data, file, nga_cache)].
+        # Ditet e mbyllura me cache te vlefshem lexohen ketu; te tjerat
+        # gjenerohen paralelisht ne procese (SQLite lexohet pa GIL-in e ketij procesi).
+        watermarks = self.watermarks(nga, deri) if self.cache is not None else {}
+        rezultati: Dict[str, Tuple[str, bool]] = {}
+        mbetura = []
+        for data in ditet_e_intervalit(nga, deri):
+            vlera = self.cache.merr(f"dita_{data}", watermarks.get(data)) if self.cache is not None else None
+            if vlera is not None:
+                rezultati[data] = (self.ruaj_raport(vlera["raport"], data), True)
+            else:
+                mbetura.append(data)
+
+        jobs = max(1, min(int(jobs or 1), len(mbetura)))
+        if jobs == 1:
+            for data in mbetura:
+                rezultati[data] = (self.gjenero_dhe_ruaj(data)[1], False)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_nis_procesin,
+                initargs=(self.db_path, self.reports_dir, self.lidhjet.pragmas, self.cache is not None),
+            ) as pool:
+                for data, filename in zip(mbetura, pool.map(_gjenero_ne_proces, mbetura)):
+                    rezultati[data] = (filename, False)
+        return [(data, f, nga_cache) for data, (f, nga_cache) in sorted(rezultati.items())]
+
+
+# gjeneratori i procesit punetor (nje per proces, me lidhjet e veta)
+_GJENERATORI: Optional[RaportGenerator] = None
+
+
+def _nis_procesin(db_path: str, reports_dir: str, pragmas: Dict[str, Any], cache: bool) -> None:
+    global _GJENERATORI
+    lidhjet = ConnectionManager(db_path, pragmas=pragmas)
+    _GJENERATORI = RaportGenerator(db_path=db_path, reports_dir=reports_dir, lidhjet=lidhjet, cache=cache)
+
+
+def _gjenero_ne_proces(data: str) -> str:
+    return _GJENERATORI.gjenero_dhe_ruaj(data)[1]
+
 
 def parse_args():
     ap = argparse.ArgumentParser(description="Gjenero raport ditor nga security.db")
     ap.add_argument("--db", default="security.db", help="Rruga e databazes SQLite")
     ap.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"), help="Data YYYY-MM-DD (default: sot)")
+    ap.add_argument("--from", dest="nga", default=None, help="Fillimi i intervalit YYYY-MM-DD (raport per cdo dite)")
+    ap.add_argument("--to", dest="deri", default=None, help="Fundi i intervalit YYYY-MM-DD (default: sot)")
+    ap.add_argument("--week", default=None, help="Raport javor YYYY-Www (ISO), p.sh. 2024-W19")
+    ap.add_argument("--month", default=None, help="Raport mujor YYYY-MM")
+    ap.add_argument("--aggregate", action="store_true", help="Edhe raport agregat per gjithe intervalin")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Procese paralele per intervalin")
+    ap.add_argument("--no-cache", action="store_true", help="Mos perdor cache-in e raporteve te diteve te mbyllura")
     ap.add_argument("--out", default="reports", help="Folder per raportet (default: reports)")
+    ap.add_argument("--pragma", action="append", default=[], help="SQLite PRAGMA EMRI=VLERA (mund te perseritet)")
     return ap.parse_args()
 
 
+def _intervali(args) -> Optional[Tuple[str, str, bool]]:
+    # -> (nga, deri, agregat) ose None per modin e nje dite
+    if args.week:
+        return intervali_i_javes(args.week) + (True,)
+    if args.month:
+        return intervali_i_muajit(args.month) + (True,)
+    if args.nga or args.deri:
+        nga = args.nga or args.deri
+        deri = args.deri or datetime.now().strftime("%Y-%m-%d")
+        ditet_e_intervalit(nga, deri)
+        return nga, deri, args.aggregate
+    return None
+
+
 def main():
     args = parse_args()
     if not os.path.exists(args.db):
         print(f"ERROR: Databaza '{args.db}' nuk ekziston! Fillimisht nis monitorin.")
         return
 
-    gen = RaportGenerator(db_path=args.db, reports_dir=args.out)
-    raport, filename = gen.gjenero_dhe_ruaj(args.date)
-    print("\n" + raport)
-    print(f"\nRaporti u ruajt ne: {filename}\n")
+    try:
+        intervali = _intervali(args)
+    except ValueError as e:
+        raise SystemExit(f"ERROR: {e}")
+
+    lidhjet = ConnectionManager(args.db, pragmas=parse_pragma_args(args.pragma))
+    gen = RaportGenerator(db_path=args.db, reports_dir=args.out, lidhjet=lidhjet, cache=not args.no_cache)
+    if intervali is None:
+        raport, filename = gen.gjenero_dhe_ruaj(args.date)
+        print("\n" + raport)
+        print(f"\nRaporti u ruajt ne: {filename}\n")
+        return
+
+    nga, deri, agregat = intervali
+    t = time.perf_counter()
+    ditet = gen.gjenero_ditet(nga, deri, jobs=args.jobs)
+    for data, filename, nga_cache in ditet:
+        print(f"  {data}  {filename}{'  (cache)' if nga_cache else ''}")
+    print(f"\n{len(ditet)} raporte ditore ({sum(c for _, _, c in ditet)} nga cache) ne {time.perf_counter() - t:.2f}s")
+    if agregat:
+        raport = gen.gjenero_raport_agregat(nga, deri)
+        filename = gen.ruaj_raport(raport, f"{nga}_{deri}")
+        print("\n" + raport)
+        print(f"\nRaporti agregat u ruajt ne: {filename}\n")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Any, Dict, Optional
+
+from src.metrics import METRIKAT
+
+_GODITJE = METRIKAT.counter("si_raport_cache_total", "Kerkesa ne cache-in e raporteve", ("rezultati",))
+_EMER_I_SIGURT = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class RaportCache:
+    # Raporte te renderuara per dite te mbyllura, nje file JSON per celes.
+    # Vlera ruhet bashke me watermark-un e te dhenave; nese watermark-u
+    # ndryshon (events te vonuara, arkivim) hyrja konsiderohet e vjeteruar.
+
+    def __init__(self, dir: str):
+        self.dir = dir
+
+    def _path(self, celesi: str) -> str:
+        return os.path.join(self.dir, _EMER_I_SIGURT.sub("_", celesi) + ".json")
+
+    def merr(self, celesi: str, watermark: Optional[str]) -> Optional[Dict[str, Any]]:
+        if watermark is None:
+            return None
+        try:
+            with open(self._path(celesi), encoding="utf-8") as f:
+                hyrja = json.load(f)
+        except FileNotFoundError:
+            _GODITJE.inc(rezultati="mungon")
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning("Cache i raportit %s i palexueshem: %s", celesi, e)
+            _GODITJE.inc(rezultati="mungon")
+            return None
+        if hyrja.get("watermark") != watermark:
+            _GODITJE.inc(rezultati="vjeteruar")
+            return None
+        _GODITJE.inc(rezultati="goditje")
+        return hyrja.get("vlera")
+
+    def ruaj(self, celesi: str, watermark: str, vlera: Dict[str, Any]) -> None:
+        # shkrim atomik: procese paralele mund te shkruajne te njejtin celes
+        os.makedirs(self.dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"watermark": watermark, "vlera": vlera}, f, ensure_ascii=False)
+            os.replace(tmp, self._path(celesi))
+        except BaseException:
+            os.unlink(tmp)
+            raise
@@ -4,76 +4,143 @@
 import argparse
 import os
 import schedule
+import threading
 import time
 from datetime import datetime
-
+from typing import Callable, Optional
+
+from src.alerts import AlertDispatcher, krijo_sinks
+from src.alerts import shto_argumentet as shto_argumentet_alert
+from src.archive import Arkivuesi
+from src.connections import parse_pragma_args
+from src.metrics import METRIKAT, shto_argumentet
+from src.metrics import nis as nis_metrikat
+from src.notify import DegjuesUnix, socket_default
 from src.raport import RaportGenerator
 from src.database import SecurityDatabase
 
 
-class AlertSystem:
-    def __init__(self, admin_email: str = "admin@example.com"):
-        self.admin_email = admin_email
-
-    def dergo_alarm_console(self, subjekti: str, mesazhi: str) -> None:
-        print("\n" + "=" * 70)
-        print("EMAIL ALERT (SIMULIM - console)")
-        print(f"Per:      {self.admin_email}")
-        print(f"Subjekti: {subjekti}")
-        print("-" * 70)
-        print(mesazhi)
-        print("=" * 70 + "\n")
-
-    def dergo_alarm_suspicious(self, events) -> None:
-        if not events:
-            return
+CURSOR_SUSPICIOUS = "suspicious_alert"
 
-        subjekti = f"LARM SIGURIE - {len(events)} aktivitete suspicious"
-        mesazhi = f"""U gjeten {len(events)} aktivitete suspicious.
+_JOB_KOHA = METRIKAT.histogram("si_scheduler_job_seconds", "Kohezgjatja e detyrave te scheduler-it", ("job",))
+_JOB_GABIME = METRIKAT.counter("si_scheduler_job_gabime_total", "Detyra te deshtuara", ("job",))
+_JOB_SUKSES = METRIKAT.gauge(
+    "si_scheduler_job_sukses_timestamp", "Epoch i ekzekutimit te fundit te suksesshem", ("job",)
+)
+_ALARME = METRIKAT.counter("si_scheduler_suspicious_total", "Suspicious events te derguara si alarm")
 
-Detaje (max 5):
-"""
 
-        for event in events[:5]:
-            event_id, data_ora, perdoruesi, veprimi, file_path, suspicious = event
-            mesazhi += f"""- [{data_ora}] user={perdoruesi} action={veprimi}
-  file={file_path}
-
-"""
-
-        if len(events) > 5:
-            mesazhi += f"... dhe {len(events) - 5} aktivitete te tjera.\n\n"
+def _mat(emri: str, fn: Callable[[], None]) -> Callable[[], None]:
+    def detyra():
+        t = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            _JOB_GABIME.inc(job=emri)
+            raise
+        finally:
+            _JOB_KOHA.observe(time.perf_counter() - t, job=emri)
+        _JOB_SUKSES.set(time.time(), job=emri)
 
-        mesazhi += "Ju lutem kontrolloni keto aktivitete sa me shpejt.\n"
-        self.dergo_alarm_console(subjekti, mesazhi)
+    return detyra
 
 
 class Scheduler:
-    def __init__(self, db_path: str, reports_dir: str, admin_email: str):
-        self.db = SecurityDatabase(db_path)
-        self.generator = RaportGenerator(db_path=db_path, reports_dir=reports_dir)
-        self.alert_system = AlertSystem(admin_email=admin_email)
+    page_size = 200
+
+    def __init__(
+        self,
+        db_path: str,
+        reports_dir: str,
+        admin_email: str,
+        pragmas=None,
+        partition: Optional[str] = None,
+        retention: int = -1,
+        alert_system: Optional[AlertDispatcher] = None,
+        njoftimet=None,
+        columnar: bool = False,
+        db: Optional[SecurityDatabase] = None,
+    ):
+        # src.daemon i jep DB-ne e monitorit: nje pool lidhjesh dhe cache per procesin
+        self.db = db if db is not None else SecurityDatabase(db_path, pragmas=pragmas)
+        self.generator = RaportGenerator(
+            db_path=db_path,
+            reports_dir=reports_dir,
+            lidhjet=self.db.lidhjet,
+            particionet=self.db.particionet,
+        )
+        self.partition = partition
+        self.retention = retention
+        # ditet e mbyllura -> arkive kolonare (para retention-it, qe lexohen pa gunzip)
+        self.arkivuesi = Arkivuesi(self.db) if columnar else None
+        # dergimi behet ne thread-in e dispatcher-it: kontrollet dhe raportet nuk presin
+        self.alert_system = alert_system or AlertDispatcher(per=admin_email)
+        # kanali nga monitori (DegjuesUnix / KanalLokal); None = vetem polling
+        self.njoftimet = njoftimet
+        self._ndal = threading.Event()
 
     def kontrollo_suspicious_events(self):
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Kontrollim suspicious...")
-        suspicious = self.db.merr_suspicious_events(limit=200)
-        if suspicious:
-            print(f"  ⚠️  U gjeten {len(suspicious)} suspicious events")
-            self.alert_system.dergo_alarm_suspicious(suspicious)
+        cursor = self.db.merr_cursor(CURSOR_SUSPICIOUS)
+        if cursor is None:
+            cursor = self.db.id_para_suspicious_te_fundit(self.page_size)
+            self.db.vendos_cursor(CURSOR_SUSPICIOUS, cursor)
+
+        gjithsej = 0
+        while True:
+            suspicious = self.db.merr_suspicious_pas(cursor, limit=self.page_size)
+            if not suspicious:
+                break
+            if not self.alert_system.dergo_alarm_suspicious(suspicious):
+                # radha e alarmeve plot: cursor-i mbetet, events provohen ne ciklin tjeter
+                break
+            # cursor-i ecen pasi dispatcher-i i pranoi events
+            cursor = suspicious[-1][0]
+            self.db.vendos_cursor(CURSOR_SUSPICIOUS, cursor)
+            gjithsej += len(suspicious)
+            if len(suspicious) < self.page_size:
+                break
+
+        _ALARME.inc(gjithsej)
+        if gjithsej:
+            print(f"  ⚠️  U gjeten {gjithsej} suspicious events te reja")
         else:
-            print("  ✅ Nuk ka suspicious events")
+            print("  ✅ Nuk ka suspicious events te reja")
+
+    def kontrollo_periodik(self):
+        # me kanal aktiv, njoftimet (dhe heartbeat-i me id-ne e fundit) e mbulojne;
+        # DB lexohet periodikisht vetem kur kanali nuk flet
+        if self.njoftimet is not None and self.njoftimet.aktiv():
+            return
+        self.kontrollo_suspicious_events()
+
+    def _pas_njoftimit(self):
+        cursor = self.db.merr_cursor(CURSOR_SUSPICIOUS)
+        if cursor is not None and self.njoftimet.max_id <= cursor:
+            return
+        _mat("suspicious_push", self.kontrollo_suspicious_events)()
 
     def gjenero_raport_ditor(self):
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Gjenerim raporti ditor...")
         data = datetime.now().strftime("%Y-%m-%d")
         raport, filename = self.generator.gjenero_dhe_ruaj(data)
         subjekti = f"Raporti Ditor i Sigurise - {data}"
-        self.alert_system.dergo_alarm_console(subjekti, raport)
+        self.alert_system.dergo_raport(subjekti, raport)
         print(f"  ✓ Raporti u ruajt ne: {filename}")
 
+    def mirembaj_particionet(self):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Particionim ({self.partition or '-'})...")
+        te_ndara = self.db.particionet.ndaj(self.partition) if self.partition else []
+        kolonare = self.arkivuesi.arkivo() if self.arkivuesi is not None else []
+        arkivuar = self.db.particionet.zbato_retention(self.retention) if self.partition and self.retention >= 0 else []
+        print(f"  ✓ Particione te reja: {len(te_ndara)}, te arkivuara: {len(arkivuar)}, dite kolonare: {len(kolonare)}")
+
     def setup_schedule(self, report_time: str, check_minutes: int):
-        schedule.every().day.at(report_time).do(self.gjenero_raport_ditor)
-        schedule.every(check_minutes).minutes.do(self.kontrollo_suspicious_events)
+        schedule.every().day.at(report_time).do(_mat("raport", self.gjenero_raport_ditor))
+        if self.partition or self.arkivuesi is not None:
+            # pas raportit, qe dita e fundit te raportohet nga DB kryesore
+            schedule.every().day.at("00:15").do(_mat("particionet", self.mirembaj_particionet))
+        schedule.every(check_minutes).minutes.do(_mat("suspicious", self.kontrollo_periodik))
 
         print("\nDetyrat:")
         for job in schedule.get_jobs():
@@ -81,21 +148,50 @@ class Scheduler:
         print("\nCtrl+C per me ndalu\n")
 
     def run(self):
+        if self.njoftimet is not None:
+            try:
+                self.njoftimet.start()
+            except OSError as e:
+                print(f"  ⚠️  Kanali i njoftimeve nuk u hap ({e}); vetem polling ne DB")
+                self.njoftimet = None
         try:
-            while True:
+            while not self._ndal.is_set():
                 schedule.run_pending()
-                time.sleep(1)
+                if self.njoftimet is None:
+                    self._ndal.wait(1)
+                elif self.njoftimet.prit(timeout=1.0):
+                    self._pas_njoftimit()
         except KeyboardInterrupt:
             print("\nScheduler u ndal.\n")
+        finally:
+            if self.njoftimet is not None:
+                self.njoftimet.ndalo()
+            self.alert_system.ndalo(timeout=30)
+
+    def ndalo(self):
+        # run() ne nje thread tjeter (src.daemon) mbaron pas iteracionit aktual
+        self._ndal.set()
 
 
 def parse_args():
     ap = argparse.ArgumentParser(description="Scheduler per raport + alerts")
     ap.add_argument("--db", default="security.db", help="Rruga e databazes")
     ap.add_argument("--out", default="reports", help="Folder per raportet")
-    ap.add_argument("--admin-email", default="admin@example.com", help="Email admin (vetem per console)")
+    ap.add_argument("--admin-email", default="admin@example.com", help="Marresi i alarmeve dhe raporteve")
     ap.add_argument("--report-time", default="23:59", help="Ora e raportit (HH:MM)")
     ap.add_argument("--check-minutes", type=int, default=10, help="Sa minuta midis kontrollimeve suspicious")
+    ap.add_argument("--pragma", action="append", default=[], help="SQLite PRAGMA EMRI=VLERA (mund te perseritet)")
+    ap.add_argument("--partition", choices=["month", "day"], default=None,
+                    help="Zhvendos periudhat e mbyllura ne particione (cdo nate 00:15)")
+    ap.add_argument("--retention", type=int, default=-1,
+                    help="Sa particione aktive mbahen; me te vjetrat kompresohen ne arkive (-1 = pa limit)")
+    ap.add_argument("--columnar-archive", action="store_true",
+                    help="Cdo nate 00:15 arkivo ditet e mbyllura ne format kolonar (raporte afatgjata pa SQLite)")
+    ap.add_argument("--notify-socket", default=None,
+                    help="Socket Unix ku monitori njofton suspicious (default: <db>.notify)")
+    ap.add_argument("--no-notify", action="store_true", help="Pa njoftime: vetem polling cdo --check-minutes")
+    shto_argumentet_alert(ap)
+    shto_argumentet(ap)
     return ap.parse_args()
 
 
@@ -105,9 +201,33 @@ def main():
         print(f"ERROR: Databaza '{args.db}' nuk ekziston! Fillimisht nis monitorin.")
         return
 
-    s = Scheduler(db_path=args.db, reports_dir=args.out, admin_email=args.admin_email)
+    try:
+        sinks = krijo_sinks(args.alert_sink, args.smtp_host, args.smtp_port, args.smtp_from,
+                            args.smtp_starttls, args.smtp_user, args.webhook_url)
+    except ValueError as e:
+        raise SystemExit(f"ERROR: {e}")
+    alerts = AlertDispatcher(sinks, args.admin_email, dritarja=args.alert_window,
+                             rate_per_ore=args.alert_rate, dedup_ttl=args.alert_dedup)
+    METRIKAT.gauge("si_alert_radha", "Alarme ne radhe per dergim").funksion(alerts.madhesia_radhes)
+    s = Scheduler(
+        db_path=args.db,
+        reports_dir=args.out,
+        admin_email=args.admin_email,
+        pragmas=parse_pragma_args(args.pragma),
+        partition=args.partition,
+        retention=args.retention,
+        alert_system=alerts,
+        columnar=args.columnar_archive,
+        njoftimet=None if args.no_notify else DegjuesUnix(args.notify_socket or socket_default(args.db)),
+    )
     s.setup_schedule(report_time=args.report_time, check_minutes=args.check_minutes)
-    s.run()
+    eksportuesi = nis_metrikat(args.metrics_textfile, args.metrics_http, args.metrics_interval,
+                               args.profile, args.profile_sample)
+    try:
+        s.run()
+    finally:
+        if eksportuesi is not None:
+            eksportuesi.ndalo()
 
 
 if __name__ == "__main__":
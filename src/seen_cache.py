@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import math
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+Celes = Tuple[int, int]  # (path_id, perdoruesi_id)
+
+
+def _celes_bytes(celesi: Celes) -> bytes:
+    return struct.pack("<qq", celesi[0], celesi[1])
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, int(capacity))
+        error_rate = min(max(float(error_rate), 1e-6), 0.5)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self._array = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _indekset(self, data: bytes):
+        # double hashing (Kirsch-Mitzenmacher) mbi nje digest te vetem 128-bit
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.bits
+
+    def add(self, data: bytes) -> None:
+        for idx in self._indekset(data):
+            self._array[idx >> 3] |= 1 << (idx & 7)
+        self.count += 1
+
+    def __contains__(self, data: bytes) -> bool:
+        for idx in self._indekset(data):
+            if not self._array[idx >> 3] & (1 << (idx & 7)):
+                return False
+        return True
+
+    @property
+    def madhesia_bytes(self) -> int:
+        return len(self._array)
+
+
+class SeenCache:
+    # "A e ka prekur ky user kete file me pare?" pa SQLite ne rastin e zakonshem.
+    #   - LRU me ciftet e nxehta: hit => PO (e sakte, sepse cdo gje ne LRU eshte ne DB)
+    #   - Bloom filter: vetem hint; negativi konfirmohet ne DB, sepse nje lidhje
+    #     tjeter mund ta kete shkruar ciftin pa kaluar nga ky cache
+    #   - perndryshe kthen None dhe DB mbetet burimi i se vertetes
+    # Perdoret vetem brenda lock-ut te writer-it, ndaj nuk ka lock te vetin.
+
+    def __init__(self, lru_size: int = 100_000, bloom_capacity: int = 1_000_000, bloom_error: float = 0.01):
+        self.lru_size = max(0, int(lru_size))
+        self._lru: "OrderedDict[Celes, None]" = OrderedDict()
+        self.bloom: Optional[BloomFilter] = None
+        if bloom_capacity and bloom_capacity > 0:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error)
+
+        self.lru_hits = 0
+        self.bloom_negative = 0
+        self.db_lookups = 0
+        self.db_hits = 0
+
+    @property
+    def aktiv(self) -> bool:
+        return self.lru_size > 0 or self.bloom is not None
+
+    def ngarko(self, ciftet: Iterable[Celes]) -> int:
+        # warm start: ciftet vijne nga me i riu te me i vjetri
+        n = 0
+        for celesi in ciftet:
+            if self.bloom is not None:
+                self.bloom.add(_celes_bytes(celesi))
+            if len(self._lru) < self.lru_size:
+                self._lru[celesi] = None
+                self._lru.move_to_end(celesi, last=False)
+            n += 1
+        return n
+
+    def kontrollo(self, celesi: Celes) -> Optional[bool]:
+        if celesi in self._lru:
+            self._lru.move_to_end(celesi)
+            self.lru_hits += 1
+            return True
+        if self.bloom is not None and _celes_bytes(celesi) not in self.bloom:
+            self.bloom_negative += 1
+        self.db_lookups += 1
+        return None
+
+    def rezultat_db(self, celesi: Celes, ka_me_pare: bool) -> None:
+        if ka_me_pare:
+            self.db_hits += 1
+            self._vendos_ne_lru(celesi)
+
+    def shto(self, celesi: Celes) -> None:
+        # thirret vetem pasi cifti i ri eshte commit-uar ne file_history
+        if self.bloom is not None:
+            self.bloom.add(_celes_bytes(celesi))
+        self._vendos_ne_lru(celesi)
+
+    def _vendos_ne_lru(self, celesi: Celes) -> None:
+        if self.lru_size <= 0:
+            return
+        self._lru[celesi] = None
+        self._lru.move_to_end(celesi)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def pastro(self) -> None:
+        self._lru.clear()
+        if self.bloom is not None:
+            self.bloom = BloomFilter(self.bloom.capacity, self.bloom.error_rate)
+
+    def statistika(self) -> Dict[str, int]:
+        return {
+            "lru_hits": self.lru_hits,
+            "bloom_negative": self.bloom_negative,
+            "db_lookups": self.db_lookups,
+            "db_hits": self.db_hits,
+            "lru_size": len(self._lru),
+            "bloom_bytes": self.bloom.madhesia_bytes if self.bloom is not None else 0,
+        }
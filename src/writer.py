@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from src.database import EventRecord, SecurityDatabase
+from src.detector import BurstDetector
+from src.journal import JOURNAL_CURSOR, Journal
+from src.metrics import BUCKETS_KOHA, BUCKETS_MADHESIA, METRIKAT, profil
+
+VerdictCallback = Callable[[EventRecord, int, int], None]
+
+# sjellja kur radha eshte plot:
+#   block       - thirresi pret (backpressure deri te observer-i)
+#   drop-oldest - eventi me i vjeter ne radhe hidhet (numerohet)
+#   spill       - eventi shkon ne journal-in ne disk dhe riluhet me vone
+POLITIKAT = ("block", "drop-oldest", "spill")
+RIPROVO_MAX = 5.0  # sekonda, backoff-i max kur DB nuk pranon shkrime
+RIPROVO_NE_NDALIM = 10.0  # sa riprovohet pas ndalo() para se te hiqet dore
+PRITJE_BLOCK = 0.05  # politika block me journal: pritja per vend ne radhe nen lock
+
+_NDALO = object()
+
+_BATCH_KOHA = METRIKAT.histogram("si_writer_batch_seconds", "Koha e shkrimit te nje batch-i ne DB")
+_BATCH_MADHESIA = METRIKAT.histogram("si_writer_batch_events", "Events per batch", buckets=BUCKETS_MADHESIA)
+_VONESA = METRIKAT.histogram(
+    "si_event_vonesa_seconds", "Nga eventi (koha e monitorit) deri ne commit", buckets=BUCKETS_KOHA + (30.0, 60.0)
+)
+_GABIME = METRIKAT.counter("si_writer_gabime_total", "Batch-e qe deshtuan ne DB")
+_HEDHUR = METRIKAT.counter("si_writer_hedhur_total", "Events te hedhura nga politika drop-oldest")
+_SPILL = METRIKAT.counter("si_writer_spill_total", "Events te derguara ne journal")
+_RILUAJTUR = METRIKAT.counter("si_writer_riluajtur_total", "Events te riluajtura nga journal-i ne DB")
+
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class EventWriter:
+    # Radhe e kufizuar events + thread i dedikuar qe i shkruan ne DB me batch.
+    # Observer-i i watchdog vetem fut ne radhe; SQLite preket vetem nga ky thread.
+    #
+    # Me journal: kur DB deshton (locked, disk i ngadalte) ose radha mbushet me
+    # politiken spill, events shkojne ne journal. Derisa journal-i te shkarkohet,
+    # edhe events e reja kalojne prej tij, qe rendi te ruhet. Riluajtja shkruan
+    # seq-in ne DB ne te njejtin commit, ndaj nje restart e vazhdon exactly-once.
+
+    def __init__(
+        self,
+        database: SecurityDatabase,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000,
+        on_verdict: Optional[VerdictCallback] = None,
+        politika: str = "block",
+        journal: Optional[Journal] = None,
+        detektori: Optional[BurstDetector] = None,
+    ):
+        if politika not in POLITIKAT:
+            raise ValueError(f"Politike e panjohur: {politika!r} (te mundshme: {', '.join(POLITIKAT)})")
+        if politika == "spill" and journal is None:
+            raise ValueError("Politika 'spill' kerkon nje journal")
+        self.db = database
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.on_verdict = on_verdict
+        self.politika = politika
+        self.journal = journal
+        self.detektori = detektori
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, int(max_queue)))
+        self._thread: Optional[threading.Thread] = None
+        self._spill = False
+        self._spill_lock = threading.RLock()
+        self._rikuperuar = False
+        self._vonesa = 0.0
+        self._riprovo_pas = 0.0
+        self._ndalur_ne: Optional[float] = None
+        self._markers: List[_FlushMarker] = []
+
+        self.batches_shkruar = 0
+        self.events_shkruar = 0
+        self.gabime = 0
+        self.hedhur = 0
+        self.spill = 0
+        self.riluajtur = 0
+
+    def start(self) -> "EventWriter":
+        if self._thread is None:
+            self._rikupero()
+            self._thread = threading.Thread(target=self._run, name="si-db-writer", daemon=True)
+            self._thread.start()
+        return self
+
+    def _rikupero(self) -> None:
+        # journal i mbetur nga nje nisje e meparshme: riluhet para events te reja
+        if self.journal is None:
+            return
+        with self._spill_lock:
+            if self._rikuperuar:
+                return
+            self._rikuperuar = True
+            n = self.journal.hap(self.db.merr_cursor(JOURNAL_CURSOR) or 0)
+            if n:
+                logging.warning("Journal: %d events te paaplikuara nga nje nisje e meparshme, riluhen", n)
+                self._spill = True
+
+    def shto(
+        self,
+        perdoruesi: str,
+        veprimi: str,
+        file_path: str,
+        koha: Optional[float] = None,
+        numri: int = 1,
+        dest_path: Optional[str] = None,
+    ) -> None:
+        ev = EventRecord(perdoruesi, veprimi, file_path, time.time() if koha is None else koha, numri, dest_path)
+        if self.detektori is not None:
+            # ne rendin e ardhjes, para radhes: gjetja udheton me eventin edhe neper journal
+            with profil("detektori"):
+                ev = self.detektori.shiko(ev)
+        if self.journal is not None:
+            self._fut_me_journal(ev)
+            return
+        if self.politika == "drop-oldest":
+            for item in self._fut_duke_hedhur(ev):
+                self._queue.put(item)
+        else:
+            self._queue.put(ev)
+
+    def _fut_me_journal(self, ev: EventRecord) -> None:
+        # _spill kontrollohet dhe eventi futet nen te njejtin lock: writer-i nuk
+        # mund ta kaloje radhen ne journal midis tyre (eventi do te mbetej ne radhe
+        # dhe do te shkruhej para events me te vjetra te journal-it)
+        while True:
+            with self._spill_lock:
+                self._rikupero()
+                if self._spill:
+                    self._ne_journal([ev])
+                    return
+                if self.politika == "drop-oldest":
+                    te_nxjerra = self._fut_duke_hedhur(ev)
+                    break
+                try:
+                    if self.politika == "spill":
+                        self._queue.put_nowait(ev)
+                    else:
+                        # block: pritje e shkurter, qe lock-u te mos mbahet sa writer-i punon
+                        self._queue.put(ev, timeout=PRITJE_BLOCK)
+                    return
+                except queue.Full:
+                    if self.politika == "spill":
+                        logging.warning("Radha e writer-it plot: events kalojne ne journal")
+                        self._spill = True
+                        self._ne_journal([ev])
+                        return
+        for item in te_nxjerra:
+            self._queue.put(item)
+
+    def _fut_duke_hedhur(self, ev: EventRecord) -> List[object]:
+        # kthen flush/ndalim-et e nxjerra (nuk hidhen kurre): thirresi i rifut
+        # pasi te kete liruar _spill_lock, se put() mund te bllokoje
+        te_nxjerra: List[object] = []
+        while True:
+            try:
+                self._queue.put_nowait(ev)
+                return te_nxjerra
+            except queue.Full:
+                pass
+            try:
+                i_vjeter = self._queue.get_nowait()
+            except queue.Empty:
+                continue
+            if isinstance(i_vjeter, EventRecord):
+                self.hedhur += 1
+                _HEDHUR.inc()
+            else:
+                te_nxjerra.append(i_vjeter)
+
+    def _ne_journal(self, events: List[EventRecord]) -> None:
+        self.journal.shto(events)
+        self.spill += len(events)
+        _SPILL.inc(len(events))
+
+    def madhesia_radhes(self) -> int:
+        return self._queue.qsize()
+
+    def ne_journal(self) -> int:
+        return 0 if self.journal is None else self.journal.ne_pritje
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # Pret derisa cdo event i futur para kesaj thirrjeje te jete shkruar
+        # (perfshire ato ne journal).
+        if self._thread is None or not self._thread.is_alive():
+            self._rikupero()
+            self._shkruaj_te_mbeturat()
+            self._riluaj(deri_ne_fund=True)
+            return not self._spill
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def ndalo(self, timeout: Optional[float] = None) -> None:
+        self._ndalur_ne = time.monotonic()
+        if self._thread is None:
+            self._rikupero()
+            self._shkruaj_te_mbeturat()
+            self._riluaj(deri_ne_fund=True)
+            self._mbyll_journal()
+            return
+        self._queue.put(_NDALO)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _mbyll_journal(self) -> None:
+        if self.journal is None:
+            return
+        self.journal.mbyll()
+        if self.journal.ne_pritje:
+            logging.warning("Journal: %d events mbeten ne %s per nisjen e ardhshme", self.journal.ne_pritje,
+                            self.journal.dir)
+
+    def _zbraz_radhen(self) -> List[EventRecord]:
+        # events e radhes; flush marker-at kalojne te _markers, _NDALO rikthehet
+        events: List[EventRecord] = []
+        ndalo = False
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, EventRecord):
+                events.append(item)
+            elif isinstance(item, _FlushMarker):
+                self._markers.append(item)
+            elif item is _NDALO:
+                ndalo = True
+        if ndalo:
+            self._queue.put(_NDALO)
+        return events
+
+    def _shkruaj_te_mbeturat(self) -> None:
+        batch = self._zbraz_radhen()
+        for i in range(0, len(batch), self.batch_size):
+            self._shkruaj(batch[i:i + self.batch_size])
+        self._sinjalizo_markers()
+
+    def _run(self) -> None:
+        batch: List[EventRecord] = []
+        afati: Optional[float] = None
+        duhet_ndalur = False
+
+        while not duhet_ndalur:
+            timeout = None if afati is None else max(0.0, afati - time.monotonic())
+            if self._spill:
+                # journal-i kontrollohet periodikisht (ose kur mbaron backoff-i)
+                pritja = max(self._riprovo_pas - time.monotonic(), 0.0) or max(self.flush_interval, 0.05)
+                timeout = pritja if timeout is None else min(timeout, pritja)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _NDALO:
+                duhet_ndalur = True
+            elif isinstance(item, _FlushMarker):
+                self._markers.append(item)
+            elif item is not None:
+                batch.append(item)
+                if afati is None:
+                    afati = time.monotonic() + self.flush_interval
+
+            koha_mbaroi = afati is not None and time.monotonic() >= afati
+            if duhet_ndalur or self._markers or koha_mbaroi or len(batch) >= self.batch_size:
+                self._shkruaj(batch)
+                batch = []
+                afati = None
+            if not batch and self._queue.empty():
+                self._riluaj()
+            if self.journal is not None:
+                self.journal.sinkronizo(vetem_nese_duhet=True)
+            if self._markers and not self._spill:
+                self._sinjalizo_markers()
+
+        # flush final: cdo gje qe mbeti pas sinjalit te ndalimit
+        self._shkruaj_te_mbeturat()
+        self._riluaj(deri_ne_fund=True)
+        self._sinjalizo_markers()
+        self._mbyll_journal()
+
+    def _sinjalizo_markers(self) -> None:
+        for m in self._markers:
+            m.done.set()
+        self._markers = []
+
+    def _backoff(self) -> float:
+        self._vonesa = min(max(0.1, self._vonesa * 2), RIPROVO_MAX)
+        self._riprovo_pas = time.monotonic() + self._vonesa
+        return self._vonesa
+
+    def _shkruaj(self, batch: List[EventRecord]) -> None:
+        if not batch:
+            return
+        t = time.perf_counter()
+        try:
+            verdiktet = self.db.shto_events(batch)
+        except sqlite3.OperationalError as e:
+            # DB e bllokuar / disk: gabim kalimtar
+            if self.journal is not None:
+                # batch-i dhe gjithe radha (me te rejat) shkojne ne journal, ne rend
+                with self._spill_lock:
+                    self._spill = True
+                    te_radhes = self._zbraz_radhen()
+                    self._ne_journal(batch + te_radhes)
+                logging.warning("DB nuk pranon shkrime (%s): %d events ne journal, riprovim pas %.1fs",
+                                e, len(batch) + len(te_radhes), self._backoff())
+                return
+            verdiktet = self._riprovo(batch, e)
+            if verdiktet is None:
+                return
+        except Exception:
+            self.gabime += 1
+            _GABIME.inc()
+            logging.exception("Shkrimi i batch-it (%d events) ne DB deshtoi", len(batch))
+            return
+        self._pas_shkrimit(batch, verdiktet, t)
+
+    def _riprovo(self, batch: List[EventRecord], gabimi: Exception) -> Optional[List[Tuple[int, int]]]:
+        # pa journal: batch-i mbahet dhe riprovohet me backoff; radha mbushet dhe
+        # politika (block/drop-oldest) vendos per events e reja
+        vonesa = 0.1
+        while True:
+            if self._ndalur_ne is not None and time.monotonic() - self._ndalur_ne > RIPROVO_NE_NDALIM:
+                self.gabime += 1
+                _GABIME.inc()
+                logging.error("DB nuk pranon shkrime (%s): %d events humben ne ndalim", gabimi, len(batch))
+                return None
+            logging.warning("DB nuk pranon shkrime (%s), riprovim pas %.1fs", gabimi, vonesa)
+            time.sleep(vonesa)
+            vonesa = min(vonesa * 2, RIPROVO_MAX)
+            try:
+                return self.db.shto_events(batch)
+            except sqlite3.OperationalError as e:
+                gabimi = e
+            except Exception:
+                self.gabime += 1
+                _GABIME.inc()
+                logging.exception("Shkrimi i batch-it (%d events) ne DB deshtoi", len(batch))
+                return None
+
+    def _riluaj(self, deri_ne_fund: bool = False) -> None:
+        # journal -> DB me batch; cdo commit ruan edhe seq-in e fundit
+        if self.journal is None or not self._spill:
+            return
+        if not deri_ne_fund and time.monotonic() < self._riprovo_pas:
+            return
+        while True:
+            rekordet = self.journal.lexo(self.batch_size)
+            if not rekordet:
+                with self._spill_lock:
+                    if not self.journal.ne_pritje:
+                        self._spill = False
+                        self._vonesa = 0.0
+                        logging.info("Journal u shkarkua; shkrimi vazhdon direkt ne DB")
+                return
+            batch = [ev for _, ev in rekordet]
+            seq = rekordet[-1][0]
+            t = time.perf_counter()
+            try:
+                verdiktet = self.db.shto_events(batch, cursor=(JOURNAL_CURSOR, seq))
+            except sqlite3.OperationalError as e:
+                logging.warning("Riluajtja e journal-it deshtoi (%s), riprovim pas %.1fs", e, self._backoff())
+                return
+            except Exception:
+                # batch i pariparueshem: kapercehet qe journal-i te mos bllokohet
+                self.gabime += 1
+                _GABIME.inc()
+                logging.exception("Riluajtja e journal-it: %d events u kapercyen (seq <= %d)", len(batch), seq)
+                self.db.vendos_cursor(JOURNAL_CURSOR, seq)
+                self.journal.konfirmo(seq)
+                continue
+            self.journal.konfirmo(seq)
+            self.riluajtur += len(batch)
+            _RILUAJTUR.inc(len(batch))
+            self._vonesa = 0.0
+            self._pas_shkrimit(batch, verdiktet, t)
+            if not deri_ne_fund and not self._queue.empty():
+                return
+
+    def _pas_shkrimit(self, batch: List[EventRecord], verdiktet: List[Tuple[int, int]], t: float) -> None:
+        tani = time.time()
+        _BATCH_KOHA.observe(time.perf_counter() - t)
+        _BATCH_MADHESIA.observe(len(batch))
+        for ev in batch:
+            _VONESA.observe(tani - ev.koha)
+        self.batches_shkruar += 1
+        self.events_shkruar += len(batch)
+        if self.on_verdict is None:
+            return
+        with profil("writer.on_verdict"):
+            for ev, (event_id, suspicious) in zip(batch, verdiktet):
+                try:
+                    self.on_verdict(ev, event_id, suspicious)
+                except Exception:
+                    logging.exception("on_verdict deshtoi per %s", ev.file_path)
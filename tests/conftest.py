@@ -0,0 +1,40 @@
+import random
+import time
+
+import pytest
+
+from src.database import EventRecord
+
+
+def _ts(s):
+    return time.mktime(time.strptime(s, "%Y-%m-%d %H:%M:%S"))
+
+
+def _mbush(db, n, koha, perdoruesit=("ana", "ben"), veprimet=("CREATED", "MODIFIED"), paths=("/srv/f0",),
+           dest=None, arsye=None, seed=None):
+    # Cdo fushe eshte funksion i indeksit ose sekuence: me `seed` zgjedhje e
+    # rastesishme, pa te cikel sipas indeksit. `dest` jo-None => MOVED.
+    rng = random.Random(seed) if seed is not None else None
+
+    def vlera(v, i):
+        if v is None or callable(v):
+            return v if v is None else v(i)
+        return rng.choice(v) if rng is not None else v[i % len(v)]
+
+    events = []
+    for i in range(n):
+        dest_path = vlera(dest, i)
+        events.append(EventRecord(vlera(perdoruesit, i), "MOVED" if dest_path else vlera(veprimet, i),
+                                  vlera(paths, i), koha(i), dest_path=dest_path, arsye=vlera(arsye, i)))
+    return db.shto_events(events)
+
+
+@pytest.fixture
+def ts():
+    # "YYYY-MM-DD HH:MM:SS" (ore lokale) -> epoch
+    return _ts
+
+
+@pytest.fixture
+def mbush():
+    return _mbush
@@ -0,0 +1,171 @@
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from src.alerts import AlertDispatcher, SmtpSink, WebhookSink
+
+
+def _ev(i, user="u1", dir="/home/u1", veprimi="CREATED"):
+    return (i, f"2024-05-05 10:00:{i:02d}", user, veprimi, f"{dir}/f{i}", 1)
+
+
+class _Sink:
+    emri = "test"
+
+    def __init__(self):
+        self.alarme = []
+
+    def dergo(self, alarm, per):
+        self.alarme.append(alarm)
+
+
+class _Ora:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_grouping_dedup_and_rate_limit():
+    sink, ora = _Sink(), _Ora()
+    d = AlertDispatcher([sink], dritarja=60, rate_per_ore=1, dedup_ttl=600, ora=ora)
+    # pa thread: hapat e worker-it thirren direkt
+    d._grupo([_ev(1), _ev(2), _ev(3, user="u2"), _ev(4, dir="/etc")])
+    d._grupo([_ev(1)])  # i njejti (user, veprim, path): dedup
+    d._dergo_grupet()
+    assert sink.alarme == []
+
+    ora.t += 61
+    d._dergo_grupet()
+    grupet = sorted((a.perdoruesi, a.dir, len(a.events)) for a in sink.alarme)
+    assert grupet == [("u1", "/etc", 1), ("u1", "/home/u1", 2), ("u2", "/home/u1", 1)]
+
+    # rate limit: 1 alarm ne ore per grup; te shtypurat raportohen me vone
+    d._grupo([_ev(5)])
+    ora.t += 61
+    d._dergo_grupet()
+    assert len(sink.alarme) == 3
+    ora.t += 3600
+    d._grupo([_ev(6)])
+    d._dergo_grupet(te_gjitha=True)
+    assert sink.alarme[-1].te_shtypura == 1
+    assert "1 events te tjera" in sink.alarme[-1].mesazhi
+
+
+def test_suppressed_events_are_flushed_and_idle_buckets_dropped():
+    sink, ora = _Sink(), _Ora()
+    d = AlertDispatcher([sink], dritarja=0, rate_per_ore=1, dedup_ttl=0, ora=ora)
+    d._grupo([_ev(1)])
+    d._dergo_grupet()
+    d._grupo([_ev(2), _ev(3)])
+    d._dergo_grupet()
+    assert len(sink.alarme) == 1
+
+    # grupi hesht: te shtypurat dalin ne permbledhje kur bucket-i ka token
+    ora.t += 1800
+    d._mirembaj_bucket()
+    assert len(sink.alarme) == 1
+    ora.t += 1800
+    d._mirembaj_bucket()
+    assert sink.alarme[-1].te_shtypura == 2 and sink.alarme[-1].events == ()
+    assert "2 aktivitete suspicious te shtypura" in sink.alarme[-1].subjekti
+
+    # bucket-i plot dhe pa te shtypura hiqet
+    ora.t += 3600
+    d._mirembaj_bucket()
+    assert d._bucket == {}
+
+
+def test_webhook_only_to_localhost():
+    for url in ("http://localhost:9000/a", "http://127.0.0.1/a", "https://[::1]:8443/a"):
+        WebhookSink(url)
+    for url in ("http://example.com/a", "http://10.0.0.5/a", "ftp://127.0.0.1/a"):
+        with pytest.raises(ValueError):
+            WebhookSink(url)
+
+
+def test_async_delivery_never_blocks_caller():
+    ngadalte = threading.Event()
+
+    class _Ngadalte(_Sink):
+        def dergo(self, alarm, per):
+            ngadalte.wait(5)
+            super().dergo(alarm, per)
+
+    sink = _Ngadalte()
+    d = AlertDispatcher([sink], dritarja=0, max_radha=2)
+    d.dergo_raport("raporti", "teksti")
+    d.dergo_alarm_suspicious([_ev(i) for i in range(3)])
+    pranuar = [d.dergo_alarm_suspicious([_ev(10 + i)]) for i in range(10)]  # radha plot: nuk presin
+    assert d.hedhur > 0 and pranuar.count(False) == d.hedhur
+    ngadalte.set()
+    d.ndalo(timeout=5)
+    assert sink.alarme[0].subjekti == "raporti"
+    assert sum(len(a.events) for a in sink.alarme[1:]) >= 3
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    # server SMTP minimal lokal (vetem sa i duhet smtplib-it)
+    def handle(self):
+        self.wfile.write(b"220 localhost\r\n")
+        while True:
+            rresht = self.rfile.readline()
+            if not rresht:
+                return
+            komanda = rresht.strip().upper()
+            if komanda.startswith((b"EHLO", b"HELO")):
+                self.wfile.write(b"250 localhost\r\n")
+            elif komanda == b"DATA":
+                self.wfile.write(b"354 vazhdo\r\n")
+                trupi = []
+                while (r := self.rfile.readline()) not in (b".\r\n", b""):
+                    trupi.append(r)
+                self.server.mesazhet.append(b"".join(trupi).decode())
+                self.wfile.write(b"250 ok\r\n")
+            elif komanda == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.server.trupat.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *a):
+        pass
+
+
+def test_smtp_and_webhook_sinks_against_local_servers():
+    smtp = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+    smtp.mesazhet = []
+    http = HTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    http.trupat = []
+    for server in (smtp, http):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sinks = [
+            SmtpSink("127.0.0.1", smtp.server_address[1], timeout=5),
+            WebhookSink(f"http://127.0.0.1:{http.server_address[1]}/alert"),
+        ]
+        d = AlertDispatcher(sinks, per="sec@example.com", dritarja=0.05, riprovo=0)
+        d.dergo_alarm_suspicious([_ev(1), _ev(2)])
+        d.ndalo(timeout=10)
+    finally:
+        smtp.shutdown()
+        http.shutdown()
+        smtp.server_close()
+        http.server_close()
+
+    assert len(smtp.mesazhet) == 1
+    assert "To: sec@example.com" in smtp.mesazhet[0]
+    assert "LARM SIGURIE - 2 aktivitete suspicious" in smtp.mesazhet[0]
+    assert http.trupat[0]["perdoruesi"] == "u1"
+    assert [e["id"] for e in http.trupat[0]["events"]] == [1, 2]
@@ -0,0 +1,82 @@
+import pytest
+
+import src.columnar as columnar
+from src.archive import Arkivuesi, arkivat_e_vlefshme
+from src.columnar import ArkivKolonare
+from src.database import EventRecord, SecurityDatabase
+from src.raport import RaportGenerator
+
+
+def _events(ts, ditet, n=400):
+    return dict(
+        n=n,
+        # sekonda te perseritura: barazime ne ts, te zgjidhura nga id
+        koha=lambda i: ts(f"{ditet[i % len(ditet)]} 10:00:00") + i * 7 % 41,
+        perdoruesit=[f"u{k}" for k in range(7)],
+        veprimet=("CREATED", "MODIFIED", "DELETED"),
+        paths=[f"/srv/d{a}/f{b}.txt" for a in range(4) for b in range(10)],
+        dest=lambda i: f"/srv/bak/f{i}.txt.bak" if i % 13 == 0 else None,
+        arsye=lambda i: "burst_dosja" if i % 29 == 0 else None,
+        seed=3,
+    )
+
+
+def _pa_oren(raport):
+    return raport.rsplit("\n", 1)[0]
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_arkiva_kolonare_jep_te_njejtin_raport(tmp_path, monkeypatch, numpy, ts, mbush):
+    if numpy and not columnar.HAS_NUMPY:
+        pytest.skip("numpy mungon")
+    monkeypatch.setattr(columnar, "HAS_NUMPY", numpy)
+    monkeypatch.setattr(columnar, "BLLOKU", 64)
+
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    ditet = ["2024-01-30", "2024-01-31", "2024-02-01"]
+    mbush(db, **_events(ts, ditet))
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"), lidhjet=db.lidhjet, particionet=db.particionet, cache=False)
+    para = {d: gen.merr_permbledhjen(d) for d in ditet}
+    interval_para = gen.merr_permbledhjen_interval(ditet[0], ditet[-1])
+    raport_para = _pa_oren(gen.gjenero_raport_agregat(ditet[0], ditet[-1]))
+
+    db.particionet.ndaj("month", tani=ts("2024-02-15 00:00:00"))
+    arkivuesi = Arkivuesi(db)
+    assert arkivuesi.arkivo(tani=ts("2024-02-15 00:00:00")) == ditet
+    assert arkivuesi.arkivo(tani=ts("2024-02-15 00:00:00")) == []
+    with ArkivKolonare(arkivuesi._path_per(ditet[0])) as a:
+        assert len(a.meta["blloqet"]) > 1
+        assert a.permbledhja() == {k: v for k, v in para[ditet[0]].items() if k != "arkiva"}
+
+    # janari shkon ne .gz: raportet lexojne arkiven kolonare, pa shenimin "arkivuar"
+    assert db.particionet.zbato_retention(0, tani=ts("2024-02-15 00:00:00")) == ["2024-01"]
+    for d in ditet:
+        assert gen.merr_permbledhjen(d) == dict(para[d], arkiva=None)
+    assert gen.merr_permbledhjen_interval(ditet[0], ditet[-1]) == dict(interval_para, arkiva=None)
+    assert _pa_oren(gen.gjenero_raport_agregat(ditet[0], ditet[-1])) == raport_para
+    db.mbyll()
+
+
+def test_event_i_vonuar_e_zhvlereson_arkiven(tmp_path, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    mbush(db, **_events(ts, ["2024-03-01", "2024-03-02"], n=60))
+    arkivuesi = Arkivuesi(db)
+    assert arkivuesi.arkivo() == ["2024-03-01", "2024-03-02"]
+    assert set(arkivat_e_vlefshme(db.lidhjet, "2024-03-01", "2024-03-02")) == {"2024-03-01", "2024-03-02"}
+
+    db.shto_events([EventRecord("vone", "CREATED", "/srv/vone", ts("2024-03-02 23:59:00"))])
+    assert set(arkivat_e_vlefshme(db.lidhjet, "2024-03-01", "2024-03-02")) == {"2024-03-01"}
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"), lidhjet=db.lidhjet, particionet=db.particionet)
+    assert "vone" in gen.gjenero_raport_tekst("2024-03-02")
+    assert arkivuesi.arkivo() == ["2024-03-02"]
+    with ArkivKolonare(arkivuesi._path_per("2024-03-02")) as a:
+        assert a.permbledhja()["perdorues_aktive"] == gen.merr_permbledhjen("2024-03-02")["perdorues_aktive"]
+        assert "/srv/vone" in a.paths
+
+    # arkive e demtuar: raporti kthehet te SQLite
+    with open(arkivuesi._path_per("2024-03-01"), "r+b") as f:
+        f.truncate(20)
+    assert gen.merr_permbledhjen("2024-03-01")["total_events"] == 30
+    db.mbyll()
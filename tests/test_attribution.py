@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from src.attribution import HookAttribution, OwnerAttribution, ProcessAttribution, UidCache, krijo_attribution
+
+
+def test_owner_attribution_uses_file_owner_and_caches_names(tmp_path, monkeypatch):
+    import src.attribution as attribution
+
+    thirrje = []
+    monkeypatch.setattr(attribution, "_emri_per_uid", lambda uid: thirrje.append(uid) or f"user{uid}")
+
+    f = tmp_path / "a.txt"
+    f.write_text("x")
+    a = OwnerAttribution()
+    uid = os.stat(f).st_uid
+    for _ in range(5):
+        assert a.perdoruesi(str(f), "MODIFIED") == f"user{uid}"
+    assert thirrje == [uid]
+
+    # pas fshirjes: pronari i fundit i njohur
+    f.unlink()
+    assert a.perdoruesi(str(f), "DELETED") == f"user{uid}"
+
+    a.invalido()
+    a.perdoruesi(str(tmp_path), "MODIFIED")
+    assert len(thirrje) == 2
+
+
+def test_uid_cache_expires():
+    c = UidCache(ttl=0)
+    c.emri(os.getuid())
+    c.emri(os.getuid())
+    assert c.misses == 2
+
+
+def test_hook_attribution_falls_back_and_caches():
+    thirrje = []
+
+    def hook(path, veprimi):
+        thirrje.append(path)
+        return "auditor" if path.startswith("/srv") else None
+
+    fallback = ProcessAttribution()
+    fallback._emri = "monitori"
+    a = HookAttribution(hook, fallback=fallback, ttl=60)
+    assert a.perdoruesi("/srv/x", "MODIFIED") == "auditor"
+    assert a.perdoruesi("/srv/x", "MODIFIED") == "auditor"
+    assert a.perdoruesi("/home/y", "MODIFIED") == "monitori"
+    assert thirrje == ["/srv/x", "/home/y"]
+    assert a.fallbacks == 1
+
+
+def test_krijo_attribution_validates():
+    assert krijo_attribution("owner").emri == "owner"
+    with pytest.raises(ValueError):
+        krijo_attribution("hook")
+    with pytest.raises(ValueError):
+        krijo_attribution("ldap")
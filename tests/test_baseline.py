@@ -0,0 +1,114 @@
+import os
+
+from src.attribution import Attribution, OwnerAttribution
+from src.baseline import BaselineScanner
+from src.database import SecurityDatabase
+from src.detector import BurstDetector, Pragjet
+
+
+def _pema(root, n_dirs=6, n_files=5):
+    for d in range(n_dirs):
+        os.makedirs(root / f"d{d}" / "nen", exist_ok=True)
+        for f in range(n_files):
+            (root / f"d{d}" / f"f{f}.txt").write_text("x")
+        (root / f"d{d}" / "nen" / "g.txt").write_text("y")
+    os.makedirs(root / ".git", exist_ok=True)
+    (root / ".git" / "HEAD").write_text("ref")
+
+
+def _numero(db, veprimi):
+    with db.lidhjet.reader() as c:
+        return c.execute("SELECT COUNT(*) FROM events WHERE veprimi = ?", (veprimi,)).fetchone()[0]
+
+
+def test_seed_then_offline_diff(tmp_path):
+    root = tmp_path / "root"
+    _pema(root)
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+
+    stats = BaselineScanner(db, str(root), threads=4, seed=True, progress=None).skano()
+    assert stats["files"] == 36 and stats["seeded"] == 36
+    assert db.statistika()["total_events"] == 0
+    # prekja e pare nga pronari nuk eshte me suspicious
+    pronari = BaselineScanner(db, str(root)).uids.emri(os.stat(root / "d0" / "f0.txt").st_uid)
+    assert db.shto_event(pronari, "MODIFIED", str(root / "d0" / "f0.txt")) == 0
+
+    (root / "d1" / "f1.txt").write_text("ndryshuar me gjate")
+    (root / "d2" / "i_ri.txt").write_text("z")
+    os.remove(root / "d3" / "f3.txt")
+    njoftuar = []
+    stats = BaselineScanner(db, str(root), threads=4, progress=None, on_suspicious=njoftuar.append).skano()
+    assert (stats["created"], stats["modified"], stats["deleted"]) == (1, 1, 1)
+    assert (_numero(db, "CREATED"), _numero(db, "DELETED")) == (1, 1)
+    # scheduler-i me kanal aktiv njoftohet edhe per events e baseline-it
+    assert max(njoftuar) == max(e[0] for e in db.merr_suspicious_events(limit=10))
+
+    # pa ndryshime: asnje event i ri
+    stats = BaselineScanner(db, str(root), threads=2, progress=None).skano()
+    assert (stats["created"], stats["modified"], stats["deleted"]) == (0, 0, 0)
+    db.mbyll()
+
+
+def test_seed_uses_root_attribution(tmp_path):
+    class _Monitori(Attribution):
+        emri = "process"
+
+        def perdoruesi(self, file_path, veprimi):
+            return "monitori"
+
+    root = tmp_path / "root"
+    _pema(root, n_dirs=2, n_files=2)
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    BaselineScanner(db, str(root), seed=True, progress=None, attribution=_Monitori()).skano()
+    f = str(root / "d0" / "f0.txt")
+    # first-seen eshte sipas perdoruesit qe jep attribution, jo pronarit
+    assert db.shto_event("monitori", "MODIFIED", f) == 0
+
+    sc = BaselineScanner(db, str(tmp_path / "bosh"), attribution=OwnerAttribution())
+    assert sc.attribution is None
+    db.mbyll()
+
+
+def test_offline_deletes_go_through_detector(tmp_path):
+    root = tmp_path / "root"
+    _pema(root, n_dirs=1, n_files=4)
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    BaselineScanner(db, str(root), seed=True, progress=None).skano()
+    for f in range(4):
+        os.remove(root / "d0" / f"f{f}.txt")
+    detektori = BurstDetector(Pragjet(fshirje=3))
+    BaselineScanner(db, str(root), progress=None, detektori=detektori).skano()
+    # file-t jane seed-uar: vetem detektori i ben suspicious
+    assert detektori.gjetje
+    assert len(db.merr_suspicious_events(limit=10)) == sum(detektori.gjetje.values())
+    db.mbyll()
+
+
+def test_interrupted_scan_resumes(tmp_path):
+    root = tmp_path / "root"
+    _pema(root, n_dirs=10)
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    BaselineScanner(db, str(root), progress=None).skano()
+    for d in range(10):
+        (root / f"d{d}" / "shtese.txt").write_text("z")
+
+    sc = BaselineScanner(db, str(root), threads=1, batch_files=1, progress=None)
+    ruaj = sc._ruaj
+
+    def ruaj_dhe_ndalo(*a):
+        ruaj(*a)
+        sc.ndalo()
+
+    sc._ruaj = ruaj_dhe_ndalo
+    sc.skano()
+    assert sc.files < 70
+
+    sc2 = BaselineScanner(db, str(root), threads=3, progress=None)
+    sc2.skano()
+    assert sc2.rifilluar
+    assert sc.files + sc2.files >= 70
+    assert _numero(db, "CREATED") == 10
+    with db.lidhjet.reader() as c:
+        assert c.execute("SELECT COUNT(*) FROM snapshot").fetchone()[0] == 70
+        assert c.execute("SELECT COUNT(*) FROM skanim_dirs").fetchone()[0] == 0
+    db.mbyll()
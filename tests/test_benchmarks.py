@@ -0,0 +1,43 @@
+import json
+
+from benchmarks.compare import krahaso
+from benchmarks.generators import gjenero_events
+from benchmarks.run import ekzekuto, parse_args, percentil
+
+
+def test_generator_is_deterministic_and_respects_cardinality():
+    a = list(gjenero_events(2_000, perdorues=5, paths=30, forma="burst", burst=10, fillim=1.7e9, seed=7))
+    b = list(gjenero_events(2_000, perdorues=5, paths=30, forma="burst", burst=10, fillim=1.7e9, seed=7))
+    assert a == b
+    assert len(a) == 2_000
+    assert len({e.perdoruesi for e in a}) <= 5
+    assert len({e.file_path for e in a}) <= 30
+    assert all(e.dest_path for e in a if e.veprimi == "MOVED")
+
+
+def test_percentil():
+    assert percentil(list(range(1, 101)), 50) == 50
+    assert percentil(list(range(1, 101)), 99) == 99
+    assert percentil([], 99) == 0.0
+
+
+def test_run_outputs_comparable_json(tmp_path):
+    args = parse_args([
+        "--scenario", "db", "--scenario", "ingest", "--scenario", "report",
+        "--events", "500", "--report-events", "2000", "--days", "2", "--repeat", "1",
+        "--flush-interval", "0.05", "--fixture-dir", str(tmp_path),
+    ])
+    rezultati = json.loads(json.dumps(ekzekuto(args)))
+    r = rezultati["rezultatet"]
+    assert r["ingest"]["rreshta"] == 500
+    assert r["ingest"]["events_per_sek"] > 0
+    assert r["ingest"]["latenca"]["p99_ms"] >= r["ingest"]["latenca"]["p50_ms"]
+    assert r["report"]["fixture"]["riperdorur"] is False
+    assert set(r["report"]["dite"]) == {"2024-01-01", "2024-01-02"}
+
+    # fixture-i riperdoret; krahasimi gjen te njejtat metrika
+    args.scenario = ["report"]
+    i_dyti = ekzekuto(args)
+    assert i_dyti["rezultatet"]["report"]["fixture"]["riperdorur"] is True
+    metrikat = {m[0] for m in krahaso(rezultati, i_dyti)}
+    assert "report.raporti.p50_ms" in metrikat
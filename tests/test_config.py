@@ -0,0 +1,50 @@
+import pytest
+
+from src.config import ConfigError, ngarko_config, rrenjet
+
+
+def test_roots_inherit_monitor_defaults_and_override(tmp_path):
+    cfg_file = tmp_path / "config.yaml"
+    cfg_file.write_text(
+        """
+monitor:
+  db: "/var/lib/si/security.db"
+  recursive: true
+  ignore_rules: ["dir:.git"]
+  coalesce:
+    window: 0.5
+  roots:
+    - path: /home
+      ignore_rules: ["dir:.cache", "*.pyc"]
+    - name: etc
+      path: /etc
+      recursive: false
+      coalesce: {window: 0}
+    - /srv
+database:
+  cache_lru_size: 10
+""",
+        encoding="utf-8",
+    )
+    cfg = ngarko_config(str(cfg_file))
+    assert cfg["database"]["cache_lru_size"] == 10
+    assert cfg["database"]["cache_bloom_capacity"] == 1_000_000
+    assert cfg["database"]["pragmas"]["journal_mode"] == "WAL"
+
+    home, etc, srv = rrenjet(cfg)
+    assert home.ignore_rules == ["dir:.cache", "*.pyc"]
+    assert home.coalesce_window == 0.5 and home.coalesce_rules == ["created+modified", "modified"]
+    assert (etc.emri, etc.recursive, etc.coalesce_window) == ("etc", False, 0.0)
+    assert srv.path == "/srv" and srv.ignore_rules == ["dir:.git"] and srv.recursive
+
+
+def test_config_errors(tmp_path):
+    f = tmp_path / "c.yaml"
+    f.write_text("monitor:\n  roots:\n    - path: /a\n      pathh: /b\n", encoding="utf-8")
+    with pytest.raises(ConfigError):
+        rrenjet(ngarko_config(str(f)))
+    f.write_text("monitor: [1, 2]\n", encoding="utf-8")
+    with pytest.raises(ConfigError):
+        ngarko_config(str(f))
+    with pytest.raises(ConfigError):
+        rrenjet(ngarko_config(None))
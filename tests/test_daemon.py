@@ -0,0 +1,64 @@
+import os
+import stat
+import subprocess
+import sys
+
+import pytest
+
+from src.ctl import DaemonJoAktiv, GabimKomande, formato, thirr
+from src.daemon import ServeriKontrollit, Sherbimi, parse_args
+from src.database import SecurityDatabase
+
+
+def test_control_socket_commands(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    db.shto_event("ana", "CREATED", "/srv/app/a.txt")
+    for u in ("u2", "u3", "u4"):
+        db.shto_event(u, "MODIFIED", "/srv/app/a.txt")
+    db.shto_event("ana", "DELETED", "/etc/x")
+
+    sock = str(tmp_path / "t.ctl")
+    sherbimi = Sherbimi(db, str(tmp_path / "rep"))
+    serveri = ServeriKontrollit(sock, sherbimi).nis()
+    try:
+        assert stat.S_IMODE(os.stat(sock).st_mode) == 0o600
+        assert thirr(sock, "ping")["komponentet"] == ["kontroll"]
+        assert thirr(sock, "stats")["total_events"] == 5
+
+        suspicious = thirr(sock, "suspicious", limit=10)
+        assert [r[0] for r in suspicious] == [r[0] for r in db.merr_suspicious_events(limit=10)]
+        assert "Nuk ka" not in formato("suspicious", suspicious)
+
+        raport = thirr(sock, "raport", ruaj=True)
+        assert os.path.exists(raport["file"])
+
+        rreshtat = thirr(sock, "kerko", dosja="/srv", limit=2)
+        assert len(rreshtat) == 2 and all(r["path"] == "/srv/app/a.txt" for r in rreshtat)
+        assert "a.txt" in formato("kerko", rreshtat)
+
+        with pytest.raises(GabimKomande):
+            thirr(sock, "fshi")
+        with pytest.raises(GabimKomande):
+            thirr(sock, "raport", data="dje")
+
+        assert thirr(sock, "stop") == {"ndalet": True}
+        assert sherbimi.ndal.is_set()
+    finally:
+        serveri.ndalo()
+        db.mbyll()
+    assert not os.path.exists(sock)
+    with pytest.raises(DaemonJoAktiv):
+        thirr(sock, "ping")
+
+
+def test_ctl_imports_only_stdlib():
+    kodi = "import sys, src.ctl; assert not {'sqlite3', 'watchdog', 'src.database'} & set(sys.modules)"
+    subprocess.run([sys.executable, "-c", kodi], check=True, cwd=os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_alert_options_stay_with_the_daemon():
+    args, te_tjerat = parse_args(["--scheduler", "--alert-sink", "webhook", "--webhook-url", "http://127.0.0.1:9/a",
+                                  "--alert-rate", "2", "--path", "/tmp"])
+    assert args.alert_sink == ["webhook"] and args.alert_rate == 2
+    # vetem opsionet e monitorit i kalohen atij
+    assert te_tjerat == ["--path", "/tmp"]
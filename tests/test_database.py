@@ -1,5 +1,5 @@
 import os
-from src.database import SecurityDatabase
+from src.database import EventRecord, SecurityDatabase
 
 def test_suspicious_first_time(tmp_path):
     dbfile = tmp_path / "t.db"
@@ -7,3 +7,181 @@ def test_suspicious_first_time(tmp_path):
     assert db.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 1
     assert db.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 0
     assert db.shto_event("user2", "MODIFIED", "/tmp/a.txt") == 1
+
+def test_shto_events_batch_verdicts(tmp_path):
+    from src.database import EventRecord
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    batch = [
+        EventRecord("user1", "CREATED", "/tmp/a.txt", 1000.0),
+        EventRecord("user1", "MODIFIED", "/tmp/a.txt", 1001.0),
+        EventRecord("user2", "MODIFIED", "/tmp/a.txt", 1002.0),
+    ]
+    rezultati = db.shto_events(batch)
+    assert [s for _, s in rezultati] == [1, 0, 1]
+    assert len({i for i, _ in rezultati}) == 3
+    assert db.shto_event("user2", "MODIFIED", "/tmp/a.txt") == 0
+
+
+def test_wal_and_concurrent_readers(tmp_path):
+    import threading
+    db = SecurityDatabase(str(tmp_path / "t.db"), pragmas={"busy_timeout": 1000}, read_pool_size=2)
+    with db.lidhjet.writer() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+
+    gabimet = []
+
+    def lexo():
+        try:
+            for _ in range(20):
+                db.statistika()
+                db.merr_suspicious_events(limit=5)
+        except Exception as e:  # pragma: no cover
+            gabimet.append(e)
+
+    threads = [threading.Thread(target=lexo) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(50):
+        db.shto_event("user1", "MODIFIED", f"/tmp/w{i}")
+    for t in threads:
+        t.join()
+
+    assert not gabimet
+    assert db.statistika()["total_events"] == 50
+    db.mbyll()
+
+
+def test_seen_cache_warm_start_avoids_db(tmp_path):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    db.shto_event("user1", "CREATED", "/tmp/a.txt")
+    db.mbyll()
+
+    db = SecurityDatabase(dbfile, cache_lru_size=10, cache_bloom_capacity=1000)
+    assert db.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 0
+    assert db.shto_event("user1", "MODIFIED", "/tmp/b.txt") == 1
+    assert db.shto_event("user1", "MODIFIED", "/tmp/b.txt") == 0
+    stats = db.seen.statistika()
+    assert stats["lru_hits"] == 2
+    assert stats["db_lookups"] <= 1
+    db.mbyll()
+
+
+def test_seen_cache_bloom_negative_is_confirmed_in_db(tmp_path):
+    dbfile = str(tmp_path / "t.db")
+    db1 = SecurityDatabase(dbfile, cache_lru_size=10, cache_bloom_capacity=1000)
+    db2 = SecurityDatabase(dbfile, cache_lru_size=10, cache_bloom_capacity=1000)
+    assert db1.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 1
+    # db2 s'e ka pare ciftin ne cache-in e vet, por DB e ka
+    assert db2.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 0
+    assert db2.seen.statistika()["bloom_negative"] == 1
+    db1.mbyll()
+    db2.mbyll()
+
+
+def test_seen_cache_falls_back_to_db_without_cache(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"), cache_lru_size=0, cache_bloom_capacity=0)
+    assert db.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 1
+    assert db.shto_event("user1", "MODIFIED", "/tmp/a.txt") == 0
+    assert db.seen.statistika()["db_hits"] == 1
+    db.mbyll()
+
+
+def test_migration_backfills_ts_in_chunks(tmp_path):
+    import sqlite3
+    from src.database import SCHEMA_VERSION, intervali_i_dites
+
+    dbfile = str(tmp_path / "old.db")
+    conn = sqlite3.connect(dbfile)
+    conn.execute(
+        "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, data_ora TEXT, perdoruesi TEXT, "
+        "veprimi TEXT, file_path TEXT, suspicious INTEGER)"
+    )
+    conn.executemany(
+        "INSERT INTO events (data_ora, perdoruesi, veprimi, file_path, suspicious) VALUES (?, ?, ?, ?, ?)",
+        [(f"2024-03-0{1 + i % 3} 10:00:00", "u1", "MODIFIED", f"/f{i}", i % 2) for i in range(25)],
+    )
+    conn.commit()
+    conn.close()
+
+    import src.database as database
+    database.BACKFILL_CHUNK = 7
+    try:
+        db = SecurityDatabase(dbfile)
+    finally:
+        database.BACKFILL_CHUNK = 10_000
+
+    with db.lidhjet.reader() as c:
+        assert c.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert c.execute("SELECT COUNT(*) FROM events WHERE ts IS NULL").fetchone()[0] == 0
+        fillim, fund = intervali_i_dites("2024-03-02")
+        assert c.execute("SELECT COUNT(*) FROM events WHERE ts >= ? AND ts < ?", (fillim, fund)).fetchone()[0] == 8
+        plan = " ".join(r[3] for r in c.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM events WHERE suspicious = 1 ORDER BY ts DESC LIMIT 5"))
+        assert "idx_events_suspicious_ts" in plan
+    db.mbyll()
+
+
+def test_rollups_match_raw_events_and_rebuild(tmp_path):
+    from src.database import EventRecord
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    db.shto_events([EventRecord(f"u{i % 3}", "MODIFIED" if i % 2 else "CREATED", f"/f{i % 5}", 1_700_000_000 + i)
+                    for i in range(40)])
+    db.shto_event("u9", "DELETED", "/x")
+
+    inkrementale = db.statistika()
+    with db.lidhjet.reader() as c:
+        ditore = c.execute("SELECT dita, veprimi, numri, suspicious FROM stats_dita_veprimi ORDER BY 1, 2").fetchall()
+        raw = (
+            c.execute("SELECT COUNT(*) FROM events").fetchone()[0],
+            c.execute("SELECT COUNT(*) FROM events WHERE suspicious = 1").fetchone()[0],
+            c.execute("SELECT COUNT(DISTINCT perdoruesi_id) FROM events").fetchone()[0],
+        )
+    assert (inkrementale["total_events"], inkrementale["suspicious_events"], inkrementale["perdorues_aktive"]) == raw
+
+    db.rindertoj_rollups()
+    assert db.statistika() == inkrementale
+    with db.lidhjet.reader() as c:
+        assert c.execute("SELECT dita, veprimi, numri, suspicious FROM stats_dita_veprimi ORDER BY 1, 2").fetchall() == ditore
+    db.mbyll()
+
+
+def test_migration_v5_normalizes_paths_users_and_moved(tmp_path):
+    import sqlite3
+    from src.database import SCHEMA_VERSION
+
+    dbfile = str(tmp_path / "v4.db")
+    conn = sqlite3.connect(dbfile)
+    conn.executescript(
+        """
+        CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, data_ora TEXT, perdoruesi TEXT,
+            veprimi TEXT, file_path TEXT, suspicious INTEGER, numri INTEGER DEFAULT 1, ts INTEGER);
+        CREATE TABLE file_history (id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT, perdoruesi TEXT,
+            sa_here INTEGER DEFAULT 1, UNIQUE(file_path, perdoruesi));
+        INSERT INTO events (data_ora, perdoruesi, veprimi, file_path, suspicious, ts) VALUES
+            ('2024-03-01 10:00:00', 'u1', 'CREATED', '/a', 1, 1709287200),
+            ('2024-03-01 10:01:00', 'u1', 'MOVED', '/a -> /b', 1, 1709287260),
+            ('2024-03-01 10:02:00', 'u2', 'MODIFIED', '/b', 1, 1709287320);
+        INSERT INTO file_history (file_path, perdoruesi, sa_here) VALUES
+            ('/a', 'u1', 1), ('/a -> /b', 'u1', 1), ('/b', 'u2', 1);
+        PRAGMA user_version = 4;
+        """
+    )
+    conn.close()
+
+    db = SecurityDatabase(dbfile)
+    with db.lidhjet.reader() as c:
+        assert c.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert c.execute("SELECT COUNT(*) FROM paths").fetchone()[0] == 2
+        assert c.execute("SELECT COUNT(*) FROM perdoruesit").fetchone()[0] == 2
+        assert c.execute("SELECT sa_here FROM file_history ORDER BY id").fetchall() == [(2,), (1,)]
+        assert c.execute("SELECT COUNT(*) FROM events WHERE dest_path_id IS NOT NULL").fetchone()[0] == 1
+    assert [e[4] for e in db.merr_suspicious_events()] == ["/b", "/a -> /b", "/a"]
+    assert db.statistika() == {"total_events": 3, "suspicious_events": 3, "perdorues_aktive": 2}
+
+    # MOVED ruhet me burim + destinacion; verdikti mbetet per burimin
+    assert db.shto_event("u1", "MODIFIED", "/a") == 0
+    assert db.shto_events([EventRecord("u2", "MOVED", "/b", 1_709_300_000.0, dest_path="/c")])[0][1] == 0
+    assert db.merr_suspicious_events(limit=1)[0][0] == 3
+    assert db.shto_event("u1", "MODIFIED", "/c") == 1
+    db.mbyll()
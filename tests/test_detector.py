@@ -0,0 +1,80 @@
+
+from src.database import ARSYE_E_RE, EventRecord, SecurityDatabase
+from src.detector import (
+    ARSYE_BURST_DOSJA,
+    ARSYE_BURST_PERDORUESI,
+    ARSYE_FSHIRJE,
+    ARSYE_RENAME,
+    ARSYET,
+    BurstDetector,
+    Pragjet,
+)
+from src.raport import RaportGenerator
+from src.writer import EventWriter
+
+
+def _arsyet(det, events):
+    return [det.shiko(ev).arsye for ev in events]
+
+
+def test_burst_per_perdorues_dhe_dosje_nje_here_per_dritare():
+    det = BurstDetector(Pragjet(dritarja=10, perdoruesi=50, dosja=30, max_celesa=100))
+    # 29 events ne /a (nen pragun e dosjes), pastaj 40 te tjera ne dosje te ndryshme
+    events = [EventRecord("ana", "MODIFIED", f"/a/f{i}", 1000 + i * 0.1) for i in range(29)]
+    events += [EventRecord("ana", "MODIFIED", f"/b{i}/f", 1003 + i * 0.1) for i in range(40)]
+    arsyet = _arsyet(det, events)
+    assert arsyet.count(ARSYE_BURST_PERDORUESI) == 1
+    assert arsyet.index(ARSYE_BURST_PERDORUESI) == 49
+    assert ARSYE_BURST_DOSJA not in arsyet
+
+    # pas heshtjes (nje dritare), burst-i qe vazhdon jep gjetje te re
+    vone = [EventRecord("ana", "MODIFIED", f"/a/g{i}", 1013 + i * 0.1) for i in range(60)]
+    arsyet = _arsyet(det, vone)
+    assert ARSYE_BURST_DOSJA in arsyet and ARSYE_BURST_PERDORUESI in arsyet
+
+    # i njejti ritem, por i shperndare ne kohe: asnje gjetje
+    det = BurstDetector(Pragjet(dritarja=10, perdoruesi=50, dosja=30))
+    assert set(_arsyet(det, [EventRecord("ben", "MODIFIED", f"/c/f{i}", 2000 + i) for i in range(200)])) == {None}
+
+
+def test_rename_fshirje_dhe_celesa_te_kufizuar():
+    det = BurstDetector(Pragjet(dritarja=60, perdoruesi=10_000, dosja=10_000, rename=5, fshirje=8, max_celesa=20))
+    renames = [EventRecord("eve", "MOVED", f"/d/f{i}.docx", 100 + i, dest_path=f"/d/f{i}.docx.locked")
+               for i in range(6)]
+    renames.append(EventRecord("eve", "MOVED", "/d/x.tmp", 107, dest_path="/d/x.txt"))
+    assert _arsyet(det, renames) == [None] * 4 + [ARSYE_RENAME, None, None]
+    fshirje = [EventRecord("eve", "DELETED", f"/d/f{i}", 110 + i) for i in range(8)]
+    assert _arsyet(det, fshirje)[-1] == ARSYE_FSHIRJE
+
+    # shume perdorues/dosje te ndryshem: numeruesit mbeten te kufizuar
+    for i in range(500):
+        det.shiko(EventRecord(f"u{i}", "MODIFIED", f"/x{i}/f", 200 + i * 0.01))
+    assert det.celesa() <= 4 * 20
+    # celesat pa aktivitet per nje dritare hiqen
+    det.shiko(EventRecord("vone", "MODIFIED", "/z/f", 1000))
+    assert det.celesa() == 2
+
+
+def test_gjetjet_ruhen_ne_db_dhe_dalin_ne_raport(tmp_path, ts):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    base = ts("2024-05-05 10:00:00")
+    # file-t jane te njohura per perdoruesin: rregulli "hera e pare" nuk sheh asgje
+    db.shto_events([EventRecord("ana", "CREATED", f"/srv/data/f{i}", base - 3600) for i in range(30)])
+
+    w = EventWriter(db, batch_size=7, detektori=BurstDetector(Pragjet(dritarja=60, perdoruesi=1000, dosja=25)))
+    for i in range(30):
+        w.shto("ana", "MODIFIED", f"/srv/data/f{i}", koha=base + i)
+    w.ndalo()
+
+    with db.lidhjet.reader() as c:
+        rreshtat = c.execute("SELECT suspicious, arsye FROM events WHERE ts >= ? ORDER BY id", (int(base),)).fetchall()
+        te_parat = c.execute("SELECT DISTINCT arsye FROM events WHERE ts < ?", (int(base),)).fetchall()
+    assert rreshtat[24] == (1, ARSYE_BURST_DOSJA)
+    assert sum(s for s, _ in rreshtat) == 1
+    assert te_parat == [(ARSYE_E_RE,)]
+    db.mbyll()
+
+    raport = RaportGenerator(dbfile, str(tmp_path / "rep"), cache=False).gjenero_raport_tekst("2024-05-05")
+    assert ARSYET[ARSYE_BURST_DOSJA] in raport
+    assert ARSYET[ARSYE_E_RE] in raport
@@ -0,0 +1,71 @@
+import csv
+import json
+
+import pytest
+
+from src.database import EventRecord, SecurityDatabase
+from src.export import main
+
+
+def _events(ts):
+    # 20 events ne dite, pa rastesi: u2 ben vetem MOVED (ne /tmp)
+    ditet = ("2024-01-10", "2024-02-10", "2024-03-10")
+    return dict(
+        n=60,
+        koha=lambda i: ts(f"{ditet[i // 20]} 10:{i % 20:02d}:00"),
+        perdoruesit=("u0", "u1", "u2"),
+        veprimet=("CREATED", "MODIFIED", "MOVED"),
+        paths=lambda i: f"/home/u{i % 3}/f{i % 5}",
+        dest=lambda i: f"/tmp/d{i}" if i % 3 == 2 else None,
+    )
+
+
+def test_itero_events_filters_and_pages_across_partitions(tmp_path, ts, mbush):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    mbush(db, **_events(ts))
+    te_gjitha = list(db.itero_events(faqja=1000))
+    assert [e.id for e in te_gjitha] == list(range(1, 61))
+    assert te_gjitha[2].dest_path == "/tmp/d2"
+
+    db.particionet.ndaj("month", tani=ts("2024-03-15 00:00:00"))
+    assert list(db.itero_events(faqja=7)) == te_gjitha
+
+    def filtro(**kw):
+        return [e.id for e in db.itero_events(faqja=4, **kw)]
+
+    assert filtro(nga=ts("2024-02-10 00:00:00"), deri=ts("2024-03-01 00:00:00")) == list(range(21, 41))
+    assert filtro(perdoruesi="u1") == [e.id for e in te_gjitha if e.perdoruesi == "u1"]
+    assert filtro(perdoruesi="askush") == []
+    assert filtro(veprimet=["CREATED", "MOVED"]) == [e.id for e in te_gjitha if e.veprimi != "MODIFIED"]
+    assert filtro(prefiksi="/tmp/") == [e.id for e in te_gjitha if e.dest_path]
+    assert filtro(prefiksi="/home/u2/") == filtro(prefiksi="/tmp/")
+    assert filtro(suspicious=True) == [e.id for e in te_gjitha if e.suspicious]
+    assert filtro(suspicious=False, pas_id=50) == [e.id for e in te_gjitha if not e.suspicious and e.id > 50]
+    db.mbyll()
+
+
+def test_cli_incremental_export_with_state_file(tmp_path, capsys, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    mbush(db, **_events(ts))
+    state = str(tmp_path / "export.state")
+    out = str(tmp_path / "a.ndjson")
+
+    main(["--db", dbfile, "--out", out, "--state-file", state, "--user", "u0", "--limit", "5", "--page-size", "2"])
+    rreshtat = [json.loads(l) for l in open(out, encoding="utf-8")]
+    assert [r["id"] for r in rreshtat] == [1, 4, 7, 10, 13]
+    assert rreshtat[0]["perdoruesi"] == "u0" and rreshtat[0]["path"] == "/home/u0/f0"
+
+    # events te reja pas eksportit: vazhdimi merr vetem ato qe mungojne
+    db.shto_events([EventRecord("u0", "DELETED", "/home/u0/x", ts("2024-01-01 00:00:00"))])
+    db.mbyll()
+    out_csv = str(tmp_path / "b.csv")
+    main(["--db", dbfile, "--out", out_csv, "--state-file", state, "--user", "u0", "--format", "csv"])
+    rreshtat = list(csv.DictReader(open(out_csv, encoding="utf-8", newline="")))
+    assert [int(r["id"]) for r in rreshtat] == [i for i in range(14, 61) if (i - 1) % 3 == 0] + [61]
+    assert rreshtat[-1]["veprimi"] == "DELETED" and rreshtat[-1]["dest_path"] == ""
+    assert "token: v1.61." in capsys.readouterr().err
+
+    # token-i nuk pranohet me filtra te tjere
+    with pytest.raises(SystemExit):
+        main(["--db", dbfile, "--out", out, "--state-file", state, "--user", "u1"])
@@ -0,0 +1,67 @@
+import sys
+import time
+
+import pytest
+
+from src.ignore_rules import DEFAULT_RULES, IgnoreRules
+
+
+def test_rules_match_and_count_per_rule():
+    r = IgnoreRules(DEFAULT_RULES + ["suffix:.swp", "*.log", "build/", "/docs/**/*.tmp", "re:/cache-\\d+/"],
+                    root="/home/u/proj")
+    assert r.duhet_injoruar("/home/u/proj/.git/objects/ab")
+    assert r.duhet_injoruar("/home/u/proj/node_modules/x/index.js")
+    assert r.duhet_injoruar("/home/u/proj/security.db-wal")
+    assert r.duhet_injoruar("/home/u/proj/a.txt.swp")
+    assert r.duhet_injoruar("/home/u/proj/sub/app.log")
+    assert r.duhet_injoruar("/home/u/proj/sub/build/out.o")
+    assert r.duhet_injoruar("/home/u/proj/docs/a/b/x.tmp")
+    assert r.duhet_injoruar("/home/u/proj/cache-12/x")
+    assert not r.duhet_injoruar("/home/u/proj/src/x.tmp")
+    assert not r.duhet_injoruar("/home/u/proj/src/main.py")
+    assert not r.duhet_injoruar("/home/u/proj/builder/main.py")
+
+    stats = r.statistika()
+    assert stats["dir:.git"] == 1
+    assert stats["*.log"] == 1
+    assert stats["build/"] == 1
+
+
+def test_dir_excludes_for_pruning():
+    r = IgnoreRules(["dir:.git", "build/"], root="/p")
+    assert r.dir_perjashtuar("/p/.git")
+    assert r.dir_perjashtuar("/p/a/build")
+    assert not r.dir_perjashtuar("/p/src")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify vetem ne Linux")
+def test_pruned_observer_skips_excluded_dirs(tmp_path):
+    from watchdog.events import FileSystemEventHandler
+    from src.observer import krijo_observer
+
+    (tmp_path / "node_modules" / "dep").mkdir(parents=True)
+    (tmp_path / "src").mkdir()
+    r = IgnoreRules(["dir:node_modules"], root=str(tmp_path))
+
+    pare = []
+
+    class H(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if not event.is_directory:
+                pare.append(event.src_path)
+
+    observer = krijo_observer(prune=r.dir_perjashtuar)
+    observer.schedule(H(), str(tmp_path), recursive=True)
+    observer.start()
+    try:
+        (tmp_path / "node_modules" / "dep" / "x.js").write_text("x")
+        (tmp_path / "src" / "a.py").write_text("a")
+        deadline = time.time() + 5
+        while time.time() < deadline and not any(p.endswith("a.py") for p in pare):
+            time.sleep(0.05)
+    finally:
+        observer.stop()
+        observer.join()
+
+    assert any(p.endswith("a.py") for p in pare)
+    assert not any("node_modules" in p for p in pare)
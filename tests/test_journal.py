@@ -0,0 +1,159 @@
+import os
+import threading
+import sqlite3
+
+import pytest
+
+from src.database import EventRecord, SecurityDatabase
+from src.journal import JOURNAL_CURSOR, Journal
+from src.writer import EventWriter
+
+
+def _ev(i):
+    return EventRecord("u1", "CREATED", f"/tmp/j{i}", 1.7e9 + i, 1, None)
+
+
+def test_journal_read_confirm_and_torn_tail(tmp_path):
+    d = str(tmp_path / "j")
+    j = Journal(d, fsync_batch=2, segment_bytes=200)
+    assert j.hap() == 0
+    assert j.shto([_ev(i) for i in range(5)]) == 5
+    assert j.shto([_ev(5)]) == 6
+
+    rekordet = j.lexo(4)
+    assert [s for s, _ in rekordet] == [1, 2, 3, 4]
+    assert j.lexo(4)[0][0] == 1  # lexo nuk avancon pa konfirmim
+    j.konfirmo(4)
+    assert j.ne_pritje == 2
+    with pytest.raises(ValueError):
+        j.konfirmo(6)
+    j.mbyll()
+
+    # shkrim i nderprere ne mes te rekordit te fundit
+    segmentet = sorted(os.listdir(d))
+    with open(os.path.join(d, segmentet[-1]), "ab") as f:
+        f.write(b"\x10\x00\x00\x00gjysme")
+
+    j = Journal(d, segment_bytes=200)
+    assert j.hap(aplikuar_deri=4) == 2
+    rekordet = j.lexo(10)
+    assert [ev.file_path for _, ev in rekordet] == ["/tmp/j4", "/tmp/j5"]
+    j.konfirmo(6)
+    assert j.ne_pritje == 0
+    assert os.listdir(d) == []
+    # pas bishtit te prere, seq-et vazhdojne pa kolizion
+    assert j.shto([_ev(6)]) == 7
+    j.mbyll()
+
+
+def test_replay_is_exactly_once_after_restart(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    d = str(tmp_path / "j")
+    j = Journal(d)
+    j.hap()
+    j.shto([_ev(i) for i in range(10)])
+    # "crash" pasi 4 events u aplikuan bashke me cursor-in
+    rekordet = j.lexo(4)
+    db.shto_events([ev for _, ev in rekordet], cursor=(JOURNAL_CURSOR, rekordet[-1][0]))
+    j.mbyll()
+
+    writer = EventWriter(db, batch_size=3, journal=Journal(d)).start()
+    assert writer.flush(timeout=5)
+    writer.ndalo()
+    assert db.statistika()["total_events"] == 10
+    assert db.merr_cursor(JOURNAL_CURSOR) == 10
+    assert writer.riluajtur == 6
+    db.mbyll()
+
+
+def test_writer_spills_while_db_is_locked(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    origjinali = db.shto_events
+    bllokuar = [True]
+
+    def shto_events(events, cursor=None):
+        if bllokuar[0]:
+            raise sqlite3.OperationalError("database is locked")
+        return origjinali(events, cursor=cursor)
+
+    db.shto_events = shto_events
+    verdiktet = []
+    writer = EventWriter(db, batch_size=10, flush_interval=0.01, journal=Journal(str(tmp_path / "j")),
+                         on_verdict=lambda ev, i, s: verdiktet.append(ev.file_path)).start()
+    for i in range(30):
+        writer.shto("u1", "CREATED", f"/tmp/l{i}", koha=1.7e9 + i)
+    assert not writer.flush(timeout=0.5)
+    assert writer.ne_journal() > 0
+
+    bllokuar[0] = False
+    assert writer.flush(timeout=10)
+    writer.ndalo()
+    assert writer.ne_journal() == 0
+    assert verdiktet == [f"/tmp/l{i}" for i in range(30)]
+    assert db.statistika()["total_events"] == 30
+    db.mbyll()
+
+
+def test_backpressure_policies_on_full_queue(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    # pa thread: radha mbushet
+    writer = EventWriter(db, max_queue=5, politika="drop-oldest")
+    for i in range(8):
+        writer.shto("u1", "CREATED", f"/tmp/d{i}")
+    assert writer.hedhur == 3
+    writer.ndalo()
+    assert db.statistika()["total_events"] == 5
+
+    with pytest.raises(ValueError):
+        EventWriter(db, politika="spill")
+
+    verdiktet = []
+    writer = EventWriter(db, max_queue=5, politika="spill", journal=Journal(str(tmp_path / "j")),
+                         on_verdict=lambda ev, i, s: verdiktet.append(ev.file_path))
+    for i in range(12):
+        writer.shto("u1", "CREATED", f"/tmp/s{i}")
+    assert writer.spill == 7
+    writer.ndalo()
+    # radha (me e vjeter) shkruhet para journal-it
+    assert verdiktet == [f"/tmp/s{i}" for i in range(12)]
+    assert db.statistika()["total_events"] == 17
+    db.mbyll()
+
+
+def test_enqueue_does_not_race_switch_to_journal(tmp_path):
+    # writer-i kalon ne journal (DB e bllokuar) pikerisht kur shto() po fut nje event
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    origjinali = db.shto_events
+    bllokuar = [True]
+
+    def shto_events(events, cursor=None):
+        if bllokuar[0]:
+            raise sqlite3.OperationalError("database is locked")
+        return origjinali(events, cursor=cursor)
+
+    db.shto_events = shto_events
+    verdiktet = []
+    writer = EventWriter(db, journal=Journal(str(tmp_path / "j")),
+                         on_verdict=lambda ev, i, s: verdiktet.append(ev.file_path))
+    writer.shto("u1", "CREATED", "/tmp/r0", koha=1.7e9)
+
+    put = writer._queue.put
+    # _shkruaj deshton ne nje thread tjeter dhe zbraz radhen ne journal
+    t = threading.Thread(target=writer._shkruaj, args=([_ev(1)],))
+
+    def put_me_nderhyrje(item, *args, **kwargs):
+        t.start()
+        t.join(0.2)
+        put(item, *args, **kwargs)
+
+    writer._queue.put = put_me_nderhyrje
+    writer.shto("u1", "CREATED", "/tmp/r2", koha=1.7e9 + 2)
+    writer._queue.put = put
+    t.join()
+    # eventi i ri u zbraz bashke me radhen, pas events me te vjetra
+    assert writer.madhesia_radhes() == 0 and writer.ne_journal() == 3
+
+    bllokuar[0] = False
+    writer.ndalo()
+    assert verdiktet == ["/tmp/j1", "/tmp/r0", "/tmp/r2"]
+    db.mbyll()
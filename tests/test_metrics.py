@@ -0,0 +1,95 @@
+import urllib.request
+
+import pytest
+
+from src.metrics import METRIKAT, Eksportuesi, LogKufizues, Profiler, Regjistri, shkruaj_textfile
+
+
+def test_prometheus_exposition():
+    r = Regjistri()
+    c = r.counter("x_total", "Numerues", ("root",))
+    c.inc(root="/home")
+    c.inc(2, root="/home")
+    r.gauge("radha", "Radha").funksion(lambda: 7)
+    h = r.histogram("koha_seconds", "Koha", buckets=(0.1, 1.0))
+    h.observe(0.05)
+    h.observe(0.5)
+    h.observe(3)
+
+    teksti = r.eksporto()
+    assert "# TYPE x_total counter" in teksti
+    assert 'x_total{root="/home"} 3' in teksti
+    assert "radha 7" in teksti
+    assert 'koha_seconds_bucket{le="0.1"} 1' in teksti
+    assert 'koha_seconds_bucket{le="1"} 2' in teksti
+    assert 'koha_seconds_bucket{le="+Inf"} 3' in teksti
+    assert "koha_seconds_count 3" in teksti
+    assert h.vlera() == (3, 3.55)
+
+    with pytest.raises(ValueError):
+        c.inc()
+    with pytest.raises(ValueError):
+        r.gauge("x_total", "tjeter tip")
+
+
+def test_log_limiter_sample_and_rate():
+    r = Regjistri()
+    k = LogKufizues(sample=10, regjistri=r)
+    lejuar = sum(k.lejo() for _ in range(100))
+    assert lejuar == 10
+    # suspicious nuk mostrohen
+    assert all(k.lejo(suspicious=True) for _ in range(5))
+    assert r.counter("si_log_shtypur_total", "").vlera() == 90
+
+    k.konfiguro(sample=1, rate=3)
+    assert sum(k.lejo(suspicious=True) for _ in range(10)) == 3
+
+
+def test_profiler_samples_one_in_n():
+    p = Profiler(Regjistri())
+    with p.profil("filter"):
+        pass
+    assert p.permbledhje() == {}
+
+    p.konfiguro(True, cdo=4)
+    for _ in range(20):
+        with p.profil("filter"):
+            pass
+    assert p.permbledhje()["filter"]["mostra"] == 5
+
+
+def test_exporter_http_and_textfile(tmp_path):
+    r = Regjistri()
+    r.counter("si_test_total", "Test").inc(5)
+    path = str(tmp_path / "si.prom")
+    e = Eksportuesi(r, textfile=path, http="127.0.0.1:0", interval=60).start()
+    try:
+        host, port = e.adresa
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain")
+            assert "si_test_total 5" in resp.read().decode()
+    finally:
+        e.ndalo()
+    with open(path, encoding="utf-8") as f:
+        assert "si_test_total 5" in f.read()
+
+
+def test_writer_and_db_metrics(tmp_path):
+    from src.database import SecurityDatabase
+    from src.writer import EventWriter
+
+    events = METRIKAT.counter("si_db_events_total", "")
+    batches = METRIKAT.histogram("si_writer_batch_seconds", "")
+    para_events, para_batches = events.vlera(), batches.vlera()[0]
+
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    writer = EventWriter(db, batch_size=10, flush_interval=5.0).start()
+    for i in range(25):
+        writer.shto("u1", "CREATED", f"/tmp/m{i}")
+    writer.ndalo()
+    db.mbyll()
+
+    assert events.vlera() - para_events == 25
+    assert batches.vlera()[0] - para_batches == 3
+    shkruaj_textfile(str(tmp_path / "a.prom"))
+    assert "si_event_vonesa_seconds_bucket" in (tmp_path / "a.prom").read_text()
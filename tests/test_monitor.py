@@ -0,0 +1,76 @@
+import pytest
+
+from src.monitor import EventCoalescer, parse_coalesce_rules
+
+
+def _coalescer(**kw):
+    dalje = []
+    c = EventCoalescer(lambda *a: dalje.append(a), **kw)
+    return c, dalje
+
+
+def test_coalesce_created_then_modified():
+    c, dalje = _coalescer(window=1.0)
+    c.shto("u1", "CREATED", "/tmp/a", 10.0)
+    c.shto("u1", "MODIFIED", "/tmp/a", 10.1)
+    c.shto("u1", "MODIFIED", "/tmp/a", 10.2)
+    assert dalje == []
+    c.flush()
+    assert dalje == [("u1", "CREATED", "/tmp/a", 10.0, 3)]
+
+
+def test_coalesce_keeps_order_for_unmergeable_action():
+    c, dalje = _coalescer(window=1.0, rules=["modified"])
+    c.shto("u1", "CREATED", "/tmp/a", 10.0)
+    c.shto("u1", "MODIFIED", "/tmp/a", 10.1)
+    c.shto("u1", "MODIFIED", "/tmp/a", 10.2)
+    c.shto("u1", "DELETED", "/tmp/a", 10.3)
+    assert [(d[1], d[4]) for d in dalje] == [("CREATED", 1), ("MODIFIED", 2), ("DELETED", 1)]
+
+
+def test_coalesce_flush_only_expired():
+    c, dalje = _coalescer(window=1.0)
+    c.shto("u1", "MODIFIED", "/tmp/a", 10.0)
+    c.shto("u1", "MODIFIED", "/tmp/b", 12.0)
+    assert c.flush(deri=11.0) == 1
+    assert dalje == [("u1", "MODIFIED", "/tmp/a", 10.0, 1)]
+
+
+def test_parse_coalesce_rules_rejects_unknown():
+    assert parse_coalesce_rules("created+modified, modified") == ["created+modified", "modified"]
+    with pytest.raises(ValueError):
+        parse_coalesce_rules("deleted")
+
+
+def test_multi_root_workers_share_one_writer(tmp_path):
+    from watchdog.events import FileCreatedEvent, FileModifiedEvent
+
+    from src.config import RootConfig
+    from src.database import SecurityDatabase
+    from src.monitor import krijo_root
+    from src.writer import EventWriter
+
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    writer = EventWriter(db, batch_size=10, flush_interval=0.05).start()
+    workers = []
+    for emri, rregulla in (("home", ["*.pyc"]), ("etc", [])):
+        (tmp_path / emri).mkdir()
+        root = RootConfig(emri, str(tmp_path / emri), True, [], rregulla, True, "process", None, 0.0, [])
+        workers.append(krijo_root(root, db, writer, dbfile, max_queue=100).start())
+    home, etc = workers
+
+    for i in range(5):
+        home.dispatch(FileModifiedEvent(str(tmp_path / "home" / f"f{i}.txt")))
+        home.dispatch(FileModifiedEvent(str(tmp_path / "home" / f"f{i}.pyc")))
+    etc.dispatch(FileCreatedEvent(str(tmp_path / "etc" / "passwd")))
+
+    for w in workers:
+        w.ndalo()
+    writer.ndalo()
+
+    assert db.statistika()["total_events"] == 6
+    s_home, s_etc = home.statistika(), etc.statistika()
+    assert (s_home["marre"], s_home["pranuar"], s_home["injoruar"]) == (10, 5, 5)
+    assert (s_etc["marre"], s_etc["pranuar"], s_etc["injoruar"]) == (1, 1, 0)
+    db.mbyll()
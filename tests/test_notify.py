@@ -0,0 +1,72 @@
+import threading
+import time
+
+from src.database import EventRecord, SecurityDatabase
+from src.notify import DegjuesUnix, KanalLokal, PublikuesUnix
+from src.scheduler import CURSOR_SUSPICIOUS, Scheduler
+
+
+class _Alerts:
+    def __init__(self):
+        self.derguar = []
+
+    def dergo_alarm_suspicious(self, events):
+        self.derguar.append([e[0] for e in events])
+        return True
+
+
+def test_unix_socket_push_and_heartbeat(tmp_path):
+    path = str(tmp_path / "s.notify")
+    pa_degjues = PublikuesUnix(path)
+    pa_degjues.publiko(3)  # scheduler-i s'eshte nisur: hidhet pa gabim
+    pa_degjues.mbyll()
+
+    degjuesi = DegjuesUnix(path).start()
+    publikuesi = PublikuesUnix(path)
+    try:
+        assert not degjuesi.aktiv()
+        publikuesi.publiko(7)
+        assert degjuesi.prit(timeout=2)
+        assert degjuesi.max_id == 7 and degjuesi.aktiv()
+        # heartbeat pa id te re: kanali aktiv, por pa zgjim
+        publikuesi.heartbeat(detyrueshem=True)
+        assert not degjuesi.prit(timeout=0.2)
+    finally:
+        publikuesi.mbyll()
+        degjuesi.ndalo()
+
+
+def test_scheduler_consumes_push_with_subsecond_latency(tmp_path):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    db.shto_event("u1", "CREATED", "/f0")
+    kanali = KanalLokal()
+    s = Scheduler(dbfile, str(tmp_path / "rep"), "admin@example.com", njoftimet=kanali)
+    s.alert_system = _Alerts()
+    s.kontrollo_periodik()  # kanali s'ka folur ende: fallback ne DB
+    assert s.alert_system.derguar == [[1]]
+
+    kanali.heartbeat()
+    marre = threading.Event()
+
+    def loop():
+        if kanali.prit(timeout=5):
+            s._pas_njoftimit()
+            marre.set()
+
+    t = threading.Thread(target=loop)
+    t.start()
+    fillim = time.monotonic()
+    ((event_id, _),) = db.shto_events([EventRecord("u2", "CREATED", "/f1", time.time())])
+    kanali.publiko(event_id)
+    assert marre.wait(5)
+    t.join()
+    assert time.monotonic() - fillim < 1.0
+    assert s.alert_system.derguar == [[1], [2]]
+    assert s.db.merr_cursor(CURSOR_SUSPICIOUS) == 2
+
+    # kanali aktiv: polling-u periodik nuk lexon DB
+    db.shto_event("u3", "CREATED", "/f2")
+    s.kontrollo_periodik()
+    assert len(s.alert_system.derguar) == 2
+    db.mbyll()
@@ -0,0 +1,55 @@
+import os
+
+from src.database import SecurityDatabase
+from src.raport import RaportGenerator
+
+
+def test_partition_move_route_and_archive(tmp_path, monkeypatch, ts, mbush):
+    import src.partitions as partitions
+    monkeypatch.setattr(partitions, "MOVE_CHUNK", 3)
+
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    ditet = ("2024-01-10", "2024-02-10", "2024-03-10")
+    mbush(db, 21, koha=lambda i: ts(f"{ditet[i // 7]} 10:0{i % 7}:00"), perdoruesit=lambda i: f"u{i % 7 % 2}",
+          veprimet=("MODIFIED",), paths=lambda i: f"/{ditet[i // 7]}/f{i % 7 % 4}")
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"), lidhjet=db.lidhjet, particionet=db.particionet)
+    para = gen.gjenero_raport_tekst("2024-01-10").rsplit("\n", 1)[0]
+    stats_para = db.statistika()
+
+    te_ndara = db.particionet.ndaj("month", tani=ts("2024-03-15 00:00:00"))
+    assert te_ndara == ["2024-01", "2024-02"]
+    with db.lidhjet.reader() as c:
+        assert c.execute("SELECT COUNT(*) FROM events").fetchone()[0] == 7
+
+    # queries shkojne transparent ne particion
+    assert gen.gjenero_raport_tekst("2024-01-10").rsplit("\n", 1)[0] == para
+    assert len(db.merr_suspicious_events(limit=100)) == stats_para["suspicious_events"]
+    assert [e[0] for e in db.merr_suspicious_pas(0, limit=100)] == sorted(
+        e[0] for e in db.merr_suspicious_events(limit=100))
+    assert db.rindertoj_rollups() == {
+        "total_events": stats_para["total_events"],
+        "suspicious_events": stats_para["suspicious_events"],
+        "perdorues_aktive": stats_para["perdorues_aktive"],
+    }
+
+    arkivuar = db.particionet.zbato_retention(1, tani=ts("2024-03-15 00:00:00"))
+    assert arkivuar == ["2024-01"]
+    assert not os.path.exists(db.particionet._path_per("2024-01"))
+    raport = gen.gjenero_raport_tekst("2024-01-10")
+    assert "jane arkivuar" in raport
+    # totalet (rollups) tregojne suspicious, detajet mungojne: raporti nuk thote qe s'ka
+    p = gen.merr_permbledhjen("2024-01-10")
+    assert p["total_suspicious"] > 0 and p["suspicious_detaje"] == []
+    assert "NUK KA AKTIVITETE SUSPICIOUS" not in raport
+    assert f"{p['total_suspicious']} aktivitete suspicious; events jane arkivuar" in raport
+    assert db.statistika() == stats_para
+    # rindertimi nuk i humb ditet e arkivuara
+    with db.lidhjet.reader() as c:
+        dite_para = c.execute("SELECT * FROM stats_dita_perdoruesi ORDER BY 1, 2").fetchall()
+    db.rindertoj_rollups()
+    assert db.statistika() == stats_para
+    assert gen.merr_permbledhjen("2024-01-10") == p
+    with db.lidhjet.reader() as c:
+        assert c.execute("SELECT * FROM stats_dita_perdoruesi ORDER BY 1, 2").fetchall() == dite_para
+    db.mbyll()
@@ -0,0 +1,93 @@
+import io
+import sqlite3
+
+import src.database as database
+from src.database import SCHEMA_VERSION, SecurityDatabase
+from src.dimensions import dosja_e
+from src.query import kerko, kohezgjatja
+
+
+def _events(ts, n=900):
+    # dosje me prefiks te perbashket (config / configx) dhe MOVED brenda config-ut
+    ditet = ("2024-01-10", "2024-02-10", "2024-03-10")
+    dosjet = ("/srv/app/config", "/srv/app/configx", "/srv/app/config/tls", "/srv/log", "/etc")
+    return dict(
+        n=n,
+        koha=lambda i: ts(f"{ditet[i * 3 // n]} 10:00:00") + i % 17,
+        veprimet=("MODIFIED",),
+        paths=[f"{d}/f{k}" for d in dosjet for k in range(4)],
+        dest=lambda i: f"/srv/app/config/{i}.bak" if i % 11 == 0 else None,
+        seed=5,
+    )
+
+
+def _prit(te_gjitha, dosja, nga=None, perdoruesi=None):
+    def nen(p):
+        return p is not None and p.startswith(dosja + "/")
+
+    rreshtat = [e for e in te_gjitha if (nen(e.path) or nen(e.dest_path))
+                and (nga is None or e.ts >= nga) and (perdoruesi is None or e.perdoruesi == perdoruesi)]
+    return [e.id for e in sorted(rreshtat, key=lambda e: (e.ts, e.id), reverse=True)]
+
+
+def test_nen_dosje_merge_scan_and_partitions(tmp_path, monkeypatch, ts, mbush):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    mbush(db, **_events(ts))
+    te_gjitha = list(db.itero_events())
+    db.particionet.ndaj("month", tani=ts("2024-03-15 00:00:00"))
+    nga = ts("2024-02-10 10:00:05")
+
+    def kerko_ids(dosja, **kw):
+        return [e.id for e in db.itero_nen_dosje(dosja, faqja=7, **kw)]
+
+    for merge_max in (64, 1):
+        monkeypatch.setattr(database, "DOSJE_MERGE_MAX", merge_max)
+        assert kerko_ids("/srv/app/config/") == _prit(te_gjitha, "/srv/app/config")
+        assert kerko_ids("/srv/app/config", nga=nga, perdoruesi="ben") == \
+            _prit(te_gjitha, "/srv/app/config", nga=nga, perdoruesi="ben")
+        assert kerko_ids("/") == _prit(te_gjitha, "")
+        asc = [e.id for e in db.itero_nen_dosje("/srv", rend="asc", faqja=5)]
+        assert asc == list(reversed(_prit(te_gjitha, "/srv")))
+    assert kerko_ids("/nuk/ekziston") == []
+    assert kerko_ids("/srv", perdoruesi="askush") == []
+
+    out = io.StringIO()
+    assert kerko(db, out, "/srv/app/config/tls", limit=3) == 3
+    assert out.getvalue().count("/srv/app/config/tls/") == 3
+    assert kohezgjatja("6h") == 6 * 3600
+    db.mbyll()
+
+
+def test_migration_v6_backfills_dirs(tmp_path, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    mbush(db, **_events(ts, n=120))
+    db.mbyll()
+    with sqlite3.connect(dbfile) as c:
+        c.executescript(
+            """
+            DROP INDEX idx_events_dir_ts;
+            DROP INDEX idx_events_dest_dir_ts;
+            UPDATE events SET dir_id = NULL, dest_dir_id = NULL;
+            DELETE FROM dirs;
+            PRAGMA user_version = 5;
+            """
+        )
+
+    db = SecurityDatabase(dbfile)
+    with db.lidhjet.reader() as c:
+        assert c.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        rreshtat = c.execute(
+            """
+            SELECT p.path, dp.path, d.path, dd.path FROM events e
+            JOIN paths p ON p.id = e.path_id LEFT JOIN paths dp ON dp.id = e.dest_path_id
+            JOIN dirs d ON d.id = e.dir_id LEFT JOIN dirs dd ON dd.id = e.dest_dir_id
+            """
+        ).fetchall()
+        prindi = dict(c.execute("SELECT d.path, p.path FROM dirs d LEFT JOIN dirs p ON p.id = d.prind_id"))
+    assert len(rreshtat) == 120
+    for path, dest, dir_, dest_dir in rreshtat:
+        assert dir_ == dosja_e(path)
+        assert dest_dir == (None if dest is None else dosja_e(dest))
+    assert prindi["/srv/app/config/tls"] == "/srv/app/config" and prindi["/"] is None
+    db.mbyll()
@@ -0,0 +1,133 @@
+import random
+from collections import Counter
+from datetime import datetime
+
+from src.database import EVENT_KOLONAT_ARSYE, EventRecord, SecurityDatabase, event_burimi
+from src.raport import RaportGenerator, ditet_e_intervalit, intervali_i_javes, intervali_i_muajit
+
+
+def _mbush(mbush, ts, dbfile, n=800):
+    # nje dite, nje event ne minute
+    db = SecurityDatabase(dbfile)
+    base = ts("2024-05-05 00:00:00")
+    mbush(db, n, koha=lambda i: base + i * 60, perdoruesit=("ana", "ben", "cel", "dea"),
+          veprimet=("CREATED", "MODIFIED", "DELETED", "MOVED"), paths=[f"/home/x/f{k}" for k in range(31)], seed=7)
+    db.mbyll()
+
+
+def test_permbledhja_matches_in_memory_counters(tmp_path, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    _mbush(mbush, ts, dbfile)
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"))
+
+    events, suspicious = gen.merr_te_dhenat("2024-05-05")
+    p = gen.merr_permbledhjen("2024-05-05")
+
+    assert p["total_events"] == len(events)
+    assert p["total_suspicious"] == len(suspicious)
+    assert p["perdorues_aktive"] == len({e[2] for e in events})
+    assert p["veprimet"] == dict(Counter(e[3] for e in events))
+    assert p["top_perdorues"] == Counter(e[2] for e in events).most_common(5)
+    assert p["top_files"] == Counter(e[4] for e in events).most_common(5)
+    assert p["suspicious_detaje"] == suspicious[:10]
+
+
+def test_raport_per_dite_pa_te_dhena(tmp_path, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    _mbush(mbush, ts, dbfile, n=5)
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"))
+    assert gen.gjenero_raport_tekst("2020-01-01") == "Nuk ka te dhena per daten 2020-01-01"
+    assert "RAPORTI DITOR I SIGURISE" in gen.gjenero_raport_tekst("2024-05-05")
+
+
+def test_barazimet_ne_te_njejten_sekonde_si_raporti_origjinal(tmp_path, ts):
+    # shume events ne te njejten sekonde: renditja duhet te jete ajo e raportit
+    # origjinal ("ORDER BY data_ora DESC" mbi rreshtat sipas id, pastaj most_common)
+    random.seed(11)
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    base = ts("2024-05-05 10:00:00")
+    perdoruesit = [f"u{i}" for i in range(8)]
+    events = []
+    for sek in range(6):
+        random.shuffle(perdoruesit)
+        for j, u in enumerate(perdoruesit):
+            events.append(EventRecord(u, "MODIFIED", f"/srv/f{(j + sek) % 7}", base + sek))
+    db.shto_events(events)
+    gen = RaportGenerator(db.db_name, str(tmp_path / "rep"), lidhjet=db.lidhjet, particionet=db.particionet)
+
+    with db.lidhjet.reader() as c:
+        rreshtat = c.execute(f"SELECT {EVENT_KOLONAT_ARSYE} FROM {event_burimi('main.events')} ORDER BY e.id").fetchall()
+    origjinali = sorted(rreshtat, key=lambda e: e[1], reverse=True)
+    p = gen.merr_permbledhjen("2024-05-05")
+
+    assert gen.merr_te_dhenat("2024-05-05")[0] == origjinali
+    assert p["top_perdorues"] == Counter(e[2] for e in origjinali).most_common(5)
+    assert p["top_files"] == Counter(e[4] for e in origjinali).most_common(5)
+    assert p["suspicious_detaje"] == [e for e in origjinali if e[5]][:10]
+    pi = gen.merr_permbledhjen_interval("2024-05-05", "2024-05-05")
+    assert (pi["top_perdorues"], pi["top_files"], pi["suspicious_detaje"]) == (
+        p["top_perdorues"], p["top_files"], p["suspicious_detaje"])
+    db.mbyll()
+
+
+def _mbush_dite(mbush, ts, dbfile, n=600):
+    # tri dite (2024-05-05..07), nje event cdo 400 sekonda
+    db = SecurityDatabase(dbfile)
+    base = ts("2024-05-05 00:00:00")
+    mbush(db, n, koha=lambda i: base + i * 400, perdoruesit=("ana", "ben", "cel"),
+          paths=[f"/home/x/f{k}" for k in range(21)], seed=3)
+    return db
+
+
+def test_agregati_i_intervalit_perputhet_me_ditet(tmp_path, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    _mbush_dite(mbush, ts, dbfile).mbyll()
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"))
+
+    events = []
+    for data in ditet_e_intervalit("2024-05-05", "2024-05-08"):
+        events += gen.merr_te_dhenat(data)[0]
+    # si raporti origjinal: data_ora DESC, id ASC brenda sekondes
+    events.sort(key=lambda e: e[0])
+    events.sort(key=lambda e: e[1], reverse=True)
+    p = gen.merr_permbledhjen_interval("2024-05-05", "2024-05-08")
+
+    assert p["total_events"] == len(events) == 600
+    assert [d for d, _, _ in p["ditet"]] == ["2024-05-05", "2024-05-06", "2024-05-07"]
+    assert p["perdorues_aktive"] == 3
+    assert p["top_perdorues"] == Counter(e[2] for e in events).most_common(5)
+    assert p["top_files"] == Counter(e[4] for e in events).most_common(5)
+    assert p["suspicious_detaje"] == [e for e in events if e[5]][:10]
+    assert intervali_i_javes("2024-W19") == ("2024-05-06", "2024-05-12")
+    assert intervali_i_muajit("2024-02") == ("2024-02-01", "2024-02-29")
+
+
+def test_cache_per_dite_te_mbyllura(tmp_path, monkeypatch, ts, mbush):
+    dbfile = str(tmp_path / "t.db")
+    db = _mbush_dite(mbush, ts, dbfile)
+    gen = RaportGenerator(dbfile, str(tmp_path / "rep"))
+
+    ditet = gen.gjenero_ditet("2024-05-05", "2024-05-08", jobs=2)
+    assert [c for _, _, c in ditet] == [False] * 4
+    agregati = gen.gjenero_raport_agregat("2024-05-05", "2024-05-08")
+
+    def pa_llogaritje(*a):
+        raise AssertionError("duhej lexuar nga cache")
+
+    monkeypatch.setattr(gen, "merr_permbledhjen", pa_llogaritje)
+    monkeypatch.setattr(gen, "merr_permbledhjen_interval", pa_llogaritje)
+    assert [c for _, _, c in gen.gjenero_ditet("2024-05-05", "2024-05-08", jobs=2)] == [True] * 4
+    assert gen.gjenero_raport_agregat("2024-05-05", "2024-05-08") == agregati
+    monkeypatch.undo()
+
+    # event i vonuar per nje dite te mbyllur: vetem ajo dite (dhe agregati) rillogaritet
+    base = ts("2024-05-06 12:00:00")
+    db.shto_events([EventRecord("dea", "CREATED", "/home/x/vonuar", base)])
+    db.mbyll()
+    assert [c for _, _, c in gen.gjenero_ditet("2024-05-05", "2024-05-08")] == [True, False, True, True]
+    assert "dea" in gen.gjenero_raport_tekst("2024-05-06")
+    assert gen.gjenero_raport_agregat("2024-05-05", "2024-05-08") != agregati
+
+    # sot nuk ruhet kurre ne cache
+    sot = datetime.now().strftime("%Y-%m-%d")
+    assert gen.watermarks(sot, sot) == {sot: None}
@@ -0,0 +1,65 @@
+from src.database import SecurityDatabase
+from src.scheduler import CURSOR_SUSPICIOUS, Scheduler
+
+
+class _Alerts:
+    def __init__(self):
+        self.derguar = []
+
+    def dergo_alarm_suspicious(self, events):
+        self.derguar.append([e[0] for e in events])
+        return True
+
+
+def test_incremental_check_alerts_each_event_once(tmp_path):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    for i in range(5):
+        db.shto_event("u1", "CREATED", f"/f{i}")
+
+    s = Scheduler(dbfile, str(tmp_path / "rep"), "admin@example.com")
+    s.page_size = 2
+    s.alert_system = _Alerts()
+
+    s.kontrollo_suspicious_events()
+    # hera e pare: vetem page_size me te fundit, si me pare
+    assert s.alert_system.derguar == [[4, 5]]
+
+    s.kontrollo_suspicious_events()
+    assert len(s.alert_system.derguar) == 1
+
+    db.shto_event("u1", "MODIFIED", "/f0")  # jo suspicious
+    db.shto_event("u2", "MODIFIED", "/f0")
+    db.shto_event("u3", "MODIFIED", "/f0")
+    db.shto_event("u4", "MODIFIED", "/f0")
+    s.kontrollo_suspicious_events()
+    assert s.alert_system.derguar[1:] == [[7, 8], [9]]
+    assert s.db.merr_cursor(CURSOR_SUSPICIOUS) == 9
+    db.mbyll()
+
+
+def test_cursor_stays_when_alert_queue_is_full(tmp_path):
+    dbfile = str(tmp_path / "t.db")
+    db = SecurityDatabase(dbfile)
+    for i in range(3):
+        db.shto_event("u1", "CREATED", f"/f{i}")
+
+    class _Plot(_Alerts):
+        plot = True
+
+        def dergo_alarm_suspicious(self, events):
+            if self.plot:
+                return False
+            return super().dergo_alarm_suspicious(events)
+
+    s = Scheduler(dbfile, str(tmp_path / "rep"), "admin@example.com")
+    s.alert_system = _Plot()
+    s.db.vendos_cursor(CURSOR_SUSPICIOUS, 0)
+    s.kontrollo_suspicious_events()
+    assert s.db.merr_cursor(CURSOR_SUSPICIOUS) == 0
+
+    s.alert_system.plot = False
+    s.kontrollo_suspicious_events()
+    assert s.alert_system.derguar == [[1, 2, 3]]
+    assert s.db.merr_cursor(CURSOR_SUSPICIOUS) == 3
+    db.mbyll()
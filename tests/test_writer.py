@@ -0,0 +1,27 @@
+from src.database import SecurityDatabase
+from src.writer import EventWriter
+
+
+def test_writer_batches_and_reports_verdicts(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    verdiktet = []
+    writer = EventWriter(db, batch_size=50, flush_interval=5.0,
+                         on_verdict=lambda ev, i, s: verdiktet.append((ev.file_path, s)))
+    writer.start()
+    for i in range(120):
+        writer.shto("user1", "MODIFIED", f"/tmp/f{i % 10}")
+    assert writer.flush(timeout=5)
+
+    assert len(verdiktet) == 120
+    assert sum(s for _, s in verdiktet) == 10
+    assert writer.batches_shkruar >= 3
+    writer.ndalo()
+
+
+def test_writer_flushes_on_stop(tmp_path):
+    db = SecurityDatabase(str(tmp_path / "t.db"))
+    writer = EventWriter(db, batch_size=1000, flush_interval=60.0).start()
+    for i in range(25):
+        writer.shto("user1", "CREATED", f"/tmp/g{i}")
+    writer.ndalo(timeout=5)
+    assert db.statistika()["total_events"] == 25